@@ -1,15 +1,18 @@
 """
-MCP Server implementation for ChEMBL using chembl_webresource_client.
+MCP Server implementation for ChEMBL using the ChEMBL REST API.
 """
 
 from typing import Any, List, Dict, Optional
-from mcp.server.fastmcp import FastMCP
+from .utils.metrics import InstrumentedFastMCP
+from .utils.warmup import warmup_lifespan
 
-# Initialize FastMCP server with proper configuration
-mcp = FastMCP(
+# Initialize FastMCP server with proper configuration; every tool is timed and counted,
+# and the cache warm-up (if configured) starts in the background with the first session
+mcp = InstrumentedFastMCP(
     name="chembl",
     description="MCP server for accessing ChEMBL database",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=warmup_lifespan
 )
 
 # Import module registration functions
@@ -18,6 +21,9 @@ from .targets import register_target_tools
 from .assays import register_assay_tools
 from .activities import register_activity_tools
 from .documents import register_document_tools
+from .profiles import register_profile_tools
+from .analytics import register_analytics_tools
+from .admin import register_admin_tools
 
 # Register all tools with the MCP server
 molecule_tools = register_molecule_tools(mcp)
@@ -25,6 +31,9 @@ target_tools = register_target_tools(mcp)
 assay_tools = register_assay_tools(mcp)
 activity_tools = register_activity_tools(mcp)
 document_tools = register_document_tools(mcp)
+profile_tools = register_profile_tools(mcp)
+analytics_tools = register_analytics_tools(mcp)
+admin_tools = register_admin_tools(mcp)
 
 # Combine all tools for reference
 all_tools = {
@@ -33,24 +42,41 @@ all_tools = {
     **assay_tools,
     **activity_tools,
     **document_tools,
+    **profile_tools,
+    **analytics_tools,
+    **admin_tools,
 }
 
 # Re-export all tool functions for backward compatibility
 from .molecules import search_molecule_impl as search_molecule
 from .molecules import get_molecule_details_impl as get_molecule_details
+from .molecules import get_molecules_details_impl as get_molecules_details
 from .molecules import get_molecule_sdf_impl as get_molecule_sdf
 from .molecules import get_similar_molecules_impl as get_similar_molecules
 from .molecules import search_molecule_substructure_impl as search_molecule_substructure
 from .targets import search_targets_impl as search_targets
 from .targets import get_target_details_impl as get_target_details
+from .targets import get_targets_details_impl as get_targets_details
 from .targets import get_molecule_targets_impl as get_molecule_targets
+from .targets import get_target_molecules_impl as get_target_molecules
 from .assays import search_assays_impl as search_assays
 from .assays import get_assay_details_impl as get_assay_details
+from .assays import get_assays_details_impl as get_assays_details
 from .activities import get_bioactivities_impl as get_bioactivities
 from .activities import get_activity_details_impl as get_activity_details
+from .activities import export_bioactivities_impl as export_bioactivities
 from .documents import get_document_info_impl as get_document_info
+from .documents import get_documents_info_impl as get_documents_info
 from .documents import get_document_compounds_impl as get_document_compounds
+from .profiles import get_molecule_profile_impl as get_molecule_profile
+from .profiles import get_target_profile_impl as get_target_profile
+from .profiles import get_document_profile_impl as get_document_profile
+from .analytics import summarize_activities_impl as summarize_activities
+from .analytics import count_active_activities_impl as count_active_activities
+from .admin import cache_stats_impl as cache_stats
+from .admin import server_stats_impl as server_stats
 
 # Main entry point for running the server directly
 if __name__ == "__main__":
-    mcp.run(transport='stdio') 
\ No newline at end of file
+    from .__main__ import run_server
+    run_server() 
\ No newline at end of file
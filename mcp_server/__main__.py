@@ -1,13 +1,138 @@
 """
 Main entry point for the ChEMBL MCP server.
+
+The server speaks MCP over stdio (one process per client, the default), SSE
+or streamable HTTP. The HTTP transports are served by uvicorn in one process:
+pagination cursors and analytics frames live in that process's memory, so a
+follow-up call must reach the process that issued them. To scale out, run one
+server per port behind a proxy with sticky routing; the servers can share the
+on-disk response cache given with ``--cache-path``::
+
+    python -m mcp_server --transport streamable-http --host 0.0.0.0 --port 8000 \\
+        --cache-path /var/cache/chembl-mcp.db
 """
 
+import argparse
+import os
+from typing import List, Optional
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
 from . import mcp
+from .utils import configure_cache, configure_warmup
+from .utils.metrics import render_prometheus
+
+TRANSPORTS = ("stdio", "sse", "streamable-http")
+
+# Defaults for the command line options
+DEFAULT_TRANSPORT = os.environ.get("CHEMBL_TRANSPORT", "stdio")
+DEFAULT_HOST = os.environ.get("CHEMBL_HOST", "127.0.0.1")
+DEFAULT_PORT = int(os.environ.get("CHEMBL_PORT", "8000"))
+DEFAULT_WORKERS = int(os.environ.get("CHEMBL_WORKERS", "1"))
+
+# Route serving Prometheus metrics on the HTTP transports
+METRICS_PATH = "/metrics"
+
+
+def create_app(transport: Optional[str] = None) -> Starlette:
+    """Build the ASGI application for an HTTP transport.
+
+    The transport defaults to ``CHEMBL_TRANSPORT``, so uvicorn can also import
+    this as an app factory.
+
+    Raises:
+        ValueError: If the transport is not served over HTTP
+        RuntimeError: If the installed MCP SDK lacks streamable HTTP support
+    """
+    transport = transport or os.environ.get("CHEMBL_TRANSPORT", DEFAULT_TRANSPORT)
+    if transport == "sse":
+        app = mcp.sse_app()
+    elif transport == "streamable-http":
+        if not hasattr(mcp, "streamable_http_app"):
+            raise RuntimeError("The streamable-http transport requires mcp>=1.8; upgrade the mcp package")
+        # No MCP session state: only cursors and frames need the same process
+        mcp.settings.stateless_http = True
+        app = mcp.streamable_http_app()
+    else:
+        raise ValueError(f"Transport {transport!r} is not served over HTTP")
+    # Prometheus scrape endpoint (counters are per process)
+    app.router.routes.append(Route(METRICS_PATH, endpoint=metrics_endpoint))
+    return app
+
+
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    """Serve the server's metrics in the Prometheus text format."""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse and validate the command line."""
+    parser = argparse.ArgumentParser(prog="python -m mcp_server", description="Run the ChEMBL MCP server.")
+    transport = parser.add_mutually_exclusive_group()
+    transport.add_argument("--transport", choices=TRANSPORTS, default=DEFAULT_TRANSPORT,
+                           help=f"MCP transport (default: {DEFAULT_TRANSPORT})")
+    transport.add_argument("--stdio", dest="transport", action="store_const", const="stdio",
+                           help="Shorthand for --transport stdio")
+    transport.add_argument("--sse", dest="transport", action="store_const", const="sse",
+                           help="Shorthand for --transport sse")
+    transport.add_argument("--http", dest="transport", action="store_const", const="streamable-http",
+                           help="Shorthand for --transport streamable-http")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Interface to bind (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to bind (default: {DEFAULT_PORT})")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Worker processes for the HTTP transports (only 1: cursors and frames are per process)")
+    parser.add_argument("--cache-path", default=os.environ.get("CHEMBL_CACHE_PATH") or None,
+                        help="SQLite file for the response cache, shareable by several servers")
+    parser.add_argument("--warmup-manifest", default=os.environ.get("CHEMBL_WARMUP_MANIFEST") or None,
+                        help="Manifest of molecule, target and assay IDs to prefetch into the cache at startup")
+    parser.add_argument("--warmup-log", default=os.environ.get("CHEMBL_WARMUP_LOG") or None,
+                        help="Log of ChEMBL API requests whose most requested IDs are prefetched at startup")
+    parser.add_argument("--log-level", default="info", choices=["debug", "info", "warning", "error"])
+    args = parser.parse_args(argv)
+
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.workers > 1:
+        # uvicorn workers share one socket, so no proxy can route a follow-up call to the
+        # worker holding its cursor or frame (nor an SSE stream's messages to its process)
+        parser.error("--workers > 1 is not supported: pagination cursors and analytics frames are kept in one "
+                     "process; run one server per port behind a proxy with sticky routing, sharing --cache-path")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point."""
+    args = parse_args(argv)
+
+    if args.cache_path:
+        # Exported so an app factory started by uvicorn, which re-imports the package, opens the same file
+        os.environ["CHEMBL_CACHE_PATH"] = args.cache_path
+        configure_cache(path=args.cache_path)
+
+    # Exported so an app factory started by uvicorn warms its cache at startup too
+    if args.warmup_manifest:
+        os.environ["CHEMBL_WARMUP_MANIFEST"] = args.warmup_manifest
+    if args.warmup_log:
+        os.environ["CHEMBL_WARMUP_LOG"] = args.warmup_log
+    configure_warmup(args.warmup_manifest, args.warmup_log)
+
+    if args.transport == "stdio":
+        mcp.run(transport="stdio")
+        return
+
+    import uvicorn
+
+    os.environ["CHEMBL_TRANSPORT"] = args.transport
+    uvicorn.run(create_app(args.transport), host=args.host, port=args.port, log_level=args.log_level)
+
 
 def run_server():
     """Entry point for running the ChEMBL MCP server."""
-    mcp.run(transport='stdio')
+    main()
 
 if __name__ == "__main__":
     # Run the MCP server
-    run_server() 
\ No newline at end of file
+    run_server()
@@ -4,46 +4,64 @@ Activity-related functions for ChEMBL MCP server.
 
 from typing import Dict, Any, List, Optional
 from mcp.server.fastmcp import FastMCP
-from ..utils import activity_client, format_activity_info
+from ..utils import (
+    activity_client,
+    format_activity_info,
+    format_records,
+    paginate,
+    format_next_cursor,
+    QuerySource,
+    NO_MORE_RESULTS,
+    wants_json,
+    select_fields,
+    json_record,
+    json_records,
+    normalize_chembl_ids,
+)
 
 # Reference to the MCP server instance, set when tools are registered
 mcp = None
 
-async def get_bioactivities_impl(chembl_id: str, activity_type: Optional[str] = None) -> str:
+async def get_bioactivities_impl(chembl_id: str, activity_type: Optional[str] = None,
+                                 limit: int = 5, cursor: Optional[str] = None, output: str = "text",
+                                 fields: Optional[List[str]] = None) -> str:
     """Implementation for getting bioactivities."""
     try:
+        structured = wants_json(output)
+        fields = fields if structured else None
         filters = {'molecule_chembl_id': chembl_id}
         if activity_type:
             filters['standard_type'] = activity_type
             
-        results = activity_client.filter(**filters)
+        results, next_cursor, _ = await paginate(
+            'get_bioactivities', lambda: QuerySource(select_fields(activity_client.filter(**filters), fields)),
+            limit, cursor)
         
+        if structured:
+            return json_records(results, fields, next_cursor)
         if not results:
-            return f"No bioactivity data found for molecule {chembl_id}"
+            return NO_MORE_RESULTS if cursor else f"No bioactivity data found for molecule {chembl_id}"
             
-        formatted_results = []
-        for act in results[:5]:  # Limit to 5 results
-            formatted_results.append(format_activity_info(act))
-            
-        return "\n---\n".join(formatted_results)
+        return format_records(results, format_activity_info) + format_next_cursor(next_cursor)
     except Exception as e:
         return f"Error retrieving bioactivity data: {str(e)}"
 
-async def get_activity_details_impl(activity_id: str) -> str:
+async def get_activity_details_impl(activity_id: str, output: str = "text",
+                                    fields: Optional[List[str]] = None) -> str:
     """Implementation for getting activity details."""
     try:
         if not activity_id.isdigit():
             return f"Invalid activity ID format. Expected a number, got '{activity_id}'"
             
         # Filter by activity_id
-        results = activity_client.filter(activity_id=activity_id)
+        query = activity_client.filter(activity_id=activity_id)
+        if wants_json(output):
+            return json_record(await select_fields(query, fields).first(), fields)
+        result = await query.first()
         
-        if not results:
+        if not result:
             return f"No activity found with ID {activity_id}"
             
-        # Get the first matching activity
-        result = results[0]
-            
         activity_info = f"""
 Activity Details:
 Activity ID: {result.get('activity_id', 'N/A')}
@@ -60,31 +78,87 @@ Document: {result.get('document_chembl_id', 'N/A')}
     except Exception as e:
         return f"Error retrieving activity details: {str(e)}"
 
+async def export_bioactivities_impl(molecule_ids: Optional[List[str]] = None, target_ids: Optional[List[str]] = None,
+                                    standard_types: Optional[List[str]] = None, format: str = "parquet",
+                                    filename: Optional[str] = None, fields: Optional[List[str]] = None) -> str:
+    """Implementation for exporting all matching bioactivities to a local file."""
+    try:
+        from ..utils.export import activity_queries, export_activities, export_path
+        
+        molecule_ids = normalize_chembl_ids(molecule_ids or [])
+        target_ids = normalize_chembl_ids(target_ids or [])
+        if not molecule_ids and not target_ids:
+            return "Provide molecule_ids, target_ids or both to select the activities to export."
+        standard_types = [t.strip() for t in standard_types or [] if t and t.strip()]
+        
+        path = export_path(format, filename)
+        queries = activity_queries(activity_client, molecule_ids, target_ids, standard_types)
+        result = await export_activities(queries, path, format, fields)
+        
+        parts = [f"Exported {result.rows} activities to {result.path}",
+                 f"Format: {result.format}, {result.size / 1024:.1f} KB, {result.elapsed:.1f} s"]
+        if result.counts:
+            parts.append("Rows by standard type:")
+            parts.extend(f"{standard_type}: {count}" for standard_type, count in result.counts.items())
+        return "\n".join(parts)
+    except Exception as e:
+        return f"Error exporting bioactivities: {str(e)}"
+
 def register_activity_tools(mcp_instance: FastMCP):
     """Register all activity-related tools with the MCP server."""
     global mcp
     mcp = mcp_instance
     
     @mcp.tool()
-    async def get_bioactivities(chembl_id: str, activity_type: Optional[str] = None) -> str:
+    async def get_bioactivities(chembl_id: str, activity_type: Optional[str] = None, limit: int = 5,
+                                cursor: Optional[str] = None, output: str = "text",
+                                fields: Optional[List[str]] = None) -> str:
         """Get bioactivity data for a molecule.
         
         Args:
             chembl_id: ChEMBL ID of the molecule
             activity_type: Type of activity (e.g., 'IC50', 'Ki')
+            limit: Maximum number of results to return
+            cursor: Cursor from a previous call to fetch the next page
+            output: 'text' for a readable summary or 'json' for the ChEMBL records as JSON
+            fields: With output='json', the record fields to return; dotted names select nested
+                values (e.g., ['activity_id', 'standard_type', 'pchembl_value'])
         """
-        return await get_bioactivities_impl(chembl_id, activity_type)
+        return await get_bioactivities_impl(chembl_id, activity_type, limit, cursor, output, fields)
     
     @mcp.tool()
-    async def get_activity_details(activity_id: str) -> str:
+    async def get_activity_details(activity_id: str, output: str = "text", fields: Optional[List[str]] = None) -> str:
         """Get detailed information about an activity by its ID.
         
         Args:
             activity_id: Activity ID
+            output: 'text' for a readable summary or 'json' for the ChEMBL records as JSON
+            fields: With output='json', the record fields to return; dotted names select nested
+                values (e.g., ['activity_id', 'standard_type', 'pchembl_value'])
+        """
+        return await get_activity_details_impl(activity_id, output, fields)
+    
+    @mcp.tool()
+    async def export_bioactivities(molecule_ids: Optional[List[str]] = None, target_ids: Optional[List[str]] = None,
+                                   standard_types: Optional[List[str]] = None, format: str = "parquet",
+                                   filename: Optional[str] = None, fields: Optional[List[str]] = None) -> str:
+        """Export all bioactivities of the given molecules and/or targets to a local file.
+        
+        Use this instead of paging through get_bioactivities when every record is needed
+        (e.g., all IC50 and Ki values of a target for a QSAR model).
+        
+        Args:
+            molecule_ids: ChEMBL IDs of the molecules whose activities are exported
+            target_ids: ChEMBL IDs of the targets whose activities are exported
+            standard_types: Only export these activity types (e.g., ['IC50', 'Ki'])
+            format: 'parquet', 'arrow' (Arrow IPC) or 'ndjson' (gzip-compressed JSON lines)
+            filename: Name of the file in the server's export directory (generated if omitted)
+            fields: Columns to export (default: IDs, names, SMILES, type, relation, value, units, pChEMBL)
         """
-        return await get_activity_details_impl(activity_id)
+        return await export_bioactivities_impl(molecule_ids, target_ids, standard_types, format, filename, fields)
     
     return {
         "get_bioactivities": get_bioactivities,
         "get_activity_details": get_activity_details,
+        "export_bioactivities": export_bioactivities,
     } 
\ No newline at end of file
@@ -0,0 +1,112 @@
+"""
+Server administration functions for ChEMBL MCP server.
+"""
+
+from typing import Dict, Any, List, Optional
+from mcp.server.fastmcp import FastMCP
+from ..utils import get_cache, get_single_flight, get_transport, get_warmup
+from ..utils.metrics import get_metrics, render_prometheus
+
+# Reference to the MCP server instance, set when tools are registered
+mcp = None
+
+def _format_stats(stats: Dict[str, Any]) -> str:
+    """Format a counter snapshot as 'Label: value' lines."""
+    lines = []
+    for key, value in stats.items():
+        label = key.replace('_', ' ').capitalize()
+        if isinstance(value, float):
+            value = f"{value:.3f}"
+        lines.append(f"{label}: {value if value is not None else 'N/A'}")
+    return "\n".join(lines)
+
+async def cache_stats_impl() -> str:
+    """Implementation for reporting response cache statistics."""
+    try:
+        return ("Cache Statistics:\n" + _format_stats(get_cache().snapshot())
+                + "\n\nRequest Coalescing:\n" + _format_stats(get_single_flight().stats.as_dict()))
+    except Exception as e:
+        return f"Error retrieving cache statistics: {str(e)}"
+
+async def server_stats_impl(format: str = "text") -> str:
+    """Implementation for reporting server instrumentation."""
+    try:
+        if format == "prometheus":
+            return render_prometheus()
+        if format != "text":
+            return f"Unknown format '{format}'. Expected 'text' or 'prometheus'."
+            
+        metrics = get_metrics()
+        tools = sorted({labels[0] for labels in metrics.tool_calls.values})
+        lines = ["Tool Calls:"]
+        for tool in tools:
+            calls = metrics.tool_duration.count(tool)
+            errors = metrics.tool_calls.get(tool, "error") + metrics.tool_calls.get(tool, "exception")
+            lines.append(f"{tool}: {calls} calls, {int(errors)} errors, "
+                         f"mean {metrics.tool_duration.mean(tool) * 1000:.1f} ms, "
+                         f"p95 <= {metrics.tool_duration.quantile(0.95, tool) * 1000:.0f} ms, "
+                         f"{metrics.tool_backend_calls.mean(tool):.1f} backend calls per call")
+        if not tools:
+            lines.append("No tool calls yet")
+            
+        lines.append("\nBackend Calls:")
+        for (backend, operation), count in sorted(metrics.backend_calls.values.items()):
+            lines.append(f"{backend} {operation}: {int(count)} calls, "
+                         f"mean {metrics.backend_duration.mean(backend, operation) * 1000:.1f} ms")
+        for (backend, error), count in sorted(metrics.backend_errors.values.items()):
+            lines.append(f"{backend} errors ({error}): {int(count)}")
+            
+        lines.append("\nChEMBL API:")
+        lines.append(f"Requests: {int(metrics.http_requests.total())}")
+        lines.append(f"Bytes received: {int(metrics.http_bytes.total())}")
+        lines.append(f"Retries: {int(metrics.http_retries.total())}")
+        for (status,), count in sorted(metrics.http_requests.values.items()):
+            lines.append(f"HTTP {status}: {int(count)}")
+        for (error,), count in sorted(metrics.http_errors.values.items()):
+            lines.append(f"{error}: {int(count)}")
+            
+        limiter = get_transport().limiter
+        lines.append("\nRate Limit:")
+        if limiter.enabled:
+            tokens, rate, paused = limiter.snapshot()
+            lines.append(f"Rate: {rate:.2f} of {limiter.max_rate:g} requests/s"
+                         + (f" (paused for {paused:.1f} s)" if paused else ""))
+        else:
+            lines.append("Rate: unlimited")
+        lines.append(f"Throttled (HTTP 429): {int(metrics.ratelimit_throttled.total())}")
+        lines.append(f"Queue wait: mean {metrics.ratelimit_wait.mean() * 1000:.1f} ms, "
+                     f"p95 <= {metrics.ratelimit_wait.quantile(0.95) * 1000:.0f} ms")
+            
+        lines.append("\nCache:")
+        lines.append(_format_stats(get_cache().stats.as_dict()))
+        lines.append("\nRequest Coalescing:")
+        lines.append(_format_stats(get_single_flight().stats.as_dict()))
+        lines.append("\nWarm-up:")
+        lines.append(get_warmup().status())
+        return "Server Statistics:\n\n" + "\n".join(lines)
+    except Exception as e:
+        return f"Error retrieving server statistics: {str(e)}"
+
+def register_admin_tools(mcp_instance: FastMCP):
+    """Register all administration tools with the MCP server."""
+    global mcp
+    mcp = mcp_instance
+    
+    @mcp.tool()
+    async def cache_stats() -> str:
+        """Get hit/miss/eviction counters and sizes of the response cache, and request coalescing counters."""
+        return await cache_stats_impl()
+    
+    @mcp.tool()
+    async def server_stats(format: str = "text") -> str:
+        """Get per-tool latency, backend call, ChEMBL API traffic and cache statistics.
+        
+        Args:
+            format: 'text' for a summary or 'prometheus' for the Prometheus text exposition format
+        """
+        return await server_stats_impl(format)
+    
+    return {
+        "cache_stats": cache_stats,
+        "server_stats": server_stats,
+    }
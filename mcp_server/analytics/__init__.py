@@ -0,0 +1,211 @@
+"""
+Activity analytics tools for ChEMBL MCP server.
+
+Summary questions ("median IC50 per target", "how many actives below
+100 nM") are answered from a columnar activity frame (see utils/frame.py)
+instead of by paging through get_bioactivities. The first call for a
+query loads its activities once; the frame ID in the answer, or repeating
+the same query, reuses the loaded frame for follow-up questions.
+"""
+
+import math
+from typing import Any, List, Optional, Tuple
+from mcp.server.fastmcp import FastMCP
+from ..utils import (
+    activity_client,
+    dump,
+    normalize_chembl_ids,
+    wants_json,
+)
+
+# Reference to the MCP server instance, set when tools are registered
+mcp = None
+
+def _nm(pchembl: float) -> float:
+    """Molar concentration in nM equivalent to a pChEMBL value."""
+    return 10 ** (9 - pchembl)
+
+def _group_name(group: str, label: Optional[str]) -> str:
+    return f"{group} ({label})" if label else group
+
+async def _load_frame(molecule_ids: Optional[List[str]], target_ids: Optional[List[str]],
+                      standard_types: Optional[List[str]], frame_id: Optional[str]) -> Tuple[str, Any, List[str]]:
+    """The frame to aggregate (by ID, or the cached or newly loaded frame of the query) and the type filter."""
+    from ..utils.export import activity_queries
+    from ..utils.frame import get_frame_store, load_activity_frame
+    
+    store = get_frame_store()
+    standard_types = [t.strip() for t in standard_types or [] if t and t.strip()]
+    if frame_id:
+        frame_id = frame_id.strip()
+        return frame_id, store.get(frame_id), standard_types
+    
+    molecule_ids = normalize_chembl_ids(molecule_ids or [])
+    target_ids = normalize_chembl_ids(target_ids or [])
+    if not molecule_ids and not target_ids:
+        raise ValueError("Provide molecule_ids, target_ids or a frame_id to select the activities to summarize")
+    key = (tuple(sorted(set(molecule_ids))), tuple(sorted(set(target_ids))), tuple(sorted(set(standard_types))))
+    cached = store.find(key)
+    if cached:
+        return cached[0], cached[1], standard_types
+    
+    description = ", ".join(part for part in (
+        f"molecules {', '.join(molecule_ids)}" if molecule_ids else "",
+        f"targets {', '.join(target_ids)}" if target_ids else "",
+        f"types {', '.join(standard_types)}" if standard_types else "",
+    ) if part)
+    frame = await load_activity_frame(activity_queries(activity_client, molecule_ids, target_ids, standard_types),
+                                      description)
+    return store.put(frame, key), frame, standard_types
+
+def _header(title: str, frame_id: str, frame: Any) -> str:
+    return (f"{title} for {frame.description or 'the selected activities'}\n"
+            f"Frame {frame_id}: {len(frame)} activities (pass frame_id='{frame_id}' to ask more about them)")
+
+async def summarize_activities_impl(molecule_ids: Optional[List[str]] = None, target_ids: Optional[List[str]] = None,
+                                    standard_types: Optional[List[str]] = None, group_by: str = "target",
+                                    percentiles: Optional[List[float]] = None, limit: int = 20,
+                                    frame_id: Optional[str] = None, output: str = "text") -> str:
+    """Implementation for summarizing activity potencies per group."""
+    try:
+        structured = wants_json(output)
+        percentiles = [float(p) for p in (percentiles if percentiles is not None else [25, 50, 75])]
+        if any(not 0 <= p <= 100 for p in percentiles):
+            return "Percentiles must be between 0 and 100."
+        quantiles = sorted(set(p / 100 for p in percentiles) | {0.5})
+        
+        frame_id, frame, standard_types = await _load_frame(molecule_ids, target_ids, standard_types, frame_id)
+        stats = frame.group_stats(group_by, quantiles, frame.mask(standard_types))
+        order = sorted(range(len(stats.groups)), key=lambda i: (-int(stats.counts[i]), stats.groups[i]))
+        shown = order[:max(limit, 0)]
+        
+        if structured:
+            return dump({
+                "frame_id": frame_id,
+                "activities": len(frame),
+                "with_pchembl": stats.total,
+                "group_by": group_by,
+                "groups": [{
+                    "group": stats.groups[i],
+                    "name": stats.labels[i],
+                    "count": int(stats.counts[i]),
+                    "mean_pchembl": round(float(stats.mean[i]), 3),
+                    **{f"p{q * 100:g}_pchembl": round(float(stats.percentiles[q][i]), 3) for q in quantiles},
+                    "median_nm": round(_nm(float(stats.percentiles[0.5][i])), 3),
+                } for i in shown],
+                "more_groups": len(order) - len(shown),
+            })
+        
+        parts = [_header(f"pChEMBL summary by {group_by}", frame_id, frame),
+                 f"{stats.total} activities with a pChEMBL value in {len(order)} groups"]
+        if standard_types:
+            parts[-1] += f" (types: {', '.join(standard_types)})"
+        for i in shown:
+            values = ", ".join(f"p{q * 100:g} {stats.percentiles[q][i]:.2f}" for q in quantiles)
+            parts.append(f"{_group_name(stats.groups[i], stats.labels[i])}: n={int(stats.counts[i])}, "
+                         f"mean {stats.mean[i]:.2f}, {values}; "
+                         f"median ≈ {_nm(float(stats.percentiles[0.5][i])):.3g} nM")
+        if len(order) > len(shown):
+            parts.append(f"... {len(order) - len(shown)} more groups (raise limit to see them)")
+        return "\n".join(parts)
+    except Exception as e:
+        return f"Error summarizing activities: {str(e)}"
+
+async def count_active_activities_impl(threshold_nm: float = 100.0, molecule_ids: Optional[List[str]] = None,
+                                       target_ids: Optional[List[str]] = None,
+                                       standard_types: Optional[List[str]] = None, group_by: str = "target",
+                                       limit: int = 20, frame_id: Optional[str] = None,
+                                       output: str = "text") -> str:
+    """Implementation for counting activities at or below a potency threshold per group."""
+    try:
+        structured = wants_json(output)
+        if not threshold_nm > 0 or math.isinf(threshold_nm):
+            return "threshold_nm must be a positive concentration in nM."
+        
+        frame_id, frame, standard_types = await _load_frame(molecule_ids, target_ids, standard_types, frame_id)
+        groups, labels, active, measured = frame.threshold_counts(group_by, threshold_nm,
+                                                                  frame.mask(standard_types))
+        order = sorted(range(len(groups)), key=lambda i: (-int(active[i]), -int(measured[i]), groups[i]))
+        shown = order[:max(limit, 0)]
+        total_active, total_measured = int(active.sum()), int(measured.sum())
+        
+        if structured:
+            return dump({
+                "frame_id": frame_id,
+                "activities": len(frame),
+                "threshold_nm": threshold_nm,
+                "active": total_active,
+                "measured": total_measured,
+                "group_by": group_by,
+                "groups": [{"group": groups[i], "name": labels[i], "active": int(active[i]),
+                            "measured": int(measured[i])} for i in shown],
+                "more_groups": len(order) - len(shown),
+            })
+        
+        parts = [_header(f"Actives at or below {threshold_nm:g} nM by {group_by}", frame_id, frame),
+                 f"{total_active} of {total_measured} activities with a molar value are active"]
+        if standard_types:
+            parts[-1] += f" (types: {', '.join(standard_types)})"
+        for i in shown:
+            parts.append(f"{_group_name(groups[i], labels[i])}: {int(active[i])} of {int(measured[i])} "
+                         f"({100 * active[i] / measured[i]:.0f}%)")
+        if len(order) > len(shown):
+            parts.append(f"... {len(order) - len(shown)} more groups (raise limit to see them)")
+        return "\n".join(parts)
+    except Exception as e:
+        return f"Error counting active activities: {str(e)}"
+
+def register_analytics_tools(mcp_instance: FastMCP):
+    """Register all analytics tools with the MCP server."""
+    global mcp
+    mcp = mcp_instance
+    
+    @mcp.tool()
+    async def summarize_activities(molecule_ids: Optional[List[str]] = None, target_ids: Optional[List[str]] = None,
+                                   standard_types: Optional[List[str]] = None, group_by: str = "target",
+                                   percentiles: Optional[List[float]] = None, limit: int = 20,
+                                   frame_id: Optional[str] = None, output: str = "text") -> str:
+        """Summarize activity potencies (pChEMBL) per target, molecule, type or assay.
+        
+        Use this for questions like "median IC50 per target" instead of paging through
+        get_bioactivities. The answer includes a frame_id that follow-up calls can pass to
+        reuse the loaded activities.
+        
+        Args:
+            molecule_ids: ChEMBL IDs of the molecules whose activities are summarized
+            target_ids: ChEMBL IDs of the targets whose activities are summarized
+            standard_types: Only include these activity types (e.g., ['IC50', 'Ki'])
+            group_by: 'target', 'molecule', 'standard_type', 'relation', 'assay' or 'document'
+            percentiles: pChEMBL percentiles to report, 0-100 (default [25, 50, 75])
+            limit: Maximum number of groups to return, largest first
+            frame_id: Frame from a previous analytics call, instead of molecule_ids/target_ids
+            output: 'text' for a readable summary or 'json' for the statistics as JSON
+        """
+        return await summarize_activities_impl(molecule_ids, target_ids, standard_types, group_by, percentiles,
+                                               limit, frame_id, output)
+    
+    @mcp.tool()
+    async def count_active_activities(threshold_nm: float = 100.0, molecule_ids: Optional[List[str]] = None,
+                                      target_ids: Optional[List[str]] = None,
+                                      standard_types: Optional[List[str]] = None, group_by: str = "target",
+                                      limit: int = 20, frame_id: Optional[str] = None,
+                                      output: str = "text") -> str:
+        """Count activities at or below a potency threshold per target, molecule, type or assay.
+        
+        Args:
+            threshold_nm: Activity threshold in nM (e.g., 100 for "actives below 100 nM")
+            molecule_ids: ChEMBL IDs of the molecules whose activities are counted
+            target_ids: ChEMBL IDs of the targets whose activities are counted
+            standard_types: Only include these activity types (e.g., ['IC50', 'Ki'])
+            group_by: 'target', 'molecule', 'standard_type', 'relation', 'assay' or 'document'
+            limit: Maximum number of groups to return, most actives first
+            frame_id: Frame from a previous analytics call, instead of molecule_ids/target_ids
+            output: 'text' for a readable summary or 'json' for the counts as JSON
+        """
+        return await count_active_activities_impl(threshold_nm, molecule_ids, target_ids, standard_types, group_by,
+                                                  limit, frame_id, output)
+    
+    return {
+        "summarize_activities": summarize_activities,
+        "count_active_activities": count_active_activities,
+    }
@@ -4,43 +4,55 @@ Assay-related functions for ChEMBL MCP server.
 
 from typing import Dict, Any, List, Optional
 from mcp.server.fastmcp import FastMCP
-from ..utils import assay_client, format_assay_info
+from ..utils import (
+    assay_client,
+    format_assay_info,
+    format_records,
+    format_batch_response,
+    normalize_chembl_ids,
+    paginate,
+    format_next_cursor,
+    QuerySource,
+    NO_MORE_RESULTS,
+    wants_json,
+    select_fields,
+    json_batch,
+    json_record,
+    json_records,
+)
 
 # Reference to the MCP server instance, set when tools are registered
 mcp = None
 
-async def search_assays_impl(assay_type: Optional[str] = None, target_id: Optional[str] = None) -> str:
+async def search_assays_impl(assay_type: Optional[str] = None, target_id: Optional[str] = None,
+                             limit: int = 5, cursor: Optional[str] = None,
+                             output: str = "text", fields: Optional[List[str]] = None) -> str:
     """Implementation for searching assays."""
     try:
+        structured = wants_json(output)
+        fields = fields if structured else None
         filters = {}
         if assay_type:
             filters['assay_type'] = assay_type
         if target_id:
             filters['target_chembl_id'] = target_id
             
-        results = assay_client.filter(**filters)
+        results, next_cursor, _ = await paginate(
+            'search_assays', lambda: QuerySource(select_fields(assay_client.filter(**filters), fields)),
+            limit, cursor)
         
+        if structured:
+            return json_records(results, fields, next_cursor)
         if not results:
-            return "No assays found matching the criteria."
+            return NO_MORE_RESULTS if cursor else "No assays found matching the criteria."
             
-        formatted_results = []
-        for assay in results[:5]:  # Limit to 5 results
-            formatted_results.append(format_assay_info(assay))
-            
-        return "\n---\n".join(formatted_results)
+        return format_records(results, format_assay_info) + format_next_cursor(next_cursor)
     except Exception as e:
         return f"Error searching assays: {str(e)}"
 
-async def get_assay_details_impl(chembl_id: str) -> str:
-    """Implementation for getting assay details."""
-    try:
-        result = assay_client.get(chembl_id)
-        
-        if not result:
-            return f"No assay found with ID {chembl_id}"
-            
-        # Get basic assay information
-        assay_info = f"""
+def _format_assay_details(result: Dict[str, Any]) -> str:
+    """Format an assay record."""
+    return f"""
 Assay Details:
 ChEMBL ID: {result.get('assay_chembl_id', 'N/A')}
 Description: {result.get('description', 'N/A')}
@@ -50,8 +62,38 @@ Target ChEMBL ID: {result.get('target_chembl_id', 'N/A')}
 Target Name: {result.get('target_pref_name', 'N/A')}
 Document ChEMBL ID: {result.get('document_chembl_id', 'N/A')}
 """
+
+async def get_assay_details_impl(chembl_id: str, output: str = "text", fields: Optional[List[str]] = None) -> str:
+    """Implementation for getting assay details."""
+    try:
+        if wants_json(output):
+            if not fields:
+                return await assay_client.get_raw(chembl_id)
+            return json_record(await assay_client.get(chembl_id), fields)
+            
+        result = await assay_client.get(chembl_id)
         
-        return assay_info
+        if not result:
+            return f"No assay found with ID {chembl_id}"
+            
+        return _format_assay_details(result)
+    except Exception as e:
+        return f"Error retrieving assay details: {str(e)}"
+
+async def get_assays_details_impl(chembl_ids: List[str], output: str = "text",
+                                  fields: Optional[List[str]] = None) -> str:
+    """Implementation for getting details of many assays in one call."""
+    try:
+        structured = wants_json(output)
+        ids = normalize_chembl_ids(chembl_ids)
+        if not ids and not structured:
+            return "No assay IDs provided."
+            
+        results = await assay_client.get_many(ids)
+        if structured:
+            return json_batch(ids, results, fields)
+        return format_batch_response('assay', ids, results, _format_assay_details,
+                                     "Error retrieving assay details")
     except Exception as e:
         return f"Error retrieving assay details: {str(e)}"
 
@@ -61,25 +103,49 @@ def register_assay_tools(mcp_instance: FastMCP):
     mcp = mcp_instance
     
     @mcp.tool()
-    async def search_assays(assay_type: Optional[str] = None, target_id: Optional[str] = None) -> str:
+    async def search_assays(assay_type: Optional[str] = None, target_id: Optional[str] = None, limit: int = 5,
+                            cursor: Optional[str] = None, output: str = "text",
+                            fields: Optional[List[str]] = None) -> str:
         """Search for assays in ChEMBL database.
         
         Args:
             assay_type: Type of assay (e.g., 'B' for biochemical, 'F' for functional)
             target_id: ChEMBL ID of the target (optional)
+            limit: Maximum number of results to return
+            cursor: Cursor from a previous call to fetch the next page
+            output: 'text' for a readable summary or 'json' for the ChEMBL records as JSON
+            fields: With output='json', the record fields to return; dotted names select nested
+                values (e.g., ['assay_chembl_id', 'assay_type', 'target_chembl_id'])
         """
-        return await search_assays_impl(assay_type, target_id)
+        return await search_assays_impl(assay_type, target_id, limit, cursor, output, fields)
     
     @mcp.tool()
-    async def get_assay_details(chembl_id: str) -> str:
+    async def get_assay_details(chembl_id: str, output: str = "text", fields: Optional[List[str]] = None) -> str:
         """Get detailed information about an assay by its ChEMBL ID.
         
         Args:
             chembl_id: ChEMBL ID of the assay
+            output: 'text' for a readable summary or 'json' for the ChEMBL records as JSON
+            fields: With output='json', the record fields to return; dotted names select nested
+                values (e.g., ['assay_chembl_id', 'assay_type', 'target_chembl_id'])
+        """
+        return await get_assay_details_impl(chembl_id, output, fields)
+    
+    @mcp.tool()
+    async def get_assays_details(chembl_ids: List[str], output: str = "text",
+                                 fields: Optional[List[str]] = None) -> str:
+        """Get detailed information about many assays at once.
+        
+        Args:
+            chembl_ids: ChEMBL IDs of the assays
+            output: 'text' for a readable summary or 'json' for the ChEMBL records as JSON
+            fields: With output='json', the record fields to return; dotted names select nested
+                values (e.g., ['assay_chembl_id', 'assay_type', 'target_chembl_id'])
         """
-        return await get_assay_details_impl(chembl_id)
+        return await get_assays_details_impl(chembl_ids, output, fields)
     
     return {
         "search_assays": search_assays,
         "get_assay_details": get_assay_details,
+        "get_assays_details": get_assays_details,
     } 
\ No newline at end of file
@@ -4,20 +4,28 @@ Document-related functions for ChEMBL MCP server.
 
 from typing import Dict, Any, List, Optional
 from mcp.server.fastmcp import FastMCP
-from ..utils import document_client, molecule_client
+from ..utils import (
+    document_client,
+    molecule_client,
+    format_batch_response,
+    normalize_chembl_ids,
+    paginate,
+    format_next_cursor,
+    QuerySource,
+    NO_MORE_RESULTS,
+    wants_json,
+    select_fields,
+    json_batch,
+    json_record,
+    json_records,
+)
 
 # Reference to the MCP server instance, set when tools are registered
 mcp = None
 
-async def get_document_info_impl(chembl_id: str) -> str:
-    """Implementation for getting document information."""
-    try:
-        result = document_client.get(chembl_id)
-        
-        if not result:
-            return f"No document found with ID {chembl_id}"
-            
-        return f"""
+def _format_document_info(result: Dict[str, Any]) -> str:
+    """Format a document record."""
+    return f"""
 Document Details:
 Title: {result.get('title', 'N/A')}
 ChEMBL ID: {result.get('document_chembl_id', 'N/A')}
@@ -27,20 +35,59 @@ Authors: {result.get('authors', 'N/A')}
 DOI: {result.get('doi', 'N/A')}
 PubMed ID: {result.get('pubmed_id', 'N/A')}
 """
+
+async def get_document_info_impl(chembl_id: str, output: str = "text", fields: Optional[List[str]] = None) -> str:
+    """Implementation for getting document information."""
+    try:
+        if wants_json(output):
+            if not fields:
+                return await document_client.get_raw(chembl_id)
+            return json_record(await document_client.get(chembl_id), fields)
+            
+        result = await document_client.get(chembl_id)
+        
+        if not result:
+            return f"No document found with ID {chembl_id}"
+            
+        return _format_document_info(result)
+    except Exception as e:
+        return f"Error retrieving document information: {str(e)}"
+
+async def get_documents_info_impl(chembl_ids: List[str], output: str = "text",
+                                  fields: Optional[List[str]] = None) -> str:
+    """Implementation for getting information about many documents in one call."""
+    try:
+        structured = wants_json(output)
+        ids = normalize_chembl_ids(chembl_ids)
+        if not ids and not structured:
+            return "No document IDs provided."
+            
+        results = await document_client.get_many(ids)
+        if structured:
+            return json_batch(ids, results, fields)
+        return format_batch_response('document', ids, results, _format_document_info,
+                                     "Error retrieving document information")
     except Exception as e:
         return f"Error retrieving document information: {str(e)}"
 
-async def get_document_compounds_impl(chembl_id: str, limit: int = 5) -> str:
+async def get_document_compounds_impl(chembl_id: str, limit: int = 5, cursor: Optional[str] = None,
+                                      output: str = "text", fields: Optional[List[str]] = None) -> str:
     """Implementation for getting document compounds."""
     try:
+        structured = wants_json(output)
+        fields = fields if structured else None
         # Filter molecules by document_chembl_id
-        results = molecule_client.filter(document_chembl_id=chembl_id)
+        query = molecule_client.filter(document_chembl_id=chembl_id)
+        results, next_cursor, offset = await paginate(
+            'get_document_compounds', lambda: QuerySource(select_fields(query, fields)), limit, cursor)
         
+        if structured:
+            return json_records(results, fields, next_cursor)
         if not results:
-            return f"No compounds found for document {chembl_id}"
+            return NO_MORE_RESULTS if cursor else f"No compounds found for document {chembl_id}"
             
         formatted_results = []
-        for i, mol in enumerate(results[:limit], 1):
+        for i, mol in enumerate(results, offset + 1):
             mol_id = mol.get('molecule_chembl_id', 'N/A')
             name = mol.get('pref_name', 'N/A')
             formula = mol.get('molecule_properties', {}).get('full_molformula', 'N/A')
@@ -48,7 +95,8 @@ async def get_document_compounds_impl(chembl_id: str, limit: int = 5) -> str:
             compound_info = f"{i}. {name} ({mol_id}) - {formula}"
             formatted_results.append(compound_info)
             
-        return f"Compounds in document {chembl_id}:\n\n" + "\n".join(formatted_results)
+        return (f"Compounds in document {chembl_id}:\n\n" + "\n".join(formatted_results)
+                + format_next_cursor(next_cursor))
     except Exception as e:
         return f"Error retrieving document compounds: {str(e)}"
 
@@ -58,25 +106,47 @@ def register_document_tools(mcp_instance: FastMCP):
     mcp = mcp_instance
     
     @mcp.tool()
-    async def get_document_info(chembl_id: str) -> str:
+    async def get_document_info(chembl_id: str, output: str = "text", fields: Optional[List[str]] = None) -> str:
         """Get information about a document in ChEMBL database.
         
         Args:
             chembl_id: ChEMBL ID of the document
+            output: 'text' for a readable summary or 'json' for the ChEMBL records as JSON
+            fields: With output='json', the record fields to return; dotted names select nested
+                values (e.g., ['document_chembl_id', 'title', 'year'])
+        """
+        return await get_document_info_impl(chembl_id, output, fields)
+    
+    @mcp.tool()
+    async def get_documents_info(chembl_ids: List[str], output: str = "text",
+                                 fields: Optional[List[str]] = None) -> str:
+        """Get information about many documents at once.
+        
+        Args:
+            chembl_ids: ChEMBL IDs of the documents
+            output: 'text' for a readable summary or 'json' for the ChEMBL records as JSON
+            fields: With output='json', the record fields to return; dotted names select nested
+                values (e.g., ['document_chembl_id', 'title', 'year'])
         """
-        return await get_document_info_impl(chembl_id)
+        return await get_documents_info_impl(chembl_ids, output, fields)
     
     @mcp.tool()
-    async def get_document_compounds(chembl_id: str, limit: int = 5) -> str:
+    async def get_document_compounds(chembl_id: str, limit: int = 5, cursor: Optional[str] = None,
+                                     output: str = "text", fields: Optional[List[str]] = None) -> str:
         """Get compounds mentioned in a document.
         
         Args:
             chembl_id: ChEMBL ID of the document
             limit: Maximum number of compounds to return
+            cursor: Cursor from a previous call to fetch the next page
+            output: 'text' for a readable summary or 'json' for the ChEMBL records as JSON
+            fields: With output='json', the record fields to return; dotted names select nested
+                values (e.g., ['molecule_chembl_id', 'molecule_properties.full_molformula'])
         """
-        return await get_document_compounds_impl(chembl_id, limit)
+        return await get_document_compounds_impl(chembl_id, limit, cursor, output, fields)
     
     return {
         "get_document_info": get_document_info,
+        "get_documents_info": get_documents_info,
         "get_document_compounds": get_document_compounds,
     } 
\ No newline at end of file
@@ -2,33 +2,75 @@
 Molecule-related functions for ChEMBL MCP server.
 """
 
-from typing import Dict, Any, List, Optional
+import asyncio
+from typing import Dict, Any, List, Optional, Tuple
 from mcp.server.fastmcp import FastMCP
-from ..utils import molecule_client, format_molecule_info
+from ..utils import (
+    molecule_client,
+    molecule_sdf_client,
+    format_molecule_info,
+    format_records,
+    format_batch_response,
+    normalize_chembl_ids,
+    paginate,
+    format_next_cursor,
+    ListSource,
+    QuerySource,
+    ResultSource,
+    StreamSource,
+    NO_MORE_RESULTS,
+    wants_json,
+    select_fields,
+    json_batch,
+    json_record,
+    json_records,
+)
 
 # Reference to the MCP server instance, set when tools are registered
 mcp = None
 
-async def search_molecule_impl(query: str, limit: int = 5) -> str:
+# Hits ranked by the local similarity index per search; later pages are served from this list
+SIMILARITY_MAX_HITS = 500
+
+# Records matched by the local name index per search; later pages are served from this list
+NAME_SEARCH_MAX_HITS = 500
+
+async def _molecule_search_source(query: str, fields: Optional[List[str]] = None) -> ResultSource:
+    """Molecules matching a name from the local name index, or the remote full-text search on a miss."""
+    from ..utils.name_index import lookup_names
+    
+    chembl_ids = await asyncio.to_thread(lookup_names, 'molecule', query, NAME_SEARCH_MAX_HITS)
+    if chembl_ids:
+        return ListSource(chembl_ids, resolve=_molecule_records)
+    return QuerySource(select_fields(molecule_client.search(query), fields))
+
+async def search_molecule_impl(query: str, limit: int = 5, cursor: Optional[str] = None,
+                              output: str = "text", fields: Optional[List[str]] = None) -> str:
     """Implementation for searching molecules in ChEMBL database."""
     try:
-        results = molecule_client.search(query)
+        structured = wants_json(output)
+        fields = fields if structured else None
+        results, next_cursor, _ = await paginate(
+            'search_molecule', lambda: _molecule_search_source(query, fields), limit, cursor)
         
+        if structured:
+            return json_records(results, fields, next_cursor)
         if not results:
-            return "No molecules found matching the query."
+            return NO_MORE_RESULTS if cursor else "No molecules found matching the query."
             
-        formatted_results = []
-        for mol in results[:limit]:
-            formatted_results.append(format_molecule_info(mol))
-            
-        return "\n---\n".join(formatted_results)
+        return format_records(results, format_molecule_info) + format_next_cursor(next_cursor)
     except Exception as e:
         return f"Error searching molecules: {str(e)}"
 
-async def get_molecule_details_impl(chembl_id: str) -> str:
+async def get_molecule_details_impl(chembl_id: str, output: str = "text", fields: Optional[List[str]] = None) -> str:
     """Implementation for getting molecule details."""
     try:
-        result = molecule_client.get(chembl_id)
+        if wants_json(output):
+            if not fields:
+                return await molecule_client.get_raw(chembl_id)
+            return json_record(await molecule_client.get(chembl_id), fields)
+            
+        result = await molecule_client.get(chembl_id)
         
         if not result:
             return f"No molecule found with ID {chembl_id}"
@@ -37,12 +79,27 @@ async def get_molecule_details_impl(chembl_id: str) -> str:
     except Exception as e:
         return f"Error retrieving molecule details: {str(e)}"
 
+async def get_molecules_details_impl(chembl_ids: List[str], output: str = "text",
+                                     fields: Optional[List[str]] = None) -> str:
+    """Implementation for getting details of many molecules in one call."""
+    try:
+        structured = wants_json(output)
+        ids = normalize_chembl_ids(chembl_ids)
+        if not ids and not structured:
+            return "No molecule IDs provided."
+            
+        results = await molecule_client.get_many(ids)
+        if structured:
+            return json_batch(ids, results, fields)
+        return format_batch_response('molecule', ids, results, format_molecule_info,
+                                     "Error retrieving molecule details")
+    except Exception as e:
+        return f"Error retrieving molecule details: {str(e)}"
+
 async def get_molecule_sdf_impl(chembl_id: str) -> str:
     """Implementation for getting molecule SDF."""
     try:
-        molecule_client.set_format('sdf')
-        result = molecule_client.get(chembl_id)
-        molecule_client.set_format('json')  # Reset to JSON format
+        result = await molecule_sdf_client.get(chembl_id)
         
         if not result:
             return f"No SDF data found for molecule {chembl_id}"
@@ -51,35 +108,91 @@ async def get_molecule_sdf_impl(chembl_id: str) -> str:
     except Exception as e:
         return f"Error retrieving SDF data: {str(e)}"
 
-async def get_similar_molecules_impl(chembl_id: str, similarity_threshold: float = 0.7) -> str:
+async def _molecule_records(chembl_ids: List[str]) -> List[Dict[str, Any]]:
+    """Records for a page of molecule IDs, in order, skipping any not found."""
+    records = await molecule_client.get_many(chembl_ids)
+    return [records[chembl_id] for chembl_id in chembl_ids if isinstance(records.get(chembl_id), dict)]
+
+async def _similarity_records(hits: List[Tuple[str, float]]) -> List[Dict[str, Any]]:
+    """Records for a page of local similarity hits, annotated like the REST results."""
+    records = await molecule_client.get_many([hit_id for hit_id, _ in hits])
+    results = []
+    for hit_id, similarity in hits:
+        record = records.get(hit_id)
+        if isinstance(record, dict):
+            results.append({**record, 'similarity': f"{similarity * 100:.1f}"})
+    return results
+
+async def _similar_molecules_source(chembl_id: str, similarity_threshold: float,
+                                    fields: Optional[List[str]] = None) -> ResultSource:
+    """Ranked similar molecules from the local fingerprint index, or the remote search."""
+    # Imported on first use: the index modules pull in NumPy
+    from ..utils.similarity import get_similarity_index
+    
+    index = get_similarity_index()
+    if index is not None:
+        threshold = float(similarity_threshold)
+        if threshold > 1:
+            threshold /= 100  # Accept percentages like the REST endpoint
+        hits = await asyncio.to_thread(index.similar_to, chembl_id.strip().upper(), threshold,
+                                       SIMILARITY_MAX_HITS)
+        if hits is not None:
+            return ListSource(hits, resolve=_similarity_records)
+    return QuerySource(select_fields(
+        molecule_client.filter(similarity=chembl_id, similarity_threshold=similarity_threshold), fields))
+
+async def get_similar_molecules_impl(chembl_id: str, similarity_threshold: float = 0.7, limit: int = 5,
+                                     cursor: Optional[str] = None, output: str = "text",
+                                     fields: Optional[List[str]] = None) -> str:
     """Implementation for getting similar molecules."""
     try:
-        results = molecule_client.filter(similarity=chembl_id).filter(similarity_threshold=similarity_threshold)
+        structured = wants_json(output)
+        fields = fields if structured else None
+        results, next_cursor, _ = await paginate(
+            'get_similar_molecules', lambda: _similar_molecules_source(chembl_id, similarity_threshold, fields),
+            limit, cursor)
         
+        if structured:
+            return json_records(results, fields, next_cursor)
         if not results:
+            if cursor:
+                return NO_MORE_RESULTS
             return f"No similar molecules found for {chembl_id} at threshold {similarity_threshold}"
             
-        formatted_results = []
-        for mol in results[:5]:  # Limit to 5 results
-            formatted_results.append(format_molecule_info(mol))
-            
-        return f"Similar molecules to {chembl_id} (threshold: {similarity_threshold}):\n\n" + "\n---\n".join(formatted_results)
+        return (f"Similar molecules to {chembl_id} (threshold: {similarity_threshold}):\n\n"
+                + format_records(results, format_molecule_info) + format_next_cursor(next_cursor))
     except Exception as e:
         return f"Error finding similar molecules: {str(e)}"
 
-async def search_molecule_substructure_impl(smiles: str) -> str:
+def _substructure_source(smiles: str, fields: Optional[List[str]] = None) -> ResultSource:
+    """Verified matches streamed from the local screening index, or the remote search.
+    
+    The local stream is consumed only as far as pages are requested, so the
+    first hits are returned as soon as they are verified.
+    """
+    from ..utils.substructure import get_substructure_index
+    
+    index = get_substructure_index()
+    if index is not None:
+        return StreamSource(index.stream_matches(smiles), resolve=_molecule_records)
+    return QuerySource(select_fields(molecule_client.filter(substructure=smiles), fields))
+
+async def search_molecule_substructure_impl(smiles: str, limit: int = 5, cursor: Optional[str] = None,
+                                            output: str = "text", fields: Optional[List[str]] = None) -> str:
     """Implementation for searching molecules by substructure."""
     try:
-        results = molecule_client.filter(substructure=smiles)
+        structured = wants_json(output)
+        fields = fields if structured else None
+        results, next_cursor, _ = await paginate(
+            'search_molecule_substructure', lambda: _substructure_source(smiles, fields), limit, cursor)
         
+        if structured:
+            return json_records(results, fields, next_cursor)
         if not results:
-            return f"No molecules found containing substructure {smiles}"
-            
-        formatted_results = []
-        for mol in results[:5]:  # Limit to 5 results
-            formatted_results.append(format_molecule_info(mol))
+            return NO_MORE_RESULTS if cursor else f"No molecules found containing substructure {smiles}"
             
-        return f"Molecules containing substructure {smiles}:\n\n" + "\n---\n".join(formatted_results)
+        return (f"Molecules containing substructure {smiles}:\n\n"
+                + format_records(results, format_molecule_info) + format_next_cursor(next_cursor))
     except Exception as e:
         return f"Error searching by substructure: {str(e)}"
 
@@ -89,23 +202,44 @@ def register_molecule_tools(mcp_instance: FastMCP):
     mcp = mcp_instance
     
     @mcp.tool()
-    async def search_molecule(query: str, limit: int = 5) -> str:
+    async def search_molecule(query: str, limit: int = 5, cursor: Optional[str] = None, output: str = "text",
+                              fields: Optional[List[str]] = None) -> str:
         """Search for molecules in ChEMBL database.
         
         Args:
             query: Search query string (e.g., 'aspirin', 'CHEMBL25')
             limit: Maximum number of results to return
+            cursor: Cursor from a previous call to fetch the next page
+            output: 'text' for a readable summary or 'json' for the ChEMBL records as JSON
+            fields: With output='json', the record fields to return; dotted names select nested
+                values (e.g., ['molecule_chembl_id', 'molecule_properties.full_mwt'])
         """
-        return await search_molecule_impl(query, limit)
+        return await search_molecule_impl(query, limit, cursor, output, fields)
     
     @mcp.tool()
-    async def get_molecule_details(chembl_id: str) -> str:
+    async def get_molecule_details(chembl_id: str, output: str = "text", fields: Optional[List[str]] = None) -> str:
         """Get detailed information about a molecule by its ChEMBL ID.
         
         Args:
             chembl_id: ChEMBL ID of the molecule (e.g., 'CHEMBL25')
+            output: 'text' for a readable summary or 'json' for the ChEMBL records as JSON
+            fields: With output='json', the record fields to return; dotted names select nested
+                values (e.g., ['molecule_chembl_id', 'molecule_properties.full_mwt'])
         """
-        return await get_molecule_details_impl(chembl_id)
+        return await get_molecule_details_impl(chembl_id, output, fields)
+    
+    @mcp.tool()
+    async def get_molecules_details(chembl_ids: List[str], output: str = "text",
+                                    fields: Optional[List[str]] = None) -> str:
+        """Get detailed information about many molecules at once.
+        
+        Args:
+            chembl_ids: ChEMBL IDs of the molecules (e.g., ['CHEMBL25', 'CHEMBL1201585'])
+            output: 'text' for a readable summary or 'json' for the ChEMBL records as JSON
+            fields: With output='json', the record fields to return; dotted names select nested
+                values (e.g., ['molecule_chembl_id', 'molecule_properties.full_mwt'])
+        """
+        return await get_molecules_details_impl(chembl_ids, output, fields)
     
     @mcp.tool()
     async def get_molecule_sdf(chembl_id: str) -> str:
@@ -117,27 +251,41 @@ def register_molecule_tools(mcp_instance: FastMCP):
         return await get_molecule_sdf_impl(chembl_id)
     
     @mcp.tool()
-    async def get_similar_molecules(chembl_id: str, similarity_threshold: float = 0.7) -> str:
+    async def get_similar_molecules(chembl_id: str, similarity_threshold: float = 0.7, limit: int = 5,
+                                    cursor: Optional[str] = None, output: str = "text",
+                                    fields: Optional[List[str]] = None) -> str:
         """Get molecules similar to a reference molecule.
         
         Args:
             chembl_id: ChEMBL ID of the reference molecule
             similarity_threshold: Similarity threshold (0.0 to 1.0)
+            limit: Maximum number of results to return
+            cursor: Cursor from a previous call to fetch the next page
+            output: 'text' for a readable summary or 'json' for the ChEMBL records as JSON
+            fields: With output='json', the record fields to return; dotted names select nested
+                values (e.g., ['molecule_chembl_id', 'molecule_properties.full_mwt'])
         """
-        return await get_similar_molecules_impl(chembl_id, similarity_threshold)
+        return await get_similar_molecules_impl(chembl_id, similarity_threshold, limit, cursor, output, fields)
     
     @mcp.tool()
-    async def search_molecule_substructure(smiles: str) -> str:
+    async def search_molecule_substructure(smiles: str, limit: int = 5, cursor: Optional[str] = None,
+                                           output: str = "text", fields: Optional[List[str]] = None) -> str:
         """Search for molecules containing a specific substructure.
         
         Args:
             smiles: SMILES notation of the substructure to search for
+            limit: Maximum number of results to return
+            cursor: Cursor from a previous call to fetch the next page
+            output: 'text' for a readable summary or 'json' for the ChEMBL records as JSON
+            fields: With output='json', the record fields to return; dotted names select nested
+                values (e.g., ['molecule_chembl_id', 'molecule_properties.full_mwt'])
         """
-        return await search_molecule_substructure_impl(smiles)
+        return await search_molecule_substructure_impl(smiles, limit, cursor, output, fields)
     
     return {
         "search_molecule": search_molecule,
         "get_molecule_details": get_molecule_details,
+        "get_molecules_details": get_molecules_details,
         "get_molecule_sdf": get_molecule_sdf,
         "get_similar_molecules": get_similar_molecules,
         "search_molecule_substructure": search_molecule_substructure
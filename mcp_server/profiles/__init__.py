@@ -0,0 +1,172 @@
+"""
+Composite profile tools for ChEMBL MCP server.
+
+A profile gathers in one call what an agent would otherwise collect with a
+series of tool calls (details, activity summary, assays, documents). The
+sections are independent queries fetched concurrently under one deadline,
+so a profile takes about as long as its slowest section; sections that miss
+the deadline are reported as such and the rest is returned.
+"""
+
+from typing import Awaitable, Callable, Dict, Tuple
+from mcp.server.fastmcp import FastMCP
+from ..utils import (
+    activity_client,
+    assay_client,
+    document_client,
+    format_activity_info,
+    format_assay_info,
+    format_batch_response,
+    format_records,
+    ChemblQuery,
+    MAX_PAGE_SIZE,
+)
+from ..utils.fanout import DEFAULT_DEADLINE, BranchResult, fan_out
+from ..molecules import get_molecule_details_impl
+from ..targets import get_molecule_targets_impl, get_target_details_impl, get_target_molecules_impl
+from ..assays import search_assays_impl
+from ..activities import get_bioactivities_impl
+from ..documents import _format_document_info, get_document_compounds_impl, get_document_info_impl
+
+# Reference to the MCP server instance, set when tools are registered
+mcp = None
+
+# Activities the target profile folds when neither the target index nor a cached ranking
+# answers: a few pages, so the section fits the deadline and is marked as partial
+TARGET_PROFILE_SCAN_MAX_ACTIVITIES = 2 * MAX_PAGE_SIZE
+
+# Section name -> (heading, function producing the section's text)
+Sections = Dict[str, Tuple[str, Callable[[], Awaitable[str]]]]
+
+async def _linked_documents(query: ChemblQuery, limit: int) -> str:
+    """The documents cited by a query's records, in order of first appearance."""
+    ids: Dict[str, None] = {}
+    async for record in query.only('document_chembl_id').iterate(page_size=MAX_PAGE_SIZE):
+        document_id = record.get('document_chembl_id')
+        if document_id:
+            ids.setdefault(document_id)
+            if len(ids) >= limit:
+                break
+    if not ids:
+        return "No documents found."
+    results = await document_client.get_many(list(ids))
+    return format_batch_response('document', list(ids), results, _format_document_info,
+                                 "Error retrieving document information")
+
+async def _records_section(query: ChemblQuery, limit: int, render: Callable, empty: str) -> str:
+    """The first ``limit`` records of a query, rendered one by one."""
+    records = await query.fetch(limit=limit)
+    return format_records(records, render) if records else empty
+
+def _format_profile(title: str, sections: Sections, results: Dict[str, BranchResult], deadline: float) -> str:
+    """Join the sections of a profile, marking the ones that failed or missed the deadline."""
+    parts = [title]
+    late = [sections[name][0] for name, result in results.items() if result.timed_out]
+    if late:
+        parts.append(f"Partial profile: {', '.join(late)} did not finish within {deadline:g} s.")
+    for name, (heading, _) in sections.items():
+        result = results[name]
+        if result.timed_out:
+            body = f"Not available: timed out after {deadline:g} s."
+        elif result.error is not None:
+            body = f"Error: {result.error}"
+        else:
+            body = result.value.strip()
+        parts.append(f"## {heading}\n{body}")
+    return "\n\n".join(parts)
+
+async def _profile(group: str, title: str, sections: Sections, deadline: float) -> str:
+    results = await fan_out(group, {name: call for name, (_, call) in sections.items()}, deadline)
+    return _format_profile(title, sections, results, deadline)
+
+async def get_molecule_profile_impl(chembl_id: str, limit: int = 5, deadline: float = DEFAULT_DEADLINE) -> str:
+    """Implementation for getting a molecule's details, targets, activities and documents at once."""
+    try:
+        activities = activity_client.filter(molecule_chembl_id=chembl_id)
+        sections: Sections = {
+            'details': ("Details", lambda: get_molecule_details_impl(chembl_id)),
+            'targets': ("Targets (get_molecule_targets)",
+                        lambda: get_molecule_targets_impl(chembl_id, limit, aggregate=True)),
+            'activities': ("Bioactivities (get_bioactivities)", lambda: get_bioactivities_impl(chembl_id, limit=limit)),
+            'documents': ("Documents", lambda: _linked_documents(activities, limit)),
+        }
+        return await _profile('molecule_profile', f"Profile of molecule {chembl_id}", sections, deadline)
+    except Exception as e:
+        return f"Error building molecule profile: {str(e)}"
+
+async def get_target_profile_impl(chembl_id: str, limit: int = 5, deadline: float = DEFAULT_DEADLINE) -> str:
+    """Implementation for getting a target's details, top molecules, assays and documents at once."""
+    try:
+        assays = assay_client.filter(target_chembl_id=chembl_id)
+        sections: Sections = {
+            'details': ("Details", lambda: get_target_details_impl(chembl_id)),
+            'molecules': ("Most potent molecules (get_target_molecules)",
+                          lambda: get_target_molecules_impl(
+                              chembl_id, limit, max_activities=TARGET_PROFILE_SCAN_MAX_ACTIVITIES)),
+            'assays': ("Assays (search_assays)", lambda: search_assays_impl(target_id=chembl_id, limit=limit)),
+            'documents': ("Documents", lambda: _linked_documents(assays, limit)),
+        }
+        return await _profile('target_profile', f"Profile of target {chembl_id}", sections, deadline)
+    except Exception as e:
+        return f"Error building target profile: {str(e)}"
+
+async def get_document_profile_impl(chembl_id: str, limit: int = 5, deadline: float = DEFAULT_DEADLINE) -> str:
+    """Implementation for getting a document's details, compounds, assays and activities at once."""
+    try:
+        sections: Sections = {
+            'details': ("Details", lambda: get_document_info_impl(chembl_id)),
+            'compounds': ("Compounds (get_document_compounds)",
+                          lambda: get_document_compounds_impl(chembl_id, limit)),
+            'assays': ("Assays", lambda: _records_section(
+                assay_client.filter(document_chembl_id=chembl_id), limit, format_assay_info, "No assays found.")),
+            'activities': ("Bioactivities", lambda: _records_section(
+                activity_client.filter(document_chembl_id=chembl_id), limit, format_activity_info,
+                "No bioactivities found.")),
+        }
+        return await _profile('document_profile', f"Profile of document {chembl_id}", sections, deadline)
+    except Exception as e:
+        return f"Error building document profile: {str(e)}"
+
+def register_profile_tools(mcp_instance: FastMCP):
+    """Register the composite profile tools with the MCP server."""
+    global mcp
+    mcp = mcp_instance
+
+    @mcp.tool()
+    async def get_molecule_profile(chembl_id: str, limit: int = 5, deadline: float = DEFAULT_DEADLINE) -> str:
+        """Get a molecule's details, targets, bioactivities and documents in one call.
+
+        Args:
+            chembl_id: ChEMBL ID of the molecule (e.g., 'CHEMBL25')
+            limit: Maximum number of entries per section
+            deadline: Seconds to wait; sections not ready by then are reported as missing
+        """
+        return await get_molecule_profile_impl(chembl_id, limit, deadline)
+
+    @mcp.tool()
+    async def get_target_profile(chembl_id: str, limit: int = 5, deadline: float = DEFAULT_DEADLINE) -> str:
+        """Get a target's details, most potent molecules, assays and documents in one call.
+
+        Args:
+            chembl_id: ChEMBL ID of the target (e.g., 'CHEMBL230')
+            limit: Maximum number of entries per section
+            deadline: Seconds to wait; sections not ready by then are reported as missing
+        """
+        return await get_target_profile_impl(chembl_id, limit, deadline)
+
+    @mcp.tool()
+    async def get_document_profile(chembl_id: str, limit: int = 5, deadline: float = DEFAULT_DEADLINE) -> str:
+        """Get a document's details, compounds, assays and bioactivities in one call.
+
+        Args:
+            chembl_id: ChEMBL ID of the document
+            limit: Maximum number of entries per section
+            deadline: Seconds to wait; sections not ready by then are reported as missing
+        """
+        return await get_document_profile_impl(chembl_id, limit, deadline)
+
+    return {
+        "get_molecule_profile": get_molecule_profile,
+        "get_target_profile": get_target_profile,
+        "get_document_profile": get_document_profile,
+    }
@@ -2,88 +2,163 @@
 Target-related functions for ChEMBL MCP server.
 """
 
-from typing import Dict, Any, List, Optional
+import asyncio
+import os
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
 from mcp.server.fastmcp import FastMCP
-from ..utils import target_client, activity_client, format_target_info
+from ..utils import (
+    target_client,
+    activity_client,
+    format_target_info,
+    format_target_components,
+    format_records,
+    format_batch_response,
+    normalize_chembl_ids,
+    ChemblQuery,
+    MAX_PAGE_SIZE,
+    paginate,
+    format_next_cursor,
+    ListSource,
+    QuerySource,
+    ResultSource,
+    StreamSource,
+    NO_MORE_RESULTS,
+    wants_json,
+    select_fields,
+    json_batch,
+    json_record,
+    json_records,
+    load_computed,
+    cached_computed,
+)
 
 # Reference to the MCP server instance, set when tools are registered
 mcp = None
 
-async def search_targets_impl(target_name: Optional[str] = None, uniprot_id: Optional[str] = None, limit: int = 5) -> str:
+# Activity fields needed to summarize a molecule's targets
+TARGET_SCAN_FIELDS = (
+    'target_chembl_id', 'target_pref_name', 'target_organism',
+    'standard_type', 'standard_value', 'standard_units', 'pchembl_value',
+)
+
+# Activity fields needed to summarize a target's molecules
+MOLECULE_SCAN_FIELDS = (
+    'molecule_chembl_id', 'standard_type', 'standard_value', 'standard_units', 'pchembl_value',
+)
+
+# Page size used when scanning a molecule's activities
+TARGET_SCAN_PAGE_SIZE = MAX_PAGE_SIZE
+
+# Activities folded per target when no target index answers; larger targets are ranked on a prefix
+TARGET_SCAN_MAX_ACTIVITIES = int(os.environ.get("CHEMBL_TARGET_SCAN_MAX_ACTIVITIES", "50000"))
+
+# Records matched by the local name index per search; later pages are served from this list
+NAME_SEARCH_MAX_HITS = 500
+
+async def _target_records(chembl_ids: List[str]) -> List[Dict[str, Any]]:
+    """Records for a page of target IDs, in order, skipping any not found."""
+    records = await target_client.get_many(chembl_ids)
+    return [records[chembl_id] for chembl_id in chembl_ids if isinstance(records.get(chembl_id), dict)]
+
+async def _target_search_source(target_name: Optional[str], uniprot_id: Optional[str],
+                                fields: Optional[List[str]] = None) -> ResultSource:
+    """Targets matching a name from the local name index, or the remote filter on a miss."""
+    from ..utils.name_index import lookup_names
+    
+    if target_name and not uniprot_id:
+        chembl_ids = await asyncio.to_thread(lookup_names, 'target', target_name, NAME_SEARCH_MAX_HITS)
+        if chembl_ids:
+            return ListSource(chembl_ids, resolve=_target_records)
+    filters = {}
+    if target_name:
+        filters['target_pref_name__icontains'] = target_name
+    if uniprot_id:
+        filters['target_components__accession'] = uniprot_id
+    return QuerySource(select_fields(target_client.filter(**filters), fields))
+
+async def search_targets_impl(target_name: Optional[str] = None, uniprot_id: Optional[str] = None, limit: int = 5,
+                              cursor: Optional[str] = None,
+                              output: str = "text", fields: Optional[List[str]] = None) -> str:
     """Implementation for searching targets."""
     try:
-        filters = {}
-        if target_name:
-            filters['target_pref_name__icontains'] = target_name
-        if uniprot_id:
-            filters['target_components__accession'] = uniprot_id
-            
-        results = target_client.filter(**filters)
+        structured = wants_json(output)
+        fields = fields if structured else None
+        results, next_cursor, _ = await paginate(
+            'search_targets', lambda: _target_search_source(target_name, uniprot_id, fields), limit, cursor)
         
+        if structured:
+            return json_records(results, fields, next_cursor)
         if not results:
-            return "No targets found matching the criteria."
-            
-        formatted_results = []
-        for tgt in results[:limit]:
-            formatted_results.append(format_target_info(tgt))
+            return NO_MORE_RESULTS if cursor else "No targets found matching the criteria."
             
-        return "\n---\n".join(formatted_results)
+        return format_records(results, format_target_info) + format_next_cursor(next_cursor)
     except Exception as e:
         return f"Error searching targets: {str(e)}"
 
-async def get_target_details_impl(chembl_id: str) -> str:
+def _format_target_details(result: Dict[str, Any]) -> str:
+    """Format a target record together with its components."""
+    components = format_target_components(result.get('target_components', []))
+    return f"Target Details:\n{format_target_info(result)}{components}"
+
+async def get_target_details_impl(chembl_id: str, output: str = "text", fields: Optional[List[str]] = None) -> str:
     """Implementation for getting target details."""
     try:
-        result = target_client.get(chembl_id)
+        if wants_json(output):
+            if not fields:
+                return await target_client.get_raw(chembl_id)
+            return json_record(await target_client.get(chembl_id), fields)
+            
+        result = await target_client.get(chembl_id)
         
         if not result:
             return f"No target found with ID {chembl_id}"
             
-        # Get components information if available
-        components = result.get('target_components', [])
-        
-        # Format the target details
-        target_info = format_target_info(result)
-        
-        # Add component information if available
-        if components:
-            component_info = "\nComponents:\n"
-            for i, comp in enumerate(components, 1):
-                component_info += f"{i}. {comp.get('component_description', 'N/A')}"
-                accession = comp.get('accession', None)
-                if accession:
-                    component_info += f" (UniProt: {accession})"
-                component_info += "\n"
-            target_info += component_info
-        
-        return f"Target Details:\n{target_info}"
+        return _format_target_details(result)
     except Exception as e:
         return f"Error retrieving target details: {str(e)}"
 
-async def get_molecule_targets_impl(chembl_id: str) -> str:
-    """Implementation for getting molecule targets."""
+async def get_targets_details_impl(chembl_ids: List[str], output: str = "text",
+                                   fields: Optional[List[str]] = None) -> str:
+    """Implementation for getting details of many targets in one call."""
     try:
-        results = activity_client.filter(molecule_chembl_id=chembl_id)
+        structured = wants_json(output)
+        ids = normalize_chembl_ids(chembl_ids)
+        if not ids and not structured:
+            return "No target IDs provided."
+            
+        results = await target_client.get_many(ids)
+        if structured:
+            return json_batch(ids, results, fields)
+        return format_batch_response('target', ids, results, _format_target_details,
+                                     "Error retrieving target details")
+    except Exception as e:
+        return f"Error retrieving target details: {str(e)}"
+
+async def get_molecule_targets_impl(chembl_id: str, limit: int = 5, aggregate: bool = False,
+                                    cursor: Optional[str] = None) -> str:
+    """Implementation for getting molecule targets.
+    
+    By default the activity stream is scanned only until ``limit`` distinct
+    targets have been seen; a cursor resumes the scan where it stopped. With
+    ``aggregate`` the full stream is folded into per-target activity counts
+    and best potency without keeping the records. A local target index
+    answers both modes without scanning, with targets ranked by activity
+    count and their best activity shown.
+    """
+    try:
+        query = activity_client.filter(molecule_chembl_id=chembl_id).only(*TARGET_SCAN_FIELDS)
         
-        if not results:
-            return f"No target information found for molecule {chembl_id}"
+        if aggregate:
+            return await _aggregate_molecule_targets(chembl_id, query, limit, cursor)
             
-        targets = {}
-        for res in results:
-            target_id = res.get('target_chembl_id')
-            if target_id and target_id not in targets:
-                targets[target_id] = {
-                    'name': res.get('target_pref_name', 'N/A'),
-                    'organism': res.get('target_organism', 'N/A'),
-                    'activity_type': res.get('standard_type', 'N/A'),
-                    'activity_value': f"{res.get('standard_value', 'N/A')} {res.get('standard_units', '')}"
-                }
+        targets, next_cursor, _ = await paginate(
+            'get_molecule_targets', lambda: _molecule_targets_source(chembl_id, query, False), limit, cursor)
                 
         if not targets:
-            return f"No target information found for molecule {chembl_id}"
+            return NO_MORE_RESULTS if cursor else f"No target information found for molecule {chembl_id}"
             
         formatted_results = []
-        for target_id, info in list(targets.items())[:5]:  # Limit to 5 targets
+        for target_id, info in targets:
             target_info = f"""
 Target: {info['name']}
 ChEMBL ID: {target_id}
@@ -92,46 +167,271 @@ Activity: {info['activity_type']} = {info['activity_value']}
 """
             formatted_results.append(target_info)
             
-        return "\n---\n".join(formatted_results)
+        return "\n---\n".join(formatted_results) + format_next_cursor(next_cursor)
     except Exception as e:
         return f"Error retrieving target information: {str(e)}"
 
+def _target_index():
+    """The local target index, if one is configured."""
+    # Imported on first use: the index modules pull in NumPy
+    from ..utils.target_index import get_target_index
+    
+    return get_target_index()
+
+async def _molecule_targets_source(chembl_id: str, query: ChemblQuery, aggregate: bool) -> ResultSource:
+    """A molecule's targets from the local index, or from a scan of its activities."""
+    index = _target_index()
+    if index is not None:
+        ranked = index.molecule_targets(chembl_id.strip().upper())
+        if ranked is not None:
+            return ListSource(ranked)
+    if aggregate:
+        # Only the ranking is cached; the activity pages are scanned past the cache
+        ranked = await load_computed(f"molecule_targets/{chembl_id}.json",
+                                     lambda: _rank_molecule_targets(query))
+        return ListSource([(target_id, info) for target_id, info in ranked])
+    return StreamSource(_distinct_targets(query))
+
+async def _distinct_targets(query: ChemblQuery) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Stream each target the first time it appears in a molecule's activities."""
+    seen = set()
+    async for res in query.iterate(page_size=TARGET_SCAN_PAGE_SIZE):
+        target_id = res.get('target_chembl_id')
+        if target_id and target_id not in seen:
+            seen.add(target_id)
+            yield target_id, {
+                'name': res.get('target_pref_name', 'N/A'),
+                'organism': res.get('target_organism', 'N/A'),
+                'activity_type': res.get('standard_type', 'N/A'),
+                'activity_value': f"{res.get('standard_value', 'N/A')} {res.get('standard_units', '')}"
+            }
+
+async def _rank_molecule_targets(query: ChemblQuery) -> List[Tuple[str, Dict[str, Any]]]:
+    """Fold a molecule's activities into per-target counts and best potency, ranked by count."""
+    targets = {}
+    async for res in query.iterate(page_size=TARGET_SCAN_PAGE_SIZE, cache=False):
+        target_id = res.get('target_chembl_id')
+        if not target_id:
+            continue
+        info = targets.get(target_id)
+        if info is None:
+            info = targets[target_id] = {
+                'name': res.get('target_pref_name', 'N/A'),
+                'organism': res.get('target_organism', 'N/A'),
+                'count': 0,
+                'best_pchembl': None,
+                'best_activity': 'N/A',
+            }
+        _fold_activity(info, res)
+            
+    for info in targets.values():
+        info['total'] = len(targets)
+    return sorted(targets.items(), key=lambda item: (-item[1]['count'], item[0]))
+
+async def _aggregate_molecule_targets(chembl_id: str, query: ChemblQuery, limit: int,
+                                      cursor: Optional[str] = None) -> str:
+    """Report a molecule's targets ranked by activity count, one page at a time."""
+    ranked, next_cursor, _ = await paginate(
+        'get_molecule_targets', lambda: _molecule_targets_source(chembl_id, query, True), limit, cursor)
+            
+    if not ranked:
+        return NO_MORE_RESULTS if cursor else f"No target information found for molecule {chembl_id}"
+        
+    formatted_results = []
+    for target_id, info in ranked:
+        formatted_results.append(f"""
+Target: {info['name']}
+ChEMBL ID: {target_id}
+Organism: {info['organism']}
+Activities: {info['count']}
+Best pChEMBL: {_format_best(info)}
+""")
+        
+    return (f"Targets of {chembl_id} ({ranked[0][1]['total']} total, ranked by activity count):\n"
+            + "\n---\n".join(formatted_results) + format_next_cursor(next_cursor))
+
+async def get_target_molecules_impl(chembl_id: str, limit: int = 5, cursor: Optional[str] = None,
+                                    max_activities: Optional[int] = None) -> str:
+    """Implementation for getting the molecules measured against a target, most potent first.
+    
+    Served from the local target index when one is configured; otherwise the
+    target's activities are folded into per-molecule activity counts and best
+    potency. ``max_activities`` bounds that scan for callers on a deadline.
+    """
+    try:
+        query = activity_client.filter(target_chembl_id=chembl_id).only(*MOLECULE_SCAN_FIELDS)
+        ranked, next_cursor, _ = await paginate(
+            'get_target_molecules', lambda: _target_molecules_source(chembl_id, query, max_activities), limit, cursor)
+        
+        if not ranked:
+            return NO_MORE_RESULTS if cursor else f"No molecule activities found for target {chembl_id}"
+            
+        formatted_results = []
+        for molecule_id, info in ranked:
+            formatted_results.append(f"""
+ChEMBL ID: {molecule_id}
+Activities: {info['count']}
+Best pChEMBL: {_format_best(info)}
+""")
+            
+        header = f"Molecules tested against {chembl_id} ({ranked[0][1]['total']} total, ranked by best pChEMBL)"
+        if ranked[0][1].get('truncated'):
+            header += (f"\nNote: only the first {ranked[0][1]['scanned']} activities of this target were "
+                       "scanned; configure a target index (CHEMBL_TARGET_INDEX) for complete results")
+        return header + ":\n" + "\n---\n".join(formatted_results) + format_next_cursor(next_cursor)
+    except Exception as e:
+        return f"Error retrieving target molecules: {str(e)}"
+
+async def _target_molecules_source(chembl_id: str, query: ChemblQuery,
+                                   max_activities: Optional[int] = None) -> ListSource:
+    """A target's molecules from the local index, or folded from a scan of its activities.
+
+    The ranking is cached per target. A caller on a budget passes a smaller
+    ``max_activities``: it gets the full ranking if one is cached, else one
+    folded from (and cached for) that many activities.
+    """
+    index = _target_index()
+    if index is not None:
+        ranked = index.target_molecules(chembl_id.strip().upper())
+        if ranked is not None:
+            return ListSource(ranked)
+    
+    path = f"target_molecules/{chembl_id}.json"
+    # Only the ranking is cached; the activity pages are scanned past the cache
+    ranked = None
+    params = None
+    if max_activities is not None and max_activities < TARGET_SCAN_MAX_ACTIVITIES:
+        ranked = await cached_computed(path)
+        params = {'max_activities': max_activities}
+    else:
+        max_activities = TARGET_SCAN_MAX_ACTIVITIES
+    if ranked is None:
+        ranked = await load_computed(path, lambda: _rank_target_molecules(query, max_activities), params)
+    return ListSource([(molecule_id, info) for molecule_id, info in ranked])
+
+async def _rank_target_molecules(query: ChemblQuery, max_activities: int) -> List[Tuple[str, Dict[str, Any]]]:
+    """Fold up to ``max_activities`` of a target's activities into per-molecule summaries, ranked by potency."""
+    molecules = {}
+    scanned = 0
+    truncated = False
+    # A bounded scan past the response cache: popular targets have hundreds of thousands of activities
+    async for res in query.iterate(limit=max_activities + 1, page_size=TARGET_SCAN_PAGE_SIZE, cache=False):
+        if scanned == max_activities:
+            truncated = True
+            break
+        scanned += 1
+        molecule_id = res.get('molecule_chembl_id')
+        if not molecule_id:
+            continue
+        info = molecules.get(molecule_id)
+        if info is None:
+            info = molecules[molecule_id] = {'count': 0, 'best_pchembl': None, 'best_activity': 'N/A'}
+        _fold_activity(info, res)
+        
+    for info in molecules.values():
+        info['total'] = len(molecules)
+        info['scanned'] = scanned
+        info['truncated'] = truncated
+    return sorted(molecules.items(), key=lambda item: (
+        item[1]['best_pchembl'] is None, -(item[1]['best_pchembl'] or 0), -item[1]['count'], item[0]))
+
+def _fold_activity(info: Dict[str, Any], res: Dict[str, Any]) -> None:
+    """Count an activity into a summary, keeping the one with the best pChEMBL."""
+    info['count'] += 1
+    pchembl = _to_float(res.get('pchembl_value'))
+    if pchembl is not None and (info['best_pchembl'] is None or pchembl > info['best_pchembl']):
+        info['best_pchembl'] = pchembl
+        info['best_activity'] = (f"{res.get('standard_type', 'N/A')} = "
+                                 f"{res.get('standard_value', 'N/A')} {res.get('standard_units', '')}")
+
+def _format_best(info: Dict[str, Any]) -> str:
+    """Best pChEMBL of a summary with the activity that reached it."""
+    if info['best_pchembl'] is None:
+        return 'N/A'
+    return f"{info['best_pchembl']:.2f} ({info['best_activity']})"
+
+def _to_float(value: Any) -> Optional[float]:
+    """Parse a numeric ChEMBL field, returning None if it is missing or invalid."""
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
 def register_target_tools(mcp_instance: FastMCP):
     """Register all target-related tools with the MCP server."""
     global mcp
     mcp = mcp_instance
     
     @mcp.tool()
-    async def search_targets(target_name: Optional[str] = None, uniprot_id: Optional[str] = None, limit: int = 5) -> str:
+    async def search_targets(target_name: Optional[str] = None, uniprot_id: Optional[str] = None, limit: int = 5,
+                             cursor: Optional[str] = None, output: str = "text",
+                             fields: Optional[List[str]] = None) -> str:
         """Search for targets in ChEMBL database.
         
         Args:
             target_name: Name of the target (optional)
             uniprot_id: UniProt accession ID (optional)
             limit: Maximum number of results to return
+            cursor: Cursor from a previous call to fetch the next page
+            output: 'text' for a readable summary or 'json' for the ChEMBL records as JSON
+            fields: With output='json', the record fields to return; dotted names select nested
+                values (e.g., ['target_chembl_id', 'target_components.accession'])
         """
-        return await search_targets_impl(target_name, uniprot_id, limit)
+        return await search_targets_impl(target_name, uniprot_id, limit, cursor, output, fields)
     
     @mcp.tool()
-    async def get_target_details(chembl_id: str) -> str:
+    async def get_target_details(chembl_id: str, output: str = "text", fields: Optional[List[str]] = None) -> str:
         """Get detailed information about a target by its ChEMBL ID.
         
         Args:
             chembl_id: ChEMBL ID of the target
+            output: 'text' for a readable summary or 'json' for the ChEMBL records as JSON
+            fields: With output='json', the record fields to return; dotted names select nested
+                values (e.g., ['target_chembl_id', 'target_components.accession'])
         """
-        return await get_target_details_impl(chembl_id)
+        return await get_target_details_impl(chembl_id, output, fields)
     
     @mcp.tool()
-    async def get_molecule_targets(chembl_id: str) -> str:
+    async def get_targets_details(chembl_ids: List[str], output: str = "text",
+                                  fields: Optional[List[str]] = None) -> str:
+        """Get detailed information about many targets at once.
+        
+        Args:
+            chembl_ids: ChEMBL IDs of the targets
+            output: 'text' for a readable summary or 'json' for the ChEMBL records as JSON
+            fields: With output='json', the record fields to return; dotted names select nested
+                values (e.g., ['target_chembl_id', 'target_components.accession'])
+        """
+        return await get_targets_details_impl(chembl_ids, output, fields)
+    
+    @mcp.tool()
+    async def get_molecule_targets(chembl_id: str, limit: int = 5, aggregate: bool = False,
+                                   cursor: Optional[str] = None) -> str:
         """Get known targets for a molecule by its ChEMBL ID.
         
         Args:
             chembl_id: ChEMBL ID of the molecule (e.g., 'CHEMBL25')
+            limit: Maximum number of targets to return
+            aggregate: Scan all activities and report per-target activity counts and best pChEMBL
+            cursor: Cursor from a previous call to fetch the next page
+        """
+        return await get_molecule_targets_impl(chembl_id, limit, aggregate, cursor)
+    
+    @mcp.tool()
+    async def get_target_molecules(chembl_id: str, limit: int = 5, cursor: Optional[str] = None) -> str:
+        """Get the molecules measured against a target, most potent first.
+        
+        Args:
+            chembl_id: ChEMBL ID of the target (e.g., 'CHEMBL230')
+            limit: Maximum number of molecules to return
+            cursor: Cursor from a previous call to fetch the next page
         """
-        return await get_molecule_targets_impl(chembl_id)
+        return await get_target_molecules_impl(chembl_id, limit, cursor)
     
     return {
         "search_targets": search_targets,
         "get_target_details": get_target_details,
+        "get_targets_details": get_targets_details,
         "get_molecule_targets": get_molecule_targets,
+        "get_target_molecules": get_target_molecules,
     } 
\ No newline at end of file
@@ -0,0 +1,309 @@
+"""
+Pluggable data backends behind the ChEMBL resource handles.
+
+Resource handles and queries (see ``client.py``) describe *what* to fetch; a
+backend decides *how*. The REST backend (the default) talks to the ChEMBL web
+services through the shared transport and response cache, coalescing
+identical concurrent requests. The SQLite backend
+(see ``sqlite_backend.py``) answers the same queries from a local ChEMBL
+release dump. Select one with ``CHEMBL_BACKEND`` or ``configure_backend``.
+"""
+
+import asyncio
+import json
+import os
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from .cache import MISSING, RawJSON, as_json_text, get_cache, make_key, unwrap
+from .singleflight import get_single_flight
+from .transport import ChemblAPIError, CircuitOpenError, get_transport
+
+if TYPE_CHECKING:
+    from .client import ChemblQuery, ChemblResource
+
+# Backend used unless configured otherwise ('rest' or 'sqlite')
+DEFAULT_BACKEND = os.environ.get("CHEMBL_BACKEND", "rest")
+
+# Path of the local ChEMBL SQLite dump used by the 'sqlite' backend
+DEFAULT_SQLITE_PATH = os.environ.get("CHEMBL_SQLITE_PATH") or None
+
+# Errors that are reported per ID by bulk lookups instead of failing the whole call
+BACKEND_ERRORS = (httpx.HTTPError, ChemblAPIError, CircuitOpenError, ValueError)
+
+
+class ChemblBackend:
+    """Interface implemented by every data backend."""
+
+    name = "base"
+
+    async def get(self, resource: "ChemblResource", chembl_id: str) -> Any:
+        """Fetch one record (parsed JSON, or text for other formats); None if not found."""
+        raise NotImplementedError
+
+    async def fetch_page(self, query: "ChemblQuery", offset: int, limit: int,
+                         cache: bool = True) -> Tuple[List[Dict[str, Any]], bool]:
+        """Fetch one page of a list query.
+
+        Args:
+            query: The list query
+            offset: Number of records to skip
+            limit: Page size
+            cache: Keep the page in the response cache (bulk scans pass False)
+
+        Returns:
+            The records of the page and whether more records follow
+        """
+        raise NotImplementedError
+
+    async def get_raw(self, resource: "ChemblResource", chembl_id: str) -> str:
+        """Fetch one record as JSON text ('null' if not found)."""
+        return json.dumps(await self.get(resource, chembl_id))
+
+    async def release(self) -> Optional[str]:
+        """ChEMBL release served by this backend (e.g., 'ChEMBL_33'), if known."""
+        return None
+
+    async def get_many(self, resource: "ChemblResource", chembl_ids: List[str], id_field: str,
+                       chunk_size: int, concurrency: int) -> Dict[str, Any]:
+        """Fetch many records by identifier with chunked ``__in`` queries.
+
+        Returns:
+            Mapping of identifier to its record, None if not found, or the
+            exception raised while fetching its chunk
+        """
+        results: Dict[str, Any] = {}
+        pending = []
+        for chembl_id in dict.fromkeys(chembl_ids):
+            value = await self._lookup_cached(resource, chembl_id)
+            if value is MISSING:
+                pending.append(chembl_id)
+            else:
+                results[chembl_id] = value
+
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def fetch_chunk(chunk: List[str]) -> None:
+            async with semaphore:
+                try:
+                    records = await resource.filter(**{f"{id_field}__in": chunk}).fetch(len(chunk))
+                except BACKEND_ERRORS as e:
+                    for chembl_id in chunk:
+                        results[chembl_id] = e
+                    return
+            found = {record.get(id_field): record for record in records}
+            for chembl_id in chunk:
+                results[chembl_id] = found.get(chembl_id)
+                await self._store_cached(resource, chembl_id, results[chembl_id])
+
+        chunk_size = max(1, chunk_size)
+        await asyncio.gather(*(fetch_chunk(pending[i:i + chunk_size])
+                               for i in range(0, len(pending), chunk_size)))
+        return results
+
+    async def _lookup_cached(self, resource: "ChemblResource", chembl_id: str) -> Any:
+        """Hook for backends with a record cache; returns MISSING on a miss."""
+        return MISSING
+
+    async def _store_cached(self, resource: "ChemblResource", chembl_id: str, record: Any) -> None:
+        """Hook for backends with a record cache."""
+
+    def close(self) -> None:
+        """Release any resources held by the backend."""
+
+
+async def _check_release() -> None:
+    """Re-check the ChEMBL release if the check interval has elapsed."""
+    if get_cache().claim_release_check():
+        await _refresh_release()
+
+
+async def _refresh_release() -> None:
+    """Look up the current ChEMBL release so stale cache entries are dropped."""
+    try:
+        response = await get_transport().request("status.json")
+        release = response.json().get("chembl_db_version") if response is not None else None
+    except BACKEND_ERRORS:
+        release = None
+    await get_cache().set_release(release)
+
+
+async def load(path: str, params: Optional[Dict[str, Any]] = None, raw: bool = False) -> Any:
+    """Fetch a REST payload through the response cache.
+
+    Args:
+        path: Path relative to the base URL, ending in the format extension
+        params: Optional query string parameters
+        raw: Return the payload as JSON text, passed through from the API
+            response or the cache without re-serializing it
+
+    Returns:
+        Parsed JSON for '.json' paths, raw text otherwise, or None if not found
+        (with ``raw``, the JSON text of any of these)
+    """
+    await _check_release()
+    cache = get_cache()
+    key = make_key(path, params)
+    value = await cache.get(key)
+    if value is MISSING:
+        # Identical requests already on their way are awaited rather than repeated
+        value = await get_single_flight().do(key, lambda: _fetch(key, path, params))
+    return as_json_text(value) if raw else unwrap(value)
+
+
+async def load_uncached(path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+    """Fetch a REST payload without reading or filling the response cache.
+
+    For bulk scans (exports, activity folds) whose pages are read once: they
+    would otherwise evict the hot records from the cache and grow its disk tier.
+
+    Returns:
+        Parsed JSON for '.json' paths, raw text otherwise, or None if not found
+    """
+    response = await get_transport().request(path, params)
+    if response is None:
+        return None
+    return response.json() if path.endswith(".json") else response.text
+
+
+async def load_computed(path: str, compute: Callable[[], Awaitable[Any]],
+                        params: Optional[Dict[str, Any]] = None) -> Any:
+    """A value folded from a bulk scan, cached under ``path`` like a response.
+
+    Only the result is cached, not the pages it was computed from (the scan
+    reads them with ``cache=False``), and identical computations running at
+    the same time are coalesced into one scan.
+
+    Args:
+        path: Cache path of the result (its first segment selects the TTL)
+        compute: Coroutine function computing a JSON-serializable value
+        params: Parameters of the computation, part of the cache key
+
+    Returns:
+        The computed or cached value
+    """
+    cache = get_cache()
+    await cache.set_release(await get_backend().release())
+    key = make_key(path, params)
+    value = await cache.get(key)
+    if value is MISSING:
+        async def run() -> Any:
+            result = await compute()
+            await cache.set(key, path, result)
+            return result
+
+        value = await get_single_flight().do(key, run)
+    return unwrap(value)
+
+
+async def cached_computed(path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+    """The value ``load_computed`` cached under ``path``, or None without computing it."""
+    cache = get_cache()
+    await cache.set_release(await get_backend().release())
+    value = await cache.get(make_key(path, params))
+    return None if value is MISSING else unwrap(value)
+
+
+async def _fetch(key: str, path: str, params: Optional[Dict[str, Any]]) -> Any:
+    """Fetch a REST payload and store it in the response cache."""
+    response = await get_transport().request(path, params)
+    if response is None:
+        value = None
+    else:
+        value = RawJSON(response.text) if path.endswith(".json") else response.text
+    await get_cache().set(key, path, value)
+    return value
+
+
+def _extract_items(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Return the record list from a paginated ChEMBL response."""
+    for key, value in data.items():
+        if key != "page_meta" and isinstance(value, list):
+            return value
+    return []
+
+
+class RestBackend(ChemblBackend):
+    """Backend for the ChEMBL REST API, fronted by the response cache."""
+
+    name = "rest"
+
+    async def get(self, resource: "ChemblResource", chembl_id: str) -> Any:
+        return await load(resource.record_path(chembl_id))
+
+    async def get_raw(self, resource: "ChemblResource", chembl_id: str) -> str:
+        return await load(resource.record_path(chembl_id), raw=True)
+
+    async def fetch_page(self, query: "ChemblQuery", offset: int, limit: int,
+                         cache: bool = True) -> Tuple[List[Dict[str, Any]], bool]:
+        path, params = query.endpoint()
+        params = {**params, "limit": limit, "offset": offset}
+        data = await (load(path, params) if cache else load_uncached(path, params))
+        if data is None:
+            return [], False
+        return _extract_items(data), bool((data.get("page_meta") or {}).get("next"))
+
+    async def release(self) -> Optional[str]:
+        await _check_release()
+        return get_cache().release
+
+    async def get_many(self, resource: "ChemblResource", chembl_ids: List[str], id_field: str,
+                       chunk_size: int, concurrency: int) -> Dict[str, Any]:
+        await _check_release()
+        return await super().get_many(resource, chembl_ids, id_field, chunk_size, concurrency)
+
+    async def _lookup_cached(self, resource: "ChemblResource", chembl_id: str) -> Any:
+        value = await get_cache().get(make_key(resource.record_path(chembl_id)))
+        return value if value is MISSING else unwrap(value)
+
+    async def _store_cached(self, resource: "ChemblResource", chembl_id: str, record: Any) -> None:
+        path = resource.record_path(chembl_id)
+        await get_cache().set(make_key(path), path, record)
+
+
+def create_backend(name: str = DEFAULT_BACKEND, **options: Any) -> ChemblBackend:
+    """Build a backend by name.
+
+    Args:
+        name: 'rest' or 'sqlite'
+        **options: Backend arguments (e.g., path for 'sqlite')
+    """
+    if name == "rest":
+        return RestBackend()
+    if name == "sqlite":
+        from .sqlite_backend import SqliteBackend
+        options.setdefault("path", DEFAULT_SQLITE_PATH)
+        if not options["path"]:
+            raise ValueError("The sqlite backend requires a database path (set CHEMBL_SQLITE_PATH)")
+        return SqliteBackend(**options)
+    raise ValueError(f"Unknown ChEMBL backend '{name}' (expected 'rest' or 'sqlite')")
+
+
+_backend: Optional[ChemblBackend] = None
+
+
+def get_backend() -> ChemblBackend:
+    """Return the backend shared by all resource handles."""
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+    return _backend
+
+
+def configure_backend(name: str = DEFAULT_BACKEND, **options: Any) -> ChemblBackend:
+    """Replace the shared backend.
+
+    Args:
+        name: 'rest' or 'sqlite'
+        **options: Backend arguments (e.g., path for 'sqlite')
+
+    Returns:
+        The newly installed backend
+    """
+    global _backend
+    backend = create_backend(name, **options)
+    if _backend is not None:
+        _backend.close()
+    _backend = backend
+    return _backend
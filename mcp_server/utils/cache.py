@@ -0,0 +1,349 @@
+"""
+Tiered response cache for ChEMBL lookups.
+
+Responses are kept in a bounded in-process LRU and, optionally, in a persistent
+SQLite file shared across restarts and across server worker processes. Every entry is tagged with the ChEMBL
+release it was fetched from; when the release changes, older entries are
+dropped from both tiers.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Sentinel returned on a cache miss (None is a valid cached value: "not found")
+MISSING = object()
+
+# Default number of entries kept in memory
+DEFAULT_MAX_ENTRIES = int(os.environ.get("CHEMBL_CACHE_SIZE", "10000"))
+
+# Optional path of the on-disk tier
+DEFAULT_CACHE_PATH = os.environ.get("CHEMBL_CACHE_PATH") or None
+
+# How often (seconds) to re-check the ChEMBL release version
+DEFAULT_RELEASE_CHECK_INTERVAL = float(os.environ.get("CHEMBL_RELEASE_CHECK_INTERVAL", "3600"))
+
+# Time-to-live (seconds) per entity, keyed by the first path segment
+DEFAULT_TTLS: Dict[str, float] = {
+    "molecule": 7 * 86400,
+    "target": 7 * 86400,
+    "assay": 7 * 86400,
+    "document": 30 * 86400,
+    "activity": 86400,
+    # Rankings folded from a molecule's or a target's activities
+    "molecule_targets": 86400,
+    "target_molecules": 86400,
+    "similarity": 86400,
+    "substructure": 86400,
+}
+
+# Time-to-live (seconds) for anything not listed in DEFAULT_TTLS
+DEFAULT_TTL = 3600.0
+
+# Time-to-live (seconds) for "not found" answers
+NEGATIVE_TTL = 300.0
+
+# Seconds to wait for another process's write lock on the on-disk tier
+DISK_LOCK_TIMEOUT = 30.0
+
+
+class RawJSON:
+    """A JSON payload kept as the text it arrived in and parsed on first use.
+
+    Responses are cached in this form so a caller that wants JSON (e.g., a
+    tool in structured output mode) can pass the text through without a
+    parse/serialize round trip, while the others pay for one parse.
+    """
+
+    __slots__ = ("text", "_value")
+
+    def __init__(self, text: str, value: Any = MISSING):
+        self.text = text
+        self._value = value
+
+    @property
+    def value(self) -> Any:
+        if self._value is MISSING:
+            self._value = json.loads(self.text)
+        return self._value
+
+
+def unwrap(value: Any) -> Any:
+    """The parsed value of a cached entry."""
+    return value.value if isinstance(value, RawJSON) else value
+
+
+def as_json_text(value: Any) -> str:
+    """The JSON text of a cached entry, serializing only values not kept as text."""
+    return value.text if isinstance(value, RawJSON) else json.dumps(value)
+
+
+def make_key(path: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Build a normalized cache key from a request path and its parameters."""
+    if not params:
+        return path
+    query = "&".join(f"{k}={params[k]}" for k in sorted(params))
+    return f"{path}?{query}"
+
+
+class CacheStats:
+    """Counters describing cache effectiveness."""
+
+    def __init__(self):
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+class LRUCache:
+    """Bounded in-memory LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, now: float) -> Tuple[Any, bool]:
+        """Return (value, expired); value is MISSING if the key is absent or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return MISSING, False
+        value, expires_at = entry
+        if expires_at <= now:
+            del self._entries[key]
+            return MISSING, True
+        self._entries.move_to_end(key)
+        return value, False
+
+    def set(self, key: str, value: Any, expires_at: float) -> int:
+        """Store a value and return the number of entries evicted to make room."""
+        if self.max_entries <= 0:
+            return 0
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        evicted = 0
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            evicted += 1
+        return evicted
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class DiskCache:
+    """Persistent SQLite tier; values are stored as JSON text."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        # Several server processes may share the file: wait out their write
+        # locks, and use WAL so readers never block on a writer
+        self._conn = sqlite3.connect(path, timeout=DISK_LOCK_TIMEOUT, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, release TEXT, expires_at REAL, value TEXT)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str, release: Optional[str], now: float) -> Tuple[Any, float]:
+        """Return (value, expires_at); value is MISSING if absent, stale or expired.
+
+        Values come back as unparsed ``RawJSON``.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT release, expires_at, value FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[0] != release or row[1] <= now:
+            return MISSING, 0.0
+        return RawJSON(row[2]), row[1]
+
+    def set(self, key: str, value: Any, release: Optional[str], expires_at: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, release, expires_at, value) VALUES (?, ?, ?, ?)",
+                (key, release, expires_at, as_json_text(value)),
+            )
+            self._conn.commit()
+
+    def invalidate(self, release: Optional[str], now: float) -> int:
+        """Delete entries from other releases or past their expiry."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM cache WHERE release IS NOT ? OR expires_at <= ?", (release, now)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def retag(self, previous: Optional[str], release: str, keep: Callable[[str], bool]) -> Tuple[int, int]:
+        """Carry entries of ``previous`` that ``keep`` accepts over to ``release``; delete the others.
+
+        Runs as one write transaction, so processes reading the file see either
+        the old or the new tags, never a mix.
+
+        Returns:
+            (entries carried over, entries deleted)
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute("SELECT key FROM cache WHERE release IS ?", (previous,)).fetchall()
+                keys = [key for (key,) in rows]
+                dropped = [(key,) for key in keys if not keep(key)]
+                self._conn.executemany("DELETE FROM cache WHERE key = ?", dropped)
+                self._conn.execute("UPDATE cache SET release = ? WHERE release IS ?", (release, previous))
+            except BaseException:
+                self._conn.rollback()
+                raise
+            self._conn.commit()
+        return len(keys) - len(dropped), len(dropped)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class TieredCache:
+    """In-memory LRU backed by an optional on-disk tier, keyed to a ChEMBL release."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, path: Optional[str] = DEFAULT_CACHE_PATH,
+                 ttls: Optional[Dict[str, float]] = None,
+                 release_check_interval: float = DEFAULT_RELEASE_CHECK_INTERVAL):
+        self.memory = LRUCache(max_entries)
+        self.disk = DiskCache(path) if path else None
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.release_check_interval = release_check_interval
+        self.release: Optional[str] = None
+        self.stats = CacheStats()
+        self._release_checked_at: Optional[float] = None
+
+    def ttl_for(self, path: str, value: Any) -> float:
+        """Time-to-live for a response, based on the entity it describes."""
+        if value is None:
+            return NEGATIVE_TTL
+        return self.ttls.get(path.split("/", 1)[0].split(".", 1)[0], DEFAULT_TTL)
+
+    async def get(self, key: str) -> Any:
+        """Look a key up in memory, then on disk. Returns MISSING on a miss.
+
+        JSON payloads may come back as ``RawJSON``; see ``unwrap``.
+        """
+        now = time.time()
+        value, expired = self.memory.get(key, now)
+        if expired:
+            self.stats.expirations += 1
+        if value is not MISSING:
+            self.stats.hits += 1
+            return value
+
+        if self.disk is not None:
+            value, expires_at = await asyncio.to_thread(self.disk.get, key, self.release, now)
+            if value is not MISSING:
+                self.stats.hits += 1
+                self.stats.disk_hits += 1
+                self.stats.evictions += self.memory.set(key, value, expires_at)
+                return value
+
+        self.stats.misses += 1
+        return MISSING
+
+    async def set(self, key: str, path: str, value: Any) -> None:
+        """Store a response in every tier."""
+        expires_at = time.time() + self.ttl_for(path, value)
+        self.stats.evictions += self.memory.set(key, value, expires_at)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, value, self.release, expires_at)
+
+    def claim_release_check(self) -> bool:
+        """Return True (once per interval) when the ChEMBL release should be re-checked."""
+        if self.release_check_interval <= 0:
+            return False
+        now = time.monotonic()
+        if self._release_checked_at is not None and now - self._release_checked_at < self.release_check_interval:
+            return False
+        self._release_checked_at = now
+        return True
+
+    async def set_release(self, release: Optional[str]) -> None:
+        """Record the current ChEMBL release, dropping entries from any other release."""
+        if release is None or release == self.release:
+            return
+        self.release = release
+        self.memory.clear()
+        if self.disk is not None:
+            self.stats.invalidations += await asyncio.to_thread(self.disk.invalidate, release, time.time())
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters and sizes for monitoring and cache sizing."""
+        return {
+            **self.stats.as_dict(),
+            "release": self.release,
+            "memory_entries": len(self.memory),
+            "max_memory_entries": self.memory.max_entries,
+            "disk_entries": len(self.disk) if self.disk is not None else None,
+        }
+
+    def close(self) -> None:
+        if self.disk is not None:
+            self.disk.close()
+
+
+# Created on first use, so importing the package opens no files
+_cache: Optional[TieredCache] = None
+
+
+def get_cache() -> TieredCache:
+    """Return the cache shared by all resource handles."""
+    global _cache
+    if _cache is None:
+        _cache = TieredCache()
+    return _cache
+
+
+def configure_cache(max_entries: int = DEFAULT_MAX_ENTRIES, path: Optional[str] = DEFAULT_CACHE_PATH,
+                    ttls: Optional[Dict[str, float]] = None,
+                    release_check_interval: float = DEFAULT_RELEASE_CHECK_INTERVAL) -> TieredCache:
+    """Replace the shared cache.
+
+    Args:
+        max_entries: Maximum number of in-memory entries (0 disables the memory tier)
+        path: SQLite file for the persistent tier (None disables it)
+        ttls: Per-entity time-to-live overrides in seconds
+        release_check_interval: Seconds between ChEMBL release checks (0 disables them)
+
+    Returns:
+        The newly installed cache
+    """
+    global _cache
+    if _cache is not None:
+        _cache.close()
+    _cache = TieredCache(max_entries, path, ttls, release_check_interval)
+    return _cache
@@ -0,0 +1,217 @@
+"""
+Asynchronous data-access layer for ChEMBL.
+
+Every tool implementation talks to ChEMBL through the resource handles defined
+here. Handles and queries only describe what to fetch; the configured backend
+(see ``backend.py``) performs the I/O without blocking the MCP event loop.
+"""
+
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+from .backend import get_backend
+from .metrics import track_backend_call
+
+# Largest page size accepted by the ChEMBL API
+MAX_PAGE_SIZE = 1000
+
+# Number of identifiers per `__in` request when fetching records in bulk
+BATCH_CHUNK_SIZE = int(os.environ.get("CHEMBL_BATCH_CHUNK_SIZE", "50"))
+
+# Maximum number of chunk requests in flight for one bulk fetch
+BATCH_CONCURRENCY = int(os.environ.get("CHEMBL_BATCH_CONCURRENCY", "4"))
+
+
+def _similarity_percent(threshold: Any) -> int:
+    """Convert a 0-1 similarity threshold into the percentage ChEMBL expects."""
+    value = float(threshold)
+    return int(round(value * 100)) if value <= 1 else int(value)
+
+
+class ChemblQuery:
+    """Lazy, immutable description of a list request against one resource.
+
+    Nothing is fetched until ``fetch``, ``first`` or ``iterate`` is awaited.
+    """
+
+    def __init__(self, resource: "ChemblResource", filters: Optional[Dict[str, Any]] = None,
+                 search: Optional[str] = None, fields: Tuple[str, ...] = ()):
+        self.resource = resource
+        self.filters = dict(filters or {})
+        self.search_term = search
+        self.fields = fields
+
+    def filter(self, **filters: Any) -> "ChemblQuery":
+        """Return a new query with additional filters applied."""
+        return ChemblQuery(self.resource, {**self.filters, **filters}, self.search_term, self.fields)
+
+    def only(self, *fields: str) -> "ChemblQuery":
+        """Return a new query that only requests the given fields."""
+        return ChemblQuery(self.resource, self.filters, self.search_term, tuple(fields))
+
+    def endpoint(self) -> Tuple[str, Dict[str, Any]]:
+        """Resolve the query into a request path and query string parameters."""
+        filters = dict(self.filters)
+        if "similarity" in filters:
+            target = quote(str(filters.pop("similarity")), safe="")
+            threshold = _similarity_percent(filters.pop("similarity_threshold", 70))
+            path = f"similarity/{target}/{threshold}"
+        elif "substructure" in filters:
+            path = f"substructure/{quote(str(filters.pop('substructure')), safe='')}"
+        elif self.search_term is not None:
+            path = f"{self.resource.name}/search"
+        else:
+            path = self.resource.name
+
+        params: Dict[str, Any] = {}
+        if self.search_term is not None:
+            params["q"] = self.search_term
+        for key, value in filters.items():
+            params[key] = ",".join(map(str, value)) if isinstance(value, (list, tuple, set)) else value
+        if self.fields:
+            params["only"] = ",".join(self.fields)
+        return f"{path}.{self.resource.format}", params
+
+    async def iterate(self, offset: int = 0, limit: Optional[int] = None, page_size: int = MAX_PAGE_SIZE,
+                      cache: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """Stream records page by page.
+
+        Args:
+            offset: Number of records to skip
+            limit: Maximum number of records to yield (None for all)
+            page_size: Number of records requested per HTTP call
+            cache: Keep the pages in the response cache; bulk scans that read
+                every page once pass False so they neither evict hot entries
+                nor grow the cache with the size of the scan
+        """
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        if limit is not None:
+            page_size = min(page_size, max(limit, 1))
+        remaining = limit
+        backend = get_backend()
+
+        while remaining is None or remaining > 0:
+            items, has_more = await track_backend_call(backend.name, "page",
+                                                       backend.fetch_page(self, offset, page_size, cache))
+            if remaining is not None:
+                items = items[:remaining]
+                remaining -= len(items)
+            for item in items:
+                yield item
+            offset += len(items)
+            if not items or not has_more:
+                return
+
+    async def fetch(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+        """Fetch up to ``limit`` records starting at ``offset``."""
+        return [item async for item in self.iterate(offset=offset, limit=limit)]
+
+    async def first(self) -> Optional[Dict[str, Any]]:
+        """Fetch the first matching record, or None."""
+        results = await self.fetch(limit=1)
+        return results[0] if results else None
+
+
+class ChemblResource:
+    """Immutable handle for one ChEMBL REST resource (molecule, target, ...) in one format.
+
+    Handles carry no per-request state, so a single instance can be shared by
+    any number of concurrent tool calls. Use ``get_resource`` or
+    ``with_format`` to obtain the pooled handle for a (resource, format) pair.
+    """
+
+    __slots__ = ("name", "format")
+
+    def __init__(self, name: str, format: str = "json"):
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "format", format)
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable; use with_format() for another format")
+
+    def __repr__(self) -> str:
+        return f"ChemblResource({self.name!r}, format={self.format!r})"
+
+    async def get(self, chembl_id: str) -> Any:
+        """Fetch a single record by its identifier.
+
+        Args:
+            chembl_id: Identifier of the record (e.g., 'CHEMBL25')
+
+        Returns:
+            Parsed JSON for the 'json' format, raw text otherwise, or None if not found
+        """
+        backend = get_backend()
+        return await track_backend_call(backend.name, "get", backend.get(self, chembl_id))
+
+    async def get_raw(self, chembl_id: str) -> str:
+        """Fetch a single JSON record as text, passed through from the cache when possible.
+
+        Args:
+            chembl_id: Identifier of the record (e.g., 'CHEMBL25')
+
+        Returns:
+            The record's JSON text, or 'null' if not found
+        """
+        backend = get_backend()
+        return await track_backend_call(backend.name, "get", backend.get_raw(self, chembl_id))
+
+    async def get_many(self, chembl_ids: List[str], id_field: Optional[str] = None,
+                       chunk_size: int = BATCH_CHUNK_SIZE,
+                       concurrency: int = BATCH_CONCURRENCY) -> Dict[str, Any]:
+        """Fetch many records by identifier with chunked ``__in`` requests.
+
+        Identifiers are deduplicated and, where the backend has a cache, looked
+        up there first; the remaining ones are split into chunks fetched
+        concurrently.
+
+        Args:
+            chembl_ids: Identifiers of the records
+            id_field: Field holding the identifier (defaults to '<name>_chembl_id')
+            chunk_size: Number of identifiers per request
+            concurrency: Maximum number of chunk requests in flight
+
+        Returns:
+            Mapping of identifier to its record, None if not found, or the
+            exception raised while fetching its chunk
+        """
+        return await get_backend().get_many(self, chembl_ids, id_field or f"{self.name}_chembl_id",
+                                            chunk_size, concurrency)
+
+    def record_path(self, chembl_id: str) -> str:
+        """REST path of a single record in this handle's format."""
+        return f"{self.name}/{quote(str(chembl_id), safe='')}.{self.format}"
+
+    def with_format(self, format: str) -> "ChemblResource":
+        """Return the pooled handle for the same resource serving another format."""
+        return get_resource(self.name, format)
+
+    def filter(self, **filters: Any) -> ChemblQuery:
+        """Build a filtered list query."""
+        return ChemblQuery(self, filters)
+
+    def search(self, query: str) -> ChemblQuery:
+        """Build a full-text search query."""
+        return ChemblQuery(self, search=query)
+
+    def all(self) -> ChemblQuery:
+        """Build an unfiltered list query."""
+        return ChemblQuery(self)
+
+
+_resources: Dict[Tuple[str, str], ChemblResource] = {}
+
+
+def get_resource(name: str, format: str = "json") -> ChemblResource:
+    """Return the shared handle for a resource in the given format.
+
+    Args:
+        name: Resource name (e.g., 'molecule')
+        format: Response format (e.g., 'json', 'sdf')
+    """
+    key = (name, format)
+    handle = _resources.get(key)
+    if handle is None:
+        handle = _resources[key] = ChemblResource(name, format)
+    return handle
@@ -0,0 +1,211 @@
+"""
+Resumable result cursors for list-returning tools.
+
+A tool call returns one page of results and, when more may follow, an opaque
+cursor token. The token refers to server-side state: the result source (a
+backend query, a precomputed hit list or a live stream) and the offset
+reached. Passing the token back resumes the same source at that offset, so
+earlier pages are never recomputed. Cursor state lives in a bounded in-process
+store and expires after a time-to-live.
+"""
+
+import asyncio
+import inspect
+import os
+import secrets
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional, Sequence, Tuple, Union
+
+from .client import ChemblQuery
+
+# Maximum number of live cursors; the least recently used are dropped first
+DEFAULT_MAX_CURSORS = int(os.environ.get("CHEMBL_CURSOR_STORE_SIZE", "1000"))
+
+# Seconds a cursor stays valid after it was issued or last used
+DEFAULT_CURSOR_TTL = float(os.environ.get("CHEMBL_CURSOR_TTL", "900"))
+
+# Largest page a single tool call may return
+MAX_PAGE_LIMIT = 100
+
+# Answer for a resumed call whose cursor has run past the last result
+NO_MORE_RESULTS = "No more results."
+
+Resolver = Callable[[List[Any]], Awaitable[List[Any]]]
+
+
+class CursorError(ValueError):
+    """Raised for a cursor that is unknown, expired or belongs to another tool."""
+
+
+class ResultSource:
+    """Something a tool pages through; subclasses implement ``take``.
+
+    ``resolve`` optionally turns the raw items of each page into what the
+    tool formats (e.g., ChEMBL IDs into records), so only the page that is
+    returned pays for the lookup.
+    """
+
+    def __init__(self, resolve: Optional[Resolver] = None):
+        self.resolve = resolve
+
+    async def take(self, offset: int, count: int) -> Tuple[List[Any], bool]:
+        """Items ``[offset, offset + count)`` and whether more may follow."""
+        raise NotImplementedError
+
+    async def page(self, offset: int, count: int) -> Tuple[List[Any], bool]:
+        items, has_more = await self.take(offset, count)
+        if self.resolve is not None and items:
+            items = await self.resolve(items)
+        return items, has_more
+
+
+class QuerySource(ResultSource):
+    """Pages of a backend query, resumed with the backend's own offset."""
+
+    def __init__(self, query: ChemblQuery, resolve: Optional[Resolver] = None):
+        super().__init__(resolve)
+        self.query = query
+
+    async def take(self, offset: int, count: int) -> Tuple[List[Any], bool]:
+        # One look-ahead record tells whether another page exists
+        items = await self.query.fetch(count + 1, offset)
+        return items[:count], len(items) > count
+
+
+class ListSource(ResultSource):
+    """Pages of a precomputed result list."""
+
+    def __init__(self, items: Sequence[Any], resolve: Optional[Resolver] = None):
+        super().__init__(resolve)
+        self.items = list(items)
+
+    async def take(self, offset: int, count: int) -> Tuple[List[Any], bool]:
+        return self.items[offset:offset + count], offset + count < len(self.items)
+
+
+class StreamSource(ResultSource):
+    """Pages of a live async stream, consumed only as far as pages are requested.
+
+    Consumed items are kept so a page can be requested again (e.g., a retried
+    call reusing a cursor). More results are assumed until the stream ends.
+    """
+
+    def __init__(self, stream: AsyncIterator[Any], resolve: Optional[Resolver] = None):
+        super().__init__(resolve)
+        self.stream = stream
+        self.buffer: List[Any] = []
+        self.exhausted = False
+        self._lock = asyncio.Lock()
+
+    async def take(self, offset: int, count: int) -> Tuple[List[Any], bool]:
+        # Concurrent calls sharing a cursor must not advance the stream twice
+        async with self._lock:
+            while not self.exhausted and len(self.buffer) < offset + count:
+                try:
+                    self.buffer.append(await self.stream.__anext__())
+                except StopAsyncIteration:
+                    self.exhausted = True
+        items = self.buffer[offset:offset + count]
+        return items, not self.exhausted or offset + count < len(self.buffer)
+
+
+class CursorStore:
+    """Bounded, TTL-expiring map from cursor tokens to (tool, source, offset)."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_CURSORS, ttl: float = DEFAULT_CURSOR_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[str, ResultSource, int, float]]" = OrderedDict()
+
+    def _expire(self, now: float) -> None:
+        for token in [t for t, entry in self._entries.items() if entry[3] <= now]:
+            del self._entries[token]
+
+    def put(self, tool: str, source: ResultSource, offset: int) -> str:
+        """Store a resume point and return its token."""
+        now = time.monotonic()
+        self._expire(now)
+        token = secrets.token_urlsafe(12)
+        self._entries[token] = (tool, source, offset, now + self.ttl)
+        while len(self._entries) > max(self.max_entries, 0):
+            self._entries.popitem(last=False)
+        return token
+
+    def get(self, tool: str, token: str) -> Tuple[ResultSource, int]:
+        """Look up a resume point.
+
+        Raises:
+            CursorError: If the token is unknown, expired or issued by another tool
+        """
+        now = time.monotonic()
+        entry = self._entries.get(token)
+        if entry is None or entry[3] <= now:
+            self._entries.pop(token, None)
+            raise CursorError("Cursor is unknown or has expired; repeat the call without a cursor")
+        if entry[0] != tool:
+            raise CursorError(f"Cursor was issued by {entry[0]}, not {tool}")
+        self._entries[token] = (entry[0], entry[1], entry[2], now + self.ttl)
+        self._entries.move_to_end(token)
+        return entry[1], entry[2]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_store = CursorStore()
+
+
+def get_cursor_store() -> CursorStore:
+    """Return the cursor store shared by all tools."""
+    return _store
+
+
+def configure_cursors(max_entries: int = DEFAULT_MAX_CURSORS, ttl: float = DEFAULT_CURSOR_TTL) -> CursorStore:
+    """Replace the shared cursor store.
+
+    Args:
+        max_entries: Maximum number of live cursors
+        ttl: Seconds a cursor stays valid after it was issued or last used
+
+    Returns:
+        The newly installed store
+    """
+    global _store
+    _store = CursorStore(max_entries, ttl)
+    return _store
+
+
+async def paginate(tool: str, make_source: Callable[[], Union[ResultSource, Awaitable[ResultSource]]], limit: int,
+                   cursor: Optional[str] = None) -> Tuple[List[Any], Optional[str], int]:
+    """Fetch one page for a tool call, starting a new source or resuming a cursor.
+
+    Args:
+        tool: Name of the calling tool; cursors only resume the tool that issued them
+        make_source: Function (sync or async) building the result source for a fresh call
+        limit: Page size (clamped to 1..MAX_PAGE_LIMIT)
+        cursor: Token returned by a previous call, if resuming
+
+    Returns:
+        The page items, the cursor for the next page (None when done) and the
+        offset of the first item
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_LIMIT))
+    store = get_cursor_store()
+    if cursor:
+        source, offset = store.get(tool, cursor)
+    else:
+        source, offset = make_source(), 0
+        if inspect.isawaitable(source):
+            source = await source
+
+    items, has_more = await source.page(offset, limit)
+    next_cursor = store.put(tool, source, offset + limit) if has_more else None
+    return items, next_cursor, offset
+
+
+def format_next_cursor(cursor: Optional[str]) -> str:
+    """Footer telling the caller how to fetch the next page, if there is one."""
+    if cursor is None:
+        return ""
+    return f"\n\nMore results available. Call again with cursor='{cursor}' to continue."
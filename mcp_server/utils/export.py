@@ -0,0 +1,229 @@
+"""
+Bulk export of bioactivities to local columnar or line-delimited files.
+
+Activity pages are streamed from the backend into a writer that holds at
+most one batch of rows (``EXPORT_BATCH_ROWS``) before handing it to the
+file, so memory stays bounded however many activities match. Batches are
+written off the event loop. Files are written under a temporary name and
+renamed once complete, so a reader never sees a partial export.
+
+Parquet and Arrow IPC files need PyArrow (``pip install 'chembl-mcp[export]'``);
+gzip-compressed NDJSON is always available.
+"""
+
+import asyncio
+import contextlib
+import gzip
+import itertools
+import json
+import os
+import tempfile
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+from .client import BATCH_CHUNK_SIZE, MAX_PAGE_SIZE, ChemblQuery
+
+# Directory export files are written to
+DEFAULT_EXPORT_DIR = os.environ.get("CHEMBL_EXPORT_DIR") or os.path.join(tempfile.gettempdir(),
+                                                                         "chembl-mcp-exports")
+
+# Rows buffered before a batch is written
+EXPORT_BATCH_ROWS = int(os.environ.get("CHEMBL_EXPORT_BATCH_ROWS", "10000"))
+
+# Columns exported by default, with their types
+ACTIVITY_COLUMNS: Dict[str, str] = {
+    "activity_id": "int",
+    "molecule_chembl_id": "string",
+    "molecule_pref_name": "string",
+    "canonical_smiles": "string",
+    "target_chembl_id": "string",
+    "target_pref_name": "string",
+    "target_organism": "string",
+    "assay_chembl_id": "string",
+    "document_chembl_id": "string",
+    "standard_type": "string",
+    "standard_relation": "string",
+    "standard_value": "float",
+    "standard_units": "string",
+    "pchembl_value": "float",
+}
+
+# File extension per format
+EXPORT_FORMATS = {"parquet": ".parquet", "arrow": ".arrow", "ndjson": ".ndjson.gz"}
+
+
+def _require_pyarrow() -> None:
+    if not PYARROW_AVAILABLE:
+        raise ImportError("Parquet and Arrow exports require PyArrow (pip install 'chembl-mcp[export]'); "
+                          "use format='ndjson' without it")
+
+
+def _convert(value: Any, kind: str) -> Any:
+    """Coerce an API value (numbers often arrive as strings) to the column type."""
+    if value is None or value == "":
+        return None
+    try:
+        if kind == "int":
+            return int(value)
+        if kind == "float":
+            return float(value)
+    except (TypeError, ValueError):
+        return None
+    return str(value)
+
+
+class NDJSONWriter:
+    """Gzip-compressed JSON lines, one record per line."""
+
+    def __init__(self, path: str, columns: Dict[str, str]):
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        self._file.write("".join(json.dumps(row, separators=(",", ":")) + "\n" for row in rows))
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ArrowWriter:
+    """Parquet (zstd) or Arrow IPC file written one record batch at a time."""
+
+    TYPES = {"int": "int64", "float": "float64", "string": "string"}
+
+    def __init__(self, path: str, columns: Dict[str, str], format: str = "parquet"):
+        _require_pyarrow()
+        self.schema = pa.schema([(name, getattr(pa, self.TYPES[kind])()) for name, kind in columns.items()])
+        if format == "parquet":
+            self._writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+        else:
+            self._writer = pa.ipc.new_file(path, self.schema)
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        batch = pa.RecordBatch.from_pylist(rows, schema=self.schema)
+        self._writer.write_batch(batch)
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+def open_writer(path: str, format: str, columns: Dict[str, str]):
+    """A batch writer for ``format`` ('parquet', 'arrow' or 'ndjson')."""
+    if format == "ndjson":
+        return NDJSONWriter(path, columns)
+    return ArrowWriter(path, columns, format)
+
+
+class ExportResult:
+    """Where an export was written and what it holds."""
+
+    def __init__(self, path: str, format: str, rows: int, counts: Dict[str, int], size: int, elapsed: float):
+        self.path = path
+        self.format = format
+        self.rows = rows
+        self.counts = counts
+        self.size = size
+        self.elapsed = elapsed
+
+
+def export_path(format: str, filename: Optional[str] = None, directory: Optional[str] = None) -> str:
+    """Path of a new export file in the export directory.
+
+    Args:
+        format: Export format, which sets the extension
+        filename: Optional file name (no directories); generated if omitted
+        directory: Export directory (defaults to DEFAULT_EXPORT_DIR)
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{format}'. Expected one of: {', '.join(EXPORT_FORMATS)}")
+    if filename is not None and (not filename or os.path.basename(filename) != filename
+                                 or filename in (".", "..")):
+        raise ValueError(f"Invalid file name '{filename}': expected a plain file name without directories")
+    directory = directory or DEFAULT_EXPORT_DIR
+    os.makedirs(directory, exist_ok=True)
+    if filename is None:
+        filename = f"activities-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    if not filename.endswith(EXPORT_FORMATS[format]):
+        filename += EXPORT_FORMATS[format]
+    return os.path.join(directory, filename)
+
+
+def _chunks(values: Optional[Sequence[str]], size: int) -> List[Optional[List[str]]]:
+    if not values:
+        return [None]
+    values = list(dict.fromkeys(values))
+    return [values[i:i + size] for i in range(0, len(values), size)]
+
+
+def activity_queries(base: ChemblQuery, molecule_ids: Optional[Sequence[str]] = None,
+                     target_ids: Optional[Sequence[str]] = None,
+                     standard_types: Optional[Sequence[str]] = None,
+                     chunk_size: int = BATCH_CHUNK_SIZE) -> List[ChemblQuery]:
+    """Disjoint activity queries covering the filters, with ID lists split to keep URLs short."""
+    queries = []
+    for molecules, targets in itertools.product(_chunks(molecule_ids, chunk_size), _chunks(target_ids, chunk_size)):
+        filters: Dict[str, Any] = {}
+        if molecules:
+            filters["molecule_chembl_id__in"] = molecules
+        if targets:
+            filters["target_chembl_id__in"] = targets
+        if standard_types:
+            filters["standard_type__in"] = list(standard_types)
+        queries.append(base.filter(**filters))
+    return queries
+
+
+async def export_activities(queries: Sequence[ChemblQuery], path: str, format: str = "parquet",
+                            columns: Optional[Sequence[str]] = None,
+                            batch_rows: int = EXPORT_BATCH_ROWS) -> ExportResult:
+    """Stream the records of ``queries`` into an export file.
+
+    Args:
+        queries: Activity queries whose records are exported, in order
+        path: Destination file (see ``export_path``)
+        format: 'parquet', 'arrow' or 'ndjson'
+        columns: Columns to export (defaults to ACTIVITY_COLUMNS); unknown ones are exported as strings
+        batch_rows: Rows buffered before a batch is written
+
+    Returns:
+        The export's path, row count and row counts per standard type
+    """
+    start = time.perf_counter()
+    columns = {name: ACTIVITY_COLUMNS.get(name, "string") for name in columns or ACTIVITY_COLUMNS}
+    items: List[Tuple[str, str]] = list(columns.items())
+    tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    rows, counts = 0, Counter()
+    writer = await asyncio.to_thread(open_writer, tmp, format, columns)
+    try:
+        try:
+            batch: List[Dict[str, Any]] = []
+            for query in queries:
+                # Pages are read once: keep them out of the response cache
+                async for record in query.only(*columns).iterate(page_size=MAX_PAGE_SIZE, cache=False):
+                    row = {name: _convert(record.get(name), kind) for name, kind in items}
+                    batch.append(row)
+                    counts[row.get("standard_type") or "unknown"] += 1
+                    if len(batch) >= batch_rows:
+                        await asyncio.to_thread(writer.write, batch)
+                        rows += len(batch)
+                        batch = []
+            if batch:
+                await asyncio.to_thread(writer.write, batch)
+                rows += len(batch)
+        finally:
+            await asyncio.to_thread(writer.close)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp)
+        raise
+    return ExportResult(path, format, rows, dict(counts.most_common()), os.path.getsize(path),
+                        time.perf_counter() - start)
@@ -0,0 +1,86 @@
+"""
+Concurrent fan-out of independent sub-queries under one deadline.
+
+Composite tools start all of their branches at once and wait for them
+together, so a call takes as long as its slowest branch rather than the sum
+of all of them. Branches still running at the deadline are cancelled and
+reported as timed out while the others' results are kept. Cancelling a
+branch does not cancel API requests that other calls are waiting on (see
+``SingleFlight``), and whatever it fetched before the deadline stays cached
+for the next attempt.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from .metrics import get_metrics
+
+# Seconds a composite tool waits for its branches
+DEFAULT_DEADLINE = float(os.environ.get("CHEMBL_PROFILE_DEADLINE", "10"))
+
+
+class BranchResult:
+    """Outcome of one branch of a fan-out."""
+
+    __slots__ = ("value", "error", "timed_out", "elapsed")
+
+    def __init__(self, value: Any = None, error: Optional[BaseException] = None, timed_out: bool = False,
+                 elapsed: float = 0.0):
+        self.value = value
+        self.error = error
+        self.timed_out = timed_out
+        self.elapsed = elapsed
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.timed_out
+
+    @property
+    def outcome(self) -> str:
+        return "timeout" if self.timed_out else "error" if self.error is not None else "ok"
+
+
+async def fan_out(group: str, branches: Dict[str, Callable[[], Awaitable[Any]]],
+                  deadline: float = DEFAULT_DEADLINE) -> Dict[str, BranchResult]:
+    """Run branches concurrently and collect what finished within the deadline.
+
+    Args:
+        group: Name of the composite call, used to label the branch metrics
+        branches: Functions starting each branch, by name
+        deadline: Seconds to wait for the branches (None or <= 0 waits for all of them)
+
+    Returns:
+        The outcome of every branch, by name and in the order given
+    """
+    start = time.perf_counter()
+    finished: Dict[str, float] = {}
+    tasks: Dict[str, "asyncio.Task[Any]"] = {}
+    for name, call in branches.items():
+        task = asyncio.ensure_future(call())
+        task.add_done_callback(lambda _, name=name: finished.setdefault(name, time.perf_counter() - start))
+        tasks[name] = task
+
+    try:
+        if tasks:
+            await asyncio.wait(tasks.values(), timeout=deadline if deadline and deadline > 0 else None)
+    finally:
+        pending = [task for task in tasks.values() if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    metrics = get_metrics()
+    results = {}
+    for name, task in tasks.items():
+        if task.cancelled():
+            result = BranchResult(timed_out=True, elapsed=time.perf_counter() - start)
+        elif task.exception() is not None:
+            result = BranchResult(error=task.exception(), elapsed=finished[name])
+        else:
+            result = BranchResult(value=task.result(), elapsed=finished[name])
+        metrics.fanout_branches.inc(group, name, result.outcome)
+        results[name] = result
+    return results
@@ -0,0 +1,166 @@
+"""
+Text rendering of ChEMBL records for the tools' readable output.
+
+Answers are assembled from parts that are joined once at the end, never by
+growing a string in a loop: repeated ``+=`` copies everything written so far
+on every step, which is quadratic in the length of the answer. The record
+templates are f-strings, which Python compiles once with the module; they
+are faster than ``str.format`` templates filled at call time.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List
+
+# Separator between the records of a list answer
+RECORD_SEPARATOR = "\n---\n"
+
+
+def format_records(records: Iterable[Dict[str, Any]], render: Callable[[Dict[str, Any]], str]) -> str:
+    """Render records one by one and join them into a single answer.
+    
+    Args:
+        records: Records to render
+        render: Function formatting a single record
+        
+    Returns:
+        The rendered records, separated by RECORD_SEPARATOR
+    """
+    return RECORD_SEPARATOR.join(map(render, records))
+
+def format_response(title: str, data: List[str], show_count: bool = False) -> str:
+    """Format a list of data items into a readable text response.
+    
+    Args:
+        title: Title for the response
+        data: List of data items to format
+        show_count: Whether to show the count of items
+    
+    Returns:
+        Formatted text response
+    """
+    parts = [f"{title}\n"]
+    parts.extend(f"{i}. {item}\n" for i, item in enumerate(data, 1))
+    
+    if show_count:
+        parts.append(f"\nTotal items: {len(data)}")
+    
+    return "".join(parts)
+
+def format_batch_response(entity: str, chembl_ids: List[str], results: Dict[str, Any],
+                          render: Callable[[Dict[str, Any]], str], error_message: str) -> str:
+    """Format the results of a batch lookup, one section per requested ID.
+    
+    Args:
+        entity: Name of the entity type (e.g., 'molecule')
+        chembl_ids: Requested IDs, in input order
+        results: Mapping of ID to record, None if not found, or an exception
+        render: Function formatting a single record
+        error_message: Prefix used for IDs whose lookup failed
+        
+    Returns:
+        Formatted text response
+    """
+    sections = []
+    found = 0
+    for chembl_id in chembl_ids:
+        value = results.get(chembl_id)
+        if isinstance(value, Exception):
+            sections.append(f"{error_message} for {chembl_id}: {str(value)}")
+        elif not value:
+            sections.append(f"No {entity} found with ID {chembl_id}")
+        else:
+            found += 1
+            sections.append(render(value))
+    
+    header = f"Results for {len(chembl_ids)} {entity} IDs ({found} found):\n"
+    return header + RECORD_SEPARATOR.join(sections)
+
+def format_molecule_info(molecule: Dict[str, Any]) -> str:
+    """Format molecule information into a readable text.
+    
+    Args:
+        molecule: Dictionary containing molecule information
+        
+    Returns:
+        Formatted molecule information
+    """
+    properties = molecule.get('molecule_properties', {})
+    return f"""
+Molecule: {molecule.get('pref_name', 'N/A')}
+ChEMBL ID: {molecule.get('molecule_chembl_id', 'N/A')}
+Formula: {properties.get('full_molformula', 'N/A')}
+Weight: {properties.get('full_mwt', 'N/A')}
+LogP: {properties.get('alogp', 'N/A')}
+HBA: {properties.get('hba', 'N/A')}
+HBD: {properties.get('hbd', 'N/A')}
+PSA: {properties.get('psa', 'N/A')}
+Rule of 5 Violations: {properties.get('num_ro5_violations', 'N/A')}
+Aromatic Rings: {properties.get('aromatic_rings', 'N/A')}
+"""
+
+def format_target_info(target: Dict[str, Any]) -> str:
+    """Format target information into a readable text.
+    
+    Args:
+        target: Dictionary containing target information
+        
+    Returns:
+        Formatted target information
+    """
+    return f"""
+Target: {target.get('target_pref_name', 'N/A')}
+ChEMBL ID: {target.get('target_chembl_id', 'N/A')}
+Type: {target.get('target_type', 'N/A')}
+Organism: {target.get('target_organism', 'N/A')}
+"""
+
+def format_target_components(components: List[Dict[str, Any]]) -> str:
+    """Format the components of a target as a numbered list.
+    
+    Args:
+        components: The target's component records
+        
+    Returns:
+        Formatted component list, or an empty string without components
+    """
+    if not components:
+        return ""
+    lines = ["\nComponents:\n"]
+    for i, comp in enumerate(components, 1):
+        accession = comp.get('accession', None)
+        uniprot = f" (UniProt: {accession})" if accession else ""
+        lines.append(f"{i}. {comp.get('component_description', 'N/A')}{uniprot}\n")
+    return "".join(lines)
+
+def format_assay_info(assay: Dict[str, Any]) -> str:
+    """Format assay information into a readable text.
+    
+    Args:
+        assay: Dictionary containing assay information
+        
+    Returns:
+        Formatted assay information
+    """
+    return f"""
+Assay: {assay.get('assay_description', 'N/A')}
+ChEMBL ID: {assay.get('assay_chembl_id', 'N/A')}
+Type: {assay.get('assay_type', 'N/A')}
+Target: {assay.get('target_pref_name', 'N/A')}
+"""
+
+def format_activity_info(activity: Dict[str, Any]) -> str:
+    """Format activity information into a readable text.
+    
+    Args:
+        activity: Dictionary containing activity information
+        
+    Returns:
+        Formatted activity information
+    """
+    return f"""
+Activity Type: {activity.get('standard_type', 'N/A')}
+Value: {activity.get('standard_value', 'N/A')} {activity.get('standard_units', '')}
+Target: {activity.get('target_pref_name', 'N/A')}
+Assay: {activity.get('assay_description', 'N/A')}
+Relation: {activity.get('standard_relation', 'N/A')}
+Activity ID: {activity.get('activity_id', 'N/A')}
+"""
@@ -0,0 +1,392 @@
+"""
+Columnar in-memory frames of activity rows for vectorized aggregation.
+
+An ``ActivityFrame`` holds the activities matched by one query as NumPy
+columns: potency as float arrays (pChEMBL and the molar value in nM, NaN
+where unknown) and the categorical columns (target, molecule, type,
+relation, assay, document) dictionary-encoded as ``int32`` codes into a
+list of categories. Group-by statistics, percentiles and threshold counts
+then run as a handful of array operations over all groups at once instead
+of a Python loop per record.
+
+Potencies are normalized to pChEMBL: ChEMBL's own ``pchembl_value`` is used
+when present, otherwise ``-log10`` of the molar value for molar units and
+exact (``=``) relations. Frames are kept in a small LRU store so follow-up
+questions about the same activities reuse them. Frames need NumPy
+(``pip install 'chembl-mcp[local]'``).
+"""
+
+import itertools
+import math
+import os
+import secrets
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+from .client import MAX_PAGE_SIZE, ChemblQuery
+
+# Frames kept for follow-up questions, and seconds a frame lives after its last use
+DEFAULT_MAX_FRAMES = int(os.environ.get("CHEMBL_FRAME_STORE_SIZE", "8"))
+DEFAULT_FRAME_TTL = float(os.environ.get("CHEMBL_FRAME_TTL", "900"))
+
+# Rows a single frame may hold
+MAX_FRAME_ROWS = int(os.environ.get("CHEMBL_FRAME_MAX_ROWS", "1000000"))
+
+# Activity fields a frame is built from
+FRAME_FIELDS = (
+    "activity_id", "molecule_chembl_id", "molecule_pref_name", "target_chembl_id", "target_pref_name",
+    "assay_chembl_id", "document_chembl_id", "standard_type", "standard_relation", "standard_value",
+    "standard_units", "pchembl_value",
+)
+
+# Dictionary-encoded columns, by the name used to group on them
+CATEGORICAL_COLUMNS = {
+    "target": "target_chembl_id",
+    "molecule": "molecule_chembl_id",
+    "standard_type": "standard_type",
+    "relation": "standard_relation",
+    "assay": "assay_chembl_id",
+    "document": "document_chembl_id",
+}
+
+# Display names kept for the categories of these columns
+LABEL_FIELDS = {"target_chembl_id": "target_pref_name", "molecule_chembl_id": "molecule_pref_name"}
+
+# Concentration units and their factor to nM
+MOLAR_UNITS = {"M": 1e9, "mM": 1e6, "uM": 1e3, "µM": 1e3, "nM": 1.0, "pM": 1e-3, "fM": 1e-6}
+
+# Relations under which a value is an upper bound on the true potency (the compound is at least this active)
+ACTIVE_RELATIONS = ("=", "<", "<=", "~")
+
+
+def _require_numpy() -> None:
+    if not NUMPY_AVAILABLE:
+        raise ImportError("Activity frames require NumPy (pip install 'chembl-mcp[local]')")
+
+
+def _float(value: Any) -> float:
+    try:
+        return float(value) if value is not None and value != "" else math.nan
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class FrameError(ValueError):
+    """Raised for a frame ID that is unknown or has expired."""
+
+
+class _Encoder:
+    """Assigns the codes and keeps the categories of one dictionary-encoded column."""
+
+    __slots__ = ("index", "categories")
+
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.categories: List[str] = []
+
+    def code(self, value: Any) -> int:
+        if value is None or value == "":
+            return -1
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.categories)
+            self.categories.append(value)
+        return code
+
+
+class _FrameBuilder:
+    """Encodes activity records into column arrays one batch at a time.
+
+    Only the batch being encoded is held as dicts; earlier batches are kept
+    as NumPy chunks, so memory grows with the encoded columns, not the records.
+    """
+
+    def __init__(self):
+        self.ids: List["np.ndarray"] = []
+        self.pchembl: List["np.ndarray"] = []
+        self.value_nm: List["np.ndarray"] = []
+        self.encoders = {field: _Encoder() for field in CATEGORICAL_COLUMNS.values()}
+        self.codes: Dict[str, List["np.ndarray"]] = {field: [] for field in self.encoders}
+        self.labels: Dict[str, Dict[int, str]] = {field: {} for field in LABEL_FIELDS}
+        self.rows = 0
+
+    def add(self, records: Sequence[Dict[str, Any]]) -> None:
+        """Encode a batch of records, normalizing potencies to pChEMBL."""
+        ids: List[int] = []
+        pchembl: List[float] = []
+        value_nm: List[float] = []
+        codes: Dict[str, List[int]] = {field: [] for field in self.encoders}
+        for record in records:
+            ids.append(int(record.get("activity_id") or 0))
+            value = _float(record.get("standard_value"))
+            factor = MOLAR_UNITS.get(record.get("standard_units") or "")
+            nm = value * factor if factor is not None and value > 0 else math.nan
+            value_nm.append(nm)
+            p = _float(record.get("pchembl_value"))
+            if math.isnan(p) and not math.isnan(nm) and record.get("standard_relation") in ("=", None):
+                p = 9.0 - math.log10(nm)
+            pchembl.append(p)
+            for field, encoder in self.encoders.items():
+                code = encoder.code(record.get(field))
+                codes[field].append(code)
+                labels = self.labels.get(field)
+                if labels is not None and code >= 0 and code not in labels:
+                    label = record.get(LABEL_FIELDS[field])
+                    if label:
+                        labels[code] = label
+        self.ids.append(np.asarray(ids, dtype=np.int64))
+        self.pchembl.append(np.asarray(pchembl, dtype=np.float64))
+        self.value_nm.append(np.asarray(value_nm, dtype=np.float64))
+        for field, values in codes.items():
+            self.codes[field].append(np.asarray(values, dtype=np.int32))
+        self.rows += len(ids)
+
+    def build(self, description: str = "") -> "ActivityFrame":
+        def join(chunks: List["np.ndarray"], dtype: Any) -> "np.ndarray":
+            return np.concatenate(chunks) if chunks else np.empty(0, dtype=dtype)
+
+        return ActivityFrame(
+            join(self.ids, np.int64),
+            join(self.pchembl, np.float64),
+            join(self.value_nm, np.float64),
+            {field: join(chunks, np.int32) for field, chunks in self.codes.items()},
+            {field: encoder.categories for field, encoder in self.encoders.items()},
+            self.labels,
+            description,
+        )
+
+
+class GroupStats:
+    """Per-group aggregates of one frame column, as parallel arrays over the groups."""
+
+    def __init__(self, column: str, groups: List[str], labels: List[Optional[str]], counts: "np.ndarray",
+                 mean: "np.ndarray", percentiles: Dict[float, "np.ndarray"], total: int):
+        self.column = column
+        self.groups = groups
+        self.labels = labels
+        self.counts = counts
+        self.mean = mean
+        self.percentiles = percentiles
+        self.total = total
+
+
+class ActivityFrame:
+    """Activity rows of one query as NumPy columns."""
+
+    def __init__(self, activity_id: "np.ndarray", pchembl: "np.ndarray", value_nm: "np.ndarray",
+                 codes: Dict[str, "np.ndarray"], categories: Dict[str, List[str]],
+                 labels: Dict[str, Dict[int, str]], description: str = ""):
+        self.activity_id = activity_id
+        self.pchembl = pchembl
+        self.value_nm = value_nm
+        self.codes = codes
+        self.categories = categories
+        self.labels = labels
+        self.description = description
+        self.created = time.time()
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]], description: str = "") -> "ActivityFrame":
+        """Build a frame from activity records, normalizing potencies to pChEMBL."""
+        _require_numpy()
+        builder = _FrameBuilder()
+        records = iter(records)
+        while True:
+            batch = list(itertools.islice(records, MAX_PAGE_SIZE))
+            if not batch:
+                break
+            builder.add(batch)
+        return builder.build(description)
+
+    def __len__(self) -> int:
+        return len(self.activity_id)
+
+    @property
+    def nbytes(self) -> int:
+        return (self.activity_id.nbytes + self.pchembl.nbytes + self.value_nm.nbytes
+                + sum(codes.nbytes for codes in self.codes.values()))
+
+    def _column(self, group_by: str) -> str:
+        if group_by not in CATEGORICAL_COLUMNS:
+            raise ValueError(f"Unknown grouping '{group_by}'. Expected one of: {', '.join(CATEGORICAL_COLUMNS)}")
+        return CATEGORICAL_COLUMNS[group_by]
+
+    def _groups(self, column: str, codes: "np.ndarray") -> Tuple[List[str], List[Optional[str]]]:
+        categories, labels = self.categories[column], self.labels.get(column, {})
+        return [categories[c] for c in codes], [labels.get(int(c)) for c in codes]
+
+    def mask(self, standard_types: Optional[Sequence[str]] = None) -> "np.ndarray":
+        """Rows of the given activity types (all rows without types)."""
+        if not standard_types:
+            return np.ones(len(self), dtype=bool)
+        wanted = [self.categories["standard_type"].index(t) for t in standard_types
+                  if t in self.categories["standard_type"]]
+        return np.isin(self.codes["standard_type"], wanted)
+
+    def group_stats(self, group_by: str, quantiles: Sequence[float] = (0.25, 0.5, 0.75),
+                    where: Optional["np.ndarray"] = None) -> GroupStats:
+        """Count, mean and percentiles of pChEMBL per group, for all groups at once.
+
+        Args:
+            group_by: Categorical column to group on (see CATEGORICAL_COLUMNS)
+            quantiles: Quantiles to compute, in [0, 1]
+            where: Optional boolean mask of the rows to include
+        """
+        column = self._column(group_by)
+        codes, values = self.codes[column], self.pchembl
+        keep = (codes >= 0) & ~np.isnan(values)
+        if where is not None:
+            keep &= where
+        codes, values = codes[keep], values[keep]
+        ncat = len(self.categories[column])
+
+        # Sort by group, then value: each group is a sorted run starting at its offset
+        order = np.lexsort((values, codes))
+        codes, values = codes[order], values[order]
+        counts = np.bincount(codes, minlength=ncat)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        present = np.flatnonzero(counts)
+        counts, starts = counts[present], starts[present]
+        sums = np.bincount(codes, weights=values, minlength=ncat)[present]
+
+        percentiles = {}
+        for q in quantiles:
+            # Linear interpolation between the closest ranks, as np.percentile does
+            position = starts + q * (counts - 1)
+            low = np.floor(position).astype(np.int64)
+            high = np.minimum(low + 1, starts + counts - 1)
+            percentiles[q] = values[low] + (values[high] - values[low]) * (position - low)
+
+        groups, labels = self._groups(column, present)
+        return GroupStats(column, groups, labels, counts, sums / counts, percentiles, int(keep.sum()))
+
+    def threshold_counts(self, group_by: str, threshold_nm: float,
+                         where: Optional["np.ndarray"] = None) -> Tuple[List[str], List[Optional[str]],
+                                                                        "np.ndarray", "np.ndarray"]:
+        """Per group, activities with a molar value at or below ``threshold_nm`` and activities measured.
+
+        Returns:
+            Groups, their labels, active counts and measured counts (groups with measured activities only)
+        """
+        column = self._column(group_by)
+        codes = self.codes[column]
+        relation_codes = [self.categories["standard_relation"].index(r) for r in ACTIVE_RELATIONS
+                          if r in self.categories["standard_relation"]]
+        measured = (codes >= 0) & ~np.isnan(self.value_nm)
+        if where is not None:
+            measured &= where
+        active = measured & (self.value_nm <= threshold_nm) & np.isin(self.codes["standard_relation"],
+                                                                      relation_codes)
+        ncat = len(self.categories[column])
+        measured_counts = np.bincount(codes[measured], minlength=ncat)
+        active_counts = np.bincount(codes[active], minlength=ncat)
+        present = np.flatnonzero(measured_counts)
+        groups, labels = self._groups(column, present)
+        return groups, labels, active_counts[present], measured_counts[present]
+
+
+async def load_activity_frame(queries: Sequence[ChemblQuery], description: str = "",
+                              max_rows: Optional[int] = None) -> ActivityFrame:
+    """Stream the records of ``queries`` into a new frame.
+
+    Raises:
+        ValueError: If the queries match more than ``max_rows`` (default MAX_FRAME_ROWS) activities
+    """
+    _require_numpy()
+    max_rows = MAX_FRAME_ROWS if max_rows is None else max_rows
+    builder = _FrameBuilder()
+    batch: List[Dict[str, Any]] = []
+    for query in queries:
+        # Pages are encoded as they arrive and kept out of the response cache
+        async for record in query.only(*FRAME_FIELDS).iterate(page_size=MAX_PAGE_SIZE, cache=False):
+            if builder.rows + len(batch) >= max_rows:
+                raise ValueError(f"More than {max_rows} activities match; narrow the query (e.g., by standard_types)")
+            batch.append(record)
+            if len(batch) >= MAX_PAGE_SIZE:
+                builder.add(batch)
+                batch = []
+    builder.add(batch)
+    return builder.build(description)
+
+
+class FrameStore:
+    """Bounded, TTL-expiring map from frame IDs (and the query a frame was loaded for) to frames."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_FRAMES, ttl: float = DEFAULT_FRAME_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[ActivityFrame, Any, float]]" = OrderedDict()
+
+    def _expire(self, now: float) -> None:
+        for frame_id in [f for f, entry in self._entries.items() if entry[2] <= now]:
+            del self._entries[frame_id]
+
+    def put(self, frame: ActivityFrame, key: Any = None) -> str:
+        """Store a frame and return its ID."""
+        now = time.monotonic()
+        self._expire(now)
+        frame_id = "F" + secrets.token_hex(4)
+        self._entries[frame_id] = (frame, key, now + self.ttl)
+        while len(self._entries) > max(self.max_entries, 0):
+            self._entries.popitem(last=False)
+        return frame_id
+
+    def _touch(self, frame_id: str, now: float) -> ActivityFrame:
+        frame, key, _ = self._entries[frame_id]
+        self._entries[frame_id] = (frame, key, now + self.ttl)
+        self._entries.move_to_end(frame_id)
+        return frame
+
+    def get(self, frame_id: str) -> ActivityFrame:
+        """Look a frame up by ID.
+
+        Raises:
+            FrameError: If the frame is unknown or has expired
+        """
+        now = time.monotonic()
+        self._expire(now)
+        if frame_id not in self._entries:
+            raise FrameError(f"Frame '{frame_id}' is unknown or has expired; repeat the call with the query")
+        return self._touch(frame_id, now)
+
+    def find(self, key: Any) -> Optional[Tuple[str, ActivityFrame]]:
+        """The live frame loaded for ``key``, if any."""
+        now = time.monotonic()
+        self._expire(now)
+        for frame_id, entry in self._entries.items():
+            if entry[1] == key:
+                return frame_id, self._touch(frame_id, now)
+        return None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_store = FrameStore()
+
+
+def get_frame_store() -> FrameStore:
+    """Return the frame store shared by all tools."""
+    return _store
+
+
+def configure_frame_store(max_entries: int = DEFAULT_MAX_FRAMES, ttl: float = DEFAULT_FRAME_TTL) -> FrameStore:
+    """Replace the shared frame store.
+
+    Args:
+        max_entries: Maximum number of frames kept
+        ttl: Seconds a frame stays available after it was loaded or last used
+
+    Returns:
+        The newly installed store
+    """
+    global _store
+    _store = FrameStore(max_entries, ttl)
+    return _store
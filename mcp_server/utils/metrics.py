@@ -0,0 +1,297 @@
+"""
+Instrumentation of tool calls, backend calls and ChEMBL HTTP traffic.
+
+Every registered tool is timed (see ``InstrumentedFastMCP``), every record or
+page request a tool makes through the resource handles is counted and timed
+per backend, and the transport records status codes, response bytes,
+retries and error classes. Response cache and request coalescing counters
+are read at collection time. Everything is kept in process and rendered in
+the Prometheus text exposition format by ``render_prometheus``, which backs
+the ``server_stats`` tool and the ``/metrics`` route of the HTTP transports.
+"""
+
+import contextvars
+import functools
+import inspect
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from mcp.server.fastmcp import FastMCP
+
+from .cache import get_cache
+from .singleflight import get_single_flight
+
+T = TypeVar("T")
+
+# Histogram buckets for latencies in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Histogram buckets for the number of backend calls one tool call makes
+CALL_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+Labels = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+# Backend calls made by the tool call running in the current context
+_tool_backend_calls: contextvars.ContextVar[Optional[List[int]]] = contextvars.ContextVar(
+    "tool_backend_calls", default=None)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def get(self, *labels: str) -> float:
+        return self.values.get(labels, 0.0)
+
+    def total(self) -> float:
+        return sum(self.values.values())
+
+    def samples(self) -> Iterator[Sample]:
+        for labels, value in sorted(self.values.items()):
+            yield self.name, dict(zip(self.labelnames, labels)), value
+
+
+class Histogram:
+    """Bucketed distribution with a running sum and count per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # Per label set: observations per bucket (not cumulative), sum, count
+        self.series: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = ([0] * len(self.buckets), [0.0, 0.0])
+        counts, totals = series
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        totals[0] += value
+        totals[1] += 1
+
+    def count(self, *labels: str) -> int:
+        series = self.series.get(labels)
+        return int(series[1][1]) if series else 0
+
+    def mean(self, *labels: str) -> float:
+        series = self.series.get(labels)
+        return series[1][0] / series[1][1] if series and series[1][1] else 0.0
+
+    def quantile(self, q: float, *labels: str) -> float:
+        """Upper bound of the bucket holding the ``q`` quantile (the largest finite bound if beyond)."""
+        series = self.series.get(labels)
+        if not series or not series[1][1]:
+            return 0.0
+        rank = q * series[1][1]
+        seen = 0
+        for bound, observed in zip(self.buckets, series[0]):
+            seen += observed
+            if seen >= rank and bound != math.inf:
+                return bound
+        return self.buckets[-2]
+
+    def samples(self) -> Iterator[Sample]:
+        for labels, (counts, (total, count)) in sorted(self.series.items()):
+            base = dict(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, observed in zip(self.buckets, counts):
+                cumulative += observed
+                yield f"{self.name}_bucket", {**base, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", base, total
+            yield f"{self.name}_count", base, count
+
+
+class CallbackMetric:
+    """Counter or gauge whose value is read from a callback at collection time."""
+
+    def __init__(self, name: str, help: str, read: Callable[[], Optional[float]], kind: str = "gauge"):
+        self.name = name
+        self.help = help
+        self.read = read
+        self.kind = kind
+
+    def samples(self) -> Iterator[Sample]:
+        value = self.read()
+        if value is not None:
+            yield self.name, {}, value
+
+
+class Metrics:
+    """The server's metric families."""
+
+    def __init__(self):
+        self.tool_calls = Counter("chembl_tool_calls_total", "Tool calls by outcome (ok, error, exception)",
+                                  ("tool", "outcome"))
+        self.tool_duration = Histogram("chembl_tool_duration_seconds", "Tool call latency", ("tool",))
+        self.tool_backend_calls = Histogram("chembl_tool_backend_calls", "Backend calls (records or pages) "
+                                            "made by one tool call", ("tool",), CALL_COUNT_BUCKETS)
+        self.backend_calls = Counter("chembl_backend_calls_total", "Backend calls by operation (get, page)",
+                                     ("backend", "operation"))
+        self.backend_duration = Histogram("chembl_backend_call_duration_seconds", "Backend call latency",
+                                          ("backend", "operation"))
+        self.backend_errors = Counter("chembl_backend_errors_total", "Failed backend calls by error class",
+                                      ("backend", "error"))
+        self.http_requests = Counter("chembl_http_requests_total", "ChEMBL API responses by status code",
+                                     ("status",))
+        self.http_duration = Histogram("chembl_http_request_duration_seconds", "ChEMBL API request latency")
+        self.http_bytes = Counter("chembl_http_response_bytes_total", "Bytes received from the ChEMBL API")
+        self.http_retries = Counter("chembl_http_retries_total", "Retried ChEMBL API requests")
+        self.http_errors = Counter("chembl_http_errors_total", "Failed ChEMBL API attempts by error class",
+                                   ("error",))
+        self.ratelimit_wait = Histogram("chembl_ratelimit_wait_seconds", "Time ChEMBL API requests waited for "
+                                        "a concurrency slot and a rate limit token")
+        self.ratelimit_throttled = Counter("chembl_ratelimit_throttled_total", "HTTP 429 answers that lowered "
+                                           "the request rate")
+        self.fanout_branches = Counter("chembl_fanout_branches_total", "Branches of composite tools by outcome "
+                                       "(ok, error, timeout)", ("group", "branch", "outcome"))
+        self.warmup_records = Counter("chembl_warmup_records_total", "Records prefetched by the startup warm-up "
+                                      "by outcome (loaded, missing, error)", ("resource", "outcome"))
+        self.name_index_lookups = Counter("chembl_name_index_lookups_total", "Name searches answered by the "
+                                          "local name index (hit) or passed to the API (miss)", ("kind", "outcome"))
+
+    def families(self) -> List[Any]:
+        from .transport import get_transport
+        cache = get_cache()
+        coalescing = get_single_flight().stats
+        limiter = get_transport().limiter
+        return [
+            self.tool_calls, self.tool_duration, self.tool_backend_calls,
+            self.backend_calls, self.backend_duration, self.backend_errors,
+            self.http_requests, self.http_duration, self.http_bytes, self.http_retries, self.http_errors,
+            self.ratelimit_wait, self.ratelimit_throttled, self.fanout_branches, self.warmup_records,
+            self.name_index_lookups,
+            CallbackMetric("chembl_ratelimit_rate", "Current ChEMBL API request rate limit (0 = unlimited)",
+                           lambda: limiter.rate),
+            CallbackMetric("chembl_cache_hits_total", "Response cache hits", lambda: cache.stats.hits, "counter"),
+            CallbackMetric("chembl_cache_disk_hits_total", "Response cache hits served by the disk tier",
+                           lambda: cache.stats.disk_hits, "counter"),
+            CallbackMetric("chembl_cache_misses_total", "Response cache misses", lambda: cache.stats.misses,
+                           "counter"),
+            CallbackMetric("chembl_cache_hit_ratio", "Response cache hit ratio",
+                           lambda: cache.stats.as_dict()["hit_ratio"]),
+            CallbackMetric("chembl_cache_memory_entries", "Entries in the in-memory cache tier",
+                           lambda: len(cache.memory)),
+            CallbackMetric("chembl_coalesced_requests_total", "Requests answered by an identical in-flight request",
+                           lambda: coalescing.coalesced, "counter"),
+            CallbackMetric("chembl_executed_requests_total", "Requests sent to the API after a cache miss",
+                           lambda: coalescing.executed, "counter"),
+        ]
+
+
+_metrics: Optional[Metrics] = None
+
+
+def get_metrics() -> Metrics:
+    """Return the metrics shared by the whole server."""
+    global _metrics
+    if _metrics is None:
+        _metrics = Metrics()
+    return _metrics
+
+
+def configure_metrics() -> Metrics:
+    """Replace the shared metrics with empty ones.
+
+    Returns:
+        The newly installed metrics
+    """
+    global _metrics
+    _metrics = Metrics()
+    return _metrics
+
+
+def render_prometheus() -> str:
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    for family in get_metrics().families():
+        samples = list(family.samples())
+        lines.append(f"# HELP {family.name} {family.help}")
+        lines.append(f"# TYPE {family.name} {family.kind}")
+        for name, labels, value in samples:
+            rendered = ",".join(f'{key}="{_escape(str(label))}"' for key, label in labels.items())
+            lines.append(f"{name}{{{rendered}}} {_format_value(value)}" if rendered
+                         else f"{name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+async def track_backend_call(backend: str, operation: str, call: Awaitable[T]) -> T:
+    """Time and count one backend call, attributing it to the running tool call."""
+    metrics = get_metrics()
+    calls = _tool_backend_calls.get()
+    if calls is not None:
+        calls[0] += 1
+    metrics.backend_calls.inc(backend, operation)
+    start = time.perf_counter()
+    try:
+        return await call
+    except Exception as e:
+        metrics.backend_errors.inc(backend, type(e).__name__)
+        raise
+    finally:
+        metrics.backend_duration.observe(time.perf_counter() - start, backend, operation)
+
+
+def instrument_tool(name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap an async tool function to record its latency, outcome and backend calls.
+
+    Tools report failures as text starting with 'Error'; such answers count
+    as outcome 'error', raised exceptions as 'exception'.
+    """
+    if not inspect.iscoroutinefunction(fn):
+        return fn
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        metrics = get_metrics()
+        calls = [0]
+        token = _tool_backend_calls.set(calls)
+        start = time.perf_counter()
+        outcome = "exception"
+        try:
+            result = await fn(*args, **kwargs)
+            outcome = "error" if isinstance(result, str) and result.startswith("Error") else "ok"
+            return result
+        finally:
+            _tool_backend_calls.reset(token)
+            metrics.tool_duration.observe(time.perf_counter() - start, name)
+            metrics.tool_backend_calls.observe(calls[0], name)
+            metrics.tool_calls.inc(name, outcome)
+
+    return wrapper
+
+
+class InstrumentedFastMCP(FastMCP):
+    """FastMCP server whose tools are registered through ``instrument_tool``."""
+
+    def add_tool(self, fn: Callable[..., Any], name: Optional[str] = None, *args: Any, **kwargs: Any) -> None:
+        super().add_tool(instrument_tool(name or fn.__name__, fn), name, *args, **kwargs)
@@ -0,0 +1,411 @@
+"""
+Local name and synonym index for molecule and target searches.
+
+``search_molecule`` and ``search_targets`` mostly look records up by name:
+a preferred name, an INN or trade name, a gene symbol. The index keeps
+every such name of a ChEMBL release in one SQLite file, normalized
+(case-folded, whitespace collapsed), with a B-tree for exact and prefix
+lookups and an FTS5 trigram table for substring and typo-tolerant
+matches. A search returns, in order:
+
+1. records with a name equal to the query,
+2. records with a name starting with it (shortest names first),
+3. records with a name containing it ("oxygenase"), through the trigram
+   table,
+4. only if none of these match, records whose names share most of the
+   query's trigrams, which covers small misspellings ("asprin").
+
+Lookups take well under a millisecond; the records themselves are fetched
+with the batch lookups, from the cache when warm. A query with no match
+falls back to the remote search.
+
+Build an index from the ChEMBL SQLite release with::
+
+    python -m mcp_server.utils.name_index build chembl_33.db /data/names.db
+
+and enable it with ``CHEMBL_NAME_INDEX=/data/names.db``. The file is
+written under a temporary name and renamed into place, and a running
+server reopens it on its next lookup after a rebuild. ``update_index``
+re-indexes only the records whose names changed in a new release (see
+``mcp_server.utils.sync``).
+"""
+
+import argparse
+import heapq
+import itertools
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# SQLite file of the name index used by search_molecule and search_targets, if any
+DEFAULT_NAME_INDEX = os.environ.get("CHEMBL_NAME_INDEX") or None
+
+# Share of the query's trigrams a name must contain to count as a fuzzy match
+FUZZY_MIN_SCORE = float(os.environ.get("CHEMBL_NAME_FUZZY_MIN_SCORE", "0.5"))
+
+# Trigram candidates scored per fuzzy search
+FUZZY_CANDIDATES = 500
+
+# Indexed record kinds
+KINDS = ("molecule", "target")
+
+# Record IDs per query when updating an index in place
+UPDATE_CHUNK = 500
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE names (id INTEGER PRIMARY KEY, kind TEXT NOT NULL, chembl_id TEXT NOT NULL,
+                    name TEXT NOT NULL, norm TEXT NOT NULL, source TEXT NOT NULL);
+CREATE VIRTUAL TABLE names_fts USING fts5(norm, content='names', content_rowid='id', tokenize='trigram');
+"""
+
+INDEXES = """
+CREATE INDEX idx_names_norm ON names (kind, norm);
+INSERT INTO names_fts (names_fts) VALUES ('rebuild');
+"""
+
+# Names read from a ChEMBL dump: (kind, ChEMBL ID, name, source)
+NAME_SOURCES = {
+    "molecule_pref_name": "SELECT 'molecule', chembl_id, pref_name, 'pref_name' FROM molecule_dictionary "
+                          "WHERE pref_name IS NOT NULL",
+    "molecule_synonyms": "SELECT DISTINCT 'molecule', md.chembl_id, ms.synonyms, ms.syn_type "
+                         "FROM molecule_synonyms ms JOIN molecule_dictionary md ON md.molregno = ms.molregno "
+                         "WHERE ms.synonyms IS NOT NULL",
+    "target_pref_name": "SELECT 'target', chembl_id, pref_name, 'pref_name' FROM target_dictionary "
+                        "WHERE pref_name IS NOT NULL",
+    "component_synonyms": "SELECT DISTINCT 'target', td.chembl_id, cs.component_synonym, cs.syn_type "
+                          "FROM component_synonyms cs "
+                          "JOIN target_components tc ON tc.component_id = cs.component_id "
+                          "JOIN target_dictionary td ON td.tid = tc.tid "
+                          "WHERE cs.component_synonym IS NOT NULL",
+}
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_name(name: str) -> str:
+    """Case-folded name with runs of whitespace collapsed to one space."""
+    return _SPACES.sub(" ", name).strip().casefold()
+
+
+def trigrams(text: str) -> set:
+    """Distinct three-character substrings of ``text`` (as the FTS5 trigram tokenizer sees it)."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _fts_phrase(value: str) -> str:
+    return '"' + value.replace('"', '""') + '"'
+
+
+class NameMatch:
+    """One indexed record matching a search, with the name that matched."""
+
+    __slots__ = ("chembl_id", "name", "match", "score")
+
+    def __init__(self, chembl_id: str, name: str, match: str, score: float = 1.0):
+        self.chembl_id = chembl_id
+        self.name = name
+        self.match = match
+        self.score = score
+
+    def __repr__(self) -> str:
+        return f"NameMatch({self.chembl_id!r}, {self.name!r}, {self.match!r}, {self.score:.2f})"
+
+
+class NameIndex:
+    """Read-only SQLite name/synonym index of one ChEMBL release."""
+
+    def __init__(self, path: str):
+        uri = Path(path).resolve().as_uri() + "?mode=ro"
+        self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.meta: Dict[str, str] = dict(self._conn.execute("SELECT key, value FROM meta"))
+        self.path = path
+
+    @property
+    def release(self) -> Optional[str]:
+        return self.meta.get("release")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM names").fetchone()[0]
+
+    def search(self, kind: str, query: str, limit: int = 100,
+               min_score: float = FUZZY_MIN_SCORE) -> List[NameMatch]:
+        """Records of ``kind`` whose names match ``query``: exact, prefix, substring, else fuzzy matches.
+
+        Args:
+            kind: 'molecule' or 'target'
+            query: Name or part of a name
+            limit: Maximum number of records returned
+            min_score: Share of the query's trigrams a fuzzy match must contain
+
+        Returns:
+            Matches in rank order, one per record (empty when nothing matches)
+        """
+        norm = normalize_name(query)
+        if not norm or limit <= 0:
+            return []
+        matches: Dict[str, NameMatch] = {}
+
+        def add(rows: List[Tuple[str, str]], match: str, score: float = 1.0) -> None:
+            for chembl_id, name in rows:
+                if chembl_id not in matches and len(matches) < limit:
+                    matches[chembl_id] = NameMatch(chembl_id, name, match, score)
+
+        with self._lock:
+            add(self._conn.execute("SELECT chembl_id, name FROM names WHERE kind = ? AND norm = ? ORDER BY id",
+                                   (kind, norm)).fetchall(), "exact")
+            if len(matches) < limit:
+                # Range scan of the (kind, norm) index: every name starting with the query
+                add(self._conn.execute(
+                    "SELECT chembl_id, name FROM names WHERE kind = ? AND norm > ? AND norm < ? "
+                    "ORDER BY length(norm), norm LIMIT ?",
+                    (kind, norm, norm + "\U0010ffff", limit * 4)).fetchall(), "prefix")
+            if len(matches) < limit and len(norm) >= 3:
+                # A phrase of trigrams matches names containing the query anywhere
+                add(self._conn.execute(
+                    "SELECT n.chembl_id, n.name FROM names_fts JOIN names n ON n.id = names_fts.rowid "
+                    "WHERE names_fts MATCH ? AND n.kind = ? ORDER BY length(n.norm), n.norm LIMIT ?",
+                    (_fts_phrase(norm), kind, limit * 4)).fetchall(), "substring")
+            grams = trigrams(norm)
+            if not matches and grams:
+                # Only on a miss: names sharing most trigrams with the query, for misspellings
+                candidates = self._conn.execute(
+                    "SELECT n.chembl_id, n.name, n.norm FROM names_fts JOIN names n ON n.id = names_fts.rowid "
+                    "WHERE names_fts MATCH ? AND n.kind = ? ORDER BY names_fts.rank LIMIT ?",
+                    (" OR ".join(_fts_phrase(g) for g in sorted(grams)), kind, FUZZY_CANDIDATES)).fetchall()
+                scored = []
+                for chembl_id, name, candidate in candidates:
+                    score = len(grams & trigrams(candidate)) / len(grams)
+                    if score >= min_score:
+                        scored.append((-score, len(candidate), candidate, chembl_id, name))
+                scored.sort()
+                for negative, _, _, chembl_id, name in scored:
+                    add([(chembl_id, name)], "fuzzy", -negative)
+        return list(matches.values())
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_index: Optional[NameIndex] = None
+_index_path: Optional[str] = DEFAULT_NAME_INDEX
+_index_stamp: Optional[Tuple[int, int]] = None
+
+
+def _stamp(path: str) -> Optional[Tuple[int, int]]:
+    """Identity of the index file currently at ``path`` (changes when a rebuild replaces it)."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def get_name_index() -> Optional[NameIndex]:
+    """Return the configured name index, or None to search remotely.
+
+    The index is reopened when a rebuild has replaced its file.
+    """
+    global _index, _index_stamp
+    if _index_path is None:
+        return None
+    stamp = _stamp(_index_path)
+    if stamp != _index_stamp:
+        _index = NameIndex(_index_path) if stamp else None
+        _index_stamp = stamp
+    return _index
+
+
+def configure_name_index(path: Optional[str] = None) -> Optional[NameIndex]:
+    """Open (or, with None, disable) the local name index."""
+    global _index, _index_path, _index_stamp
+    _index = NameIndex(path) if path else None
+    _index_path = path
+    _index_stamp = _stamp(path) if path else None
+    return _index
+
+
+def lookup_names(kind: str, query: str, limit: int = 100) -> Optional[List[str]]:
+    """ChEMBL IDs of the records of ``kind`` matching ``query`` in the name index.
+
+    Returns:
+        IDs in rank order, or None if no index is configured or nothing matched
+        (the caller then searches remotely)
+    """
+    from .metrics import get_metrics
+
+    index = get_name_index()
+    if index is None:
+        return None
+    matches = index.search(kind, query, limit)
+    get_metrics().name_index_lookups.inc(kind, "hit" if matches else "miss")
+    return [match.chembl_id for match in matches] or None
+
+
+def _dump_names(conn: sqlite3.Connection) -> Iterator[Tuple[str, str, str, str]]:
+    """Names of a ChEMBL dump, skipping sources whose tables it lacks."""
+    for sql in NAME_SOURCES.values():
+        try:
+            cursor = conn.execute(sql)
+        except sqlite3.OperationalError:
+            continue
+        for kind, chembl_id, name, source in cursor:
+            if chembl_id and name and name.strip():
+                yield kind, chembl_id, name.strip(), source or "synonym"
+
+
+def record_names(conn: sqlite3.Connection) -> Iterator[Tuple[str, str, List[Tuple[str, str]]]]:
+    """(kind, ChEMBL ID, sorted distinct (name, source) pairs) of each named record of a dump, in ID order."""
+    cursors = []
+    for sql in NAME_SOURCES.values():
+        try:
+            cursors.append(conn.execute(f"{sql} ORDER BY 1, 2"))
+        except sqlite3.OperationalError:
+            continue
+    rows = heapq.merge(*cursors, key=lambda row: (row[0], row[1]))
+    for (kind, chembl_id), group in itertools.groupby(rows, key=lambda row: (row[0], row[1])):
+        names = sorted({(name.strip(), source or "synonym") for _, _, name, source in group if name and name.strip()})
+        if chembl_id and names:
+            yield kind, chembl_id, names
+
+
+def _dump_release(conn: sqlite3.Connection) -> Optional[str]:
+    try:
+        row = conn.execute("SELECT name FROM version LIMIT 1").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+
+def build_index(database: str, output: str, release: Optional[str] = None) -> int:
+    """Index the molecule and target names of a ChEMBL SQLite dump into ``output``.
+
+    The index is written next to ``output`` and renamed into place once complete.
+
+    Returns:
+        Number of indexed names
+    """
+    source = sqlite3.connect(f"file:{database}?mode=ro", uri=True)
+    tmp = f"{output}.{os.getpid()}.tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    conn = sqlite3.connect(tmp)
+    try:
+        release = release or _dump_release(source)
+        conn.executescript(SCHEMA)
+        seen = set()
+        count = 0
+        rows = []
+        for kind, chembl_id, name, source_name in _dump_names(source):
+            norm = normalize_name(name)
+            if (kind, chembl_id, norm) in seen:
+                continue
+            seen.add((kind, chembl_id, norm))
+            rows.append((kind, chembl_id, name, norm, source_name))
+            if len(rows) >= 100_000:
+                conn.executemany("INSERT INTO names (kind, chembl_id, name, norm, source) VALUES (?, ?, ?, ?, ?)",
+                                 rows)
+                count += len(rows)
+                rows = []
+        conn.executemany("INSERT INTO names (kind, chembl_id, name, norm, source) VALUES (?, ?, ?, ?, ?)", rows)
+        count += len(rows)
+        conn.executescript(INDEXES)
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [("release", release or ""), ("names", str(count))])
+        conn.commit()
+        conn.execute("VACUUM")
+    except BaseException:
+        conn.close()
+        os.remove(tmp)
+        raise
+    finally:
+        source.close()
+    conn.close()
+    os.replace(tmp, output)
+    return count
+
+
+def update_index(database: str, output: str, records: Dict[str, Iterable[str]],
+                 release: Optional[str] = None) -> int:
+    """Re-index the names of some records from a newer dump, leaving every other name in place.
+
+    The index is copied next to ``output``, updated and renamed into place, so
+    a running server keeps reading the previous file until its next lookup.
+
+    Args:
+        database: Path of the newer ChEMBL SQLite release
+        output: Index file to update
+        records: ChEMBL IDs per kind ('molecule', 'target') whose names changed,
+            or which were added or removed
+        release: ChEMBL release recorded in the index (default: the dump's)
+
+    Returns:
+        Number of names indexed for the given records
+    """
+    wanted = {kind: set(ids) for kind, ids in records.items()}
+    source = sqlite3.connect(f"file:{database}?mode=ro", uri=True)
+    tmp = f"{output}.{os.getpid()}.tmp"
+    shutil.copyfile(output, tmp)
+    conn = sqlite3.connect(tmp)
+    try:
+        release = release or _dump_release(source)
+        for kind, ids in wanted.items():
+            ids = sorted(ids)
+            for start in range(0, len(ids), UPDATE_CHUNK):
+                chunk = ids[start:start + UPDATE_CHUNK]
+                rows = conn.execute(f"SELECT id, norm FROM names WHERE kind = ? AND chembl_id IN "
+                                    f"({', '.join('?' * len(chunk))})", (kind, *chunk)).fetchall()
+                # External content table: the trigrams are removed with the indexed text
+                conn.executemany("INSERT INTO names_fts (names_fts, rowid, norm) VALUES ('delete', ?, ?)", rows)
+                conn.executemany("DELETE FROM names WHERE id = ?", [(row[0],) for row in rows])
+        last = conn.execute("SELECT COALESCE(MAX(id), 0) FROM names").fetchone()[0]
+
+        seen = set()
+        rows = []
+        for kind, chembl_id, name, source_name in _dump_names(source):
+            norm = normalize_name(name)
+            if chembl_id not in wanted.get(kind, ()) or (kind, chembl_id, norm) in seen:
+                continue
+            seen.add((kind, chembl_id, norm))
+            rows.append((kind, chembl_id, name, norm, source_name))
+        conn.executemany("INSERT INTO names (kind, chembl_id, name, norm, source) VALUES (?, ?, ?, ?, ?)", rows)
+        conn.execute("INSERT INTO names_fts (rowid, norm) SELECT id, norm FROM names WHERE id > ?", (last,))
+        total = conn.execute("SELECT COUNT(*) FROM names").fetchone()[0]
+        conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                         [("release", release or ""), ("names", str(total))])
+        conn.commit()
+    except BaseException:
+        conn.close()
+        os.remove(tmp)
+        raise
+    finally:
+        source.close()
+    conn.close()
+    os.replace(tmp, output)
+    return len(rows)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point for building a name index."""
+    parser = argparse.ArgumentParser(prog="python -m mcp_server.utils.name_index",
+                                     description="Build a local ChEMBL molecule/target name index.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Index the names and synonyms of a ChEMBL SQLite dump")
+    build.add_argument("database", help="ChEMBL SQLite release (chembl_NN.db)")
+    build.add_argument("output", help="Index file to write")
+    build.add_argument("--release", help="ChEMBL release of the dump (default: read from the dump)")
+    args = parser.parse_args(argv)
+
+    count = build_index(args.database, args.output, args.release)
+    print(f"Indexed {count} names into {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
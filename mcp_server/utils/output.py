@@ -0,0 +1,109 @@
+"""
+Structured (JSON) tool output.
+
+Tools answer with readable text by default; the text renderers in this
+package are a view over the ChEMBL records. With ``output='json'`` a tool
+returns the records themselves as compact JSON instead, optionally projected
+onto ``fields``. Dotted names select nested values (e.g.
+``molecule_properties.full_mwt``; inside lists they apply to every element).
+
+List tools push the projection down to the backend as the ``only``
+parameter, so unneeded fields are never transferred. A single record
+requested without projection is passed through as the cached JSON text.
+Answer shapes:
+
+- single record: the record, or ``null`` if not found
+- list: ``{"results": [...], "next_cursor": ...}`` plus tool-specific keys
+- batch: ``{"results": {id: record or null}, "errors": {id: message}}``
+"""
+
+import json
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from .client import ChemblQuery
+
+OUTPUT_FORMATS = ("text", "json")
+
+
+def wants_json(output: str) -> bool:
+    """Whether a tool call asked for structured output.
+
+    Raises:
+        ValueError: If the output format is unknown
+    """
+    if output not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format '{output}' (expected 'text' or 'json')")
+    return output == "json"
+
+
+def _field_tree(fields: Sequence[str]) -> Dict[str, Any]:
+    """Nest dotted field names; None marks a field selected as a whole."""
+    tree: Dict[str, Any] = {}
+    for field in fields:
+        node = tree
+        parts = field.split(".")
+        for part in parts[:-1]:
+            child = node.setdefault(part, {})
+            if child is None:
+                break
+            node = child
+        else:
+            node[parts[-1]] = None
+    return tree
+
+
+def _apply(value: Any, tree: Optional[Dict[str, Any]]) -> Any:
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [_apply(item, tree) for item in value]
+    if not isinstance(value, dict):
+        return value
+    return {key: _apply(value[key], subtree) for key, subtree in tree.items() if key in value}
+
+
+def project(record: Any, fields: Optional[Sequence[str]] = None) -> Any:
+    """Keep only the requested (possibly dotted) fields of a record; all of it without ``fields``."""
+    if not fields:
+        return record
+    return _apply(record, _field_tree(fields))
+
+
+def query_fields(fields: Optional[Sequence[str]]) -> Tuple[str, ...]:
+    """Top-level fields to request from the backend for a projection."""
+    return tuple(dict.fromkeys(field.split(".", 1)[0] for field in fields or ()))
+
+
+def dump(payload: Any) -> str:
+    """Serialize an answer as compact JSON."""
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+
+
+def json_records(records: List[Any], fields: Optional[Sequence[str]] = None, next_cursor: Optional[str] = None,
+                 **extra: Any) -> str:
+    """A page of records as a structured answer."""
+    return dump({**extra, "results": [project(record, fields) for record in records], "next_cursor": next_cursor})
+
+
+def json_batch(chembl_ids: List[str], results: Dict[str, Any], fields: Optional[Sequence[str]] = None) -> str:
+    """The results of a batch lookup as a structured answer, keyed by requested ID."""
+    found: Dict[str, Any] = {}
+    errors: Dict[str, str] = {}
+    for chembl_id in chembl_ids:
+        value = results.get(chembl_id)
+        if isinstance(value, Exception):
+            errors[chembl_id] = str(value)
+        else:
+            found[chembl_id] = project(value, fields) if value else None
+    return dump({"results": found, "errors": errors})
+
+
+def json_record(record: Any, fields: Optional[Sequence[str]] = None) -> str:
+    """A single record (or null when not found) as a structured answer."""
+    return dump(project(record, fields) if record else None)
+
+
+def select_fields(query: "ChemblQuery", fields: Optional[Sequence[str]]) -> "ChemblQuery":
+    """Push a projection down to a list query, so the backend only returns what is needed."""
+    return query.only(*query_fields(fields)) if fields else query
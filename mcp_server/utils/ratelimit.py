@@ -0,0 +1,220 @@
+"""
+Outbound rate limiting toward the ChEMBL API.
+
+Every API request takes a token from a token bucket and holds one of a
+bounded number of concurrency slots while it is in flight. The bucket's rate
+adapts to the API's answers (additive increase, multiplicative decrease):
+HTTP 429 halves it and pauses all requests for the server's Retry-After,
+slow answers lower it slightly, and each fast answer raises it back toward
+the configured ceiling.
+
+The bucket is kept in process by default. With ``CHEMBL_RATE_LIMIT_FILE``
+set, its state (tokens, refill time, current rate, pause) lives in a small
+file updated under an exclusive ``flock``, so every replica on the host
+shares one budget and backs off together when any of them is throttled.
+The concurrency limit is always per process.
+"""
+
+import asyncio
+import contextlib
+import os
+import struct
+import threading
+import time
+from typing import AsyncIterator, Callable, List, Optional, Tuple, TypeVar
+
+from .metrics import get_metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process bucket
+    fcntl = None
+
+# Requests per second toward the API (0 disables the rate limit) and burst size
+DEFAULT_RATE = float(os.environ.get("CHEMBL_RATE_LIMIT", "10"))
+DEFAULT_BURST = float(os.environ.get("CHEMBL_RATE_BURST", "20"))
+
+# Requests in flight at once per process
+DEFAULT_CONCURRENCY = int(os.environ.get("CHEMBL_MAX_CONCURRENCY", "20"))
+
+# Responses slower than this (seconds) lower the rate
+DEFAULT_LATENCY_TARGET = float(os.environ.get("CHEMBL_RATE_LATENCY_TARGET", "5"))
+
+# Optional file holding a bucket shared by all processes on the host
+DEFAULT_SHARED_PATH = os.environ.get("CHEMBL_RATE_LIMIT_FILE") or None
+
+# Rate changes: factor on HTTP 429, factor on a slow answer, step per fast answer and
+# the adaptive floor (the last two as fractions of the configured rate)
+THROTTLE_FACTOR = 0.5
+SLOW_FACTOR = 0.9
+INCREASE_FRACTION = 0.01
+MIN_RATE_FRACTION = 0.05
+
+T = TypeVar("T")
+
+# Bucket state: tokens, time of the last refill (epoch seconds), current rate, paused until (epoch seconds)
+State = List[float]
+_STATE = struct.Struct("<4d")
+
+
+class LocalBucketState:
+    """Bucket state kept in this process."""
+
+    def __init__(self, state: State):
+        self._state = state
+        self._lock = threading.Lock()
+
+    def update(self, change: Callable[[State], T]) -> T:
+        """Apply ``change`` to the state atomically and return its result."""
+        with self._lock:
+            return change(self._state)
+
+    def close(self) -> None:
+        pass
+
+
+class FileBucketState:
+    """Bucket state in a file shared by every process that opens it.
+
+    Each update holds an exclusive ``flock`` for one read and one write of
+    32 bytes, so contention costs microseconds. The file is created with
+    the first process's settings; later processes adopt the state found.
+    """
+
+    def __init__(self, path: str, state: State):
+        if fcntl is None:
+            raise RuntimeError("A shared rate limit file requires fcntl (POSIX)")
+        self.path = path
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        with self._locked():
+            if len(os.pread(self._fd, _STATE.size, 0)) < _STATE.size:
+                os.pwrite(self._fd, _STATE.pack(*state), 0)
+
+    @contextlib.contextmanager
+    def _locked(self):
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def update(self, change: Callable[[State], T]) -> T:
+        """Apply ``change`` to the shared state atomically and return its result."""
+        with self._locked():
+            state = list(_STATE.unpack(os.pread(self._fd, _STATE.size, 0)))
+            result = change(state)
+            os.pwrite(self._fd, _STATE.pack(*state), 0)
+            return result
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class RateLimiter:
+    """Adaptive token bucket plus a per-process concurrency limit."""
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: float = DEFAULT_BURST,
+                 concurrency: int = DEFAULT_CONCURRENCY, latency_target: float = DEFAULT_LATENCY_TARGET,
+                 shared_path: Optional[str] = DEFAULT_SHARED_PATH):
+        self.max_rate = rate
+        self.min_rate = rate * MIN_RATE_FRACTION
+        self.burst = max(burst, 1.0)
+        self.concurrency = concurrency
+        self.latency_target = latency_target
+        initial = [self.burst, time.time(), rate, 0.0]
+        self._state = FileBucketState(shared_path, initial) if shared_path else LocalBucketState(initial)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_rate > 0
+
+    @property
+    def rate(self) -> float:
+        """Current rate in requests per second (0 when unlimited)."""
+        return self._state.update(lambda state: state[2]) if self.enabled else 0.0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Like the HTTP client, the semaphore belongs to the loop it was created on
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    def _take(self, state: State) -> float:
+        """Take a token, or return how long to wait before one is available."""
+        tokens, stamp, rate, paused_until = state
+        now = time.time()
+        if now < paused_until:
+            return paused_until - now
+        tokens = min(self.burst, tokens + max(now - stamp, 0.0) * rate)
+        state[0], state[1] = tokens, now
+        if tokens >= 1:
+            state[0] = tokens - 1
+            return 0.0
+        return (1 - tokens) / rate
+
+    async def acquire_token(self) -> float:
+        """Wait for a token. Returns the seconds spent waiting."""
+        if not self.enabled:
+            return 0.0
+        waited = 0.0
+        while True:
+            delay = self._state.update(self._take)
+            if delay <= 0:
+                return waited
+            await asyncio.sleep(delay)
+            waited += delay
+
+    @contextlib.asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold a concurrency slot and a token for the duration of one request."""
+        start = time.perf_counter()
+        semaphore = self._get_semaphore() if self.concurrency > 0 else None
+        if semaphore is not None:
+            await semaphore.acquire()
+        try:
+            await self.acquire_token()
+            get_metrics().ratelimit_wait.observe(time.perf_counter() - start)
+            yield
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+
+    def _adjust(self, factor: float = 1.0, pause: float = 0.0) -> Callable[[State], float]:
+        def change(state: State) -> float:
+            if factor < 1:
+                state[2] = max(self.min_rate, state[2] * factor)
+            else:
+                state[2] = min(self.max_rate, state[2] + self.max_rate * INCREASE_FRACTION)
+            if pause > 0:
+                # The bucket starts refilling, from empty, when the pause ends
+                state[3] = max(state[3], time.time() + pause)
+                state[0], state[1] = 0.0, state[3]
+            return state[2]
+        return change
+
+    def record(self, status_code: int, latency: float, retry_after: Optional[float] = None) -> None:
+        """Adapt the rate to one API answer."""
+        if not self.enabled:
+            return
+        if status_code == 429:
+            get_metrics().ratelimit_throttled.inc()
+            self._state.update(self._adjust(THROTTLE_FACTOR, retry_after or 0.0))
+        elif latency > self.latency_target:
+            self._state.update(self._adjust(SLOW_FACTOR))
+        elif status_code < 500:
+            self._state.update(self._adjust())
+
+    def snapshot(self) -> Tuple[float, float, float]:
+        """Current (tokens, rate, seconds paused) of the bucket, without refilling it."""
+        def read(state: State) -> Tuple[float, float, float]:
+            return state[0], state[2], max(state[3] - time.time(), 0.0)
+        return self._state.update(read)
+
+    def close(self) -> None:
+        self._state.close()
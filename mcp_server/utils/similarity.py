@@ -0,0 +1,303 @@
+"""
+Local similarity search over precomputed Morgan fingerprints.
+
+An index directory holds the fingerprints of a compound dump as packed
+``uint64`` rows sorted by popcount, memory-mapped at load time. A query only
+touches rows whose popcount can still reach the threshold (Tanimoto is bounded
+by ``min(a, b) / max(a, b)``), scanning outward from the query's popcount and
+raising the cutoff to the current k-th best score as results accumulate.
+
+Build an index from an SDF file or a SMILES/chemreps dump with::
+
+    python -m mcp_server.utils.similarity build chembl_33_chemreps.txt.gz /data/similarity
+
+and enable it with ``CHEMBL_SIMILARITY_INDEX=/data/similarity``. Searching
+needs NumPy; building also needs RDKit.
+"""
+
+import argparse
+import gzip
+import itertools
+import json
+import math
+import os
+import sys
+from pathlib import Path
+from typing import IO, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Directory of the fingerprint index used by get_similar_molecules, if any
+DEFAULT_SIMILARITY_INDEX = os.environ.get("CHEMBL_SIMILARITY_INDEX") or None
+
+# Morgan fingerprint settings used when building an index
+DEFAULT_RADIUS = 2
+DEFAULT_NBITS = 2048
+
+# Rows scored per vectorized step
+SCAN_CHUNK = 65536
+
+FINGERPRINTS_FILE = "fingerprints.npy"
+POPCOUNTS_FILE = "popcounts.npy"
+IDS_FILE = "ids.npy"
+ID_ORDER_FILE = "id_order.npy"
+META_FILE = "meta.json"
+
+
+def _require_numpy() -> None:
+    if not NUMPY_AVAILABLE:
+        raise ImportError("The local similarity index requires NumPy (pip install 'chembl-mcp[local]')")
+
+
+def _popcount(words: "np.ndarray") -> "np.ndarray":
+    """Number of set bits per row of a packed uint64 matrix (or of one vector)."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int32)
+    bytes_ = np.ascontiguousarray(words).view(np.uint8)
+    return np.unpackbits(bytes_, axis=-1).sum(axis=-1, dtype=np.int32)
+
+
+class SimilarityIndex:
+    """Memory-mapped fingerprint index with Tanimoto top-k search."""
+
+    def __init__(self, path: str):
+        _require_numpy()
+        directory = Path(path)
+        with open(directory / META_FILE) as f:
+            self.meta = json.load(f)
+        self.fingerprints = np.load(directory / FINGERPRINTS_FILE, mmap_mode="r")
+        self.popcounts = np.load(directory / POPCOUNTS_FILE, mmap_mode="r")
+        self.ids = np.load(directory / IDS_FILE, mmap_mode="r")
+        self.id_order = np.load(directory / ID_ORDER_FILE, mmap_mode="r")
+        self.path = str(directory)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def row_of(self, chembl_id: str) -> Optional[int]:
+        """Row holding the fingerprint of a ChEMBL ID, or None if not indexed."""
+        lo, hi = 0, len(self)
+        # Binary search through the sorting permutation; touches O(log n) rows
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.ids[self.id_order[mid]] < chembl_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self) and self.ids[self.id_order[lo]] == chembl_id:
+            return int(self.id_order[lo])
+        return None
+
+    def _bounds(self, count: int, threshold: float) -> Tuple[int, int]:
+        """Row range whose popcount can reach ``threshold`` against ``count`` set bits."""
+        if threshold <= 0:
+            return 0, len(self)
+        low = math.ceil(threshold * count - 1e-9)
+        high = math.floor(count / threshold + 1e-9)
+        return (int(np.searchsorted(self.popcounts, low, side="left")),
+                int(np.searchsorted(self.popcounts, high, side="right")))
+
+    def search(self, query: "np.ndarray", threshold: float = 0.7, k: int = 5) -> List[Tuple[str, float]]:
+        """Top-k rows by Tanimoto similarity to a packed fingerprint.
+
+        Args:
+            query: Packed uint64 fingerprint of the query
+            threshold: Minimum Tanimoto similarity (0-1)
+            k: Maximum number of hits
+
+        Returns:
+            (ChEMBL ID, similarity) pairs, best first
+        """
+        count = int(_popcount(query))
+        if count == 0 or k <= 0:
+            return []
+        lo, hi = self._bounds(count, threshold)
+        center = int(np.searchsorted(self.popcounts, count))
+        left = right = min(max(center, lo), hi)
+        cutoff = threshold
+        best_scores = np.empty(0, dtype=np.float64)
+        best_rows = np.empty(0, dtype=np.int64)
+
+        # Scan outward from the query popcount, where the bound is loosest
+        while left > lo or right < hi:
+            if right < hi and (left <= lo or right - center <= center - left):
+                start, stop = right, min(right + SCAN_CHUNK, hi)
+                right = stop
+            else:
+                start, stop = max(left - SCAN_CHUNK, lo), left
+                left = start
+            common = _popcount(self.fingerprints[start:stop] & query)
+            scores = common / (self.popcounts[start:stop].astype(np.int32) + count - common)
+            keep = np.flatnonzero(scores >= cutoff)
+            if keep.size == 0:
+                continue
+            best_scores = np.concatenate([best_scores, scores[keep]])
+            best_rows = np.concatenate([best_rows, keep + start])
+            if best_scores.size > k:
+                top = np.argpartition(-best_scores, k - 1)[:k]
+                best_scores, best_rows = best_scores[top], best_rows[top]
+            if best_scores.size == k:
+                # No row outside the tightened bounds can displace the current top k
+                cutoff = max(cutoff, float(best_scores.min()))
+                new_lo, new_hi = self._bounds(count, cutoff)
+                lo, hi = max(lo, new_lo), min(hi, new_hi)
+                left, right = max(left, lo), min(right, hi)
+
+        order = np.lexsort((best_rows, -best_scores))
+        return [(str(self.ids[best_rows[i]]), round(float(best_scores[i]), 4)) for i in order]
+
+    def similar_to(self, chembl_id: str, threshold: float = 0.7, k: int = 5) -> Optional[List[Tuple[str, float]]]:
+        """Top-k molecules similar to an indexed molecule; None if it is not indexed."""
+        row = self.row_of(chembl_id)
+        if row is None:
+            return None
+        return self.search(np.asarray(self.fingerprints[row]), threshold, k)
+
+
+_index: Optional[SimilarityIndex] = None
+_index_loaded = False
+
+
+def get_similarity_index() -> Optional[SimilarityIndex]:
+    """Return the configured similarity index, or None to use the remote search."""
+    global _index, _index_loaded
+    if not _index_loaded:
+        _index_loaded = True
+        if DEFAULT_SIMILARITY_INDEX:
+            _index = SimilarityIndex(DEFAULT_SIMILARITY_INDEX)
+    return _index
+
+
+def configure_similarity_index(path: Optional[str] = None) -> Optional[SimilarityIndex]:
+    """Load (or, with None, disable) the local similarity index."""
+    global _index, _index_loaded
+    _index = SimilarityIndex(path) if path else None
+    _index_loaded = True
+    return _index
+
+
+def _open_text(path: str) -> IO[str]:
+    return gzip.open(path, "rt") if path.endswith(".gz") else open(path)
+
+
+def read_molecules(path: str) -> Iterator[Tuple[str, str]]:
+    """Yield (ChEMBL ID, SMILES or molblock) pairs from a compound dump.
+
+    SDF files ('.sdf', '.sdf.gz') take the ID from a 'chembl_id' property or
+    the molecule title. Text files are either ChEMBL chemreps dumps (a header
+    with 'chembl_id' and 'canonical_smiles' columns) or 'SMILES ID' lines.
+    """
+    name = path[:-3] if path.endswith(".gz") else path
+    if name.endswith(".sdf"):
+        with _open_text(path) as f:
+            block: List[str] = []
+            for line in f:
+                if line.startswith("$$$$"):
+                    text = "".join(block)
+                    title = block[0].strip() if block else ""
+                    marker = text.find("<chembl_id>")
+                    if marker >= 0:
+                        title = text[marker:].splitlines()[1].strip()
+                    yield title, text
+                    block = []
+                else:
+                    block.append(line)
+        return
+
+    with _open_text(path) as f:
+        first = f.readline()
+        header = first.rstrip("\n").split("\t")
+        if "chembl_id" in header and "canonical_smiles" in header:
+            id_col, smiles_col = header.index("chembl_id"), header.index("canonical_smiles")
+            for line in f:
+                fields = line.rstrip("\n").split("\t")
+                if len(fields) > max(id_col, smiles_col) and fields[smiles_col]:
+                    yield fields[id_col], fields[smiles_col]
+            return
+        for line in itertools.chain([first], f):
+            fields = line.split()
+            if len(fields) >= 2:
+                yield fields[1], fields[0]
+
+
+def build_index(source: str, output: str, radius: int = DEFAULT_RADIUS, nbits: int = DEFAULT_NBITS,
+                release: Optional[str] = None) -> int:
+    """Compute Morgan fingerprints for a compound dump and write an index.
+
+    Args:
+        source: SDF or SMILES/chemreps file (optionally gzipped)
+        output: Index directory to create
+        radius: Morgan radius (2 gives ECFP4)
+        nbits: Fingerprint length, a multiple of 64
+        release: ChEMBL release recorded in the index metadata
+
+    Returns:
+        Number of indexed molecules
+    """
+    _require_numpy()
+    from rdkit import Chem, RDLogger
+    from rdkit.Chem import rdFingerprintGenerator
+
+    if nbits % 64:
+        raise ValueError("nbits must be a multiple of 64")
+    RDLogger.DisableLog("rdApp.*")
+    generator = rdFingerprintGenerator.GetMorganGenerator(radius=radius, fpSize=nbits)
+
+    ids: List[str] = []
+    rows: List["np.ndarray"] = []
+    skipped = 0
+    for chembl_id, structure in read_molecules(source):
+        mol = Chem.MolFromMolBlock(structure) if "\n" in structure else Chem.MolFromSmiles(structure)
+        if mol is None or not chembl_id:
+            skipped += 1
+            continue
+        bits = generator.GetFingerprintAsNumPy(mol).astype(np.uint8)
+        rows.append(np.packbits(bits, bitorder="little").view(np.uint64))
+        ids.append(chembl_id)
+
+    fingerprints = np.vstack(rows) if rows else np.empty((0, nbits // 64), dtype=np.uint64)
+    write_index(output, ids, fingerprints, {"fingerprint": "morgan", "radius": radius, "nbits": nbits,
+                                            "skipped": skipped, "release": release})
+    return len(ids)
+
+
+def write_index(output: str, ids: List[str], fingerprints: "np.ndarray", meta: dict) -> None:
+    """Write packed fingerprints and their IDs as an index directory, sorted by popcount."""
+    _require_numpy()
+    popcounts = _popcount(fingerprints)
+    order = np.argsort(popcounts, kind="stable")
+    id_array = np.array(ids, dtype=str)[order]
+
+    directory = Path(output)
+    directory.mkdir(parents=True, exist_ok=True)
+    np.save(directory / FINGERPRINTS_FILE, fingerprints[order])
+    np.save(directory / POPCOUNTS_FILE, popcounts[order].astype(np.uint16))
+    np.save(directory / IDS_FILE, id_array)
+    np.save(directory / ID_ORDER_FILE, np.argsort(id_array, kind="stable"))
+    with open(directory / META_FILE, "w") as f:
+        json.dump({**meta, "count": len(ids)}, f)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point for building a similarity index."""
+    parser = argparse.ArgumentParser(prog="python -m mcp_server.utils.similarity",
+                                     description="Build a local ChEMBL similarity index.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Fingerprint an SDF/SMILES dump into an index directory")
+    build.add_argument("source", help="SDF, SMILES or ChEMBL chemreps file (optionally .gz)")
+    build.add_argument("output", help="Index directory to write")
+    build.add_argument("--radius", type=int, default=DEFAULT_RADIUS)
+    build.add_argument("--nbits", type=int, default=DEFAULT_NBITS)
+    build.add_argument("--release", help="ChEMBL release of the dump (e.g. ChEMBL_33)")
+    args = parser.parse_args(argv)
+
+    count = build_index(args.source, args.output, args.radius, args.nbits, args.release)
+    print(f"Indexed {count} molecules into {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Request coalescing ("single-flight") for identical concurrent ChEMBL queries.
+
+When many tool calls ask for the same record or page at once, only the first
+one reaches the backend; the others await its result. Calls are keyed on the
+normalized request (path with format extension, sorted query parameters), the
+same key the response cache uses, so a coalesced call sees exactly the answer
+it would have fetched itself.
+"""
+
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Whether identical concurrent requests are coalesced ('0' to disable)
+DEFAULT_SINGLE_FLIGHT = os.environ.get("CHEMBL_SINGLE_FLIGHT", "1") != "0"
+
+
+class SingleFlightStats:
+    """Counters describing how much work coalescing saved."""
+
+    def __init__(self):
+        self.executed = 0
+        self.coalesced = 0
+        self.max_waiters = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        calls = self.executed + self.coalesced
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": self.coalesced / calls if calls else 0.0,
+            "max_waiters": self.max_waiters,
+        }
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time and shares its outcome.
+
+    Each caller awaits the shared call through ``asyncio.shield``, so a caller
+    that is cancelled (e.g., a tool call timing out) does not cancel the
+    request for the others. Errors are shared like results; nothing is kept
+    once the call completes.
+    """
+
+    def __init__(self, enabled: bool = DEFAULT_SINGLE_FLIGHT):
+        self.enabled = enabled
+        self.stats = SingleFlightStats()
+        self._calls: Dict[str, "asyncio.Task[Any]"] = {}
+        self._waiters: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def _forget(self, key: str, task: "asyncio.Task[Any]") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+            self._waiters.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # Mark an error as retrieved even if every caller was cancelled
+
+    async def do(self, key: str, call: Callable[[], Awaitable[T]]) -> T:
+        """Run ``call`` unless an identical call is already in flight, then share its result.
+
+        Args:
+            key: Normalized identity of the request
+            call: Function starting the request
+        """
+        if not self.enabled:
+            self.stats.executed += 1
+            return await call()
+
+        task = self._calls.get(key)
+        # A task left over from another event loop (e.g., a previous test) cannot be awaited
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            self.stats.coalesced += 1
+            self._waiters[key] += 1
+            self.stats.max_waiters = max(self.stats.max_waiters, self._waiters[key])
+        else:
+            self.stats.executed += 1
+            task = asyncio.ensure_future(call())
+            self._calls[key] = task
+            self._waiters[key] = 1
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+
+_single_flight: Optional[SingleFlight] = None
+
+
+def get_single_flight() -> SingleFlight:
+    """Return the coalescing layer shared by all REST requests."""
+    global _single_flight
+    if _single_flight is None:
+        _single_flight = SingleFlight()
+    return _single_flight
+
+
+def configure_single_flight(enabled: bool = DEFAULT_SINGLE_FLIGHT) -> SingleFlight:
+    """Replace the shared coalescing layer (resetting its counters).
+
+    Args:
+        enabled: Whether identical concurrent requests are coalesced
+
+    Returns:
+        The newly installed layer
+    """
+    global _single_flight
+    _single_flight = SingleFlight(enabled)
+    return _single_flight
@@ -0,0 +1,426 @@
+"""
+Local ChEMBL SQLite dump backend.
+
+Answers the resource queries used by the tools with indexed SQL against the
+official ChEMBL SQLite release (molecule_dictionary, target_dictionary,
+assays, activities, docs, ...). Records are shaped exactly like the REST API's
+JSON so tool output does not depend on the backend. Queries the schema cannot
+answer (similarity and substructure searches) are delegated to a fallback
+backend, the REST API by default.
+
+The lookups rely on the indexes shipped with the ChEMBL dumps: unique indexes
+on every ``chembl_id`` column and indexes on the ``molregno``, ``assay_id``,
+``doc_id`` and ``tid`` foreign keys. Name searches (molecule search and
+``target_pref_name__icontains``) are answered from the local name index when
+one is configured and knows the name; otherwise they are ``LIKE '%term%'``
+scans of the name and synonym columns, which no index can serve.
+"""
+
+import asyncio
+import sqlite3
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+from .backend import ChemblBackend, RestBackend
+
+if TYPE_CHECKING:
+    from .client import ChemblQuery, ChemblResource
+
+
+class UnsupportedQuery(Exception):
+    """Raised when a query cannot be expressed against the local schema."""
+
+
+def _decimal(value: Any, places: int) -> Optional[str]:
+    """Render a NUMERIC column the way the REST API does (fixed-point string)."""
+    return None if value is None else f"{float(value):.{places}f}"
+
+
+def _number(value: Any) -> Optional[str]:
+    """Render an unscaled NUMERIC column the way the REST API does."""
+    return None if value is None else str(float(value))
+
+
+def _molecule_record(row: sqlite3.Row) -> Dict[str, Any]:
+    properties = None
+    if row["full_molformula"] is not None or row["full_mwt"] is not None:
+        properties = {
+            "full_molformula": row["full_molformula"],
+            "full_mwt": _decimal(row["full_mwt"], 2),
+            "alogp": _decimal(row["alogp"], 2),
+            "hba": row["hba"],
+            "hbd": row["hbd"],
+            "psa": _decimal(row["psa"], 2),
+            "num_ro5_violations": row["num_ro5_violations"],
+            "aromatic_rings": row["aromatic_rings"],
+        }
+    structures = None
+    if row["canonical_smiles"] is not None:
+        structures = {
+            "canonical_smiles": row["canonical_smiles"],
+            "standard_inchi_key": row["standard_inchi_key"],
+        }
+    return {
+        "molecule_chembl_id": row["chembl_id"],
+        "pref_name": row["pref_name"],
+        "molecule_properties": properties,
+        "molecule_structures": structures,
+    }
+
+
+def _target_record(row: sqlite3.Row) -> Dict[str, Any]:
+    return {
+        "target_chembl_id": row["chembl_id"],
+        "pref_name": row["pref_name"],
+        "target_type": row["target_type"],
+        "organism": row["organism"],
+        "target_components": [],
+    }
+
+
+def _assay_record(row: sqlite3.Row) -> Dict[str, Any]:
+    return {
+        "assay_chembl_id": row["chembl_id"],
+        "description": row["description"],
+        "assay_type": row["assay_type"],
+        "assay_organism": row["assay_organism"],
+        "target_chembl_id": row["target_chembl_id"],
+        "document_chembl_id": row["document_chembl_id"],
+    }
+
+
+def _activity_record(row: sqlite3.Row) -> Dict[str, Any]:
+    return {
+        "activity_id": row["activity_id"],
+        "molecule_chembl_id": row["molecule_chembl_id"],
+        "molecule_pref_name": row["molecule_pref_name"],
+        "canonical_smiles": row["canonical_smiles"],
+        "target_chembl_id": row["target_chembl_id"],
+        "target_pref_name": row["target_pref_name"],
+        "target_organism": row["target_organism"],
+        "standard_type": row["standard_type"],
+        "standard_value": _number(row["standard_value"]),
+        "standard_units": row["standard_units"],
+        "standard_relation": row["standard_relation"],
+        "pchembl_value": _decimal(row["pchembl_value"], 2),
+        "assay_chembl_id": row["assay_chembl_id"],
+        "assay_description": row["assay_description"],
+        "document_chembl_id": row["document_chembl_id"],
+    }
+
+
+def _document_record(row: sqlite3.Row) -> Dict[str, Any]:
+    return {
+        "document_chembl_id": row["chembl_id"],
+        "title": row["title"],
+        "journal": row["journal"],
+        "year": row["year"],
+        "authors": row["authors"],
+        "doi": row["doi"],
+        "pubmed_id": row["pubmed_id"],
+    }
+
+
+class _ResourceSpec:
+    """How one REST resource maps onto the ChEMBL schema.
+
+    ``filters`` maps a REST filter name onto a predicate with an ``IN ({})``
+    placeholder, so both plain and ``__in`` filters use the same template;
+    ``like_filters`` maps ``__icontains`` filters onto a column.
+    """
+
+    def __init__(self, select: str, order_by: str, filters: Dict[str, str],
+                 build: Callable[[sqlite3.Row], Dict[str, Any]],
+                 like_filters: Optional[Dict[str, str]] = None):
+        self.select = select
+        self.order_by = order_by
+        self.filters = filters
+        self.build = build
+        self.like_filters = like_filters or {}
+
+
+RESOURCES: Dict[str, _ResourceSpec] = {
+    "molecule": _ResourceSpec(
+        select="""SELECT md.molregno, md.chembl_id, md.pref_name,
+                         cp.full_molformula, cp.full_mwt, cp.alogp, cp.hba, cp.hbd, cp.psa,
+                         cp.num_ro5_violations, cp.aromatic_rings,
+                         cs.canonical_smiles, cs.standard_inchi_key
+                  FROM molecule_dictionary md
+                  LEFT JOIN compound_properties cp ON cp.molregno = md.molregno
+                  LEFT JOIN compound_structures cs ON cs.molregno = md.molregno""",
+        order_by="md.molregno",
+        filters={
+            "molecule_chembl_id": "md.chembl_id IN ({})",
+            "document_chembl_id": ("md.molregno IN (SELECT cr.molregno FROM compound_records cr "
+                                   "JOIN docs d ON d.doc_id = cr.doc_id WHERE d.chembl_id IN ({}))"),
+        },
+        build=_molecule_record,
+    ),
+    "target": _ResourceSpec(
+        select="""SELECT td.tid, td.chembl_id, td.pref_name, td.target_type, td.organism
+                  FROM target_dictionary td""",
+        order_by="td.tid",
+        filters={
+            "target_chembl_id": "td.chembl_id IN ({})",
+            "target_components__accession": ("td.tid IN (SELECT tc.tid FROM target_components tc "
+                                             "JOIN component_sequences cs ON cs.component_id = tc.component_id "
+                                             "WHERE cs.accession IN ({}))"),
+        },
+        like_filters={"target_pref_name__icontains": "td.pref_name"},
+        build=_target_record,
+    ),
+    "assay": _ResourceSpec(
+        select="""SELECT a.assay_id, a.chembl_id, a.description, a.assay_type, a.assay_organism,
+                         td.chembl_id AS target_chembl_id, d.chembl_id AS document_chembl_id
+                  FROM assays a
+                  LEFT JOIN target_dictionary td ON td.tid = a.tid
+                  LEFT JOIN docs d ON d.doc_id = a.doc_id""",
+        order_by="a.assay_id",
+        filters={
+            "assay_chembl_id": "a.chembl_id IN ({})",
+            "assay_type": "a.assay_type IN ({})",
+            "target_chembl_id": "a.tid IN (SELECT tid FROM target_dictionary WHERE chembl_id IN ({}))",
+            "document_chembl_id": "a.doc_id IN (SELECT doc_id FROM docs WHERE chembl_id IN ({}))",
+        },
+        build=_assay_record,
+    ),
+    "activity": _ResourceSpec(
+        select="""SELECT act.activity_id, act.standard_type, act.standard_value, act.standard_units,
+                         act.standard_relation, act.pchembl_value,
+                         md.chembl_id AS molecule_chembl_id, md.pref_name AS molecule_pref_name,
+                         cs.canonical_smiles,
+                         td.chembl_id AS target_chembl_id, td.pref_name AS target_pref_name,
+                         td.organism AS target_organism,
+                         a.chembl_id AS assay_chembl_id, a.description AS assay_description,
+                         d.chembl_id AS document_chembl_id
+                  FROM activities act
+                  JOIN molecule_dictionary md ON md.molregno = act.molregno
+                  LEFT JOIN compound_structures cs ON cs.molregno = act.molregno
+                  JOIN assays a ON a.assay_id = act.assay_id
+                  LEFT JOIN target_dictionary td ON td.tid = a.tid
+                  LEFT JOIN docs d ON d.doc_id = act.doc_id""",
+        order_by="act.activity_id",
+        filters={
+            "activity_id": "act.activity_id IN ({})",
+            "molecule_chembl_id": "act.molregno IN (SELECT molregno FROM molecule_dictionary WHERE chembl_id IN ({}))",
+            "target_chembl_id": ("act.assay_id IN (SELECT a2.assay_id FROM assays a2 JOIN target_dictionary t2 "
+                                 "ON t2.tid = a2.tid WHERE t2.chembl_id IN ({}))"),
+            "assay_chembl_id": "act.assay_id IN (SELECT assay_id FROM assays WHERE chembl_id IN ({}))",
+            "document_chembl_id": "act.doc_id IN (SELECT doc_id FROM docs WHERE chembl_id IN ({}))",
+            "standard_type": "act.standard_type IN ({})",
+        },
+        build=_activity_record,
+    ),
+    "document": _ResourceSpec(
+        select="""SELECT d.doc_id, d.chembl_id, d.title, d.journal, d.year, d.authors, d.doi, d.pubmed_id
+                  FROM docs d""",
+        order_by="d.doc_id",
+        filters={"document_chembl_id": "d.chembl_id IN ({})"},
+        build=_document_record,
+    ),
+}
+
+# Molecule full-text search: ChEMBL ID, preferred name or synonym
+MOLECULE_SEARCH = ("(md.chembl_id = ? OR md.pref_name LIKE ? OR md.molregno IN "
+                   "(SELECT molregno FROM molecule_synonyms WHERE synonyms LIKE ?))")
+
+# Name filters the name index can answer: filter -> (name index kind, ChEMBL ID column)
+NAME_INDEX_FILTERS = {"target_pref_name__icontains": ("target", "td.chembl_id")}
+
+# Records taken from the name index per search
+NAME_SEARCH_MAX_HITS = 500
+
+
+def _indexed_names(kind: str, term: str) -> Optional[List[str]]:
+    """ChEMBL IDs of the records of ``kind`` whose names match ``term`` in the name index, in rank order.
+
+    Returns None when no name index is configured.
+    """
+    from .name_index import get_name_index
+
+    index = get_name_index()
+    if index is None:
+        return None
+    return [match.chembl_id for match in index.search(kind, term, NAME_SEARCH_MAX_HITS)]
+
+
+def _ranked_ids(column: str, chembl_ids: List[str], order_by: str) -> Tuple[str, str, List[Any]]:
+    """A predicate selecting ``chembl_ids`` and an ORDER BY keeping their rank ahead of ``order_by``.
+
+    Returns:
+        The predicate, the ORDER BY expression and the parameters of the ORDER BY
+        (the predicate's parameters are ``chembl_ids``)
+    """
+    placeholders = ", ".join("?" * len(chembl_ids))
+    rank = " ".join(f"WHEN ? THEN {i}" for i in range(len(chembl_ids)))
+    return f"{column} IN ({placeholders})", f"CASE {column} {rank} END, {order_by}", list(chembl_ids)
+
+
+def build_sql(query: "ChemblQuery") -> Tuple[_ResourceSpec, str, List[Any]]:
+    """Translate a resource query into SQL.
+
+    Returns:
+        The resource spec, the SQL (without LIMIT/OFFSET) and its parameters
+
+    Raises:
+        UnsupportedQuery: If the query uses a filter the schema cannot answer
+    """
+    spec = RESOURCES.get(query.resource.name)
+    if spec is None or query.resource.format != "json":
+        raise UnsupportedQuery(f"{query.resource.name}.{query.resource.format}")
+
+    clauses: List[str] = []
+    args: List[Any] = []
+    order_by = spec.order_by
+    order_args: List[Any] = []
+    if query.search_term is not None:
+        if query.resource.name != "molecule":
+            raise UnsupportedQuery(f"{query.resource.name} search")
+        term = query.search_term.strip()
+        chembl_ids = _indexed_names("molecule", term)
+        if chembl_ids:
+            clause, order_by, order_args = _ranked_ids("md.chembl_id", chembl_ids, spec.order_by)
+            # A ChEMBL ID is still matched exactly (and ranked first: it has no rank)
+            clauses.append(f"({clause} OR md.chembl_id = ?)")
+            args += chembl_ids + [term.upper()]
+        else:
+            # No index, or a name it does not know: scan names and synonyms like the REST search
+            clauses.append(MOLECULE_SEARCH)
+            args += [term.upper(), f"%{term}%", f"%{term}%"]
+            # Exact name matches first, like the REST search ranking
+            order_by = f"CASE WHEN md.pref_name = ? COLLATE NOCASE THEN 0 ELSE 1 END, {spec.order_by}"
+            order_args = [term]
+
+    for name, value in query.filters.items():
+        if name in spec.like_filters:
+            kind, column = NAME_INDEX_FILTERS.get(name, (None, None))
+            chembl_ids = _indexed_names(kind, str(value)) if kind else None
+            if chembl_ids:
+                clause, order_by, order_args = _ranked_ids(column, chembl_ids, spec.order_by)
+                clauses.append(clause)
+                args += chembl_ids
+                continue
+            clauses.append(f"{spec.like_filters[name]} LIKE ?")
+            args.append(f"%{value}%")
+            continue
+        base, values = name, [value]
+        if name.endswith("__in"):
+            base = name[:-4]
+            values = value if isinstance(value, (list, tuple, set)) else str(value).split(",")
+        template = spec.filters.get(base)
+        if template is None:
+            raise UnsupportedQuery(name)
+        values = list(values)
+        clauses.append(template.format(", ".join("?" * len(values))))
+        args += values
+
+    sql = spec.select
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += f" ORDER BY {order_by}"
+    return spec, sql, args + order_args
+
+
+class SqliteBackend(ChemblBackend):
+    """Backend serving tool queries from a local ChEMBL SQLite dump."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str, fallback: Optional[ChemblBackend] = None):
+        if not Path(path).exists():
+            raise FileNotFoundError(f"ChEMBL SQLite database not found: {path}")
+        self.path = path
+        self.fallback = fallback or RestBackend()
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Per-thread read-only connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            uri = Path(self.path).resolve().as_uri() + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _query(self, query: "ChemblQuery", offset: int, limit: int) -> Tuple[List[Dict[str, Any]], bool]:
+        spec, sql, args = build_sql(query)
+        return self._select(spec, sql, args, offset, limit)
+
+    def _select(self, spec: _ResourceSpec, sql: str, args: List[Any],
+                offset: int, limit: int) -> Tuple[List[Dict[str, Any]], bool]:
+        conn = self._connection()
+        rows = conn.execute(f"{sql} LIMIT ? OFFSET ?", (*args, limit + 1, offset)).fetchall()
+        records = [spec.build(row) for row in rows[:limit]]
+        if spec is RESOURCES["target"] and records:
+            self._attach_components(conn, rows[:limit], records)
+        return records, len(rows) > limit
+
+    @staticmethod
+    def _attach_components(conn: sqlite3.Connection, rows: List[sqlite3.Row],
+                           records: List[Dict[str, Any]]) -> None:
+        by_tid = {row["tid"]: record for row, record in zip(rows, records)}
+        placeholders = ", ".join("?" * len(by_tid))
+        components = conn.execute(
+            f"""SELECT tc.tid, cs.component_id, cs.component_type, cs.accession, cs.description
+                FROM target_components tc
+                JOIN component_sequences cs ON cs.component_id = tc.component_id
+                WHERE tc.tid IN ({placeholders}) ORDER BY tc.tid, cs.component_id""",
+            tuple(by_tid),
+        ).fetchall()
+        for row in components:
+            by_tid[row["tid"]]["target_components"].append({
+                "component_id": row["component_id"],
+                "component_type": row["component_type"],
+                "accession": row["accession"],
+                "component_description": row["description"],
+            })
+
+    def _molfile(self, chembl_id: str) -> Optional[str]:
+        row = self._connection().execute(
+            """SELECT cs.molfile FROM molecule_dictionary md
+               JOIN compound_structures cs ON cs.molregno = md.molregno
+               WHERE md.chembl_id = ?""",
+            (chembl_id,),
+        ).fetchone()
+        return row["molfile"] if row else None
+
+    def _release(self) -> Optional[str]:
+        try:
+            row = self._connection().execute("SELECT name FROM version LIMIT 1").fetchone()
+        except sqlite3.OperationalError:
+            return None
+        return row["name"] if row else None
+
+    async def get(self, resource: "ChemblResource", chembl_id: str) -> Any:
+        if resource.name == "molecule" and resource.format == "sdf":
+            return await asyncio.to_thread(self._molfile, chembl_id)
+        if resource.format != "json" or resource.name not in RESOURCES:
+            return await self.fallback.get(resource, chembl_id)
+        return await resource.filter(**{f"{resource.name}_chembl_id": chembl_id}).first()
+
+    async def fetch_page(self, query: "ChemblQuery", offset: int, limit: int,
+                         cache: bool = True) -> Tuple[List[Dict[str, Any]], bool]:
+        try:
+            # Built in the worker thread too: name searches may consult the name index
+            records, has_more = await asyncio.to_thread(self._query, query, offset, limit)
+        except UnsupportedQuery:
+            return await self.fallback.fetch_page(query, offset, limit, cache)
+        if query.fields:
+            records = [{field: record.get(field) for field in query.fields} for record in records]
+        return records, has_more
+
+    async def release(self) -> Optional[str]:
+        return await asyncio.to_thread(self._release)
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
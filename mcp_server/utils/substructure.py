@@ -0,0 +1,239 @@
+"""
+Local substructure search with a pattern-fingerprint screen.
+
+An index directory holds one RDKit pattern fingerprint per molecule as a
+packed ``uint64`` bitset, memory-mapped at load time, together with the
+molecules' SMILES. A molecule can only contain the query if its fingerprint
+has every bit set that the query's has, so a vectorized bitset test discards
+most of the dump before the (expensive) exact match runs on the survivors.
+Rows are ordered by heavy-atom count and scanned in chunks, so the smallest
+matching molecules are verified and returned first.
+
+Build an index with::
+
+    python -m mcp_server.utils.substructure build chembl_33_chemreps.txt.gz /data/substructure
+
+and enable it with ``CHEMBL_SUBSTRUCTURE_INDEX=/data/substructure``. Both
+building and searching need NumPy and RDKit.
+"""
+
+import argparse
+import asyncio
+import json
+import mmap
+import os
+import sys
+from pathlib import Path
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
+
+from .similarity import read_molecules
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Directory of the screening index used by search_molecule_substructure, if any
+DEFAULT_SUBSTRUCTURE_INDEX = os.environ.get("CHEMBL_SUBSTRUCTURE_INDEX") or None
+
+# Pattern fingerprint length used when building an index
+DEFAULT_NBITS = 2048
+
+# Rows screened per vectorized step
+SCREEN_CHUNK = 16384
+
+PATTERNS_FILE = "patterns.npy"
+IDS_FILE = "ids.npy"
+SMILES_FILE = "smiles.txt"
+OFFSETS_FILE = "offsets.npy"
+META_FILE = "meta.json"
+
+
+def _require_chemistry() -> None:
+    if not NUMPY_AVAILABLE:
+        raise ImportError("The local substructure index requires NumPy and RDKit "
+                          "(pip install 'chembl-mcp[local]')")
+
+
+def pattern_fingerprint(mol, nbits: int = DEFAULT_NBITS) -> "np.ndarray":
+    """RDKit pattern fingerprint of a molecule as packed uint64 words."""
+    from rdkit import Chem, DataStructs
+
+    bits = np.zeros(nbits, dtype=np.uint8)
+    DataStructs.ConvertToNumpyArray(Chem.PatternFingerprint(mol, fpSize=nbits), bits)
+    return np.packbits(bits, bitorder="little").view(np.uint64)
+
+
+class SubstructureIndex:
+    """Memory-mapped pattern-fingerprint screen with exact RDKit verification."""
+
+    def __init__(self, path: str):
+        _require_chemistry()
+        directory = Path(path)
+        with open(directory / META_FILE) as f:
+            self.meta = json.load(f)
+        self.patterns = np.load(directory / PATTERNS_FILE, mmap_mode="r")
+        self.ids = np.load(directory / IDS_FILE, mmap_mode="r")
+        self.offsets = np.load(directory / OFFSETS_FILE, mmap_mode="r")
+        self._smiles_file = open(directory / SMILES_FILE, "rb")
+        size = os.fstat(self._smiles_file.fileno()).st_size
+        self._smiles = mmap.mmap(self._smiles_file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.path = str(directory)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def smiles(self, row: int) -> str:
+        """SMILES of an indexed row."""
+        return self._smiles[self.offsets[row]:self.offsets[row + 1]].decode()
+
+    def query(self, smiles: str):
+        """Parse a query SMILES and compute its screen fingerprint.
+
+        Raises:
+            ValueError: If the SMILES cannot be parsed
+        """
+        from rdkit import Chem
+
+        mol = Chem.MolFromSmiles(smiles)
+        if mol is None:
+            raise ValueError(f"Invalid SMILES: {smiles}")
+        return mol, pattern_fingerprint(mol, self.meta["nbits"])
+
+    def screen(self, fingerprint: "np.ndarray", start: int = 0, stop: Optional[int] = None) -> "np.ndarray":
+        """Rows in ``[start, stop)`` whose fingerprint contains every query bit."""
+        stop = len(self) if stop is None else stop
+        words = np.flatnonzero(fingerprint)
+        if words.size == 0:
+            return np.arange(start, stop)
+        needed = fingerprint[words]
+        block = self.patterns[start:stop, words]
+        return np.flatnonzero(np.all((block & needed) == needed, axis=1)) + start
+
+    def iter_chunks(self, smiles: str) -> Iterator[Tuple[List[str], int]]:
+        """Screen and verify the index chunk by chunk.
+
+        Yields:
+            The ChEMBL IDs verified in each chunk and the number of screen survivors
+        """
+        from rdkit import Chem
+
+        query, fingerprint = self.query(smiles)
+        for start in range(0, len(self), SCREEN_CHUNK):
+            candidates = self.screen(fingerprint, start, min(start + SCREEN_CHUNK, len(self)))
+            hits = []
+            for row in candidates:
+                mol = Chem.MolFromSmiles(self.smiles(row))
+                if mol is not None and mol.HasSubstructMatch(query):
+                    hits.append(str(self.ids[row]))
+            yield hits, len(candidates)
+
+    def iter_matches(self, smiles: str) -> Iterator[str]:
+        """ChEMBL IDs of molecules containing the query, smallest molecules first."""
+        for hits, _ in self.iter_chunks(smiles):
+            yield from hits
+
+    async def stream_matches(self, smiles: str) -> AsyncIterator[str]:
+        """Async variant of ``iter_matches``; each chunk is processed in a worker thread."""
+        chunks = self.iter_chunks(smiles)
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                return
+            for chembl_id in chunk[0]:
+                yield chembl_id
+
+    def close(self) -> None:
+        if isinstance(self._smiles, mmap.mmap):
+            self._smiles.close()
+        self._smiles_file.close()
+
+
+_index: Optional[SubstructureIndex] = None
+_index_loaded = False
+
+
+def get_substructure_index() -> Optional[SubstructureIndex]:
+    """Return the configured substructure index, or None to use the remote search."""
+    global _index, _index_loaded
+    if not _index_loaded:
+        _index_loaded = True
+        if DEFAULT_SUBSTRUCTURE_INDEX:
+            _index = SubstructureIndex(DEFAULT_SUBSTRUCTURE_INDEX)
+    return _index
+
+
+def configure_substructure_index(path: Optional[str] = None) -> Optional[SubstructureIndex]:
+    """Load (or, with None, disable) the local substructure index."""
+    global _index, _index_loaded
+    if _index is not None:
+        _index.close()
+    _index = SubstructureIndex(path) if path else None
+    _index_loaded = True
+    return _index
+
+
+def build_index(source: str, output: str, nbits: int = DEFAULT_NBITS, release: Optional[str] = None) -> int:
+    """Compute pattern fingerprints for a compound dump and write a screening index.
+
+    Args:
+        source: SDF or SMILES/chemreps file (optionally gzipped)
+        output: Index directory to create
+        nbits: Fingerprint length, a multiple of 64
+        release: ChEMBL release recorded in the index metadata
+
+    Returns:
+        Number of indexed molecules
+    """
+    _require_chemistry()
+    from rdkit import Chem, RDLogger
+
+    if nbits % 64:
+        raise ValueError("nbits must be a multiple of 64")
+    RDLogger.DisableLog("rdApp.*")
+
+    entries = []
+    skipped = 0
+    for chembl_id, structure in read_molecules(source):
+        mol = Chem.MolFromMolBlock(structure) if "\n" in structure else Chem.MolFromSmiles(structure)
+        if mol is None or not chembl_id:
+            skipped += 1
+            continue
+        entries.append((mol.GetNumHeavyAtoms(), chembl_id, Chem.MolToSmiles(mol), pattern_fingerprint(mol, nbits)))
+    # Smallest molecules first: they are verified fastest and are the closest matches
+    entries.sort(key=lambda entry: entry[0])
+
+    directory = Path(output)
+    directory.mkdir(parents=True, exist_ok=True)
+    patterns = np.vstack([e[3] for e in entries]) if entries else np.empty((0, nbits // 64), dtype=np.uint64)
+    np.save(directory / PATTERNS_FILE, patterns)
+    np.save(directory / IDS_FILE, np.array([e[1] for e in entries], dtype=str))
+    encoded = [e[2].encode() for e in entries]
+    np.save(directory / OFFSETS_FILE, np.cumsum([0] + [len(s) for s in encoded], dtype=np.int64))
+    with open(directory / SMILES_FILE, "wb") as f:
+        f.write(b"".join(encoded))
+    with open(directory / META_FILE, "w") as f:
+        json.dump({"fingerprint": "pattern", "nbits": nbits, "count": len(entries),
+                   "skipped": skipped, "release": release}, f)
+    return len(entries)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point for building a substructure index."""
+    parser = argparse.ArgumentParser(prog="python -m mcp_server.utils.substructure",
+                                     description="Build a local ChEMBL substructure screening index.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Fingerprint an SDF/SMILES dump into an index directory")
+    build.add_argument("source", help="SDF, SMILES or ChEMBL chemreps file (optionally .gz)")
+    build.add_argument("output", help="Index directory to write")
+    build.add_argument("--nbits", type=int, default=DEFAULT_NBITS)
+    build.add_argument("--release", help="ChEMBL release of the dump (e.g. ChEMBL_33)")
+    args = parser.parse_args(argv)
+
+    count = build_index(args.source, args.output, args.nbits, args.release)
+    print(f"Indexed {count} molecules into {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
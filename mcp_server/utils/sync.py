@@ -0,0 +1,382 @@
+"""
+Incremental sync of the local cache and indexes with a new ChEMBL release.
+
+A ChEMBL release changes a small share of the records, yet everything kept
+for the previous one would otherwise be thrown away: the response cache
+drops every entry tagged with an older release, and the name and target
+indexes are rebuilt from scratch. ``sync`` instead compares the SQLite dump
+of the new release with the previous one and applies only the difference:
+
+1. Every molecule, target, assay, document and activity of the dump is
+   shaped like the REST record the tools read (through the SQLite backend's
+   resource mappings) and reduced to a digest, as are the names and
+   synonyms of each molecule and target. The digests are kept in a small
+   state file; comparing them with the previous release's gives the records
+   added, changed and removed.
+2. The on-disk response cache carries the entries of unchanged records
+   over to the new release in one transaction, so servers switching to the
+   new release still find them. Entries of changed records and list or
+   search results are dropped.
+3. The name index re-indexes the names of the changed records only.
+4. The target index recomputes the (molecule, target) pairs of the
+   molecules whose activities changed and copies the others.
+
+Each index is written next to the one in use and swapped in atomically, and
+the cache update is a single transaction, so servers keep answering
+throughout and pick the new files up on their next lookup. The new state
+replaces the previous one last: an interrupted sync is simply run again.
+Without a previous state (the first sync), or for a store built from another
+release than the state's, the store is rebuilt in full.
+
+Check whether the API serves a release that has not been synced yet, and
+sync a downloaded dump, with::
+
+    python -m mcp_server.utils.sync status --state /data/sync.db
+    python -m mcp_server.utils.sync run chembl_34.db --state /data/sync.db \\
+        --cache-path /var/cache/chembl-mcp.db --name-index /data/names.db --target-index /data/targets
+"""
+
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import os
+import re
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import unquote
+
+from .cache import DEFAULT_CACHE_PATH, DiskCache
+from .name_index import DEFAULT_NAME_INDEX, record_names
+from .sqlite_backend import RESOURCES, SqliteBackend
+from .target_index import DEFAULT_TARGET_INDEX, dump_release
+
+# State file holding the record digests of the last synced release
+DEFAULT_SYNC_STATE = os.environ.get("CHEMBL_SYNC_STATE") or None
+
+# Synced REST resources and the field identifying their records
+RECORD_KEYS = {
+    "molecule": "molecule_chembl_id",
+    "target": "target_chembl_id",
+    "assay": "assay_chembl_id",
+    "document": "document_chembl_id",
+    "activity": "activity_id",
+}
+
+# Entities holding the names and synonyms of each molecule and target
+NAME_ENTITIES = {"molecule": "molecule_names", "target": "target_names"}
+
+ENTITIES = (*RECORD_KEYS, *NAME_ENTITIES.values())
+
+# Records read from the dump and digests written per step
+DIGEST_CHUNK = 5000
+
+STATE_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE digests (entity TEXT NOT NULL, key TEXT NOT NULL, digest BLOB NOT NULL,
+                      molecule TEXT, target TEXT, PRIMARY KEY (entity, key)) WITHOUT ROWID;
+"""
+
+# Records of the new state ("digests") missing from, or differing in, the previous one ("old")
+DIFF_SQL = {
+    "added": "SELECT n.entity, n.key FROM digests n LEFT JOIN old.digests o "
+             "ON o.entity = n.entity AND o.key = n.key WHERE o.key IS NULL",
+    "changed": "SELECT n.entity, n.key FROM digests n JOIN old.digests o "
+               "ON o.entity = n.entity AND o.key = n.key WHERE o.digest != n.digest",
+    "removed": "SELECT o.entity, o.key FROM old.digests o LEFT JOIN digests n "
+               "ON n.entity = o.entity AND n.key = o.key WHERE n.key IS NULL",
+}
+
+# Molecules and targets of the activities added, changed or removed (before and after the change)
+ACTIVITY_REFS_SQL = """
+SELECT n.molecule, n.target FROM digests n LEFT JOIN old.digests o ON o.entity = n.entity AND o.key = n.key
+WHERE n.entity = 'activity' AND (o.key IS NULL OR o.digest != n.digest)
+UNION
+SELECT o.molecule, o.target FROM old.digests o LEFT JOIN digests n ON n.entity = o.entity AND n.key = o.key
+WHERE o.entity = 'activity' AND (n.key IS NULL OR n.digest != o.digest)
+"""
+
+# Cache keys of single records ('molecule/CHEMBL25.json', 'activity/31863.json', ...)
+_RECORD_KEY = re.compile(r"^(molecule|target|assay|document|activity)/([^/?]+)\.(?:json|sdf)$")
+
+
+def _digest(value: Any) -> bytes:
+    text = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+
+def dump_digests(conn: sqlite3.Connection) -> Iterator[Tuple[str, str, bytes, Optional[str], Optional[str]]]:
+    """(entity, key, digest, molecule, target) of every record of a dump.
+
+    Activities carry the ChEMBL IDs of their molecule and target; the other
+    entities leave both empty.
+    """
+    conn.row_factory = sqlite3.Row
+    for entity, key in RECORD_KEYS.items():
+        spec = RESOURCES[entity]
+        cursor = conn.execute(f"{spec.select} ORDER BY {spec.order_by}")
+        while True:
+            rows = cursor.fetchmany(DIGEST_CHUNK)
+            if not rows:
+                break
+            records = [spec.build(row) for row in rows]
+            if entity == "target":
+                SqliteBackend._attach_components(conn, rows, records)
+            for record in records:
+                if entity == "activity":
+                    refs = (record["molecule_chembl_id"], record["target_chembl_id"])
+                else:
+                    refs = (None, None)
+                yield (entity, str(record[key]), _digest(record), *refs)
+    conn.row_factory = None
+    for kind, chembl_id, names in record_names(conn):
+        yield NAME_ENTITIES[kind], chembl_id, _digest(names), None, None
+
+
+class Delta:
+    """Records added, changed and removed between two releases, by entity.
+
+    A full delta (no previous release to compare with) lists no records:
+    every store is rebuilt.
+    """
+
+    def __init__(self, previous: Optional[str], release: str):
+        self.previous = previous
+        self.release = release
+        self.added: Dict[str, Set[str]] = {entity: set() for entity in ENTITIES}
+        self.changed: Dict[str, Set[str]] = {entity: set() for entity in ENTITIES}
+        self.removed: Dict[str, Set[str]] = {entity: set() for entity in ENTITIES}
+        # Molecules and targets whose activities changed
+        self.molecules: Set[str] = set()
+        self.targets: Set[str] = set()
+
+    @property
+    def full(self) -> bool:
+        return self.previous is None
+
+    def touched(self, entity: str) -> Set[str]:
+        """Keys of the records of ``entity`` added, changed or removed."""
+        return self.added[entity] | self.changed[entity] | self.removed[entity]
+
+    def total(self) -> int:
+        return sum(len(self.touched(entity)) for entity in ENTITIES)
+
+    def summary(self) -> str:
+        if self.full:
+            return f"{self.release}: first sync, every store rebuilt"
+        lines = [f"{self.previous} -> {self.release}: {self.total()} records differ"]
+        for entity in ENTITIES:
+            lines.append(f"  {entity}: {len(self.added[entity])} added, {len(self.changed[entity])} changed, "
+                         f"{len(self.removed[entity])} removed")
+        lines.append(f"  activities changed for {len(self.molecules)} molecules and {len(self.targets)} targets")
+        return "\n".join(lines)
+
+
+def compute_delta(conn: sqlite3.Connection, previous: str, release: str) -> Delta:
+    """Compare the digests of a new state with the previous state attached as ``old``."""
+    delta = Delta(previous, release)
+    for change, sql in DIFF_SQL.items():
+        records = getattr(delta, change)
+        for entity, key in conn.execute(sql):
+            records[entity].add(key)
+    for molecule, target in conn.execute(ACTIVITY_REFS_SQL):
+        if molecule:
+            delta.molecules.add(molecule)
+        if target:
+            delta.targets.add(target)
+    return delta
+
+
+def state_release(state: str) -> Optional[str]:
+    """ChEMBL release last synced into ``state``, or None before the first sync."""
+    if not os.path.exists(state):
+        return None
+    conn = sqlite3.connect(f"file:{state}?mode=ro", uri=True)
+    try:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'release'").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+
+def _write_state(database: str, state: str, release: str) -> None:
+    """Write the digests of every record of ``database`` into a new state file."""
+    source = sqlite3.connect(f"file:{database}?mode=ro", uri=True)
+    conn = sqlite3.connect(state)
+    try:
+        conn.executescript(STATE_SCHEMA)
+        digests = dump_digests(source)
+        while True:
+            rows = list(itertools.islice(digests, DIGEST_CHUNK))
+            if not rows:
+                break
+            conn.executemany("INSERT INTO digests VALUES (?, ?, ?, ?, ?)", rows)
+        conn.execute("INSERT INTO meta VALUES ('release', ?)", (release,))
+        conn.commit()
+    finally:
+        conn.close()
+        source.close()
+
+
+def _is_current(key: str, touched: Dict[str, Set[str]]) -> bool:
+    """Whether a cache entry still answers for the new release: a record that did not change."""
+    match = _RECORD_KEY.match(key)
+    # List, search and similarity results may change with any record
+    return match is not None and unquote(match.group(2)) not in touched[match.group(1)]
+
+
+def sync_cache(path: str, delta: Delta) -> str:
+    """Carry the on-disk cache entries of unchanged records over to the new release."""
+    if delta.full:
+        return "left to the servers' release check (no previous release to compare with)"
+    touched = {entity: delta.touched(entity) for entity in RECORD_KEYS}
+    cache = DiskCache(path)
+    try:
+        kept, dropped = cache.retag(delta.previous, delta.release, lambda key: _is_current(key, touched))
+    finally:
+        cache.close()
+    return f"{kept} entries carried over, {dropped} dropped"
+
+
+def sync_name_index(path: str, database: str, delta: Delta) -> str:
+    """Re-index the names of changed molecules and targets, or rebuild the index."""
+    from .name_index import NameIndex, build_index, update_index
+
+    indexed = None
+    if os.path.exists(path):
+        index = NameIndex(path)
+        indexed = index.release
+        index.close()
+    if delta.full or indexed != delta.previous:
+        return f"rebuilt ({build_index(database, path, delta.release)} names)"
+    records = {kind: delta.touched(entity) for kind, entity in NAME_ENTITIES.items()}
+    count = update_index(database, path, records, delta.release)
+    return f"{sum(map(len, records.values()))} records re-indexed ({count} names)"
+
+
+def sync_target_index(path: str, database: str, delta: Delta) -> str:
+    """Recompute the pairs of molecules whose activities changed, or rebuild the index."""
+    from .target_index import _indexed_release, refresh_index, update_index
+
+    if delta.full or _indexed_release(path) != delta.previous:
+        return f"rebuilt ({refresh_index(database, path, force=True)} pairs)"
+    count = update_index(database, path, delta.molecules, delta.release)
+    return f"{len(delta.molecules)} molecules recomputed ({count} pairs)"
+
+
+class SyncReport:
+    """What a sync found and did to each store."""
+
+    def __init__(self, delta: Delta):
+        self.delta = delta
+        self.stores: Dict[str, str] = {}
+
+    def summary(self) -> str:
+        lines = [self.delta.summary()]
+        lines += [f"{store}: {result}" for store, result in self.stores.items()]
+        return "\n".join(lines)
+
+
+def sync(database: str, state: Optional[str] = DEFAULT_SYNC_STATE, cache_path: Optional[str] = DEFAULT_CACHE_PATH,
+         name_index: Optional[str] = DEFAULT_NAME_INDEX, target_index: Optional[str] = DEFAULT_TARGET_INDEX,
+         force: bool = False) -> Optional[SyncReport]:
+    """Bring the local stores from the last synced release to the release of ``database``.
+
+    Args:
+        database: SQLite dump of the new ChEMBL release
+        state: State file of the last sync (created by the first one)
+        cache_path: On-disk response cache to carry over, if any
+        name_index: Name index file to update, if any
+        target_index: Target index location to update, if any
+        force: Sync even if ``database`` holds the release already synced
+
+    Returns:
+        The report, or None if the release was already synced
+
+    Raises:
+        ValueError: If no state file is given or the dump records no release
+    """
+    if not state:
+        raise ValueError("A sync state file is required (--state or CHEMBL_SYNC_STATE)")
+    release = dump_release(database)
+    if release is None:
+        raise ValueError(f"{database} records no ChEMBL release (no version table)")
+    previous = state_release(state)
+    if previous == release and not force:
+        return None
+
+    tmp = f"{state}.{os.getpid()}.tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    try:
+        _write_state(database, tmp, release)
+        if previous is None:
+            delta = Delta(None, release)
+        else:
+            conn = sqlite3.connect(tmp)
+            try:
+                conn.execute("ATTACH DATABASE ? AS old", (state,))
+                delta = compute_delta(conn, previous, release)
+            finally:
+                conn.close()
+
+        report = SyncReport(delta)
+        if cache_path:
+            report.stores["cache"] = sync_cache(cache_path, delta)
+        if name_index:
+            report.stores["name index"] = sync_name_index(name_index, database, delta)
+        if target_index:
+            report.stores["target index"] = sync_target_index(target_index, database, delta)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    # Last: until the state moves on, running the sync again redoes every step
+    os.replace(tmp, state)
+    return report
+
+
+async def check_release(state: Optional[str] = DEFAULT_SYNC_STATE) -> Tuple[Optional[str], Optional[str]]:
+    """(release served by the configured backend, release last synced into ``state``)."""
+    from .backend import get_backend
+
+    return await get_backend().release(), state_release(state) if state else None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point for syncing local stores with a new release."""
+    parser = argparse.ArgumentParser(prog="python -m mcp_server.utils.sync",
+                                     description="Sync the local ChEMBL cache and indexes with a new release.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="Apply the changes of a new ChEMBL SQLite dump to the local stores")
+    run.add_argument("database", help="ChEMBL SQLite release (chembl_NN.db)")
+    run.add_argument("--cache-path", default=DEFAULT_CACHE_PATH, help="On-disk response cache to carry over")
+    run.add_argument("--name-index", default=DEFAULT_NAME_INDEX, help="Name index file to update")
+    run.add_argument("--target-index", default=DEFAULT_TARGET_INDEX, help="Target index symlink to update")
+    run.add_argument("--force", action="store_true", help="Sync even if the release is unchanged")
+    status = commands.add_parser("status", help="Compare the API's release with the last synced one "
+                                                "(exit status 1 if a newer release awaits)")
+    for command in (run, status):
+        command.add_argument("--state", default=DEFAULT_SYNC_STATE, required=DEFAULT_SYNC_STATE is None,
+                             help="State file of the last sync")
+    args = parser.parse_args(argv)
+
+    if args.command == "status":
+        served, synced = asyncio.run(check_release(args.state))
+        print(f"Served release: {served or 'unknown'}; synced release: {synced or 'none'}", file=sys.stderr)
+        if served is not None and served != synced:
+            sys.exit(1)
+        return
+    report = sync(args.database, args.state, args.cache_path, args.name_index, args.target_index, args.force)
+    if report is None:
+        print(f"{Path(args.database).name} is already synced", file=sys.stderr)
+    else:
+        print(report.summary(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
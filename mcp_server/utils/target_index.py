@@ -0,0 +1,499 @@
+"""
+Precomputed molecule/target activity summaries.
+
+For every (molecule, target) pair with activities in a ChEMBL release, the
+index keeps the number of activities and the best pChEMBL value together
+with the activity that reached it. ChEMBL IDs are interned as the integers
+after their ``CHEMBL`` prefix; pairs are stored as flat arrays grouped by
+molecule (most active targets first), and a permutation of them groups the
+same pairs by target (most potent molecules first). Everything is
+memory-mapped, so a lookup is two binary searches and a slice, with no scan
+of the activities.
+
+Build an index from the ChEMBL SQLite release with::
+
+    python -m mcp_server.utils.target_index build chembl_33.db /data/targets
+
+and enable it with ``CHEMBL_TARGET_INDEX=/data/targets``. When a new release
+arrives, ``refresh`` rebuilds the index only if the dump's release differs
+from the indexed one, next to the current one, and switches the
+``/data/targets`` symlink to it atomically; a running server picks the new
+index up on its next lookup. ``update_index`` switches in the same way but
+only recomputes the molecules whose activities changed between releases
+(see ``mcp_server.utils.sync``). Needs NumPy.
+"""
+
+import argparse
+import json
+import math
+import os
+import shutil
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Directory of the summary index used by get_molecule_targets and get_target_molecules, if any
+DEFAULT_TARGET_INDEX = os.environ.get("CHEMBL_TARGET_INDEX") or None
+
+# Rows read from the dump per step while building
+BUILD_CHUNK = 100_000
+
+CHEMBL_PREFIX = "CHEMBL"
+
+META_FILE = "meta.json"
+MOLECULE_IDS_FILE = "molecule_ids.npy"
+MOLECULE_OFFSETS_FILE = "molecule_offsets.npy"
+TARGET_IDS_FILE = "target_ids.npy"
+TARGET_OFFSETS_FILE = "target_offsets.npy"
+TARGET_NAMES_FILE = "target_names.npy"
+TARGET_ORGANISMS_FILE = "target_organisms.npy"
+TARGET_PAIRS_FILE = "target_pairs.npy"
+PAIR_FILES = {
+    "molecules": "pair_molecules.npy",
+    "targets": "pair_targets.npy",
+    "counts": "pair_counts.npy",
+    "pchembl": "pair_pchembl.npy",
+    "types": "pair_types.npy",
+    "values": "pair_values.npy",
+    "units": "pair_units.npy",
+}
+
+# One row per (molecule, target) pair; the bare activity columns come from the
+# row holding the maximum pChEMBL (SQLite's min/max aggregate semantics)
+PAIRS_SELECT = """
+SELECT md.chembl_id, td.chembl_id, COUNT(*), MAX(act.pchembl_value),
+       act.standard_type, act.standard_value, act.standard_units
+FROM activities act
+JOIN molecule_dictionary md ON md.molregno = act.molregno
+JOIN assays a ON a.assay_id = act.assay_id
+JOIN target_dictionary td ON td.tid = a.tid
+"""
+PAIRS_SQL = PAIRS_SELECT + "GROUP BY act.molregno, a.tid"
+
+# The pairs of some molecules only, for incremental updates
+MOLECULE_PAIRS_SQL = PAIRS_SELECT + "WHERE md.chembl_id IN ({}) GROUP BY act.molregno, a.tid"
+
+# Molecule IDs per incremental update query
+UPDATE_CHUNK = 500
+
+# Column types of the pair arrays, in PAIR_FILES order
+PAIR_DTYPES = ("uint32", "uint32", "uint32", "float32", "uint16", "float64", "uint16")
+
+TARGETS_SQL = "SELECT chembl_id, pref_name, organism FROM target_dictionary"
+
+
+def _require_numpy() -> None:
+    if not NUMPY_AVAILABLE:
+        raise ImportError("The local target index requires NumPy (pip install 'chembl-mcp[local]')")
+
+
+def chembl_number(chembl_id: str) -> Optional[int]:
+    """The interned form of a ChEMBL ID (25 for 'CHEMBL25'), or None if it is not one."""
+    digits = chembl_id[len(CHEMBL_PREFIX):]
+    if chembl_id.startswith(CHEMBL_PREFIX) and digits.isdigit():
+        return int(digits)
+    return None
+
+
+class TargetIndex:
+    """Memory-mapped activity summaries of every (molecule, target) pair of a release."""
+
+    def __init__(self, path: str):
+        _require_numpy()
+        directory = Path(path)
+        with open(directory / META_FILE) as f:
+            self.meta = json.load(f)
+
+        def load(name: str) -> "np.ndarray":
+            return np.load(directory / name, mmap_mode="r")
+
+        self.molecule_ids = load(MOLECULE_IDS_FILE)
+        self.molecule_offsets = load(MOLECULE_OFFSETS_FILE)
+        self.target_ids = load(TARGET_IDS_FILE)
+        self.target_offsets = load(TARGET_OFFSETS_FILE)
+        self.target_names = load(TARGET_NAMES_FILE)
+        self.target_organisms = load(TARGET_ORGANISMS_FILE)
+        self.target_pairs = load(TARGET_PAIRS_FILE)
+        self.pairs = {field: load(name) for field, name in PAIR_FILES.items()}
+        self.activity_types: List[str] = self.meta["activity_types"]
+        self.units: List[str] = self.meta["units"]
+        self.path = str(directory)
+
+    @property
+    def release(self) -> Optional[str]:
+        return self.meta.get("release")
+
+    def __len__(self) -> int:
+        return len(self.pairs["counts"])
+
+    @staticmethod
+    def _row(ids: "np.ndarray", chembl_id: str) -> Optional[int]:
+        number = chembl_number(chembl_id)
+        if number is None:
+            return None
+        row = int(np.searchsorted(ids, number))
+        return row if row < len(ids) and int(ids[row]) == number else None
+
+    def _summaries(self, pairs: Any) -> List[Dict[str, Any]]:
+        """Count, best pChEMBL and activity of each pair (a slice or positions), in order."""
+        columns = {field: self.pairs[field][pairs].tolist() for field in
+                   ("counts", "pchembl", "types", "values", "units")}
+        summaries = []
+        for count, pchembl, type_, value, units in zip(columns["counts"], columns["pchembl"], columns["types"],
+                                                       columns["values"], columns["units"]):
+            activity_type = self.activity_types[type_]
+            activity_value = f"{'N/A' if math.isnan(value) else value} {self.units[units]}"
+            best = None if math.isnan(pchembl) else round(pchembl, 2)
+            summaries.append({
+                'count': count,
+                'best_pchembl': best,
+                'best_activity': f"{activity_type} = {activity_value}" if best is not None else 'N/A',
+                'activity_type': activity_type,
+                'activity_value': activity_value,
+            })
+        return summaries
+
+    def molecule_targets(self, chembl_id: str) -> Optional[List[Tuple[str, Dict[str, Any]]]]:
+        """A molecule's targets ranked by activity count; None if it has no indexed activities.
+
+        Returns:
+            (target ChEMBL ID, summary) pairs shaped like the ones
+            ``get_molecule_targets`` folds from the activities
+        """
+        row = self._row(self.molecule_ids, chembl_id)
+        if row is None:
+            return None
+        pairs = slice(int(self.molecule_offsets[row]), int(self.molecule_offsets[row + 1]))
+        targets = self.pairs["targets"][pairs].tolist()
+        results = []
+        for target, summary in zip(targets, self._summaries(pairs)):
+            summary.update(name=str(self.target_names[target]), organism=str(self.target_organisms[target]),
+                           total=len(targets))
+            results.append((f"{CHEMBL_PREFIX}{int(self.target_ids[target])}", summary))
+        return results
+
+    def target_molecules(self, chembl_id: str) -> Optional[List[Tuple[str, Dict[str, Any]]]]:
+        """A target's molecules ranked by best pChEMBL, then activity count; None if not indexed."""
+        row = self._row(self.target_ids, chembl_id)
+        if row is None:
+            return None
+        pairs = np.asarray(self.target_pairs[int(self.target_offsets[row]):int(self.target_offsets[row + 1])])
+        molecules = self.pairs["molecules"][pairs].tolist()
+        results = []
+        for molecule, summary in zip(molecules, self._summaries(pairs)):
+            summary['total'] = len(molecules)
+            results.append((f"{CHEMBL_PREFIX}{molecule}", summary))
+        return results
+
+
+_index: Optional[TargetIndex] = None
+_index_path: Optional[str] = DEFAULT_TARGET_INDEX
+_index_stamp: Optional[Tuple[int, int]] = None
+
+
+def _stamp(path: str) -> Optional[Tuple[int, int]]:
+    """Identity of the index files currently behind ``path`` (follows a refreshed symlink)."""
+    try:
+        stat = os.stat(Path(path) / META_FILE)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def get_target_index() -> Optional[TargetIndex]:
+    """Return the configured target index, or None to fold activities on the fly.
+
+    The index is reloaded when ``refresh`` has switched it to a new release.
+    """
+    global _index, _index_stamp
+    if _index_path is None:
+        return None
+    stamp = _stamp(_index_path)
+    if stamp != _index_stamp:
+        _index = TargetIndex(_index_path) if stamp else None
+        _index_stamp = stamp
+    return _index
+
+
+def configure_target_index(path: Optional[str] = None) -> Optional[TargetIndex]:
+    """Load (or, with None, disable) the local target index."""
+    global _index, _index_path, _index_stamp
+    _index = TargetIndex(path) if path else None
+    _index_path = path
+    _index_stamp = _stamp(path) if path else None
+    return _index
+
+
+def dump_release(database: str) -> Optional[str]:
+    """ChEMBL release of a SQLite dump (e.g., 'ChEMBL_33'), if recorded."""
+    conn = sqlite3.connect(f"file:{database}?mode=ro", uri=True)
+    try:
+        row = conn.execute("SELECT name FROM version LIMIT 1").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+
+def _intern(values: Dict[str, int], value: Optional[str]) -> int:
+    return values.setdefault(value or "", len(values))
+
+
+def _pair_columns(rows: List[Tuple], types: Dict[str, int], units: Dict[str, int]) -> Dict[str, "np.ndarray"]:
+    """Arrays named like PAIR_FILES from rows of PAIRS_SQL, interning types and units."""
+    rows = [row for row in rows if chembl_number(row[0]) is not None and chembl_number(row[1]) is not None]
+    return {
+        "molecules": np.array([chembl_number(r[0]) for r in rows], dtype=np.uint32),
+        "targets": np.array([chembl_number(r[1]) for r in rows], dtype=np.uint32),
+        "counts": np.array([r[2] for r in rows], dtype=np.uint32),
+        "pchembl": np.array([math.nan if r[3] is None else r[3] for r in rows], dtype=np.float32),
+        "types": np.array([_intern(types, r[4]) for r in rows], dtype=np.uint16),
+        "values": np.array([math.nan if r[5] is None else r[5] for r in rows], dtype=np.float64),
+        "units": np.array([_intern(units, r[6]) for r in rows], dtype=np.uint16),
+    }
+
+
+def _concatenate(chunks: List[Dict[str, "np.ndarray"]]) -> Dict[str, "np.ndarray"]:
+    return {field: np.concatenate([chunk[field] for chunk in chunks]) if chunks else np.empty(0, dtype=dtype)
+            for field, dtype in zip(PAIR_FILES, PAIR_DTYPES)}
+
+
+def _read_targets(conn: sqlite3.Connection) -> List[Tuple[Optional[int], str, str]]:
+    return [(chembl_number(chembl_id), name or "N/A", organism or "N/A")
+            for chembl_id, name, organism in conn.execute(TARGETS_SQL)]
+
+
+def build_index(database: str, output: str, release: Optional[str] = None) -> int:
+    """Summarize the activities of a ChEMBL SQLite dump into an index directory.
+
+    Args:
+        database: Path of the ChEMBL SQLite release
+        output: Index directory to create
+        release: ChEMBL release recorded in the metadata (default: the dump's)
+
+    Returns:
+        Number of indexed (molecule, target) pairs
+    """
+    _require_numpy()
+    release = release or dump_release(database)
+    types: Dict[str, int] = {}
+    units: Dict[str, int] = {}
+    chunks: List[Dict[str, "np.ndarray"]] = []
+
+    conn = sqlite3.connect(f"file:{database}?mode=ro", uri=True)
+    try:
+        targets = _read_targets(conn)
+        cursor = conn.execute(PAIRS_SQL)
+        while True:
+            rows = cursor.fetchmany(BUILD_CHUNK)
+            if not rows:
+                break
+            chunks.append(_pair_columns(rows, types, units))
+    finally:
+        conn.close()
+
+    pairs = _concatenate(chunks)
+    write_index(output, pairs, targets, list(types), list(units), {"release": release})
+    return len(pairs["counts"])
+
+
+def update_index(database: str, output: str, molecule_ids: Iterable[str], release: Optional[str] = None) -> int:
+    """Write the index at ``output`` for a newer dump, recomputing only some molecules' pairs.
+
+    The pairs of the given molecules (those whose activities changed between
+    the indexed release and the dump) are summarized again from the dump;
+    every other pair is copied from the current index. The result is switched
+    in like ``refresh_index`` does.
+
+    Args:
+        database: Path of the newer ChEMBL SQLite release
+        output: Current index location
+        molecule_ids: ChEMBL IDs of the molecules to recompute
+        release: ChEMBL release recorded in the metadata (default: the dump's)
+
+    Returns:
+        Number of indexed pairs
+    """
+    _require_numpy()
+    release = release or dump_release(database)
+    current = TargetIndex(output)
+    ids = sorted(set(molecule_ids))
+    numbers = np.array([n for n in map(chembl_number, ids) if n is not None], dtype=np.uint32)
+    keep = ~np.isin(current.pairs["molecules"], numbers)
+    kept = {field: np.asarray(current.pairs[field][keep]) for field in PAIR_FILES}
+    # Stored target columns are rows of target_ids: back to interned IDs
+    kept["targets"] = np.asarray(current.target_ids)[kept["targets"]].astype(np.uint32)
+    types = {value: code for code, value in enumerate(current.activity_types)}
+    units = {value: code for code, value in enumerate(current.units)}
+    chunks = [kept]
+
+    conn = sqlite3.connect(f"file:{database}?mode=ro", uri=True)
+    try:
+        targets = _read_targets(conn)
+        for start in range(0, len(ids), UPDATE_CHUNK):
+            chunk = ids[start:start + UPDATE_CHUNK]
+            rows = conn.execute(MOLECULE_PAIRS_SQL.format(", ".join("?" * len(chunk))), chunk).fetchall()
+            chunks.append(_pair_columns(rows, types, units))
+    finally:
+        conn.close()
+
+    pairs = _concatenate(chunks)
+    _publish(output, release, lambda path: write_index(path, pairs, targets, list(types), list(units),
+                                                       {"release": release}))
+    return len(pairs["counts"])
+
+
+def _string_rank(numbers: "np.ndarray") -> "np.ndarray":
+    """Rank of each interned ID in the lexicographic order of the full ChEMBL IDs."""
+    unique, inverse = np.unique(numbers, return_inverse=True)
+    order = np.argsort(np.char.add(CHEMBL_PREFIX, unique.astype(str)), kind="stable")
+    ranks = np.empty(len(unique), dtype=np.int64)
+    ranks[order] = np.arange(len(unique))
+    return ranks[inverse]
+
+
+def write_index(output: str, pairs: Dict[str, "np.ndarray"], targets: List[Tuple[Optional[int], str, str]],
+                activity_types: List[str], units: List[str], meta: dict) -> None:
+    """Sort pair summaries into an index directory.
+
+    Args:
+        output: Index directory to create
+        pairs: Arrays named like PAIR_FILES, with interned molecule and target IDs
+        targets: (interned ID, name, organism) of the targets
+        activity_types: Activity types, by the codes used in ``pairs['types']``
+        units: Units, by the codes used in ``pairs['units']``
+        meta: Extra metadata (e.g., the release)
+    """
+    _require_numpy()
+    known = {number: (name, organism) for number, name, organism in targets if number is not None}
+    target_ids = np.unique(np.concatenate([pairs["targets"], np.array(list(known), dtype=np.uint32)]))
+    target_rows = np.searchsorted(target_ids, pairs["targets"])
+    molecule_ids, molecule_rows = np.unique(pairs["molecules"], return_inverse=True)
+    counts = pairs["counts"].astype(np.int64)
+    potency = np.where(np.isnan(pairs["pchembl"]), -np.inf, pairs["pchembl"].astype(np.float64))
+
+    # By molecule: most activities first, ties by target ID
+    by_molecule = np.lexsort((_string_rank(pairs["targets"]), -counts, molecule_rows))
+    # By target: best pChEMBL first, then most activities, ties by molecule ID
+    target_pairs = np.lexsort((_string_rank(pairs["molecules"][by_molecule]), -counts[by_molecule],
+                               -potency[by_molecule], target_rows[by_molecule]))
+
+    directory = Path(output)
+    directory.mkdir(parents=True, exist_ok=True)
+    for field, name in PAIR_FILES.items():
+        column = target_rows.astype(np.int32) if field == "targets" else pairs[field]
+        np.save(directory / name, column[by_molecule])
+    np.save(directory / MOLECULE_IDS_FILE, molecule_ids.astype(np.uint32))
+    np.save(directory / MOLECULE_OFFSETS_FILE,
+            np.searchsorted(molecule_rows[by_molecule], np.arange(len(molecule_ids) + 1)).astype(np.int64))
+    np.save(directory / TARGET_IDS_FILE, target_ids.astype(np.uint32))
+    np.save(directory / TARGET_OFFSETS_FILE,
+            np.searchsorted(target_rows[by_molecule][target_pairs], np.arange(len(target_ids) + 1)).astype(np.int64))
+    np.save(directory / TARGET_PAIRS_FILE, target_pairs.astype(np.int64))
+    np.save(directory / TARGET_NAMES_FILE, np.array([known.get(int(t), ("N/A",))[0] for t in target_ids], dtype=str))
+    np.save(directory / TARGET_ORGANISMS_FILE,
+            np.array([known.get(int(t), ("N/A", "N/A"))[1] for t in target_ids], dtype=str))
+    with open(directory / META_FILE, "w") as f:
+        json.dump({**meta, "pairs": len(by_molecule), "molecules": len(molecule_ids), "targets": len(target_ids),
+                   "activity_types": activity_types, "units": units}, f)
+
+
+def _indexed_release(output: str) -> Optional[str]:
+    try:
+        with open(Path(output) / META_FILE) as f:
+            return json.load(f).get("release")
+    except (OSError, ValueError):
+        return None
+
+
+def refresh_index(database: str, output: str, force: bool = False) -> Optional[int]:
+    """Rebuild the index at ``output`` if the dump holds a different release, switching atomically.
+
+    ``output`` is kept as a symlink to a sibling directory per release
+    (``<output>.<release>``); the new index is written completely before
+    the symlink is replaced, and the previous release's directory is removed.
+    Processes that still map the old files keep reading them until they reload.
+
+    Args:
+        database: Path of the ChEMBL SQLite release
+        output: Index location (a symlink managed by this function, or absent)
+        force: Rebuild even if the release is unchanged
+
+    Returns:
+        Number of indexed pairs, or None if the index was already up to date
+    """
+    release = dump_release(database)
+    if not force and release is not None and _indexed_release(output) == release:
+        return None
+
+    return _publish(output, release, lambda path: build_index(database, path, release))
+
+
+def _publish(output: str, release: Optional[str], write: Callable[[str], Any]) -> Any:
+    """Write an index into ``<output>.<release>`` with ``write``, then point the ``output`` symlink at it.
+
+    Returns:
+        What ``write`` returned
+    """
+    link = Path(output).absolute()
+    previous = link.resolve() if link.is_symlink() else None
+    suffix = release or "current"
+    target = link.with_name(f"{link.name}.{suffix}")
+    if target == previous:
+        target = link.with_name(f"{link.name}.{suffix}.new")
+    if target.exists():
+        shutil.rmtree(target)
+    result = write(str(target))
+
+    if link.exists() and not link.is_symlink():
+        # A directory written by 'build' is moved aside once to start managing a symlink
+        previous = link.with_name(f"{link.name}.previous")
+        if previous.exists():
+            shutil.rmtree(previous)
+        link.rename(previous)
+    staging = link.with_name(f".{link.name}.link")
+    if staging.is_symlink():
+        staging.unlink()
+    staging.symlink_to(target.name)
+    os.replace(staging, link)
+    if previous is not None and previous != target and previous.exists():
+        shutil.rmtree(previous)
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command line entry point for building and refreshing a target index."""
+    parser = argparse.ArgumentParser(prog="python -m mcp_server.utils.target_index",
+                                     description="Build a local ChEMBL molecule/target summary index.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Summarize a ChEMBL SQLite dump into an index directory")
+    build.add_argument("database", help="ChEMBL SQLite release (chembl_NN.db)")
+    build.add_argument("output", help="Index directory to write")
+    build.add_argument("--release", help="ChEMBL release of the dump (default: read from the dump)")
+    refresh = commands.add_parser("refresh", help="Rebuild and switch the index if the dump is a new release")
+    refresh.add_argument("database", help="ChEMBL SQLite release (chembl_NN.db)")
+    refresh.add_argument("output", help="Index symlink to update")
+    refresh.add_argument("--force", action="store_true", help="Rebuild even if the release is unchanged")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        count = build_index(args.database, args.output, args.release)
+        print(f"Indexed {count} molecule/target pairs into {args.output}", file=sys.stderr)
+        return
+    count = refresh_index(args.database, args.output, args.force)
+    if count is None:
+        print(f"{args.output} is up to date", file=sys.stderr)
+    else:
+        print(f"Indexed {count} molecule/target pairs into {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
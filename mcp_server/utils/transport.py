@@ -0,0 +1,264 @@
+"""
+Central HTTP transport for all ChEMBL traffic.
+
+A single pooled ``httpx.AsyncClient`` (HTTP/2 when the ``h2`` package is
+installed) is shared by every resource handle. Requests that fail with a
+transient error are retried with jittered exponential backoff, honoring
+``Retry-After``, and a circuit breaker fails fast while the API is down.
+Every attempt goes through the adaptive rate limiter (see ``ratelimit``).
+"""
+
+import asyncio
+import os
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+import httpx
+
+from .metrics import get_metrics
+from .ratelimit import RateLimiter
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Base URL for ChEMBL API
+BASE_URL = os.environ.get("CHEMBL_BASE_URL", "https://www.ebi.ac.uk/chembl/api/data")
+
+# Default timeout (seconds) for a single HTTP request
+DEFAULT_TIMEOUT = float(os.environ.get("CHEMBL_TIMEOUT", "30"))
+
+# Connection pool size and number of idle keep-alive connections
+DEFAULT_MAX_CONNECTIONS = int(os.environ.get("CHEMBL_MAX_CONNECTIONS", "20"))
+DEFAULT_MAX_KEEPALIVE = int(os.environ.get("CHEMBL_MAX_KEEPALIVE", "10"))
+
+# Whether to negotiate HTTP/2 (requires the 'h2' package)
+DEFAULT_HTTP2 = os.environ.get("CHEMBL_HTTP2", "1") != "0"
+
+# Retry policy for transient failures
+DEFAULT_MAX_RETRIES = int(os.environ.get("CHEMBL_MAX_RETRIES", "3"))
+DEFAULT_BACKOFF_BASE = float(os.environ.get("CHEMBL_BACKOFF_BASE", "0.5"))
+MAX_BACKOFF = 30.0
+
+# Circuit breaker: consecutive failed requests before opening, seconds before a trial request
+DEFAULT_FAILURE_THRESHOLD = int(os.environ.get("CHEMBL_CIRCUIT_THRESHOLD", "5"))
+DEFAULT_RESET_TIMEOUT = float(os.environ.get("CHEMBL_CIRCUIT_RESET", "30"))
+
+# HTTP statuses worth retrying
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class ChemblAPIError(Exception):
+    """Raised when the ChEMBL API answers with an unexpected HTTP status."""
+
+    def __init__(self, status_code: int, url: str):
+        self.status_code = status_code
+        self.url = url
+        super().__init__(f"ChEMBL API returned HTTP {status_code} for {url}")
+
+
+class CircuitOpenError(Exception):
+    """Raised without contacting the API while the circuit breaker is open."""
+
+    def __init__(self, retry_in: float):
+        self.retry_in = retry_in
+        super().__init__(f"ChEMBL API is unavailable (circuit open, retrying in {retry_in:.0f}s)")
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open trial request."""
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_started: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_request(self) -> None:
+        """Raise CircuitOpenError unless a request may be attempted now."""
+        state = self.state
+        if state == "closed":
+            return
+        now = time.monotonic()
+        # A trial that never reported back (e.g. cancelled) is abandoned after reset_timeout
+        if state == "half-open" and (self._trial_started is None
+                                     or now - self._trial_started >= self.reset_timeout):
+            self._trial_started = now
+            return
+        elapsed = now - self.opened_at
+        raise CircuitOpenError(max(self.reset_timeout - elapsed, 0.0))
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_started = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial_started is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._trial_started = None
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delay in seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class ChemblTransport:
+    """Owns the pooled ``httpx.AsyncClient`` used for all ChEMBL traffic.
+
+    The underlying client is bound to the event loop it was created on, so a
+    new one is created transparently when the running loop changes.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, timeout: float = DEFAULT_TIMEOUT,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 max_keepalive: int = DEFAULT_MAX_KEEPALIVE,
+                 http2: bool = DEFAULT_HTTP2,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff_base: float = DEFAULT_BACKOFF_BASE,
+                 breaker: Optional[CircuitBreaker] = None,
+                 limiter: Optional[RateLimiter] = None):
+        self.base_url = (base_url or BASE_URL).rstrip("/")
+        self.timeout = timeout
+        self.limits = httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_keepalive,
+                                   keepalive_expiry=30.0)
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.breaker = breaker or CircuitBreaker()
+        self.limiter = limiter or RateLimiter()
+        self.retries = 0
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 10.0)),
+                limits=self.limits,
+                http2=self.http2,
+            )
+            self._loop = loop
+        return self._client
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Delay before retry number ``attempt`` (0-based): full jitter, at least Retry-After."""
+        delay = random.uniform(0, min(MAX_BACKOFF, self.backoff_base * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, MAX_BACKOFF))
+        return delay
+
+    async def request(self, path: str, params: Optional[Dict[str, Any]] = None,
+                      timeout: Optional[float] = None) -> Optional[httpx.Response]:
+        """Issue a GET request against the ChEMBL API, retrying transient failures.
+
+        Args:
+            path: Path relative to the base URL (e.g., 'molecule/CHEMBL25.json')
+            params: Optional query string parameters
+            timeout: Optional timeout override in seconds for this request
+
+        Returns:
+            The HTTP response, or None if the resource does not exist
+        """
+        client = self._get_client()
+        extra = {"timeout": timeout} if timeout is not None else {}
+        error: Exception = RuntimeError("request not attempted")
+
+        metrics = get_metrics()
+        self.breaker.before_request()
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                async with self.limiter.slot():
+                    start = time.perf_counter()
+                    response = await client.get(f"/{path}", params=params, **extra)
+            except httpx.TransportError as e:
+                metrics.http_errors.inc(type(e).__name__)
+                error = e
+            else:
+                elapsed = time.perf_counter() - start
+                metrics.http_duration.observe(elapsed)
+                metrics.http_requests.inc(str(response.status_code))
+                metrics.http_bytes.inc(amount=len(response.content))
+                if response.status_code not in RETRY_STATUSES:
+                    self.limiter.record(response.status_code, elapsed)
+                    self.breaker.record_success()
+                    if response.status_code == 404:
+                        return None
+                    if response.status_code >= 400:
+                        raise ChemblAPIError(response.status_code, str(response.url))
+                    return response
+                error = ChemblAPIError(response.status_code, str(response.url))
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                self.limiter.record(response.status_code, elapsed, retry_after)
+
+            if attempt == self.max_retries:
+                break
+            self.retries += 1
+            metrics.http_retries.inc()
+            await asyncio.sleep(self.backoff(attempt, retry_after))
+
+        self.breaker.record_failure()
+        raise error
+
+    async def aclose(self) -> None:
+        """Close the underlying HTTP client."""
+        if self._client is not None:
+            client, self._client, self._loop = self._client, None, None
+            await client.aclose()
+
+
+# Created on first use, like the backend and the cache
+_transport: Optional[ChemblTransport] = None
+
+
+def get_transport() -> ChemblTransport:
+    """Return the transport shared by all resource handles."""
+    global _transport
+    if _transport is None:
+        _transport = ChemblTransport()
+    return _transport
+
+
+def configure_transport(base_url: Optional[str] = None, **options: Any) -> ChemblTransport:
+    """Replace the shared transport, e.g. to point the server at a mirror.
+
+    Args:
+        base_url: Base URL of the ChEMBL API (defaults to BASE_URL)
+        **options: Any other ChemblTransport argument (timeout, max_connections,
+            max_keepalive, http2, max_retries, backoff_base, breaker, limiter)
+
+    Returns:
+        The newly installed transport
+    """
+    global _transport
+    _transport = ChemblTransport(base_url, **options)
+    return _transport
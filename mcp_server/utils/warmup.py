@@ -0,0 +1,228 @@
+"""
+Cache warm-up from a manifest of frequently requested records.
+
+Traffic is skewed toward a few thousand popular molecules and targets, so a
+process that starts cold pays for the same lookups every time. At startup
+the server can prefetch those records into the response cache: the IDs
+come from a manifest (``CHEMBL_WARMUP_MANIFEST``) or are derived from a log
+of earlier ChEMBL API requests (``CHEMBL_WARMUP_LOG``), such as the
+server's own request log or a proxy's access log.
+
+Records are fetched with the batch lookups (chunked ``__in`` queries,
+stored per ID), a few chunks at a time, in a background task started by
+the MCP server's lifespan. ``initialize`` and tool calls are answered
+while the warm-up runs, and its requests go through the same rate limiter
+as everything else.
+
+A manifest is either JSON mapping resources to IDs::
+
+    {"molecule": ["CHEMBL25", "CHEMBL1201585"], "target": ["CHEMBL230"]}
+
+or text with one ``<resource> <id>`` pair per line (``#`` starts a comment).
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+from .client import BATCH_CHUNK_SIZE, get_resource
+from .metrics import get_metrics
+
+# Manifest of IDs to prefetch at startup, or a request log to derive it from
+DEFAULT_WARMUP_MANIFEST = os.environ.get("CHEMBL_WARMUP_MANIFEST") or None
+DEFAULT_WARMUP_LOG = os.environ.get("CHEMBL_WARMUP_LOG") or None
+
+# IDs per resource taken from a log (the most frequently requested ones)
+DEFAULT_WARMUP_TOP = int(os.environ.get("CHEMBL_WARMUP_TOP", "2000"))
+
+# Chunk requests the warm-up keeps in flight
+DEFAULT_WARMUP_CONCURRENCY = int(os.environ.get("CHEMBL_WARMUP_CONCURRENCY", "2"))
+
+# Resources that can be prefetched
+WARMUP_RESOURCES = ("molecule", "target", "assay")
+
+# Record lookups (/molecule/CHEMBL25.json) and ID filters (?molecule_chembl_id__in=CHEMBL25,CHEMBL2) in a log
+_RECORD_PATH = re.compile(r"/(molecule|target|assay)/(CHEMBL\d+)\b")
+_ID_FILTER = re.compile(r"\b(molecule|target|assay)_chembl_id(?:__in)?=([A-Za-z0-9,%]+)")
+_ID = re.compile(r"CHEMBL\d+")
+
+
+def parse_manifest(text: str) -> Dict[str, List[str]]:
+    """IDs per resource from manifest text (JSON or ``<resource> <id>`` lines).
+
+    Raises:
+        ValueError: If the manifest is malformed or names an unknown resource
+    """
+    manifest: Dict[str, List[str]] = {}
+    if text.lstrip().startswith("{"):
+        entries = [(resource, chembl_id) for resource, ids in json.loads(text).items() for chembl_id in ids]
+    else:
+        entries = []
+        for number, line in enumerate(text.splitlines(), 1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            parts = line.replace(",", " ").split()
+            if len(parts) != 2:
+                raise ValueError(f"Manifest line {number}: expected '<resource> <id>', got {line!r}")
+            entries.append((parts[0], parts[1]))
+    for resource, chembl_id in entries:
+        if resource not in WARMUP_RESOURCES:
+            raise ValueError(f"Unknown warm-up resource '{resource}'. Expected one of: "
+                             f"{', '.join(WARMUP_RESOURCES)}")
+        manifest.setdefault(resource, []).append(str(chembl_id).strip().upper())
+    return {resource: list(dict.fromkeys(ids)) for resource, ids in manifest.items()}
+
+
+def manifest_from_log(lines: Iterable[str], top: int = DEFAULT_WARMUP_TOP) -> Dict[str, List[str]]:
+    """The ``top`` most frequently requested IDs per resource in a log of ChEMBL API requests."""
+    counts: Dict[str, Counter] = {resource: Counter() for resource in WARMUP_RESOURCES}
+    for line in lines:
+        for resource, chembl_id in _RECORD_PATH.findall(line):
+            counts[resource][chembl_id] += 1
+        for resource, value in _ID_FILTER.findall(line):
+            counts[resource].update(_ID.findall(value.replace("%2C", ",").upper()))
+    return {resource: [chembl_id for chembl_id, _ in counter.most_common(top)]
+            for resource, counter in counts.items() if counter}
+
+
+def load_manifest(manifest_path: Optional[str] = None, log_path: Optional[str] = None,
+                  top: int = DEFAULT_WARMUP_TOP) -> Dict[str, List[str]]:
+    """IDs per resource from a manifest file and/or a request log, merged."""
+    manifest: Dict[str, List[str]] = {}
+    if manifest_path:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = parse_manifest(f.read())
+    if log_path:
+        with open(log_path, encoding="utf-8", errors="replace") as f:
+            for resource, ids in manifest_from_log(f, top).items():
+                manifest[resource] = list(dict.fromkeys(manifest.get(resource, []) + ids))
+    return manifest
+
+
+class WarmupReport:
+    """Outcome of one warm-up run."""
+
+    def __init__(self):
+        self.counts: Dict[str, Counter] = {}
+        self.elapsed = 0.0
+        self.error: Optional[str] = None
+
+    def total(self, outcome: Optional[str] = None) -> int:
+        return sum(counter[outcome] if outcome else sum(counter.values()) for counter in self.counts.values())
+
+    def format(self) -> str:
+        if self.error:
+            return f"Failed: {self.error}"
+        lines = [f"{self.total('loaded')} of {self.total()} records loaded in {self.elapsed:.1f} s"]
+        for resource, counter in self.counts.items():
+            lines.append(f"{resource}: {counter['loaded']} loaded, {counter['missing']} not found, "
+                         f"{counter['error']} failed")
+        return "\n".join(lines)
+
+
+async def warm_up(manifest: Dict[str, List[str]], concurrency: int = DEFAULT_WARMUP_CONCURRENCY,
+                  chunk_size: int = BATCH_CHUNK_SIZE) -> WarmupReport:
+    """Prefetch the manifest's records into the response cache, one resource after the other.
+
+    Records already cached are not fetched again, so warming a process that
+    shares an on-disk cache with warm ones costs no API requests.
+    """
+    start = time.perf_counter()
+    report = WarmupReport()
+    metrics = get_metrics()
+    for resource, ids in manifest.items():
+        results = await get_resource(resource).get_many(ids, chunk_size=chunk_size, concurrency=concurrency)
+        counter = report.counts[resource] = Counter()
+        for value in results.values():
+            outcome = "error" if isinstance(value, Exception) else "missing" if value is None else "loaded"
+            counter[outcome] += 1
+            metrics.warmup_records.inc(resource, outcome)
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+class Warmup:
+    """Runs the startup warm-up once per process and keeps its report."""
+
+    def __init__(self, manifest_path: Optional[str] = DEFAULT_WARMUP_MANIFEST,
+                 log_path: Optional[str] = DEFAULT_WARMUP_LOG, top: int = DEFAULT_WARMUP_TOP,
+                 concurrency: int = DEFAULT_WARMUP_CONCURRENCY):
+        self.manifest_path = manifest_path
+        self.log_path = log_path
+        self.top = top
+        self.concurrency = concurrency
+        self.report: Optional[WarmupReport] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.manifest_path or self.log_path)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> Optional[asyncio.Task]:
+        """Start the warm-up in the background, unless disabled or already started."""
+        if self.enabled and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+        return self._task
+
+    async def run(self) -> WarmupReport:
+        """Load the manifest and prefetch its records; failures end up in the report."""
+        report = WarmupReport()
+        try:
+            manifest = await asyncio.to_thread(load_manifest, self.manifest_path, self.log_path, self.top)
+            report = await warm_up(manifest, self.concurrency)
+        except Exception as e:
+            report.error = str(e)
+        self.report = report
+        return report
+
+    def status(self) -> str:
+        """One-line state of the warm-up for the stats tools."""
+        if not self.enabled:
+            return "Disabled"
+        if self.report is None:
+            return "Running" if self.running else "Not started"
+        return self.report.format()
+
+
+_warmup = Warmup()
+
+
+def get_warmup() -> Warmup:
+    """Return the process-wide warm-up."""
+    return _warmup
+
+
+def configure_warmup(manifest_path: Optional[str] = DEFAULT_WARMUP_MANIFEST,
+                     log_path: Optional[str] = DEFAULT_WARMUP_LOG, top: int = DEFAULT_WARMUP_TOP,
+                     concurrency: int = DEFAULT_WARMUP_CONCURRENCY) -> Warmup:
+    """Replace the process-wide warm-up.
+
+    Args:
+        manifest_path: Manifest of IDs to prefetch (JSON or '<resource> <id>' lines)
+        log_path: Log of ChEMBL API requests to take the most requested IDs from
+        top: IDs per resource taken from the log
+        concurrency: Chunk requests kept in flight
+
+    Returns:
+        The newly installed warm-up
+    """
+    global _warmup
+    _warmup = Warmup(manifest_path, log_path, top, concurrency)
+    return _warmup
+
+
+@asynccontextmanager
+async def warmup_lifespan(server: Any) -> AsyncIterator[None]:
+    """MCP server lifespan starting the warm-up without waiting for it."""
+    get_warmup().start()
+    yield
@@ -0,0 +1,291 @@
+"""
+Shared fixtures for the offline ChEMBL MCP server tests.
+"""
+
+import sqlite3
+
+import pytest
+
+from mcp_server import utils
+from stub_server import StubChemblServer
+
+ASPIRIN = {
+    "molecule_chembl_id": "CHEMBL25",
+    "pref_name": "ASPIRIN",
+    "molecule_properties": {
+        "full_molformula": "C9H8O4",
+        "full_mwt": "180.16",
+        "alogp": "1.31",
+        "hba": 3,
+        "hbd": 1,
+        "psa": "63.60",
+        "num_ro5_violations": 0,
+        "aromatic_rings": 1,
+    },
+    "molecule_structures": {
+        "canonical_smiles": "CC(=O)Oc1ccccc1C(=O)O",
+        "standard_inchi_key": "BSYNRYMUTXBXSQ-UHFFFAOYSA-N",
+    },
+}
+
+COX2 = {
+    "target_chembl_id": "CHEMBL230",
+    "pref_name": "Cyclooxygenase-2",
+    "target_type": "SINGLE PROTEIN",
+    "organism": "Homo sapiens",
+    "target_components": [
+        {"component_id": 1, "component_type": "PROTEIN", "accession": "P35354",
+         "component_description": "Cyclooxygenase-2"},
+    ],
+}
+
+COX2_ASSAY = {
+    "assay_chembl_id": "CHEMBL1217645",
+    "description": "Inhibition of COX-2",
+    "assay_type": "B",
+    "assay_organism": "Homo sapiens",
+    "target_chembl_id": "CHEMBL230",
+    "document_chembl_id": "CHEMBL1121427",
+}
+
+COX2_DOCUMENT = {
+    "document_chembl_id": "CHEMBL1121427",
+    "title": "COX-2 inhibitors",
+    "journal": "J. Med. Chem.",
+    "year": 2001,
+    "authors": "Doe J",
+    "doi": "10.1000/xyz",
+    "pubmed_id": 123,
+}
+
+ASPIRIN_SDF = """
+     RDKit          2D
+
+ 13 13  0  0  0  0  0  0  0  0999 V2000
+M  END
+"""
+
+
+def make_molecule(index: int) -> dict:
+    """Build a synthetic molecule record."""
+    return {
+        "molecule_chembl_id": f"CHEMBL{1000 + index}",
+        "pref_name": f"COMPOUND {index}",
+        "molecule_properties": {
+            "full_molformula": "C6H6",
+            "full_mwt": "78.11",
+            "alogp": "1.69",
+            "hba": 0,
+            "hbd": 0,
+            "psa": "0.00",
+            "num_ro5_violations": 0,
+            "aromatic_rings": 1,
+        },
+        "molecule_structures": {
+            "canonical_smiles": "c1ccccc1",
+            "standard_inchi_key": "UHOVQNZJYSORNB-UHFFFAOYSA-N",
+        },
+    }
+
+
+def make_target(index: int) -> dict:
+    """Build a synthetic single-protein target record."""
+    return {
+        "target_chembl_id": f"CHEMBL{200 + index}",
+        "pref_name": f"Target {index}",
+        "target_type": "SINGLE PROTEIN",
+        "organism": "Homo sapiens",
+        "target_components": [
+            {"component_id": 100 + index, "component_type": "PROTEIN",
+             "accession": f"Q{10000 + index}", "component_description": f"Target {index}"},
+        ],
+    }
+
+
+def make_assay(target_index: int) -> dict:
+    """Build a synthetic binding assay record against a synthetic target."""
+    return {
+        "assay_chembl_id": f"CHEMBL{9000 + target_index}",
+        "description": f"Inhibition of Target {target_index}",
+        "assay_type": "B",
+        "assay_organism": "Homo sapiens",
+        "target_chembl_id": f"CHEMBL{200 + target_index}",
+        "document_chembl_id": "CHEMBL1121427",
+    }
+
+
+def make_activity(index: int, target_index: int) -> dict:
+    """Build a synthetic activity record for CHEMBL25."""
+    return {
+        "activity_id": 5000 + index,
+        "molecule_chembl_id": "CHEMBL25",
+        "molecule_pref_name": "ASPIRIN",
+        "canonical_smiles": ASPIRIN["molecule_structures"]["canonical_smiles"],
+        "target_chembl_id": f"CHEMBL{200 + target_index}",
+        "target_pref_name": f"Target {target_index}",
+        "target_organism": "Homo sapiens",
+        "standard_type": "IC50",
+        "standard_value": str(10.0 * (index + 1)),
+        "standard_units": "nM",
+        "standard_relation": "=",
+        "pchembl_value": f"{8.0 - index / 100:.2f}",
+        "assay_chembl_id": f"CHEMBL{9000 + target_index}",
+        "assay_description": f"Inhibition of Target {target_index}",
+        "document_chembl_id": "CHEMBL1121427",
+    }
+
+
+MOLECULES = [ASPIRIN] + [make_molecule(i) for i in range(30)]
+TARGETS = [COX2] + [make_target(t) for t in range(12)]
+ASSAYS = [COX2_ASSAY] + [make_assay(t) for t in range(12)]
+ACTIVITIES = [make_activity(i, i % 12) for i in range(120)]
+
+# Compounds recorded for the fixture document
+DOCUMENT_MOLECULES = MOLECULES[:5]
+
+
+def default_routes() -> dict:
+    """Canned responses covering every tool."""
+    return {
+        "/status.json": {"chembl_db_version": "ChEMBL_33"},
+        "/molecule/CHEMBL25.json": ASPIRIN,
+        "/molecule/CHEMBL25.sdf": ASPIRIN_SDF,
+        "/molecule/search.json": {"molecules": MOLECULES[:10]},
+        "/molecule/search.json?q=aspirin": {"molecules": [ASPIRIN]},
+        "/molecule.json": {"molecules": MOLECULES},
+        "/molecule.json?document_chembl_id=CHEMBL1121427": {"molecules": DOCUMENT_MOLECULES},
+        "/similarity/CHEMBL25/70.json": {"molecules": MOLECULES[:8]},
+        "/substructure/CC%28%3DO%29O.json": {"molecules": MOLECULES},
+        "/target/CHEMBL230.json": COX2,
+        "/target.json": {"targets": TARGETS},
+        "/target.json?target_pref_name__icontains=cyclooxygenase": {"targets": [COX2]},
+        "/assay/CHEMBL1217645.json": COX2_ASSAY,
+        "/assay.json": {"assays": ASSAYS},
+        "/activity.json": {"activities": ACTIVITIES},
+        "/document/CHEMBL1121427.json": COX2_DOCUMENT,
+        "/document.json": {"documents": [COX2_DOCUMENT]},
+    }
+
+
+# Subset of the ChEMBL SQLite schema read by the sqlite backend
+FIXTURE_SCHEMA = """
+CREATE TABLE version (name TEXT, creation_date TEXT, comments TEXT);
+CREATE TABLE molecule_dictionary (molregno INTEGER PRIMARY KEY, pref_name TEXT, chembl_id TEXT UNIQUE);
+CREATE TABLE compound_properties (
+    molregno INTEGER PRIMARY KEY, full_molformula TEXT, full_mwt NUMERIC, alogp NUMERIC,
+    hba INTEGER, hbd INTEGER, psa NUMERIC, num_ro5_violations INTEGER, aromatic_rings INTEGER);
+CREATE TABLE compound_structures (
+    molregno INTEGER PRIMARY KEY, molfile TEXT, standard_inchi_key TEXT, canonical_smiles TEXT);
+CREATE TABLE molecule_synonyms (molsyn_id INTEGER PRIMARY KEY, molregno INTEGER, syn_type TEXT, synonyms TEXT);
+CREATE TABLE docs (
+    doc_id INTEGER PRIMARY KEY, journal TEXT, year INTEGER, pubmed_id INTEGER, doi TEXT,
+    chembl_id TEXT UNIQUE, title TEXT, authors TEXT);
+CREATE TABLE compound_records (record_id INTEGER PRIMARY KEY, molregno INTEGER, doc_id INTEGER);
+CREATE TABLE target_dictionary (
+    tid INTEGER PRIMARY KEY, target_type TEXT, pref_name TEXT, organism TEXT, chembl_id TEXT UNIQUE);
+CREATE TABLE component_sequences (
+    component_id INTEGER PRIMARY KEY, component_type TEXT, accession TEXT, description TEXT);
+CREATE TABLE target_components (targcomp_id INTEGER PRIMARY KEY, tid INTEGER, component_id INTEGER);
+CREATE TABLE assays (
+    assay_id INTEGER PRIMARY KEY, doc_id INTEGER, description TEXT, assay_type TEXT,
+    assay_organism TEXT, tid INTEGER, chembl_id TEXT UNIQUE);
+CREATE TABLE activities (
+    activity_id INTEGER PRIMARY KEY, assay_id INTEGER, doc_id INTEGER, molregno INTEGER,
+    standard_relation TEXT, standard_value NUMERIC, standard_units TEXT, standard_type TEXT,
+    pchembl_value NUMERIC);
+CREATE INDEX idx_synonyms_molregno ON molecule_synonyms (molregno);
+CREATE INDEX idx_records_molregno ON compound_records (molregno);
+CREATE INDEX idx_records_doc ON compound_records (doc_id);
+CREATE INDEX idx_components_tid ON target_components (tid);
+CREATE INDEX idx_assays_tid ON assays (tid);
+CREATE INDEX idx_act_molregno ON activities (molregno);
+CREATE INDEX idx_act_assay ON activities (assay_id);
+CREATE INDEX idx_act_doc ON activities (doc_id);
+"""
+
+
+def build_fixture_db(path: str) -> None:
+    """Write the fixture records into a ChEMBL-schema SQLite database."""
+    conn = sqlite3.connect(path)
+    conn.executescript(FIXTURE_SCHEMA)
+    conn.execute("INSERT INTO version VALUES ('ChEMBL_33', '2023-05-31', 'fixture')")
+
+    molregno = {}
+    for m in MOLECULES:
+        molregno[m["molecule_chembl_id"]] = regno = len(molregno) + 1
+        props, structs = m["molecule_properties"], m["molecule_structures"]
+        conn.execute("INSERT INTO molecule_dictionary VALUES (?, ?, ?)",
+                     (regno, m["pref_name"], m["molecule_chembl_id"]))
+        conn.execute("INSERT INTO compound_properties VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                     (regno, props["full_molformula"], props["full_mwt"], props["alogp"], props["hba"],
+                      props["hbd"], props["psa"], props["num_ro5_violations"], props["aromatic_rings"]))
+        molfile = ASPIRIN_SDF if m is ASPIRIN else None
+        conn.execute("INSERT INTO compound_structures VALUES (?, ?, ?, ?)",
+                     (regno, molfile, structs["standard_inchi_key"], structs["canonical_smiles"]))
+    conn.execute("INSERT INTO molecule_synonyms (molregno, syn_type, synonyms) VALUES (1, 'INN', 'Aspirin')")
+
+    d = COX2_DOCUMENT
+    conn.execute("INSERT INTO docs VALUES (1, ?, ?, ?, ?, ?, ?, ?)",
+                 (d["journal"], d["year"], d["pubmed_id"], d["doi"], d["document_chembl_id"],
+                  d["title"], d["authors"]))
+    conn.executemany("INSERT INTO compound_records (molregno, doc_id) VALUES (?, 1)",
+                     [(molregno[m["molecule_chembl_id"]],) for m in DOCUMENT_MOLECULES])
+
+    tid = {}
+    for t in TARGETS:
+        tid[t["target_chembl_id"]] = len(tid) + 1
+        conn.execute("INSERT INTO target_dictionary VALUES (?, ?, ?, ?, ?)",
+                     (tid[t["target_chembl_id"]], t["target_type"], t["pref_name"], t["organism"],
+                      t["target_chembl_id"]))
+        for c in t["target_components"]:
+            conn.execute("INSERT INTO component_sequences VALUES (?, ?, ?, ?)",
+                         (c["component_id"], c["component_type"], c["accession"], c["component_description"]))
+            conn.execute("INSERT INTO target_components (tid, component_id) VALUES (?, ?)",
+                         (tid[t["target_chembl_id"]], c["component_id"]))
+
+    assay_id = {}
+    for a in ASSAYS:
+        assay_id[a["assay_chembl_id"]] = len(assay_id) + 1
+        conn.execute("INSERT INTO assays VALUES (?, 1, ?, ?, ?, ?, ?)",
+                     (assay_id[a["assay_chembl_id"]], a["description"], a["assay_type"],
+                      a["assay_organism"], tid[a["target_chembl_id"]], a["assay_chembl_id"]))
+
+    for act in ACTIVITIES:
+        conn.execute("INSERT INTO activities VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?)",
+                     (act["activity_id"], assay_id[act["assay_chembl_id"]],
+                      molregno[act["molecule_chembl_id"]], act["standard_relation"],
+                      float(act["standard_value"]), act["standard_units"], act["standard_type"],
+                      float(act["pchembl_value"])))
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def chembl_stub():
+    """Run a local ChEMBL stub and point the shared transport at it.
+
+    Each test also gets an empty, memory-only response cache and fresh
+    request coalescing counters.
+    """
+    server = StubChemblServer(default_routes()).start()
+    utils.configure_transport(server.base_url, backoff_base=0.01)
+    utils.configure_cache(path=None)
+    utils.configure_single_flight()
+    try:
+        yield server
+    finally:
+        utils.configure_transport()
+        utils.configure_cache()
+        server.stop()
+
+
+@pytest.fixture
+def chembl_sqlite(chembl_stub, tmp_path):
+    """Serve queries from a fixture ChEMBL SQLite dump, falling back to the stub."""
+    path = str(tmp_path / "chembl.db")
+    build_fixture_db(path)
+    backend = utils.configure_backend("sqlite", path=path)
+    try:
+        yield backend
+    finally:
+        utils.configure_backend("rest")
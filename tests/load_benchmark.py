@@ -0,0 +1,203 @@
+"""
+Load benchmark: drive the server's tools through the MCP protocol against the local stub.
+
+Calls the 14 lookup tools round-robin at a fixed concurrency, over an
+in-memory MCP session with the server in this process, or over stdio with
+``python -m mcp_server`` in a subprocess, and reports per-tool and overall
+p50/p95/p99 latency, throughput and errors. The stub serves the test
+fixtures or, with ``--cassette``, a recording of live API responses.
+
+    python tests/load_benchmark.py --concurrency 32 --calls 2000 --delay 0.02 --jitter 0.03
+    python tests/load_benchmark.py --transport stdio --cassette chembl.jsonl --no-cache
+
+Record a cassette (needs network access) by forwarding one round of calls
+to the live API:
+
+    python tests/load_benchmark.py --record chembl.jsonl
+"""
+
+import argparse
+import asyncio
+import logging
+import math
+import os
+import sys
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from conftest import default_routes
+from stub_server import StubChemblServer
+
+LIVE_API = "https://www.ebi.ac.uk/chembl/api/data"
+
+# One call per tool, with arguments the fixtures (and the live API) can answer
+TOOL_CALLS: List[Tuple[str, Dict[str, Any]]] = [
+    ("search_molecule", {"query": "aspirin"}),
+    ("get_molecule_targets", {"chembl_id": "CHEMBL25"}),
+    ("get_molecule_details", {"chembl_id": "CHEMBL25"}),
+    ("get_molecule_sdf", {"chembl_id": "CHEMBL25"}),
+    ("get_similar_molecules", {"chembl_id": "CHEMBL25", "similarity_threshold": 0.7}),
+    ("search_molecule_substructure", {"smiles": "CC(=O)O"}),
+    ("search_assays", {"target_id": "CHEMBL230"}),
+    ("get_assay_details", {"chembl_id": "CHEMBL1217645"}),
+    ("get_bioactivities", {"chembl_id": "CHEMBL25"}),
+    ("get_activity_details", {"activity_id": "5000"}),
+    ("search_targets", {"target_name": "cyclooxygenase"}),
+    ("get_target_details", {"chembl_id": "CHEMBL230"}),
+    ("get_document_info", {"chembl_id": "CHEMBL1121427"}),
+    ("get_document_compounds", {"chembl_id": "CHEMBL1121427"}),
+]
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of ``values`` (0 < q <= 1)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(math.ceil(q * len(ordered)) - 1, 0)]
+
+
+class LoadReport:
+    """Latencies and errors per tool for one benchmark run."""
+
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.elapsed = 0.0
+
+    @property
+    def calls(self) -> int:
+        return sum(len(values) for values in self.latencies.values())
+
+    @property
+    def throughput(self) -> float:
+        return self.calls / self.elapsed if self.elapsed else 0.0
+
+    def all_latencies(self) -> List[float]:
+        return [value for values in self.latencies.values() for value in values]
+
+    def format(self) -> str:
+        def row(name: str, values: List[float], errors: int) -> str:
+            return (f"{name:<30}{len(values):>7}{errors:>7}"
+                    + "".join(f"{percentile(values, q) * 1000:>10.1f}" for q in (0.5, 0.95, 0.99)))
+
+        lines = [f"{'tool':<30}{'calls':>7}{'errors':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"]
+        for name in sorted(self.latencies):
+            lines.append(row(name, self.latencies[name], self.errors[name]))
+        lines.append(row("all", self.all_latencies(), sum(self.errors.values())))
+        lines.append(f"{self.calls} calls in {self.elapsed:.2f} s at concurrency {self.concurrency}: "
+                     f"{self.throughput:.1f} calls/s")
+        return "\n".join(lines)
+
+
+async def run_load(session: ClientSession, calls: int, concurrency: int,
+                   tool_calls: List[Tuple[str, Dict[str, Any]]] = TOOL_CALLS) -> LoadReport:
+    """Issue ``calls`` tool calls round-robin over ``tool_calls`` with ``concurrency`` workers."""
+    report = LoadReport(concurrency)
+    counter = iter(range(calls))
+
+    async def worker() -> None:
+        for i in counter:
+            name, arguments = tool_calls[i % len(tool_calls)]
+            start = time.perf_counter()
+            result = await session.call_tool(name, arguments)
+            report.latencies[name].append(time.perf_counter() - start)
+            text = result.content[0].text if result.content else ""
+            if result.isError or text.startswith("Error"):
+                report.errors[name] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+@asynccontextmanager
+async def memory_session(base_url: str, cache: bool = True) -> AsyncIterator[ClientSession]:
+    """An MCP session with the server running in this process, talking to ``base_url``."""
+    from mcp_server import mcp
+    from mcp_server.utils import RateLimiter, configure_cache, configure_transport
+    from mcp_server.utils.cache import DEFAULT_MAX_ENTRIES
+
+    configure_transport(base_url, limiter=RateLimiter(rate=0, shared_path=None))
+    configure_cache(max_entries=DEFAULT_MAX_ENTRIES if cache else 0, path=None)
+    try:
+        async with create_connected_server_and_client_session(mcp._mcp_server) as session:
+            yield session
+    finally:
+        configure_transport()
+        configure_cache()
+
+
+@asynccontextmanager
+async def stdio_session(base_url: str, cache: bool = True) -> AsyncIterator[ClientSession]:
+    """An MCP session with ``python -m mcp_server`` running in a subprocess, talking to ``base_url``."""
+    env = {**os.environ, "CHEMBL_BASE_URL": base_url, "CHEMBL_RATE_LIMIT": "0",
+           "CHEMBL_CACHE_SIZE": "10000" if cache else "0"}
+    env.pop("CHEMBL_CACHE_PATH", None)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    params = StdioServerParameters(command=sys.executable, args=["-m", "mcp_server"], env=env, cwd=root)
+    with open(os.devnull, "w") as errlog:
+        async with stdio_client(params, errlog=errlog) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                yield session
+
+
+async def benchmark(transport: str = "memory", calls: int = 1000, concurrency: int = 16, delay: float = 0.0,
+                    jitter: float = 0.0, error_rate: float = 0.0, cassette: Optional[str] = None,
+                    cache: bool = True) -> LoadReport:
+    """Start a stub, run the load through the chosen transport and return the report."""
+    options = {"delay": delay, "jitter": jitter, "error_rate": error_rate}
+    stub = (StubChemblServer.from_cassette(cassette, **options) if cassette
+            else StubChemblServer(default_routes(), **options)).start()
+    try:
+        session_factory = stdio_session if transport == "stdio" else memory_session
+        async with session_factory(stub.base_url, cache) as session:
+            return await run_load(session, calls, concurrency)
+    finally:
+        stub.stop()
+
+
+async def record(path: str, upstream: str = LIVE_API) -> int:
+    """Forward one round of tool calls to the live API and save the responses as a cassette."""
+    stub = StubChemblServer(upstream=upstream).start()
+    try:
+        async with memory_session(stub.base_url, cache=False) as session:
+            await run_load(session, len(TOOL_CALLS), 1)
+        return stub.save_cassette(path)
+    finally:
+        stub.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--transport", choices=("memory", "stdio"), default="memory")
+    parser.add_argument("--calls", type=int, default=1000, help="Total tool calls")
+    parser.add_argument("--concurrency", type=int, default=16, help="Calls in flight at once")
+    parser.add_argument("--delay", type=float, default=0.0, help="Stub latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random stub latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of stub answers failing with 503")
+    parser.add_argument("--cassette", help="Replay this recording instead of the test fixtures")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the response cache")
+    parser.add_argument("--record", metavar="PATH", help="Record a cassette from the live API and exit")
+    args = parser.parse_args(argv)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    if args.record:
+        print(f"Recorded {asyncio.run(record(args.record))} responses to {args.record}")
+        return
+    report = asyncio.run(benchmark(args.transport, args.calls, args.concurrency, args.delay, args.jitter,
+                                   args.error_rate, args.cassette, not args.no_cache))
+    print(report.format())
+
+
+if __name__ == "__main__":
+    main()
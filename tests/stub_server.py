@@ -0,0 +1,242 @@
+"""
+Local stand-in for the ChEMBL REST API used by the offline tests and benchmarks.
+
+Besides canned routes, the stub can replay a cassette of recorded API
+responses (one JSON object per line: route, status and body). A cassette is
+recorded by running the stub with ``upstream`` set to the live API: requests
+it has no route for are forwarded, answered and kept for ``save_cassette``.
+"""
+
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+# Query parameters that control paging rather than select records
+PAGING_PARAMS = {"limit", "offset", "only", "format"}
+
+
+class _Server(ThreadingHTTPServer):
+    # Accept bursts of concurrent connections without refusing any
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class StubChemblServer:
+    """Threaded HTTP server answering ChEMBL-style requests from canned data.
+
+    Routes are keyed by request path (e.g. '/molecule/CHEMBL25.json'),
+    optionally followed by '?' and the non-paging query parameters in sorted
+    order. Dicts holding only a record list are filtered by equality and
+    '__in' parameters on fields the records carry, paginated with the
+    'limit'/'offset' parameters, other dicts are served as JSON, strings as
+    plain text and integers as an error response with that HTTP status.
+    A route keyed by the path and all query parameters (as recorded in
+    cassettes) takes precedence.
+
+    Each answer is delayed by ``delay`` plus a uniform random ``jitter``, and
+    a fraction ``error_rate`` of the requests fail with HTTP 503.
+    """
+
+    def __init__(self, routes: Optional[Dict[str, Any]] = None, delay: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, upstream: Optional[str] = None):
+        self.routes: Dict[str, Any] = dict(routes or {})
+        self.delay = delay
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.upstream = upstream.rstrip("/") if upstream else None
+        self.recorded: Dict[str, Any] = {}
+        self.requests: List[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.connections = 0
+        self.failures: Dict[str, List[Tuple[int, Dict[str, str]]]] = {}
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", 0), self._make_handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubChemblServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def fail_next(self, path: str, status: int, times: int = 1,
+                  headers: Optional[Dict[str, str]] = None) -> None:
+        """Answer the next ``times`` requests for ``path`` with an error status."""
+        with self._lock:
+            self.failures.setdefault(path, []).extend([(status, headers or {})] * times)
+
+    def count(self, prefix: str) -> int:
+        """Number of requests received whose path starts with ``prefix``."""
+        with self._lock:
+            return sum(1 for path in self.requests if path.startswith(prefix))
+
+    @classmethod
+    def from_cassette(cls, path: str, **options: Any) -> "StubChemblServer":
+        """A stub replaying the responses recorded in a cassette file."""
+        return cls(load_cassette(path), **options)
+
+    def save_cassette(self, path: str) -> int:
+        """Write the responses forwarded from upstream to a cassette. Returns how many."""
+        with self._lock:
+            recorded = sorted(self.recorded.items())
+        with open(path, "w") as f:
+            for route, payload in recorded:
+                status, body = (payload, None) if isinstance(payload, int) else (200, payload)
+                f.write(json.dumps({"route": route, "status": status, "body": body}) + "\n")
+        return len(recorded)
+
+    def _resolve(self, path: str, params: Dict[str, str]) -> Any:
+        exact = _route_key(path, params)
+        if exact in self.routes:
+            return self.routes[exact]
+        selectors = sorted((k, v) for k, v in params.items() if k not in PAGING_PARAMS)
+        if selectors:
+            key = path + "?" + "&".join(f"{k}={v}" for k, v in selectors)
+            if key in self.routes:
+                return self.routes[key]
+        return self.routes.get(path)
+
+    def _forward(self, path: str, params: Dict[str, str]) -> Any:
+        """Answer from the upstream API and record the answer under the exact route."""
+        url = f"{self.upstream}{path}" + (f"?{urllib.parse.urlencode(params)}" if params else "")
+        request = urllib.request.Request(url, headers={"Accept": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                body = response.read().decode()
+                payload = json.loads(body) if "json" in response.headers.get("Content-Type", "") else body
+        except urllib.error.HTTPError as e:
+            payload = e.code
+        with self._lock:
+            self.routes[_route_key(path, params)] = self.recorded[_route_key(path, params)] = payload
+        return payload
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                params = dict(parse_qsl(url.query))
+                with stub._lock:
+                    stub.requests.append(self.path)
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                try:
+                    self._respond(url, params)
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+            def _respond(self, url, params):
+                delay = stub.delay + (random.uniform(0, stub.jitter) if stub.jitter else 0.0)
+                if delay:
+                    time.sleep(delay)
+
+                with stub._lock:
+                    pending = stub.failures.get(url.path)
+                    failure = pending.pop(0) if pending else None
+                if failure is None and stub.error_rate and random.random() < stub.error_rate:
+                    failure = (503, {})
+                if failure is not None:
+                    status, headers = failure
+                    self._send(status, "application/json", b'{"error_message": "Injected error"}', headers)
+                    return
+
+                payload = stub._resolve(url.path, params)
+                if payload is None and stub.upstream:
+                    payload = stub._forward(url.path, params)
+                if payload is None:
+                    self._send(404, "application/json", b'{"error_message": "Not found"}')
+                elif isinstance(payload, int):
+                    self._send(payload, "application/json", b'{"error_message": "Injected error"}')
+                elif isinstance(payload, str):
+                    self._send(200, "text/plain", payload.encode())
+                else:
+                    body = _paginate(payload, url.path, params)
+                    self._send(200, "application/json", json.dumps(body).encode())
+
+            def _send(self, status: int, content_type: str, body: bytes,
+                      headers: Optional[Dict[str, str]] = None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def _route_key(path: str, params: Dict[str, str]) -> str:
+    """Route of a request with all of its query parameters, in sorted order."""
+    query = "&".join(f"{k}={v}" for k, v in sorted(params.items()) if k != "format")
+    return f"{path}?{query}" if query else path
+
+
+def load_cassette(path: str) -> Dict[str, Any]:
+    """Routes replaying a cassette: JSON bodies as dicts, text as strings, errors as statuses."""
+    routes = {}
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                routes[entry["route"]] = entry["body"] if entry["status"] == 200 else entry["status"]
+    return routes
+
+
+def _paginate(payload: Dict[str, Any], path: str, params: Dict[str, str]) -> Dict[str, Any]:
+    """Apply limit/offset paging to a list payload, mimicking ChEMBL's page_meta."""
+    if len(payload) != 1 or not isinstance(next(iter(payload.values())), list):
+        return payload
+    key, records = next(iter(payload.items()))
+    for name, value in params.items():
+        if name.endswith("__in"):
+            wanted = set(value.split(","))
+            records = [r for r in records if str(r.get(name[:-4])) in wanted]
+        elif name not in PAGING_PARAMS and "__" not in name and any(name in r for r in records):
+            records = [r for r in records if str(r.get(name)) == value]
+    limit = int(params.get("limit", 20))
+    offset = int(params.get("offset", 0))
+    page = records[offset:offset + limit]
+    if "only" in params:
+        fields = params["only"].split(",")
+        page = [{f: record.get(f) for f in fields} for record in page]
+    has_next = offset + limit < len(records)
+    return {
+        key: page,
+        "page_meta": {
+            "limit": limit,
+            "offset": offset,
+            "total_count": len(records),
+            "next": f"{path}?limit={limit}&offset={offset + limit}" if has_next else None,
+            "previous": None,
+        },
+    }
@@ -0,0 +1,166 @@
+"""
+Tests for the columnar activity frame and the analytics tools built on it.
+"""
+
+import json
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from conftest import ACTIVITIES, make_activity
+from mcp_server import count_active_activities, summarize_activities, utils
+from mcp_server.utils import activity_client
+from mcp_server.utils import frame as frame_module
+from mcp_server.utils.frame import ActivityFrame, FrameError, FrameStore, configure_frame_store
+
+
+@pytest.fixture(autouse=True)
+def frame_store():
+    store = configure_frame_store()
+    yield store
+    configure_frame_store()
+
+
+def _frame_id(text):
+    return text.split("frame_id='")[1].split("'")[0]
+
+
+def test_units_are_normalized_to_pchembl():
+    records = [
+        {"activity_id": 1, "standard_value": "1", "standard_units": "uM", "standard_relation": "="},
+        {"activity_id": 2, "standard_value": "10", "standard_units": "nM", "standard_relation": "=",
+         "pchembl_value": "8.05"},
+        {"activity_id": 3, "standard_value": "5", "standard_units": "%", "standard_relation": "="},
+        {"activity_id": 4, "standard_value": "100", "standard_units": "nM", "standard_relation": ">"},
+        {"activity_id": 5, "standard_value": None, "standard_units": "nM"},
+    ]
+    frame = ActivityFrame.from_records(records)
+    assert frame.value_nm[0] == 1000.0 and frame.pchembl[0] == pytest.approx(6.0)
+    assert frame.pchembl[1] == 8.05
+    assert math.isnan(frame.value_nm[2]) and math.isnan(frame.pchembl[2])
+    assert frame.value_nm[3] == 100.0 and math.isnan(frame.pchembl[3])
+    assert math.isnan(frame.value_nm[4])
+    assert frame.codes["standard_relation"].tolist() == [0, 0, 0, 1, -1]
+    assert frame.categories["standard_relation"] == ["=", ">"]
+
+
+def test_group_stats_match_numpy():
+    frame = ActivityFrame.from_records(ACTIVITIES)
+    assert frame.codes["target_chembl_id"].dtype == np.int32
+    stats = frame.group_stats("target", (0.1, 0.5, 0.9))
+    assert stats.groups[:2] == ["CHEMBL200", "CHEMBL201"] and stats.labels[0] == "Target 0"
+    for g, group in enumerate(stats.groups):
+        values = np.array([float(r["pchembl_value"]) for r in ACTIVITIES if r["target_chembl_id"] == group])
+        assert stats.counts[g] == len(values) and stats.mean[g] == pytest.approx(values.mean())
+        for q in (0.1, 0.5, 0.9):
+            assert stats.percentiles[q][g] == pytest.approx(np.percentile(values, q * 100))
+
+
+def test_frame_store_expires_and_evicts():
+    store = FrameStore(max_entries=2, ttl=60)
+    frames = [ActivityFrame.from_records(ACTIVITIES[:i + 1]) for i in range(3)]
+    ids = [store.put(f, key=i) for i, f in enumerate(frames)]
+    assert len(store) == 2 and store.find(2) == (ids[2], frames[2])
+    with pytest.raises(FrameError):
+        store.get(ids[0])
+
+    expired = FrameStore(ttl=0)
+    frame_id = expired.put(frames[0], key="query")
+    assert expired.find("query") is None
+    with pytest.raises(FrameError):
+        expired.get(frame_id)
+
+
+@pytest.mark.asyncio
+async def test_summarize_by_target(chembl_stub):
+    result = await summarize_activities(molecule_ids=["chembl25"], percentiles=[10, 90])
+    assert "pChEMBL summary by target for molecules CHEMBL25" in result
+    assert "120 activities with a pChEMBL value in 12 groups" in result
+    # CHEMBL200 holds activities 0, 12, ..., 108: pChEMBL 8.00 down to 6.92
+    assert ("CHEMBL200 (Target 0): n=10, mean 7.46, p10 7.03, p50 7.46, p90 7.89; median ≈ 34.7 nM"
+            in result)
+
+    structured = json.loads(await summarize_activities(frame_id=_frame_id(result), group_by="standard_type",
+                                                       output="json"))
+    assert structured["groups"] == [{"group": "IC50", "name": None, "count": 120, "mean_pchembl": 7.405,
+                                     "p25_pchembl": 7.107, "p50_pchembl": 7.405, "p75_pchembl": 7.703,
+                                     "median_nm": 39.355}]
+
+
+@pytest.mark.asyncio
+async def test_frames_are_encoded_page_by_page(chembl_stub, monkeypatch):
+    """Pages are encoded as they arrive, never all held as records, and skip the response cache."""
+    batches = []
+    add = frame_module._FrameBuilder.add
+
+    def record_batch(self, records):
+        batches.append(len(records))
+        add(self, records)
+
+    monkeypatch.setattr(frame_module._FrameBuilder, "add", record_batch)
+    monkeypatch.setattr(frame_module, "MAX_PAGE_SIZE", 50)
+    cache = utils.get_cache()
+    entries = len(cache.memory)
+    frame = await frame_module.load_activity_frame([activity_client.filter(molecule_chembl_id="CHEMBL25")])
+    assert len(frame) == 120 and batches == [50, 50, 20]
+    assert len(cache.memory) == entries
+    assert frame.categories["target_chembl_id"][:2] == ["CHEMBL200", "CHEMBL201"]
+
+
+@pytest.mark.asyncio
+async def test_follow_up_questions_reuse_the_frame(chembl_stub):
+    first = await summarize_activities(molecule_ids=["CHEMBL25"], limit=3)
+    requests = chembl_stub.count("/activity.json")
+    assert "... 9 more groups" in first
+
+    by_id = await count_active_activities(500, frame_id=_frame_id(first))
+    same_query = await count_active_activities(100, molecule_ids=["CHEMBL25"], group_by="assay")
+    assert chembl_stub.count("/activity.json") == requests
+    assert _frame_id(by_id) == _frame_id(same_query) == _frame_id(first)
+
+    # 10 * (i + 1) <= 500 nM for activities 0-49: five per target for the first two targets, four after
+    assert "50 of 120 activities with a molar value are active" in by_id
+    assert "CHEMBL200 (Target 0): 5 of 10 (50%)\nCHEMBL201 (Target 1): 5 of 10 (50%)" in by_id
+    assert "CHEMBL9000: 1 of 10 (10%)" in same_query and "CHEMBL9011: 0 of 10 (0%)" in same_query
+
+
+@pytest.mark.asyncio
+async def test_type_filter_and_relations(chembl_stub):
+    ki = [{**make_activity(200 + i, 0), "standard_type": "Ki", "standard_relation": ">",
+           "pchembl_value": None} for i in range(4)]
+    chembl_stub.routes["/activity.json"] = {"activities": ACTIVITIES + ki}
+
+    result = await count_active_activities(10000, target_ids=["CHEMBL200"], output="json")
+    counts = json.loads(result)
+    # Ki values are lower bounds ('>'), so they are measured but never active
+    assert counts["measured"] == 14 and counts["active"] == 10
+
+    ic50 = json.loads(await summarize_activities(frame_id=counts["frame_id"], standard_types=["IC50"],
+                                                 output="json"))
+    ki_only = json.loads(await count_active_activities(10000, frame_id=counts["frame_id"], standard_types=["Ki"],
+                                                       output="json"))
+    assert ic50["groups"][0]["count"] == 10 and ki_only["measured"] == 4 and ki_only["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_invalid_requests(chembl_stub, monkeypatch):
+    assert "Provide molecule_ids, target_ids or a frame_id" in await summarize_activities()
+    assert "unknown or has expired" in await summarize_activities(frame_id="Fmissing")
+    assert "Unknown grouping 'organism'" in await summarize_activities(molecule_ids=["CHEMBL25"],
+                                                                       group_by="organism")
+    assert "between 0 and 100" in await summarize_activities(molecule_ids=["CHEMBL25"], percentiles=[150])
+    assert "positive concentration" in await count_active_activities(0, molecule_ids=["CHEMBL25"])
+
+    monkeypatch.setattr(frame_module, "MAX_FRAME_ROWS", 5)
+    assert "More than 5 activities match" in await summarize_activities(target_ids=["CHEMBL201"])
+
+    monkeypatch.setattr(frame_module, "NUMPY_AVAILABLE", False)
+    assert "require NumPy" in await summarize_activities(target_ids=["CHEMBL200"])
+
+
+@pytest.mark.asyncio
+async def test_summarize_from_sqlite(chembl_sqlite):
+    result = await count_active_activities(100, target_ids=["CHEMBL200", "CHEMBL205"])
+    assert "2 of 20 activities with a molar value are active" in result
@@ -0,0 +1,77 @@
+"""
+Tests for the batch detail tools.
+"""
+
+import asyncio
+
+import pytest
+
+from mcp_server import (
+    get_assays_details,
+    get_documents_info,
+    get_molecule_details,
+    get_molecules_details,
+    get_targets_details,
+)
+from mcp_server.utils import ChemblAPIError, molecule_client
+
+MOLECULE_IDS = ["CHEMBL25"] + [f"CHEMBL{1000 + i}" for i in range(30)]
+
+
+@pytest.mark.asyncio
+async def test_molecules_in_input_order(chembl_stub):
+    """Results follow input order, with duplicates and unknown IDs reported per ID."""
+    ids = list(reversed(MOLECULE_IDS)) + ["chembl25 ", "CHEMBL0"]
+    result = await get_molecules_details(ids)
+
+    assert result.startswith("Results for 33 molecule IDs (32 found):")
+    sections = result.split("\n---\n")
+    assert "COMPOUND 29" in sections[0]
+    assert "ASPIRIN" in sections[30] and "ASPIRIN" in sections[31]
+    assert sections[32] == "No molecule found with ID CHEMBL0"
+    # 32 unique IDs fit in a single chunk
+    assert chembl_stub.count("/molecule.json") == 1
+
+
+@pytest.mark.asyncio
+async def test_batch_populates_cache(chembl_stub):
+    """Records fetched in bulk serve later single lookups and batches."""
+    await get_molecules_details(MOLECULE_IDS)
+    await get_molecules_details(MOLECULE_IDS[:5])
+    assert "ASPIRIN" in await get_molecule_details("CHEMBL25")
+
+    assert chembl_stub.count("/molecule.json") == 1
+    assert chembl_stub.count("/molecule/") == 0
+
+
+@pytest.mark.asyncio
+async def test_chunks_fan_out_under_limit(chembl_stub):
+    """Chunks are fetched concurrently, never more than the configured limit."""
+    chembl_stub.delay = 0.05
+    results = await molecule_client.get_many(MOLECULE_IDS, chunk_size=3, concurrency=4)
+
+    assert len(results) == 31 and all(results.values())
+    assert chembl_stub.count("/molecule.json") == 11
+    assert chembl_stub.max_in_flight == 4
+
+
+@pytest.mark.asyncio
+async def test_chunk_errors_are_reported_per_id(chembl_stub):
+    """A failing chunk marks only its own IDs as errors."""
+    chembl_stub.routes["/molecule.json?molecule_chembl_id__in=CHEMBL1001,CHEMBL1002"] = 503
+    results = await molecule_client.get_many(["CHEMBL25", "CHEMBL1000", "CHEMBL1001", "CHEMBL1002"],
+                                             chunk_size=2)
+
+    assert results["CHEMBL25"]["pref_name"] == "ASPIRIN"
+    assert results["CHEMBL1000"]["pref_name"] == "COMPOUND 0"
+    assert isinstance(results["CHEMBL1001"], ChemblAPIError)
+    assert isinstance(results["CHEMBL1002"], ChemblAPIError)
+
+
+@pytest.mark.asyncio
+async def test_other_batch_tools(chembl_stub):
+    """Targets, assays and documents use the same batch path."""
+    assert "Cyclooxygenase-2" in await get_targets_details(["CHEMBL230", "CHEMBL0"])
+    assert "Inhibition of COX-2" in await get_assays_details(["CHEMBL1217645"])
+    assert "COX-2 inhibitors" in await get_documents_info(["CHEMBL1121427"])
+    assert await get_targets_details([" "]) == "No target IDs provided."
@@ -0,0 +1,121 @@
+"""
+Tests for the tiered ChEMBL response cache.
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from mcp_server import cache_stats, get_molecule_details, get_target_details
+from mcp_server.utils import configure_cache, get_cache
+from mcp_server.utils.cache import MISSING, DiskCache
+
+MOLECULE_PATH = "/molecule/CHEMBL25.json"
+
+
+@pytest.mark.asyncio
+async def test_repeated_lookups_hit_memory(chembl_stub):
+    """Repeated lookups of the same ID make a single backend round trip."""
+    for _ in range(5):
+        assert "ASPIRIN" in await get_molecule_details("CHEMBL25")
+    assert chembl_stub.count(MOLECULE_PATH) == 1
+
+    stats = get_cache().snapshot()
+    assert stats["hits"] == 4
+    assert stats["misses"] == 1
+    assert stats["release"] == "ChEMBL_33"
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction(chembl_stub):
+    """The memory tier is bounded and evicts the least recently used entry."""
+    configure_cache(max_entries=2, path=None)
+    await get_molecule_details("CHEMBL25")
+    await get_target_details("CHEMBL230")
+    await get_molecule_details("CHEMBL25")
+    await get_molecule_details("CHEMBL0")  # evicts the target
+    await get_target_details("CHEMBL230")
+
+    assert chembl_stub.count("/target/CHEMBL230.json") == 2
+    assert chembl_stub.count(MOLECULE_PATH) == 1
+    assert get_cache().snapshot()["evictions"] == 2
+
+
+@pytest.mark.asyncio
+async def test_per_entity_ttl(chembl_stub):
+    """Entries expire according to the TTL of their entity."""
+    configure_cache(path=None, ttls={"molecule": 0.05})
+    await get_molecule_details("CHEMBL25")
+    await get_target_details("CHEMBL230")
+    await asyncio.sleep(0.1)
+    await get_molecule_details("CHEMBL25")
+    await get_target_details("CHEMBL230")
+
+    assert chembl_stub.count(MOLECULE_PATH) == 2
+    assert chembl_stub.count("/target/CHEMBL230.json") == 1
+    assert get_cache().snapshot()["expirations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_survives_restart(chembl_stub, tmp_path):
+    """Entries written to the on-disk tier are served by a fresh process cache."""
+    path = str(tmp_path / "cache.sqlite")
+    configure_cache(path=path)
+    await get_molecule_details("CHEMBL25")
+
+    configure_cache(path=path)
+    assert "ASPIRIN" in await get_molecule_details("CHEMBL25")
+    assert chembl_stub.count(MOLECULE_PATH) == 1
+    assert get_cache().snapshot()["disk_hits"] == 1
+
+
+def test_disk_tier_shared_between_workers(tmp_path):
+    """Worker processes writing the same cache file concurrently neither block readers nor fail."""
+    path = str(tmp_path / "cache.sqlite")
+    workers = [DiskCache(path) for _ in range(4)]
+
+    def fill(worker, index):
+        for i in range(50):
+            worker.set(f"molecule/CHEMBL{index}-{i}.json", {"i": i}, "ChEMBL_33", 1e12)
+
+    threads = [threading.Thread(target=fill, args=(w, n)) for n, w in enumerate(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert workers[0].get("molecule/CHEMBL3-49.json", "ChEMBL_33", 0)[0].value == {"i": 49}
+    assert workers[3].get("molecule/CHEMBL0-0.json", "ChEMBL_34", 0)[0] is MISSING
+    assert len(workers[1]) == 200
+    for worker in workers:
+        worker.close()
+
+
+@pytest.mark.asyncio
+async def test_new_release_invalidates(chembl_stub, tmp_path):
+    """A new ChEMBL release drops entries cached from the previous one."""
+    path = str(tmp_path / "cache.sqlite")
+    configure_cache(path=path, release_check_interval=0.05)
+    await get_molecule_details("CHEMBL25")
+
+    chembl_stub.routes["/status.json"] = {"chembl_db_version": "ChEMBL_34"}
+    await asyncio.sleep(0.1)
+    await get_molecule_details("CHEMBL25")
+
+    stats = get_cache().snapshot()
+    assert chembl_stub.count(MOLECULE_PATH) == 2
+    assert stats["release"] == "ChEMBL_34"
+    assert stats["invalidations"] == 1
+    assert stats["disk_entries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_stats_tool(chembl_stub):
+    """The cache_stats tool reports the counters as text."""
+    await get_molecule_details("CHEMBL25")
+    await get_molecule_details("CHEMBL25")
+    result = await cache_stats()
+    assert "Cache Statistics" in result
+    assert "Hits: 1" in result
+    assert "Misses: 1" in result
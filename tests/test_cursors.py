@@ -0,0 +1,98 @@
+"""
+Tests for limit/cursor pagination of the list tools.
+"""
+
+import re
+import time
+
+import pytest
+
+from mcp_server import get_bioactivities, get_molecule_targets, search_molecule
+from mcp_server import targets
+from mcp_server.utils import NO_MORE_RESULTS, configure_cursors, get_cursor_store
+
+
+def _cursor(result):
+    match = re.search(r"cursor='([^']+)'", result)
+    return match.group(1) if match else None
+
+
+def _activity_ids(result):
+    return [int(i) for i in re.findall(r"Activity ID: (\d+)", result)]
+
+
+@pytest.fixture(autouse=True)
+def cursors():
+    store = configure_cursors()
+    try:
+        yield store
+    finally:
+        configure_cursors()
+
+
+@pytest.mark.asyncio
+async def test_bioactivities_resume_without_refetching(chembl_stub):
+    """Each page starts at the cursor's offset; earlier records are never requested again."""
+    seen = []
+    cursor = None
+    while True:
+        result = await get_bioactivities("CHEMBL25", limit=50, cursor=cursor)
+        seen += _activity_ids(result)
+        cursor = _cursor(result)
+        if cursor is None:
+            break
+
+    assert seen == list(range(5000, 5120))
+    offsets = [re.search(r"offset=(\d+)", r).group(1) for r in chembl_stub.requests if r.startswith("/activity")]
+    assert offsets == ["0", "50", "100"]
+
+
+@pytest.mark.asyncio
+async def test_last_page_has_no_cursor(chembl_stub):
+    """A page that reaches the end of the results carries no cursor."""
+    result = await get_bioactivities("CHEMBL25", limit=100)
+    rest = await get_bioactivities("CHEMBL25", limit=100, cursor=_cursor(result))
+
+    assert _activity_ids(rest) == list(range(5100, 5120))
+    assert _cursor(rest) is None
+    assert _cursor(await search_molecule("aspirin")) is None
+
+
+@pytest.mark.asyncio
+async def test_cursor_errors(chembl_stub):
+    """Unknown, expired and foreign cursors are reported, not silently restarted."""
+    configure_cursors(ttl=0.05)
+    cursor = _cursor(await get_bioactivities("CHEMBL25"))
+
+    foreign = await get_molecule_targets("CHEMBL25", cursor=cursor)
+    assert "issued by get_bioactivities" in foreign
+    time.sleep(0.1)
+    assert "expired" in await get_bioactivities("CHEMBL25", cursor=cursor)
+    assert "expired" in await get_bioactivities("CHEMBL25", cursor="bogus")
+
+
+@pytest.mark.asyncio
+async def test_store_is_bounded(chembl_stub):
+    """The least recently used cursors are dropped once the store is full."""
+    store = configure_cursors(max_entries=3)
+    cursors = [_cursor(await get_bioactivities("CHEMBL25")) for _ in range(4)]
+
+    assert len(get_cursor_store()) == 3 and store is get_cursor_store()
+    assert "expired" in await get_bioactivities("CHEMBL25", cursor=cursors[0])
+    assert _activity_ids(await get_bioactivities("CHEMBL25", cursor=cursors[1])) == list(range(5005, 5010))
+
+
+@pytest.mark.asyncio
+async def test_molecule_targets_resume_stream(chembl_stub, monkeypatch):
+    """The distinct-target scan resumes where the previous page stopped."""
+    monkeypatch.setattr(targets, "TARGET_SCAN_PAGE_SIZE", 10)
+    first = await get_molecule_targets("CHEMBL25", limit=5)
+    second = await get_molecule_targets("CHEMBL25", limit=5, cursor=_cursor(first))
+    third = await get_molecule_targets("CHEMBL25", limit=5, cursor=_cursor(second))
+
+    names = re.findall(r"Target: (Target \d+)", first + second + third)
+    assert names == [f"Target {t}" for t in range(12)]
+    # Pages of 10 activities cover targets 0-9 and 10-11; the stream then ends
+    assert chembl_stub.count("/activity.json") == 12
+    assert _cursor(third) is None
+    assert NO_MORE_RESULTS not in third
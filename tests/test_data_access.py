@@ -0,0 +1,127 @@
+"""
+Tests for the asynchronous ChEMBL data-access layer, run against a local stub.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from mcp_server import (
+    get_activity_details,
+    get_bioactivities,
+    get_document_compounds,
+    get_document_info,
+    get_molecule_details,
+    get_molecule_sdf,
+    get_molecule_targets,
+    get_similar_molecules,
+    search_molecule,
+    search_molecule_substructure,
+)
+from mcp_server.utils import activity_client, configure_cache, molecule_client, molecule_sdf_client
+
+
+@pytest.mark.asyncio
+async def test_get_and_missing_record(chembl_stub):
+    """A known ID returns parsed JSON and an unknown ID returns None."""
+    assert (await molecule_client.get("CHEMBL25"))["pref_name"] == "ASPIRIN"
+    assert await molecule_client.get("CHEMBL0") is None
+
+
+@pytest.mark.asyncio
+async def test_query_pagination(chembl_stub):
+    """Queries page through the backend and stop at the requested limit."""
+    results = await molecule_client.all().fetch(25)
+    assert len(results) == 25
+
+    everything = [m async for m in molecule_client.all().iterate(page_size=10)]
+    assert len(everything) == 31
+    assert chembl_stub.count("/molecule.json") == 1 + 4
+
+
+@pytest.mark.asyncio
+async def test_query_endpoint_resolution():
+    """Similarity and substructure filters map onto their dedicated endpoints."""
+    path, params = molecule_client.filter(similarity="CHEMBL25", similarity_threshold=0.7).endpoint()
+    assert path == "similarity/CHEMBL25/70.json" and params == {}
+
+    path, _ = molecule_client.filter(substructure="CC(=O)O").endpoint()
+    assert path == "substructure/CC%28%3DO%29O.json"
+
+    path, params = activity_client.filter(molecule_chembl_id__in=["A", "B"]).only("activity_id").endpoint()
+    assert path == "activity.json"
+    assert params == {"molecule_chembl_id__in": "A,B", "only": "activity_id"}
+
+
+@pytest.mark.asyncio
+async def test_tools_against_stub(chembl_stub):
+    """Every tool produces its usual text output through the async layer."""
+    assert "ASPIRIN" in await search_molecule("aspirin")
+    assert "C9H8O4" in await get_molecule_details("CHEMBL25")
+    assert "M  END" in await get_molecule_sdf("CHEMBL25")
+    assert "Similar molecules" in await get_similar_molecules("CHEMBL25")
+    assert "substructure CC(=O)O" in await search_molecule_substructure("CC(=O)O")
+    assert "Target 0" in await get_molecule_targets("CHEMBL25")
+    assert "IC50" in await get_bioactivities("CHEMBL25")
+    assert "Activity ID: 5000" in await get_activity_details("5000")
+    assert "COX-2 inhibitors" in await get_document_info("CHEMBL1121427")
+    assert "ASPIRIN (CHEMBL25)" in await get_document_compounds("CHEMBL1121427")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_tool_throughput(chembl_stub):
+    """Concurrent tool calls overlap their backend waits instead of serializing.
+
+    This doubles as the throughput benchmark: run with ``pytest -s`` to see
+    the aggregate calls/second for N concurrent calls.
+    """
+    concurrency = 20
+    configure_cache(max_entries=0, path=None, release_check_interval=0)
+    chembl_stub.delay = 0.2
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(get_molecule_details("CHEMBL25") for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    assert all("ASPIRIN" in r for r in results)
+    print(f"\n{concurrency} concurrent calls in {elapsed:.3f}s "
+          f"({concurrency / elapsed:.1f} calls/s, serial bound {1 / chembl_stub.delay:.1f} calls/s)")
+    # Serial execution would take concurrency * delay = 4s
+    assert elapsed < concurrency * chembl_stub.delay / 4
+
+
+def test_resource_handles_are_immutable():
+    """Format-specific handles are pooled and cannot be switched in place."""
+    assert molecule_client.with_format("sdf") is molecule_sdf_client
+    assert molecule_sdf_client.with_format("json") is molecule_client
+    with pytest.raises(AttributeError):
+        molecule_client.format = "sdf"
+
+
+@pytest.mark.asyncio
+async def test_interleaved_sdf_and_json_calls(chembl_stub):
+    """Concurrent SDF fetches, including failing ones, never leak into JSON calls."""
+    configure_cache(max_entries=0, path=None)
+    chembl_stub.delay = 0.005
+    chembl_stub.routes["/molecule/CHEMBL26.sdf"] = 500
+
+    calls = []
+    for _ in range(40):
+        calls += [
+            ("sdf", get_molecule_sdf("CHEMBL25")),
+            ("error", get_molecule_sdf("CHEMBL26")),
+            ("json", search_molecule("aspirin")),
+            ("json", get_document_compounds("CHEMBL1121427")),
+            ("json", get_molecule_details("CHEMBL25")),
+        ]
+    results = await asyncio.gather(*(call for _, call in calls))
+
+    for (kind, _), result in zip(calls, results):
+        if kind == "sdf":
+            assert "M  END" in result
+        elif kind == "error":
+            assert result.startswith("Error retrieving SDF data")
+        else:
+            assert "ASPIRIN" in result and "M  END" not in result
+    assert molecule_client.format == "json"
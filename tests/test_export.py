@@ -0,0 +1,143 @@
+"""
+Tests for the bulk bioactivity export.
+"""
+
+import gzip
+import json
+import os
+
+import pytest
+
+from conftest import ACTIVITIES, make_activity
+from mcp_server import export_bioactivities
+from mcp_server import utils
+from mcp_server.utils import activity_client, get_backend
+from mcp_server.utils.cache import MISSING
+from mcp_server.utils import export
+from mcp_server.utils.export import activity_queries, export_activities
+
+
+@pytest.fixture
+def export_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(export, "DEFAULT_EXPORT_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _read_ndjson(path):
+    with gzip.open(path, "rt") as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.mark.asyncio
+async def test_ndjson_export(chembl_stub, export_dir):
+    result = await export_bioactivities(molecule_ids=["chembl25 "], format="ndjson", filename="aspirin")
+    path = str(export_dir / "aspirin.ndjson.gz")
+    assert result.startswith(f"Exported 120 activities to {path}")
+    assert "IC50: 120" in result
+
+    rows = _read_ndjson(path)
+    assert len(rows) == 120
+    assert rows[0]["activity_id"] == 5000 and rows[0]["standard_value"] == 10.0
+    assert rows[0]["pchembl_value"] == 8.0 and rows[0]["target_chembl_id"] == "CHEMBL200"
+    assert os.listdir(export_dir) == ["aspirin.ndjson.gz"]
+
+
+@pytest.mark.asyncio
+async def test_filters_by_target_and_type(chembl_stub, export_dir):
+    ki = [{**make_activity(200 + i, i % 3), "standard_type": "Ki"} for i in range(9)]
+    chembl_stub.routes["/activity.json"] = {"activities": ACTIVITIES + ki}
+
+    result = await export_bioactivities(target_ids=["CHEMBL200", "CHEMBL201"], standard_types=["Ki"],
+                                        format="ndjson", fields=["activity_id", "target_chembl_id", "standard_type"])
+    assert "Exported 6 activities" in result and "Ki: 6" in result
+    rows = _read_ndjson(result.split(" to ")[1].splitlines()[0])
+    assert {row["target_chembl_id"] for row in rows} == {"CHEMBL200", "CHEMBL201"}
+    assert set(rows[0]) == {"activity_id", "target_chembl_id", "standard_type"}
+
+
+def test_id_lists_are_chunked():
+    molecules = [f"CHEMBL{i}" for i in range(120)]
+    queries = activity_queries(activity_client, molecules, ["CHEMBL200"], ["IC50"], chunk_size=50)
+    assert [len(q.filters["molecule_chembl_id__in"]) for q in queries] == [50, 50, 20]
+    assert all(q.filters["target_chembl_id__in"] == ["CHEMBL200"] for q in queries)
+    assert len(activity_queries(activity_client, molecules, [f"T{i}" for i in range(60)], chunk_size=50)) == 6
+
+
+@pytest.mark.asyncio
+async def test_memory_is_bounded_by_batch(chembl_stub, tmp_path, monkeypatch):
+    """Rows reach the file in batches of at most ``batch_rows``."""
+    sizes = []
+    write = export.NDJSONWriter.write
+
+    def record_batch(self, rows):
+        sizes.append(len(rows))
+        write(self, rows)
+
+    monkeypatch.setattr(export.NDJSONWriter, "write", record_batch)
+
+    path = str(tmp_path / "out.ndjson.gz")
+    result = await export_activities([activity_client.filter(molecule_chembl_id="CHEMBL25")], path, "ndjson",
+                                     batch_rows=16)
+    assert result.rows == 120 and sizes == [16] * 7 + [8]
+    assert len(_read_ndjson(path)) == 120
+
+
+@pytest.mark.asyncio
+async def test_export_pages_bypass_the_cache(chembl_stub, tmp_path):
+    """Export pages are read once and neither fill nor evict the response cache."""
+    cache = utils.configure_cache(max_entries=2, path=str(tmp_path / "cache.db"))
+    await get_backend().release()
+    await activity_client.get("5000")
+    entries = (len(cache.memory), len(cache.disk))
+
+    result = await export_activities([activity_client.filter(molecule_chembl_id="CHEMBL25")],
+                                     str(tmp_path / "out.ndjson.gz"), "ndjson")
+    assert result.rows == 120 and chembl_stub.count("/activity.json") == 1
+    assert (len(cache.memory), len(cache.disk)) == entries and cache.stats.evictions == 0
+    assert await cache.get("activity/5000.json") is not MISSING
+
+
+@pytest.mark.asyncio
+async def test_parquet_and_arrow_exports(chembl_stub, export_dir):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    result = await export_bioactivities(molecule_ids=["CHEMBL25"], filename="aspirin")
+    table = pq.read_table(str(export_dir / "aspirin.parquet"))
+    assert table.num_rows == 120 and "Exported 120 activities" in result
+    assert table.schema.field("standard_value").type == pa.float64()
+    assert table.schema.field("activity_id").type == pa.int64()
+
+    await export_bioactivities(molecule_ids=["CHEMBL25"], format="arrow", filename="aspirin")
+    with pa.ipc.open_file(str(export_dir / "aspirin.arrow")) as reader:
+        assert reader.read_all().num_rows == 120
+
+
+@pytest.mark.asyncio
+async def test_invalid_requests(chembl_stub, export_dir):
+    assert "Provide molecule_ids, target_ids" in await export_bioactivities()
+    assert "Invalid file name" in await export_bioactivities(molecule_ids=["CHEMBL25"], filename="../escape")
+    assert "Unknown export format" in await export_bioactivities(molecule_ids=["CHEMBL25"], format="csv")
+
+    chembl_stub.routes["/activity.json"] = 400
+    result = await export_bioactivities(molecule_ids=["CHEMBL25"], format="ndjson")
+    assert result.startswith("Error exporting bioactivities")
+    assert os.listdir(export_dir) == []
+
+
+@pytest.mark.asyncio
+async def test_columnar_formats_need_pyarrow(chembl_stub, export_dir, monkeypatch):
+    monkeypatch.setattr(export, "PYARROW_AVAILABLE", False)
+    result = await export_bioactivities(molecule_ids=["CHEMBL25"])
+    assert "require PyArrow" in result and "format='ndjson'" in result
+    assert os.listdir(export_dir) == []
+
+
+@pytest.mark.asyncio
+async def test_export_from_sqlite(chembl_sqlite, export_dir):
+    result = await export_bioactivities(target_ids=["CHEMBL200", "CHEMBL205"], standard_types=["IC50"],
+                                        format="ndjson", filename="targets")
+    assert "Exported 20 activities" in result
+    rows = _read_ndjson(str(export_dir / "targets.ndjson.gz"))
+    assert {row["target_chembl_id"] for row in rows} == {"CHEMBL200", "CHEMBL205"}
+    assert rows[0]["standard_value"] == 10.0 and rows[0]["canonical_smiles"] == "CC(=O)Oc1ccccc1C(=O)O"
@@ -0,0 +1,107 @@
+"""
+Micro-benchmarks and output checks for the text formatters.
+
+Each formatter renders lists of 10 to 100k records; rendering must stay
+linear in the number of records. Run with ``pytest -s`` to print the
+timings, and set ``CHEMBL_BENCH_SIZES`` (e.g. ``10,100,1000,10000,100000``)
+to choose the list sizes.
+"""
+
+import os
+import time
+from typing import Callable, Dict, List
+
+import pytest
+
+from conftest import COX2, make_activity, make_assay, make_molecule, make_target
+from mcp_server.targets import _format_target_details
+from mcp_server.utils import (
+    format_activity_info,
+    format_assay_info,
+    format_batch_response,
+    format_molecule_info,
+    format_records,
+    format_response,
+    format_target_components,
+    format_target_info,
+)
+
+BENCH_SIZES = [int(n) for n in os.environ.get("CHEMBL_BENCH_SIZES", "10,1000,100000").split(",")]
+
+# Largest allowed growth of the per-record time from the smallest to the largest size
+LINEAR_SLACK = 10.0
+
+
+def _records(make: Callable[[int], Dict], n: int) -> List[Dict]:
+    return [make(i) for i in range(n)]
+
+
+def _component(i: int) -> Dict:
+    return {"component_id": i, "accession": f"Q{10000 + i}", "component_description": f"Subunit {i}"}
+
+
+def _batch(n: int):
+    records = _records(make_molecule, n)
+    ids = [record["molecule_chembl_id"] for record in records]
+    return ids, dict(zip(ids, records))
+
+
+# name -> (build input of n records, render it)
+BENCHMARKS = {
+    "format_molecule_info": (lambda n: _records(make_molecule, n),
+                             lambda records: format_records(records, format_molecule_info)),
+    "format_target_info": (lambda n: _records(make_target, n),
+                           lambda records: format_records(records, format_target_info)),
+    "format_assay_info": (lambda n: _records(make_assay, n),
+                          lambda records: format_records(records, format_assay_info)),
+    "format_activity_info": (lambda n: _records(lambda i: make_activity(i, i % 12), n),
+                             lambda records: format_records(records, format_activity_info)),
+    "format_target_components": (lambda n: _records(_component, n), format_target_components),
+    "format_response": (lambda n: [f"item {i}" for i in range(n)],
+                        lambda items: format_response("Items", items, show_count=True)),
+    "format_batch_response": (_batch, lambda batch: format_batch_response(
+        "molecule", batch[0], batch[1], format_molecule_info, "Error")),
+}
+
+
+def _per_record_seconds(render: Callable, data, n: int) -> float:
+    """Best of a few runs, repeated so small inputs take measurable time."""
+    repeats = max(1, 10_000 // n)
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            render(data)
+        best = min(best, (time.perf_counter() - start) / repeats)
+    return best / n
+
+
+@pytest.mark.parametrize("name", list(BENCHMARKS))
+def test_formatter_scales_linearly(name):
+    build, render = BENCHMARKS[name]
+    timings = {n: _per_record_seconds(render, build(n), n) for n in BENCH_SIZES}
+
+    print(f"\n{name}: " + ", ".join(f"{n}: {t * 1e6:.2f} us/record" for n, t in timings.items()))
+    smallest, largest = min(BENCH_SIZES), max(BENCH_SIZES)
+    assert timings[largest] < timings[smallest] * LINEAR_SLACK
+
+
+def test_format_response_output():
+    assert format_response("Title", ["a", "b"]) == "Title\n1. a\n2. b\n"
+    assert format_response("Title", ["a"], show_count=True) == "Title\n1. a\n\nTotal items: 1"
+    assert format_response("Title", []) == "Title\n"
+
+
+def test_target_details_output():
+    assert _format_target_details(COX2) == (
+        "Target Details:\n" + format_target_info(COX2)
+        + "\nComponents:\n1. Cyclooxygenase-2 (UniProt: P35354)\n")
+    components = [{"component_description": "Alpha"}, {"component_description": "Beta", "accession": "P1"}]
+    assert format_target_components(components) == "\nComponents:\n1. Alpha\n2. Beta (UniProt: P1)\n"
+    assert format_target_components([]) == ""
+
+
+def test_format_records_output():
+    records = _records(make_assay, 3)
+    assert format_records(records, format_assay_info) == "\n---\n".join(map(format_assay_info, records))
+    assert format_records([], format_assay_info) == ""
@@ -0,0 +1,70 @@
+"""
+Tests for the offline replay stub and the MCP load benchmark built on it.
+"""
+
+import re
+
+import pytest
+
+from conftest import default_routes
+from load_benchmark import TOOL_CALLS, benchmark, memory_session, percentile, run_load
+from stub_server import StubChemblServer
+
+# Cursor tokens are random, so outputs are compared without them
+CURSOR = re.compile(r"cursor='[^']*'")
+
+
+def test_percentile_nearest_rank():
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.95) == 95
+    assert percentile(values, 0.99) == 99
+    assert percentile([3.0], 0.99) == 3
+    assert percentile([], 0.5) == 0
+
+
+@pytest.mark.asyncio
+async def test_benchmark_drives_every_tool():
+    """Every lookup tool answers through the MCP protocol, concurrently and without errors."""
+    report = await benchmark(calls=len(TOOL_CALLS) * 4, concurrency=8, delay=0.01, jitter=0.01, cache=False)
+    print("\n" + report.format())
+
+    assert set(report.latencies) == {name for name, _ in TOOL_CALLS}
+    assert report.calls == len(TOOL_CALLS) * 4
+    assert not any(report.errors.values())
+    latencies = report.all_latencies()
+    assert percentile(latencies, 0.5) <= percentile(latencies, 0.95) <= percentile(latencies, 0.99)
+    assert report.throughput > 0
+
+
+@pytest.mark.asyncio
+async def test_injected_errors_are_retried():
+    """Random 503s from the stub are absorbed by the transport's retries."""
+    report = await benchmark(calls=len(TOOL_CALLS), concurrency=4, error_rate=0.1, cache=False)
+    assert not any(report.errors.values())
+
+
+@pytest.mark.asyncio
+async def test_recorded_cassette_replays_identically(tmp_path):
+    """Responses forwarded to an upstream API are recorded and replayed without it."""
+    upstream = StubChemblServer(default_routes()).start()
+    recorder = StubChemblServer(upstream=upstream.base_url).start()
+    try:
+        async with memory_session(recorder.base_url, cache=False) as session:
+            live = [(await session.call_tool(name, arguments)).content[0].text for name, arguments in TOOL_CALLS]
+        cassette = str(tmp_path / "chembl.jsonl")
+        assert recorder.save_cassette(cassette) == len(recorder.recorded) > len(TOOL_CALLS)
+    finally:
+        recorder.stop()
+        upstream.stop()
+
+    replay = StubChemblServer.from_cassette(cassette).start()
+    try:
+        async with memory_session(replay.base_url, cache=False) as session:
+            replayed = [(await session.call_tool(name, arguments)).content[0].text
+                        for name, arguments in TOOL_CALLS]
+            report = await run_load(session, len(TOOL_CALLS), 2)
+    finally:
+        replay.stop()
+    assert [CURSOR.sub("", text) for text in replayed] == [CURSOR.sub("", text) for text in live]
+    assert not any(report.errors.values())
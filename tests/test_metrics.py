@@ -0,0 +1,93 @@
+"""
+Tests for tool, backend and HTTP instrumentation.
+"""
+
+import re
+
+import httpx
+import pytest
+
+from mcp_server import mcp, server_stats
+from mcp_server.__main__ import create_app
+from mcp_server.utils import get_backend
+from mcp_server.utils.metrics import configure_metrics, get_metrics, render_prometheus
+
+# One sample line of the Prometheus text format
+SAMPLE_LINE = re.compile(r'^[a-z_]+(\{([a-z_]+="[^"]*",?)+\})? [0-9.e+-]+$|^[a-z_]+(\{.*le="\+Inf".*\})? \d+$')
+
+
+@pytest.fixture(autouse=True)
+def metrics():
+    yield configure_metrics()
+    configure_metrics()
+
+
+@pytest.mark.asyncio
+async def test_tool_calls_are_measured(chembl_stub, metrics):
+    """Registered tools record latency, outcome and the backend pages they triggered."""
+    await get_backend().release()
+    await mcp.call_tool("get_bioactivities", {"chembl_id": "CHEMBL25", "limit": 5})
+    await mcp.call_tool("get_molecule_details", {"chembl_id": "CHEMBL25"})
+
+    assert metrics.tool_calls.get("get_bioactivities", "ok") == 1
+    assert metrics.tool_duration.count("get_bioactivities") == 1
+    # One page of five plus the look-ahead record
+    assert metrics.tool_backend_calls.mean("get_bioactivities") == 1
+    assert metrics.backend_calls.get("rest", "page") == 1
+    assert metrics.backend_calls.get("rest", "get") == 1
+    assert metrics.http_requests.get("200") == 3
+    assert metrics.http_bytes.total() > 1000
+
+
+@pytest.mark.asyncio
+async def test_errors_are_classified(chembl_stub, metrics):
+    """Failed calls count as tool errors and by backend error class and status code."""
+    await get_backend().release()
+    chembl_stub.fail_next("/molecule/CHEMBL25.json", 400)
+    result = await mcp.call_tool("get_molecule_details", {"chembl_id": "CHEMBL25"})
+
+    assert result[0].text.startswith("Error retrieving molecule details")
+    assert metrics.tool_calls.get("get_molecule_details", "error") == 1
+    assert metrics.backend_errors.get("rest", "ChemblAPIError") == 1
+    assert metrics.http_requests.get("400") == 1
+
+
+@pytest.mark.asyncio
+async def test_prometheus_exposition(chembl_stub):
+    """Every metric renders as HELP/TYPE headers followed by well-formed samples."""
+    await mcp.call_tool("get_molecule_details", {"chembl_id": "CHEMBL25"})
+    await mcp.call_tool("get_molecule_details", {"chembl_id": "CHEMBL25"})
+    text = render_prometheus()
+
+    for line in text.splitlines():
+        assert line.startswith("# HELP ") or line.startswith("# TYPE ") or SAMPLE_LINE.match(line), line
+    assert 'chembl_tool_calls_total{tool="get_molecule_details",outcome="ok"} 2' in text
+    assert 'chembl_tool_duration_seconds_bucket{tool="get_molecule_details",le="+Inf"} 2' in text
+    assert "chembl_cache_hits_total 1" in text
+    assert "# TYPE chembl_cache_hit_ratio gauge" in text
+
+
+@pytest.mark.asyncio
+async def test_server_stats_tool(chembl_stub):
+    """server_stats summarizes the metrics, or returns the exposition text."""
+    await mcp.call_tool("search_molecule", {"query": "aspirin"})
+    text = await server_stats()
+
+    assert "search_molecule: 1 calls, 0 errors" in text
+    assert "rest page: 1 calls" in text
+    assert "Hit ratio" in text
+    assert (await server_stats("prometheus")).startswith("# HELP chembl_tool_calls_total")
+    assert "Unknown format" in await server_stats("xml")
+
+
+@pytest.mark.asyncio
+async def test_metrics_route():
+    """The HTTP transports serve the exposition text at /metrics."""
+    get_metrics().http_retries.inc()
+    transport = httpx.ASGITransport(app=create_app("sse"))
+    async with httpx.AsyncClient(transport=transport, base_url="http://server") as client:
+        response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "chembl_http_retries_total 1" in response.text
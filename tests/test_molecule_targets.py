@@ -0,0 +1,69 @@
+"""
+Tests for the streaming and aggregated modes of get_molecule_targets.
+"""
+
+import pytest
+
+from mcp_server import get_molecule_targets
+from mcp_server import targets
+from mcp_server.utils import get_cache
+
+
+@pytest.fixture
+def small_pages(monkeypatch):
+    """Scan activities in pages of 10 so early termination is observable."""
+    monkeypatch.setattr(targets, "TARGET_SCAN_PAGE_SIZE", 10)
+
+
+@pytest.mark.asyncio
+async def test_streaming_stops_at_limit(chembl_stub, small_pages):
+    """Only the pages needed to find ``limit`` distinct targets are fetched."""
+    result = await get_molecule_targets("CHEMBL25", limit=5)
+
+    assert result.count("Target:") == 5
+    assert chembl_stub.count("/activity.json") == 1
+    request = next(r for r in chembl_stub.requests if r.startswith("/activity.json"))
+    assert "only=target_chembl_id" in request
+
+
+@pytest.mark.asyncio
+async def test_streaming_spans_pages(chembl_stub, small_pages):
+    """A limit beyond the first page keeps streaming until it is met."""
+    result = await get_molecule_targets("CHEMBL25", limit=12)
+
+    assert result.count("Target:") == 12
+    assert chembl_stub.count("/activity.json") == 2
+
+
+@pytest.mark.asyncio
+async def test_aggregated_mode(chembl_stub, small_pages):
+    """Aggregation scans every activity and reports counts and best potency."""
+    result = await get_molecule_targets("CHEMBL25", limit=3, aggregate=True)
+
+    assert chembl_stub.count("/activity.json") == 12
+    assert "12 total" in result
+    assert result.count("Activities: 10") == 3
+    # Target 0 is hit by activities 0, 12, ..., 108; activity 0 is the most potent
+    assert "Best pChEMBL: 8.00 (IC50 = 10.0 nM)" in result
+
+
+@pytest.mark.asyncio
+async def test_aggregated_mode_caches_only_the_ranking(chembl_stub, small_pages):
+    """The scanned pages stay out of the cache; a repeat call is answered from the cached ranking."""
+    first = await get_molecule_targets("CHEMBL25", limit=3, aggregate=True)
+    keys = list(get_cache().memory._entries)
+    assert not [key for key in keys if key.startswith("activity.json")]
+    assert "molecule_targets/CHEMBL25.json" in keys
+
+    second = await get_molecule_targets("CHEMBL25", limit=3, aggregate=True)
+    assert second.split("cursor=")[0] == first.split("cursor=")[0]
+    assert chembl_stub.count("/activity.json") == 12
+
+
+@pytest.mark.asyncio
+async def test_no_targets(chembl_stub):
+    """A molecule without activities gets the usual message."""
+    chembl_stub.routes["/activity.json?molecule_chembl_id=CHEMBL0"] = {"activities": []}
+    for aggregate in (False, True):
+        result = await get_molecule_targets("CHEMBL0", aggregate=aggregate)
+        assert result == "No target information found for molecule CHEMBL0"
@@ -0,0 +1,150 @@
+"""
+Tests for the local name/synonym search index.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from conftest import build_fixture_db
+from mcp_server import search_molecule, search_targets
+from mcp_server.utils import name_index as name_index_module
+from mcp_server.utils.metrics import get_metrics
+from mcp_server.utils.name_index import (
+    build_index,
+    configure_name_index,
+    get_name_index,
+    normalize_name,
+)
+
+
+@pytest.fixture
+def fixture_db(tmp_path):
+    path = str(tmp_path / "chembl.db")
+    build_fixture_db(path)
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE component_synonyms (compsyn_id INTEGER PRIMARY KEY, component_id INTEGER,
+                                         component_synonym TEXT, syn_type TEXT);
+        INSERT INTO component_synonyms (component_id, component_synonym, syn_type)
+            SELECT tc.component_id, 'PTGS2', 'GENE_SYMBOL' FROM target_components tc
+            JOIN target_dictionary td ON td.tid = tc.tid WHERE td.chembl_id = 'CHEMBL230';
+        INSERT INTO molecule_synonyms (molregno, syn_type, synonyms) VALUES (1, 'TRADE_NAME', 'Aspro  Clear');
+    """)
+    conn.commit()
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def name_index(fixture_db, tmp_path):
+    path = str(tmp_path / "names.db")
+    build_index(fixture_db, path)
+    index = configure_name_index(path)
+    try:
+        yield index
+    finally:
+        configure_name_index()
+
+
+def _ids(matches):
+    return [match.chembl_id for match in matches]
+
+
+def test_normalize_name():
+    assert normalize_name("  Aspro \t Clear ") == "aspro clear"
+    assert normalize_name("ASPIRIN") == normalize_name("aspirin")
+
+
+def test_match_order(name_index):
+    assert name_index.meta["release"] == "ChEMBL_33"
+    exact = name_index.search("molecule", "Aspirin")
+    assert _ids(exact) == ["CHEMBL25"] and exact[0].match == "exact"
+    assert [m.match for m in name_index.search("molecule", "aspro clear")] == ["exact"]
+
+    # Prefix matches come before substring ones, shortest names first
+    compounds = name_index.search("molecule", "compound 1", limit=4)
+    assert [m.name for m in compounds] == ["COMPOUND 1", "COMPOUND 10", "COMPOUND 11", "COMPOUND 12"]
+    assert [m.match for m in compounds] == ["exact", "prefix", "prefix", "prefix"]
+
+    substring = name_index.search("target", "oxygenase")
+    assert _ids(substring) == ["CHEMBL230"] and substring[0].match == "substring"
+    assert _ids(name_index.search("target", "ptgs2")) == ["CHEMBL230"]
+    assert name_index.search("molecule", "cyclooxygenase") == []
+
+
+def test_fuzzy_matches_only_on_a_miss(name_index):
+    typo = name_index.search("molecule", "asprin")
+    assert _ids(typo) == ["CHEMBL25"] and typo[0].match == "fuzzy" and typo[0].score >= 0.5
+    assert _ids(name_index.search("target", "cyclooxigenase")) == ["CHEMBL230"]
+    assert name_index.search("molecule", "zzzz") == []
+    assert name_index.search("molecule", "ab") == []
+
+
+def test_lookup_is_fast(name_index):
+    start = time.perf_counter()
+    for _ in range(200):
+        name_index.search("molecule", "aspirin", limit=10)
+    assert (time.perf_counter() - start) / 200 < 0.001
+
+
+@pytest.mark.asyncio
+async def test_search_tools_use_the_index(chembl_stub, name_index):
+    result = await search_molecule("asprin")
+    assert "ChEMBL ID: CHEMBL25" in result
+    assert chembl_stub.count("/molecule/search.json") == 0
+
+    structured = json.loads(await search_targets(target_name="PTGS2", output="json",
+                                                 fields=["target_chembl_id"]))
+    assert structured["results"] == [{"target_chembl_id": "CHEMBL230"}]
+    assert chembl_stub.count("/target.json?target_pref_name__icontains") == 0
+
+    page = await search_molecule("compound", limit=10)
+    assert page.count("ChEMBL ID:") == 10 and "cursor=" in page
+    assert chembl_stub.count("/molecule/search.json") == 0
+
+
+@pytest.mark.asyncio
+async def test_misses_fall_back_to_the_api(chembl_stub, name_index):
+    lookups = get_metrics().name_index_lookups
+    misses = lookups.values.get(("molecule", "miss"), 0)
+    result = await search_molecule("acetylsalicylic")
+    assert chembl_stub.count("/molecule/search.json") == 1 and "ChEMBL ID:" in result
+    assert lookups.values[("molecule", "miss")] == misses + 1
+
+    # UniProt accessions are not names: always searched remotely
+    await search_targets(target_name="cyclooxygenase", uniprot_id="P35354")
+    assert chembl_stub.count("/target.json?target_pref_name__icontains") == 1
+
+
+@pytest.mark.asyncio
+async def test_lookups_run_off_the_event_loop(chembl_stub, name_index, monkeypatch):
+    """Index lookups run in a worker thread, so a slow lookup does not stall other requests."""
+    threads = []
+    lookup_names = name_index_module.lookup_names
+
+    def recording_lookup(*args):
+        threads.append(threading.current_thread())
+        return lookup_names(*args)
+
+    monkeypatch.setattr(name_index_module, "lookup_names", recording_lookup)
+    assert "ChEMBL ID: CHEMBL25" in await search_molecule("aspirin")
+    assert "CHEMBL230" in await search_targets(target_name="PTGS2")
+    assert len(threads) == 2 and threading.main_thread() not in threads
+
+
+def test_rebuilt_index_is_reopened(fixture_db, name_index, tmp_path):
+    path = name_index.path
+    conn = sqlite3.connect(fixture_db)
+    conn.execute("INSERT INTO molecule_synonyms (molregno, syn_type, synonyms) VALUES (2, 'INN', 'Novelamide')")
+    conn.commit()
+    conn.close()
+    build_index(fixture_db, path)
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+
+    assert _ids(get_name_index().search("molecule", "novelamide")) == ["CHEMBL1000"]
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".tmp")] == []
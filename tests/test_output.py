@@ -0,0 +1,129 @@
+"""
+Tests for the structured (JSON) output mode of the tools.
+"""
+
+import json
+
+import pytest
+
+from conftest import ASPIRIN, COX2, DOCUMENT_MOLECULES
+from mcp_server import (
+    get_bioactivities,
+    get_document_compounds,
+    get_molecule_details,
+    get_molecules_details,
+    get_target_details,
+    search_molecule,
+)
+from mcp_server.utils import get_cache, project
+from mcp_server.utils.cache import MISSING, DiskCache, RawJSON
+
+
+def test_project_dotted_and_list_fields():
+    """Dotted fields select nested values and apply to every element of a list."""
+    fields = ["target_chembl_id", "target_components.accession", "missing"]
+    assert project(COX2, fields) == {
+        "target_chembl_id": "CHEMBL230",
+        "target_components": [{"accession": "P35354"}],
+    }
+    # Selecting a whole object wins over one of its fields
+    assert project(ASPIRIN, ["molecule_properties", "molecule_properties.hba"])["molecule_properties"] \
+        == ASPIRIN["molecule_properties"]
+    assert project(ASPIRIN, None) is ASPIRIN
+
+
+@pytest.mark.asyncio
+async def test_detail_passes_response_text_through(chembl_stub):
+    """Without projection, a record is returned as the API's JSON text, not re-serialized."""
+    result = await get_molecule_details("CHEMBL25", output="json")
+    assert result == json.dumps(ASPIRIN)
+
+    # The second call is served from the cache, still as the original text
+    assert await get_molecule_details("CHEMBL25", output="json") == result
+    assert chembl_stub.count("/molecule/CHEMBL25") == 1
+
+
+@pytest.mark.asyncio
+async def test_detail_projection_and_not_found(chembl_stub):
+    result = json.loads(await get_target_details("CHEMBL230", output="json",
+                                                 fields=["pref_name", "target_components.accession"]))
+    assert result == {"pref_name": "Cyclooxygenase-2", "target_components": [{"accession": "P35354"}]}
+
+    assert await get_molecule_details("CHEMBL999999", output="json") == "null"
+    assert await get_molecule_details("CHEMBL999999", output="json", fields=["pref_name"]) == "null"
+
+
+@pytest.mark.asyncio
+async def test_list_projection_is_pushed_down(chembl_stub):
+    """List tools ask the API for the top-level fields of the projection only."""
+    result = json.loads(await get_bioactivities("CHEMBL25", limit=3, output="json",
+                                                fields=["activity_id", "pchembl_value"]))
+    assert result["results"] == [
+        {"activity_id": 5000, "pchembl_value": "8.00"},
+        {"activity_id": 5001, "pchembl_value": "7.99"},
+        {"activity_id": 5002, "pchembl_value": "7.98"},
+    ]
+    assert result["next_cursor"]
+    assert any("only=activity_id%2Cpchembl_value" in path or "only=activity_id,pchembl_value" in path
+               for path in chembl_stub.requests if path.startswith("/activity"))
+
+    result = json.loads(await get_document_compounds("CHEMBL1121427", limit=10, output="json",
+                                                     fields=["molecule_properties.full_mwt"]))
+    assert result == {
+        "results": [{"molecule_properties": {"full_mwt": m["molecule_properties"]["full_mwt"]}}
+                    for m in DOCUMENT_MOLECULES],
+        "next_cursor": None,
+    }
+
+
+@pytest.mark.asyncio
+async def test_list_without_projection_returns_records(chembl_stub):
+    result = json.loads(await search_molecule("aspirin", output="json"))
+    assert result == {"results": [ASPIRIN], "next_cursor": None}
+    assert not any("only=" in path for path in chembl_stub.requests)
+
+
+@pytest.mark.asyncio
+async def test_batch_shape(chembl_stub):
+    chembl_stub.routes["/molecule.json?molecule_chembl_id__in=CHEMBL25,CHEMBL404,CHEMBL1001"] = 503
+    result = json.loads(await get_molecules_details(["CHEMBL25", "CHEMBL404", "CHEMBL1001"], output="json",
+                                                    fields=["pref_name"]))
+    assert result["results"] == {}
+    assert list(result["errors"]) == ["CHEMBL25", "CHEMBL404", "CHEMBL1001"]
+
+    result = json.loads(await get_molecules_details(["CHEMBL25", "CHEMBL404"], output="json",
+                                                    fields=["pref_name"]))
+    assert result == {"results": {"CHEMBL25": {"pref_name": "ASPIRIN"}, "CHEMBL404": None}, "errors": {}}
+
+
+@pytest.mark.asyncio
+async def test_unknown_output_format(chembl_stub):
+    result = await search_molecule("aspirin", output="xml")
+    assert result.startswith("Error") and "Unknown output format 'xml'" in result
+    assert not chembl_stub.requests
+
+
+@pytest.mark.asyncio
+async def test_text_output_unchanged(chembl_stub):
+    """The projection only applies to structured output."""
+    result = await search_molecule("aspirin", fields=["pref_name"])
+    assert "ASPIRIN" in result and "C9H8O4" in result
+    assert not any("only=" in path for path in chembl_stub.requests)
+
+
+def test_disk_tier_returns_unparsed_text(tmp_path):
+    """Disk hits stay as text until a caller needs the parsed value."""
+    disk = DiskCache(str(tmp_path / "cache.db"))
+    disk.set("key", RawJSON('{"a": 1}'), None, 10.0)
+    value, _ = disk.get("key", None, 0.0)
+    assert isinstance(value, RawJSON) and value.text == '{"a": 1}'
+    assert value._value is MISSING and value.value == {"a": 1}
+
+
+@pytest.mark.asyncio
+async def test_cached_dicts_serialize_on_demand(chembl_stub):
+    """Records stored parsed (e.g., by batch lookups) are still served as JSON text."""
+    await get_molecules_details(["CHEMBL25"])
+    result = await get_molecule_details("CHEMBL25", output="json")
+    assert json.loads(result) == ASPIRIN
+    assert get_cache().stats.hits
@@ -0,0 +1,114 @@
+"""
+Tests for the composite profile tools and the fan-out they run on.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from mcp_server import get_document_profile, get_molecule_profile, get_target_profile, profiles
+from mcp_server.utils import configure_cache
+from mcp_server.utils.fanout import fan_out
+from mcp_server.utils.metrics import configure_metrics
+
+
+@pytest.fixture(autouse=True)
+def metrics():
+    yield configure_metrics()
+    configure_metrics()
+
+
+@pytest.mark.asyncio
+async def test_molecule_profile_sections(chembl_stub):
+    result = await get_molecule_profile("CHEMBL25", limit=3)
+    assert result.startswith("Profile of molecule CHEMBL25")
+    assert "Partial profile" not in result
+    for heading in ("## Details", "## Targets", "## Bioactivities", "## Documents"):
+        assert heading in result
+    assert "Molecule: ASPIRIN" in result and "Target: Target 0" in result
+    assert "Title: COX-2 inhibitors" in result
+
+
+@pytest.mark.asyncio
+async def test_target_and_document_profiles(chembl_stub):
+    target = await get_target_profile("CHEMBL230", limit=3)
+    for heading in ("## Details", "## Most potent molecules", "## Assays", "## Documents"):
+        assert heading in target
+    assert "Cyclooxygenase-2" in target
+
+    document = await get_document_profile("CHEMBL1121427", limit=3)
+    for heading in ("## Details", "## Compounds", "## Assays", "## Bioactivities"):
+        assert heading in document
+    assert "Error" not in document
+
+
+@pytest.mark.asyncio
+async def test_target_profile_scans_a_bounded_prefix(chembl_stub, monkeypatch):
+    """Without an index or a cached ranking, the molecules section folds a few activities and says so."""
+    monkeypatch.setattr(profiles, "TARGET_PROFILE_SCAN_MAX_ACTIVITIES", 4)
+    partial = await get_target_profile("CHEMBL200", limit=3)
+    assert "Note: only the first 4 activities of this target were scanned" in partial
+    assert "Activities: 4" in partial
+
+    # Once get_target_molecules has cached the full ranking, the profile uses it
+    await profiles.get_target_molecules_impl("CHEMBL200")
+    requests = chembl_stub.count("/activity.json")
+    full = await get_target_profile("CHEMBL200", limit=3)
+    assert "Note:" not in full and "Activities: 10" in full
+    assert chembl_stub.count("/activity.json") == requests
+
+
+@pytest.mark.asyncio
+async def test_profile_latency_is_bounded_by_slowest_branch(chembl_stub):
+    """The sections' requests overlap, so a profile is much faster than the same calls in sequence."""
+    configure_cache(max_entries=0, path=None, release_check_interval=0)
+    chembl_stub.delay = 0.2
+
+    start = time.perf_counter()
+    await profiles.get_molecule_details_impl("CHEMBL25")
+    await profiles.get_molecule_targets_impl("CHEMBL25", 5, aggregate=True)
+    await profiles.get_bioactivities_impl("CHEMBL25", limit=5)
+    await profiles._linked_documents(profiles.activity_client.filter(molecule_chembl_id="CHEMBL25"), 5)
+    serial = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = await get_molecule_profile("CHEMBL25", limit=5)
+    concurrent = time.perf_counter() - start
+
+    print(f"\nmolecule profile: serial {serial:.3f}s, concurrent {concurrent:.3f}s")
+    assert "Partial profile" not in result
+    assert concurrent < serial * 0.6
+
+
+@pytest.mark.asyncio
+async def test_deadline_returns_partial_profile(chembl_stub, monkeypatch, metrics):
+    """A section that misses the deadline is reported while the others are returned."""
+    async def stalled(*args, **kwargs):
+        await asyncio.sleep(5)
+        return "never"
+
+    monkeypatch.setattr(profiles, "get_bioactivities_impl", stalled)
+    start = time.perf_counter()
+    result = await get_molecule_profile("CHEMBL25", deadline=0.3)
+    assert time.perf_counter() - start < 1
+
+    assert "Partial profile: Bioactivities (get_bioactivities) did not finish within 0.3 s." in result
+    assert "Not available: timed out after 0.3 s." in result
+    assert "ASPIRIN" in result and "## Targets" in result
+    assert metrics.fanout_branches.get("molecule_profile", "activities", "timeout") == 1
+    assert metrics.fanout_branches.get("molecule_profile", "details", "ok") == 1
+
+
+@pytest.mark.asyncio
+async def test_fan_out_records_errors():
+    async def fail():
+        raise ValueError("boom")
+
+    async def answer():
+        return 42
+
+    results = await fan_out("test", {"fail": fail, "answer": answer}, deadline=1)
+    assert list(results) == ["fail", "answer"]
+    assert isinstance(results["fail"].error, ValueError) and not results["fail"].ok
+    assert results["answer"].ok and results["answer"].value == 42
@@ -0,0 +1,121 @@
+"""
+Tests for the adaptive rate limiter in front of the ChEMBL API.
+"""
+
+import asyncio
+import multiprocessing
+import time
+
+import pytest
+
+from mcp_server.utils import configure_transport, get_backend, molecule_client
+from mcp_server.utils.metrics import configure_metrics
+from mcp_server.utils.ratelimit import RateLimiter
+
+MOLECULE_PATH = "/molecule/CHEMBL25.json"
+
+
+@pytest.fixture(autouse=True)
+def metrics():
+    yield configure_metrics()
+    configure_metrics()
+
+
+@pytest.mark.asyncio
+async def test_bucket_bounds_request_rate():
+    """After the burst, tokens are handed out at the configured rate."""
+    limiter = RateLimiter(rate=50, burst=5, shared_path=None)
+    start = time.perf_counter()
+    for _ in range(15):
+        await limiter.acquire_token()
+    elapsed = time.perf_counter() - start
+    # 5 tokens from the burst, then 10 at 50/s
+    assert 0.18 <= elapsed < 0.5
+
+
+@pytest.mark.asyncio
+async def test_throttling_halves_rate_and_pauses(chembl_stub, metrics):
+    """A 429 halves the rate and holds every request back for Retry-After."""
+    limiter = RateLimiter(rate=100, burst=10, shared_path=None)
+    configure_transport(chembl_stub.base_url, backoff_base=0.01, limiter=limiter)
+    chembl_stub.fail_next(MOLECULE_PATH, 429, headers={"Retry-After": "0.3"})
+
+    start = time.perf_counter()
+    assert (await molecule_client.get("CHEMBL25"))["pref_name"] == "ASPIRIN"
+    assert time.perf_counter() - start >= 0.3
+    # Halved by the 429, then raised by one step for the successful retry
+    assert limiter.rate == pytest.approx(51)
+    assert metrics.ratelimit_throttled.total() == 1
+
+    for i in range(10):
+        await molecule_client.get(f"CHEMBL{1000 + i}")
+    assert limiter.rate == pytest.approx(61)
+
+
+@pytest.mark.asyncio
+async def test_slow_answers_lower_rate(chembl_stub):
+    limiter = RateLimiter(rate=100, burst=10, latency_target=0.05, shared_path=None)
+    configure_transport(chembl_stub.base_url, limiter=limiter)
+    await get_backend().release()
+    chembl_stub.delay = 0.1
+    await molecule_client.get("CHEMBL25")
+    assert limiter.rate == pytest.approx(90)
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_queues_requests(chembl_stub, metrics):
+    """Requests beyond the concurrency limit wait for a slot, and the wait is measured."""
+    configure_transport(chembl_stub.base_url, limiter=RateLimiter(rate=0, concurrency=2, shared_path=None))
+    await get_backend().release()
+    chembl_stub.delay = 0.2
+    metrics.ratelimit_wait.series.clear()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(molecule_client.get(f"CHEMBL{1000 + i}") for i in range(4)))
+    assert time.perf_counter() - start >= 0.4
+
+    wait = metrics.ratelimit_wait
+    assert wait.count() == 4
+    # Two requests started at once, the other two queued for about one request each
+    assert wait.mean() * 4 >= 0.35
+
+
+def _take_tokens(path: str, count: int) -> None:
+    limiter = RateLimiter(rate=20, burst=5, shared_path=path)
+
+    async def take():
+        for _ in range(count):
+            await limiter.acquire_token()
+
+    asyncio.run(take())
+
+
+def test_shared_bucket_spans_processes(tmp_path):
+    """Processes sharing a bucket file share one budget."""
+    path = str(tmp_path / "bucket")
+    ctx = multiprocessing.get_context("fork")
+    start = time.perf_counter()
+    workers = [ctx.Process(target=_take_tokens, args=(path, 10)) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(10)
+    elapsed = time.perf_counter() - start
+    assert all(worker.exitcode == 0 for worker in workers)
+    # 20 tokens with a burst of 5 at 20/s; separate buckets would need 0.25 s
+    assert elapsed >= 0.7
+
+
+def test_shared_bucket_shares_throttling(tmp_path):
+    """A 429 seen by one replica slows every replica using the file."""
+    path = str(tmp_path / "bucket")
+    first = RateLimiter(rate=10, shared_path=path)
+    second = RateLimiter(rate=10, shared_path=path)
+    try:
+        first.record(429, 0.1, retry_after=1)
+        assert second.rate == pytest.approx(5)
+        tokens, rate, paused = second.snapshot()
+        assert tokens == 0 and 0.5 < paused <= 1
+    finally:
+        first.close()
+        second.close()
@@ -0,0 +1,69 @@
+"""
+Tests for the server command line and its HTTP transports.
+"""
+
+import asyncio
+import socket
+
+import pytest
+import uvicorn
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+
+from mcp_server.__main__ import create_app, parse_args
+
+
+def test_transport_selection():
+    """The transport flags, including the --stdio passed by the Dockerfile, are honored."""
+    assert parse_args([]).transport == "stdio"
+    assert parse_args(["--stdio"]).transport == "stdio"
+    assert parse_args(["--sse"]).transport == "sse"
+    args = parse_args(["--transport", "streamable-http", "--host", "0.0.0.0", "--port", "9000"])
+    assert (args.transport, args.host, args.port, args.workers) == ("streamable-http", "0.0.0.0", 9000, 1)
+
+
+@pytest.mark.parametrize("argv", [
+    ["--workers", "2"],
+    ["--sse", "--workers", "2"],
+    ["--http", "--workers", "4"],
+    ["--http", "--workers", "0"],
+    ["--stdio", "--sse"],
+])
+def test_invalid_deployments_rejected(argv):
+    """Worker counts that cannot serve cursors, frames or sessions correctly are refused up front."""
+    with pytest.raises(SystemExit):
+        parse_args(argv)
+
+
+def test_create_app_rejects_stdio():
+    with pytest.raises(ValueError):
+        create_app("stdio")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.mark.asyncio
+async def test_sse_round_trip(chembl_stub):
+    """A client session over SSE lists the tools and calls one against the API."""
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(create_app("sse"), host="127.0.0.1", port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    try:
+        while not server.started:
+            await asyncio.sleep(0.01)
+        async with sse_client(f"http://127.0.0.1:{port}/sse") as streams:
+            async with ClientSession(*streams) as session:
+                await session.initialize()
+                tools = {tool.name for tool in (await session.list_tools()).tools}
+                result = await session.call_tool("get_molecule_details", {"chembl_id": "CHEMBL25"})
+    finally:
+        # Open SSE streams never finish on their own; do not wait for them
+        server.should_exit = server.force_exit = True
+        await task
+
+    assert {"search_molecule", "get_bioactivities", "cache_stats"} <= tools
+    assert "ASPIRIN" in result.content[0].text
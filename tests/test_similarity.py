@@ -0,0 +1,134 @@
+"""
+Tests for the local fingerprint similarity index.
+"""
+
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from mcp_server import get_similar_molecules
+from mcp_server.utils.similarity import (
+    SimilarityIndex,
+    build_index,
+    configure_similarity_index,
+    read_molecules,
+    write_index,
+)
+
+# Structures for the fixture molecule IDs (CHEMBL25 and the synthetic CHEMBL1000+)
+SMILES = {
+    "CHEMBL25": "CC(=O)Oc1ccccc1C(=O)O",
+    "CHEMBL1000": "OC(=O)c1ccccc1O",
+    "CHEMBL1001": "COC(=O)c1ccccc1O",
+    "CHEMBL1002": "CC(=O)Oc1ccccc1C(=O)OC",
+    "CHEMBL1003": "CC(=O)Oc1ccc(Cl)cc1C(=O)O",
+    "CHEMBL1004": "CC(C)Cc1ccc(cc1)C(C)C(=O)O",
+    "CHEMBL1005": "CC(=O)Nc1ccc(O)cc1",
+    "CHEMBL1006": "Cn1cnc2c1c(=O)n(C)c(=O)n2C",
+    "CHEMBL1007": "c1ccccc1",
+    "CHEMBL1008": "Cc1ccccc1",
+    "CHEMBL1009": "Oc1ccccc1",
+    "CHEMBL1010": "CCO",
+    "CHEMBL1011": "CC(=O)Oc1ccccc1C(=O)N",
+}
+
+
+def _random_index(path, rows=5000, words=32, seed=7):
+    rng = np.random.default_rng(seed)
+    # Sparse bits with varying density, like real fingerprints
+    density = rng.uniform(0.01, 0.1, size=(rows, 1))
+    bits = rng.random((rows, words * 64)) < density
+    packed = np.packbits(bits.astype(np.uint8), axis=1, bitorder="little").view(np.uint64)
+    ids = [f"CHEMBL{100000 + i}" for i in range(rows)]
+    write_index(str(path), ids, packed, {"fingerprint": "random"})
+    return SimilarityIndex(str(path)), ids, bits
+
+
+def _brute_force(bits, query_bits, threshold, k):
+    common = (bits & query_bits).sum(axis=1)
+    union = (bits | query_bits).sum(axis=1)
+    scores = np.where(union > 0, common / np.maximum(union, 1), 0.0)
+    ranked = sorted(((-s, i) for i, s in enumerate(scores) if s >= threshold))[:k]
+    return [(i, -s) for s, i in ranked]
+
+
+@pytest.mark.parametrize("threshold", [0.3, 0.5, 0.8])
+def test_pruned_search_matches_brute_force(tmp_path, threshold):
+    """Popcount pruning never drops a hit that an exhaustive scan would return."""
+    index, ids, bits = _random_index(tmp_path / "index")
+    for query in range(0, 5000, 499):
+        hits = index.similar_to(ids[query], threshold, k=10)
+        expected = _brute_force(bits, bits[query], threshold, 10)
+        assert [round(s, 4) for _, s in hits] == [round(s, 4) for _, s in expected]
+        assert hits[0] == (ids[query], 1.0)
+
+
+def test_lookup_by_id(tmp_path):
+    """Every indexed ID resolves to its row and unknown IDs to None."""
+    index, ids, _ = _random_index(tmp_path / "index", rows=300)
+    for chembl_id in ids:
+        assert str(index.ids[index.row_of(chembl_id)]) == chembl_id
+    assert index.row_of("CHEMBL1") is None
+    assert index.similar_to("CHEMBL1") is None
+
+
+def test_read_molecule_formats(tmp_path):
+    """SMILES lists, chemreps dumps and SDF files are all accepted."""
+    smi = tmp_path / "dump.smi"
+    smi.write_text("CCO CHEMBL545\nc1ccccc1 CHEMBL277500\n")
+    chemreps = tmp_path / "chemreps.txt"
+    chemreps.write_text("chembl_id\tcanonical_smiles\tstandard_inchi\nCHEMBL545\tCCO\tInChI=1S\n")
+    sdf = tmp_path / "dump.sdf"
+    sdf.write_text("ethanol\n  RDKit\n\n  0  0  0  0  0  0  0  0  0  0999 V2000\nM  END\n"
+                   "> <chembl_id>\nCHEMBL545\n\n$$$$\n")
+
+    assert list(read_molecules(str(smi))) == [("CHEMBL545", "CCO"), ("CHEMBL277500", "c1ccccc1")]
+    assert list(read_molecules(str(chemreps))) == [("CHEMBL545", "CCO")]
+    assert [chembl_id for chembl_id, _ in read_molecules(str(sdf))] == ["CHEMBL545"]
+
+
+@pytest.fixture
+def similarity_index(tmp_path):
+    """Index built from the fixture molecules' structures with the build command."""
+    pytest.importorskip("rdkit")
+    source = tmp_path / "molecules.smi"
+    source.write_text("".join(f"{smiles} {chembl_id}\n" for chembl_id, smiles in SMILES.items()))
+    assert build_index(str(source), str(tmp_path / "index")) == len(SMILES)
+    index = configure_similarity_index(str(tmp_path / "index"))
+    try:
+        yield index
+    finally:
+        configure_similarity_index(None)
+
+
+def test_build_matches_rdkit_tanimoto(similarity_index):
+    """Scores of the built index agree with RDKit's own Tanimoto."""
+    from rdkit import Chem, DataStructs
+    from rdkit.Chem import rdFingerprintGenerator
+
+    generator = rdFingerprintGenerator.GetMorganGenerator(radius=2, fpSize=2048)
+    fps = {cid: generator.GetFingerprint(Chem.MolFromSmiles(s)) for cid, s in SMILES.items()}
+    for chembl_id, similarity in similarity_index.similar_to("CHEMBL25", threshold=0.0, k=len(SMILES)):
+        assert similarity == pytest.approx(DataStructs.TanimotoSimilarity(fps["CHEMBL25"], fps[chembl_id]),
+                                           abs=1e-4)
+
+
+@pytest.mark.asyncio
+async def test_tool_uses_local_index(chembl_stub, similarity_index):
+    """get_similar_molecules ranks locally and only fetches the hit records."""
+    start = time.perf_counter()
+    result = await get_similar_molecules("CHEMBL25", 0.4)
+    elapsed = time.perf_counter() - start
+
+    assert result.startswith("Similar molecules to CHEMBL25 (threshold: 0.4)")
+    assert result.index("ASPIRIN") < result.index("COMPOUND")
+    assert "COMPOUND 6" not in result  # caffeine
+    assert chembl_stub.count("/similarity/") == 0
+    print(f"\nlocal get_similar_molecules: {elapsed * 1000:.1f} ms")
+
+    # Molecules missing from the index fall back to the remote search
+    chembl_stub.routes["/similarity/CHEMBL0/70.json"] = {"molecules": []}
+    assert (await get_similar_molecules("CHEMBL0")).startswith("No similar molecules found")
+    assert chembl_stub.count("/similarity/") == 1
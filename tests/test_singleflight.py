@@ -0,0 +1,87 @@
+"""
+Tests for coalescing identical concurrent ChEMBL requests.
+"""
+
+import asyncio
+
+import pytest
+
+from mcp_server import cache_stats, get_bioactivities, get_molecule_details, get_target_details
+from mcp_server.utils import activity_client, configure_single_flight, get_backend, get_single_flight
+
+MOLECULE_PATH = "/molecule/CHEMBL25.json"
+
+
+async def _slow_down(stub, delay):
+    """Settle the release check (a new release would clear the cache mid-test), then add latency."""
+    await get_backend().release()
+    stub.delay = delay
+
+
+@pytest.mark.asyncio
+async def test_identical_calls_share_one_request(chembl_stub):
+    """Concurrent lookups of one record make a single round trip."""
+    await _slow_down(chembl_stub, 0.05)
+    results = await asyncio.gather(*(get_molecule_details("CHEMBL25") for _ in range(20)))
+
+    assert all("ASPIRIN" in result for result in results)
+    assert chembl_stub.count(MOLECULE_PATH) == 1
+    stats = get_single_flight().stats.as_dict()
+    assert (stats["executed"], stats["coalesced"], stats["max_waiters"]) == (1, 19, 20)
+    assert len(get_single_flight()) == 0
+    assert "Coalesced: 19" in await cache_stats()
+
+
+@pytest.mark.asyncio
+async def test_keys_are_normalized(chembl_stub):
+    """Filters given in any order coalesce; different filters or formats do not."""
+    await _slow_down(chembl_stub, 0.05)
+    await asyncio.gather(
+        activity_client.filter(molecule_chembl_id="CHEMBL25", standard_type="IC50").fetch(5),
+        activity_client.filter(standard_type="IC50", molecule_chembl_id="CHEMBL25").fetch(5),
+        activity_client.filter(molecule_chembl_id="CHEMBL25").fetch(5),
+        get_target_details("CHEMBL230"),
+        get_target_details("CHEMBL230"),
+    )
+
+    assert chembl_stub.count("/activity.json") == 2
+    assert chembl_stub.count("/target/CHEMBL230.json") == 1
+    assert get_single_flight().stats.coalesced == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared(chembl_stub):
+    """A failed request fails every coalesced caller once, without repeating it."""
+    await _slow_down(chembl_stub, 0.05)
+    chembl_stub.fail_next(MOLECULE_PATH, 400)
+    results = await asyncio.gather(*(get_molecule_details("CHEMBL25") for _ in range(5)))
+
+    assert all(result.startswith("Error retrieving molecule details") for result in results)
+    assert chembl_stub.count(MOLECULE_PATH) == 1
+    # The failure is not remembered
+    assert "ASPIRIN" in await get_molecule_details("CHEMBL25")
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_others(chembl_stub):
+    """Cancelling the caller that started a request leaves it running for the rest."""
+    await _slow_down(chembl_stub, 0.1)
+    first = asyncio.ensure_future(get_bioactivities("CHEMBL25"))
+    await asyncio.sleep(0.02)
+    second = asyncio.ensure_future(get_bioactivities("CHEMBL25"))
+    await asyncio.sleep(0.02)
+    first.cancel()
+
+    assert "Activity ID: 5000" in await second
+    assert chembl_stub.count("/activity.json") == 1
+
+
+@pytest.mark.asyncio
+async def test_disabled(chembl_stub):
+    """With coalescing off, every concurrent call makes its own request."""
+    configure_single_flight(enabled=False)
+    await _slow_down(chembl_stub, 0.05)
+    await asyncio.gather(*(get_molecule_details("CHEMBL25") for _ in range(3)))
+
+    assert chembl_stub.count(MOLECULE_PATH) == 3
+    assert get_single_flight().stats.executed == 3
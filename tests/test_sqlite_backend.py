@@ -0,0 +1,161 @@
+"""
+Tests for the local ChEMBL SQLite backend.
+"""
+
+import re
+import time
+
+import pytest
+
+from mcp_server import (
+    get_activity_details,
+    get_assay_details,
+    get_assays_details,
+    get_bioactivities,
+    get_document_compounds,
+    get_document_info,
+    get_molecule_details,
+    get_molecule_sdf,
+    get_molecule_targets,
+    get_molecules_details,
+    get_similar_molecules,
+    get_target_details,
+    get_targets_details,
+    search_assays,
+    search_molecule,
+    search_targets,
+)
+from conftest import ACTIVITIES
+from mcp_server.utils import (
+    activity_client,
+    configure_backend,
+    configure_cache,
+    get_backend,
+    molecule_client,
+    target_client,
+)
+from mcp_server.utils import name_index
+from mcp_server.utils.sqlite_backend import build_sql
+
+# (tool, args) pairs whose output must not depend on the backend
+PARITY_CALLS = [
+    (search_molecule, ("aspirin",)),
+    (get_molecule_details, ("CHEMBL25",)),
+    (get_molecule_details, ("CHEMBL0",)),
+    (get_molecule_sdf, ("CHEMBL25",)),
+    (get_molecules_details, (["CHEMBL25", "CHEMBL1003", "CHEMBL0"],)),
+    (get_molecule_targets, ("CHEMBL25", 5)),
+    (get_molecule_targets, ("CHEMBL25", 5, True)),
+    (get_target_details, ("CHEMBL230",)),
+    (get_targets_details, (["CHEMBL230", "CHEMBL205"],)),
+    (search_targets, ("cyclooxygenase",)),
+    (get_assay_details, ("CHEMBL1217645",)),
+    (get_assays_details, (["CHEMBL1217645", "CHEMBL9003"],)),
+    (search_assays, ("B", "CHEMBL230")),
+    (get_bioactivities, ("CHEMBL25",)),
+    (get_activity_details, ("5000",)),
+    (get_document_info, ("CHEMBL1121427",)),
+    (get_document_compounds, ("CHEMBL1121427",)),
+]
+
+
+async def _run_calls():
+    # Cursor tokens are random per call; only their presence must match
+    return [re.sub(r"cursor='[^']+'", "cursor=...", await tool(*args)) for tool, args in PARITY_CALLS]
+
+
+@pytest.mark.asyncio
+async def test_tool_output_matches_rest(chembl_stub, chembl_sqlite):
+    """Every tool answers identically from the local dump and the REST API."""
+    local = await _run_calls()
+    assert chembl_stub.requests == []
+
+    configure_backend("rest")
+    rest = await _run_calls()
+
+    for (tool, args), expected, actual in zip(PARITY_CALLS, rest, local):
+        assert actual == expected, f"{tool.__name__}{args}"
+
+
+@pytest.mark.asyncio
+async def test_unsupported_queries_fall_back(chembl_sqlite, chembl_stub):
+    """Similarity search is not answerable from the dump and goes to the API."""
+    assert "Similar molecules" in await get_similar_molecules("CHEMBL25")
+    assert chembl_stub.count("/similarity/") == 1
+    assert chembl_stub.count("/molecule") == 0
+
+
+@pytest.mark.asyncio
+async def test_release_and_pagination(chembl_sqlite):
+    """The dump reports its release and pages with has-more detection."""
+    assert await get_backend().release() == "ChEMBL_33"
+    everything = [m async for m in molecule_client.all().iterate(page_size=10)]
+    assert len(everything) == 31
+    assert [m["molecule_chembl_id"] for m in await molecule_client.all().only("molecule_chembl_id").fetch(2)] \
+        == ["CHEMBL25", "CHEMBL1000"]
+
+
+@pytest.mark.asyncio
+async def test_activity_records_match_rest(chembl_sqlite):
+    """Activity rows carry every field of the REST records, the molecule's SMILES included."""
+    records = [a async for a in activity_client.filter(molecule_chembl_id="CHEMBL25").iterate()]
+    assert len(records) == len(ACTIVITIES)
+    assert set(records[0]) == set(ACTIVITIES[0])
+    assert records[0]["canonical_smiles"] == ACTIVITIES[0]["canonical_smiles"]
+
+
+@pytest.mark.asyncio
+async def test_name_searches_use_the_name_index(chembl_sqlite, tmp_path):
+    """With a name index, name searches select indexed IDs instead of scanning names with LIKE."""
+    name_index.build_index(chembl_sqlite.path, str(tmp_path / "names.db"))
+    name_index.configure_name_index(str(tmp_path / "names.db"))
+    try:
+        search = molecule_client.search("asprin")
+        assert "LIKE" not in build_sql(search)[1]
+        assert [m["molecule_chembl_id"] for m in await search.fetch(5)] == ["CHEMBL25"]
+        targets = target_client.filter(target_pref_name__icontains="cyclooxygenase")
+        assert "LIKE" not in build_sql(targets)[1]
+        assert "CHEMBL230" in [t["target_chembl_id"] for t in await targets.fetch(5)]
+        assert await molecule_client.search("zzzz").fetch(5) == []
+        # IDs and names the index does not know fall back to the scan
+        assert "ChEMBL ID: CHEMBL25" in await search_molecule("CHEMBL25")
+        assert [m["molecule_chembl_id"] for m in await molecule_client.search("CHEMBL25").fetch(5)][:1] \
+            == ["CHEMBL25"]
+    finally:
+        name_index.configure_name_index()
+    assert "LIKE" in build_sql(molecule_client.search("asprin"))[1]
+
+
+def test_missing_database_is_rejected(tmp_path):
+    """Selecting the backend without a usable dump fails loudly."""
+    with pytest.raises(ValueError):
+        configure_backend("sqlite", path=None)
+    with pytest.raises(FileNotFoundError):
+        configure_backend("sqlite", path=str(tmp_path / "missing.db"))
+    assert get_backend().name == "rest"
+
+
+@pytest.mark.asyncio
+async def test_local_latency(chembl_stub, chembl_sqlite):
+    """Local lookups avoid the API round trip entirely.
+
+    Run with ``pytest -s`` to compare per-call latency of both backends
+    (the stub adds a simulated 20 ms network delay).
+    """
+    configure_cache(max_entries=0, path=None, release_check_interval=0)
+    chembl_stub.delay = 0.02
+    calls = 20
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        assert "ASPIRIN" in await get_molecule_details("CHEMBL25")
+    local = (time.perf_counter() - start) / calls
+
+    configure_backend("rest")
+    start = time.perf_counter()
+    for _ in range(calls):
+        assert "ASPIRIN" in await get_molecule_details("CHEMBL25")
+    remote = (time.perf_counter() - start) / calls
+
+    print(f"\nget_molecule_details: sqlite {local * 1000:.2f} ms/call, rest {remote * 1000:.2f} ms/call")
+    assert local < remote
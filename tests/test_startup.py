@@ -0,0 +1,59 @@
+"""
+Cold-start benchmark: import-time budget of the server package.
+
+Run with ``pytest -s`` to print the slowest modules the package itself adds
+on top of the MCP SDK.
+"""
+
+import os
+import subprocess
+import sys
+from typing import Dict, Tuple
+
+# Milliseconds the package may add to ``import mcp.server.fastmcp``
+IMPORT_BUDGET_MS = float(os.environ.get("CHEMBL_IMPORT_BUDGET_MS", "80"))
+
+# Optional dependencies only the local indexes and exports need
+HEAVY_MODULES = {"numpy", "rdkit", "pyarrow", "pandas"}
+
+
+def _import_profile(module: str) -> Dict[str, Tuple[int, int]]:
+    """Self and cumulative import time (microseconds) of every module a fresh interpreter loads."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, check=True)
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = (int(self_us), int(cumulative_us))
+    return profile
+
+
+def test_no_heavy_imports():
+    """NumPy, RDKit and friends load only when a local index or export is used."""
+    assert not HEAVY_MODULES & set(_import_profile("mcp_server"))
+
+
+def test_nothing_constructed_at_import():
+    """The cache, transport and backend are created by the first tool call, not by the import."""
+    check = ("import mcp_server\n"
+             "from mcp_server.utils import backend, cache, transport\n"
+             "assert cache._cache is None and transport._transport is None and backend._backend is None\n")
+    subprocess.run([sys.executable, "-c", check], check=True, capture_output=True)
+
+
+def test_import_time_budget():
+    """The package adds at most IMPORT_BUDGET_MS to the SDK's own import time (best of three)."""
+    runs = []
+    for _ in range(3):
+        baseline = _import_profile("mcp.server.fastmcp")
+        profile = _import_profile("mcp_server")
+        own = {name: times[0] for name, times in profile.items() if name not in baseline}
+        runs.append((sum(own.values()) / 1000, own))
+    own_ms, own = min(runs, key=lambda run: run[0])
+
+    print(f"\npackage import time: {own_ms:.1f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)")
+    for name, self_us in sorted(own.items(), key=lambda item: -item[1])[:10]:
+        print(f"{self_us / 1000:>8.1f} ms  {name}")
+    assert own_ms < IMPORT_BUDGET_MS
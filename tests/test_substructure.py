@@ -0,0 +1,112 @@
+"""
+Tests and screening benchmark for the local substructure index.
+"""
+
+import itertools
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+Chem = pytest.importorskip("rdkit.Chem")
+
+from mcp_server import search_molecule_substructure
+from mcp_server.utils import substructure
+from mcp_server.utils.substructure import build_index, configure_substructure_index
+
+# Ring systems with two attachment points and substituents to decorate them
+CORES = ["c1ccc({})cc1{}", "c1cc({})cnc1{}", "c1cc({})sc1{}", "C1CC({})CCN1{}",
+         "c1ccc2cc({})ccc2c1{}", "C1CC({})CCC1{}", "c1cc({})c2[nH]ccc2c1{}"]
+SUBSTITUENTS = ["C(=O)O", "C(=O)N", "OC(C)=O", "N", "Cl", "F", "S(=O)(=O)N",
+                "[N+](=O)[O-]", "OC", "CC", "C(F)(F)F", "C#N"]
+
+# Query fragments for the benchmark, from generic to selective
+FRAGMENTS = ["c1ccccc1", "CC(=O)O", "C(=O)N", "c1ccncc1", "S(=O)(=O)N",
+             "C(F)(F)F", "C1CCNCC1", "c1ccc2ccccc2c1", "FC(F)(F)c1ccccc1"]
+
+
+def _library():
+    """Decorated ring systems, named after the fixture ID scheme."""
+    structures = {"CHEMBL25": "CC(=O)Oc1ccccc1C(=O)O"}
+    for i, (core, (a, b)) in enumerate(itertools.product(CORES, itertools.combinations(SUBSTITUENTS, 2))):
+        structures[f"CHEMBL{1000 + i}"] = core.format(a, b)
+    return structures
+
+
+@pytest.fixture(scope="module")
+def library():
+    return _library()
+
+
+@pytest.fixture
+def substructure_index(tmp_path, library):
+    source = tmp_path / "library.smi"
+    source.write_text("".join(f"{smiles} {chembl_id}\n" for chembl_id, smiles in library.items()))
+    assert build_index(str(source), str(tmp_path / "index")) == len(library)
+    index = configure_substructure_index(str(tmp_path / "index"))
+    try:
+        yield index
+    finally:
+        configure_substructure_index(None)
+
+
+def _brute_force(library, smiles):
+    query = Chem.MolFromSmiles(smiles)
+    return {chembl_id for chembl_id, s in library.items() if Chem.MolFromSmiles(s).HasSubstructMatch(query)}
+
+
+@pytest.mark.parametrize("fragment", FRAGMENTS)
+def test_screen_never_drops_a_match(substructure_index, library, fragment):
+    """Screen plus verification finds exactly the molecules an exhaustive match finds."""
+    assert set(substructure_index.iter_matches(fragment)) == _brute_force(library, fragment)
+
+
+def test_matches_arrive_smallest_first(substructure_index):
+    """Hits come out in heavy-atom order across chunk boundaries."""
+    sizes = [Chem.MolFromSmiles(substructure_index.smiles(row)).GetNumHeavyAtoms()
+             for row in range(len(substructure_index))]
+    assert sizes == sorted(sizes)
+
+
+@pytest.mark.asyncio
+async def test_tool_uses_local_index(chembl_stub, substructure_index, monkeypatch):
+    """The tool stops after the first verified hits and never calls the remote search."""
+    monkeypatch.setattr(substructure, "SCREEN_CHUNK", 16)
+    result = await search_molecule_substructure("CC(=O)O")
+
+    first_hits = list(itertools.islice(substructure_index.iter_matches("CC(=O)O"), 5))
+    assert result.startswith("Molecules containing substructure CC(=O)O")
+    assert chembl_stub.count("/substructure/") == 0
+    # Only the first five verified hits are looked up, in one batch request
+    assert chembl_stub.count("/molecule.json") == 1
+    assert f"molecule_chembl_id__in={'%2C'.join(first_hits)}" in chembl_stub.requests[-1]
+    assert (await search_molecule_substructure("C1CC")).startswith("Error searching by substructure")
+
+
+def test_screening_benchmark(substructure_index, library, monkeypatch):
+    """Screen selectivity and wall time per fragment; run with ``pytest -s`` for the table."""
+    index = substructure_index
+    # Small chunks so the time to the first hit reflects incremental delivery
+    monkeypatch.setattr(substructure, "SCREEN_CHUNK", 64)
+    print(f"\n{'fragment':<20}{'screened':>9}{'matches':>9}{'pass %':>8}"
+          f"{'first hit ms':>14}{'indexed ms':>12}{'brute ms':>10}")
+    for fragment in FRAGMENTS:
+        start = time.perf_counter()
+        first_hit = next(index.iter_matches(fragment), None)
+        first_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        survivors = matches = 0
+        for hits, candidates in index.iter_chunks(fragment):
+            survivors += candidates
+            matches += len(hits)
+        indexed_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        expected = _brute_force(library, fragment)
+        brute_ms = (time.perf_counter() - start) * 1000
+
+        print(f"{fragment:<20}{survivors:>9}{matches:>9}{100 * survivors / len(index):>8.1f}"
+              f"{first_ms:>14.2f}{indexed_ms:>12.2f}{brute_ms:>10.2f}")
+        assert matches == len(expected) and (first_hit is None) == (not expected)
+        assert survivors >= matches
@@ -0,0 +1,146 @@
+"""
+Tests for the incremental release sync of the local cache and indexes.
+"""
+
+import asyncio
+import os
+import shutil
+import sqlite3
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from conftest import build_fixture_db
+from mcp_server.utils import sync as sync_module
+from mcp_server.utils.cache import MISSING, DiskCache
+from mcp_server.utils.name_index import NameIndex
+from mcp_server.utils.sync import check_release, main, state_release, sync
+from mcp_server.utils.target_index import TargetIndex, build_index, configure_target_index, get_target_index
+
+
+@pytest.fixture
+def releases(tmp_path):
+    """ChEMBL_33 and a ChEMBL_34 with a few records added, changed and removed."""
+    old, new = str(tmp_path / "chembl_33.db"), str(tmp_path / "chembl_34.db")
+    build_fixture_db(old)
+    shutil.copy(old, new)
+    conn = sqlite3.connect(new)
+    conn.executescript("""
+        UPDATE version SET name = 'ChEMBL_34';
+        UPDATE molecule_dictionary SET pref_name = 'NOVELAMIDE' WHERE chembl_id = 'CHEMBL1002';
+        INSERT INTO molecule_dictionary VALUES (100, 'NEWCOMPOUND', 'CHEMBL2000');
+        INSERT INTO molecule_synonyms (molregno, syn_type, synonyms)
+            SELECT molregno, 'RESEARCH_CODE', 'Compound three' FROM molecule_dictionary WHERE chembl_id = 'CHEMBL1003';
+        DELETE FROM activities WHERE activity_id = 5000;
+        UPDATE activities SET molregno = (SELECT molregno FROM molecule_dictionary WHERE chembl_id = 'CHEMBL1001')
+            WHERE activity_id = 5013;
+    """)
+    conn.commit()
+    conn.close()
+    return old, new
+
+
+@pytest.fixture
+def stores(tmp_path):
+    paths = {"state": str(tmp_path / "sync.db"), "cache_path": str(tmp_path / "cache.db"),
+             "name_index": str(tmp_path / "names.db"), "target_index": str(tmp_path / "targets")}
+    yield paths
+    configure_target_index()
+
+
+def test_first_sync_builds_every_store(releases, stores, tmp_path):
+    old, _ = releases
+    report = sync(old, **stores)
+    assert report.delta.full and report.stores["cache"].startswith("left to")
+    assert state_release(stores["state"]) == "ChEMBL_33"
+    assert NameIndex(stores["name_index"]).release == "ChEMBL_33"
+    assert os.path.islink(stores["target_index"]) and TargetIndex(stores["target_index"]).release == "ChEMBL_33"
+
+    assert sync(old, **stores) is None
+    assert sync(old, **stores, force=True).delta.total() == 0
+
+
+def test_sync_applies_the_delta(releases, stores, tmp_path):
+    old, new = releases
+    sync(old, **stores)
+    cache = DiskCache(stores["cache_path"])
+    expires_at = time.time() + 3600
+    for key in ("molecule/CHEMBL25.json", "molecule/CHEMBL25.sdf", "molecule/CHEMBL1002.json",
+                "molecule/CHEMBL2000.json", "activity/5013.json", "target/CHEMBL230.json",
+                "molecule.json?limit=20&offset=0"):
+        cache.set(key, {"key": key}, "ChEMBL_33", expires_at)
+    cache.close()
+    configure_target_index(stores["target_index"])
+    served = get_target_index()
+
+    report = sync(new, **stores)
+    delta = report.delta
+    assert (delta.previous, delta.release) == ("ChEMBL_33", "ChEMBL_34")
+    assert delta.added["molecule"] == {"CHEMBL2000"} and delta.changed["molecule"] == {"CHEMBL1002"}
+    assert delta.changed["molecule_names"] == {"CHEMBL1002", "CHEMBL1003"}
+    assert delta.removed["activity"] == {"5000"} and delta.changed["activity"] == {"5013"}
+    assert not delta.touched("target") and not delta.touched("assay") and not delta.touched("document")
+    assert delta.molecules == {"CHEMBL25", "CHEMBL1001"} and delta.targets == {"CHEMBL200", "CHEMBL201"}
+    assert state_release(stores["state"]) == "ChEMBL_34"
+
+    # Unchanged records are carried over to the new release, the rest is dropped
+    assert report.stores["cache"] == "3 entries carried over, 4 dropped"
+    cache = DiskCache(stores["cache_path"])
+    # What a server switching to the new release drops: nothing
+    assert cache.invalidate("ChEMBL_34", time.time()) == 0 and len(cache) == 3
+    assert cache.get("molecule/CHEMBL25.sdf", "ChEMBL_34", time.time())[0].value == {"key": "molecule/CHEMBL25.sdf"}
+    assert cache.get("molecule/CHEMBL1002.json", "ChEMBL_34", time.time())[0] is MISSING
+    cache.close()
+
+    names = NameIndex(stores["name_index"])
+    assert names.release == "ChEMBL_34"
+    assert [m.chembl_id for m in names.search("molecule", "novelamide")] == ["CHEMBL1002"]
+    assert [m.chembl_id for m in names.search("molecule", "compound three")] == ["CHEMBL1003"]
+    assert [m.chembl_id for m in names.search("molecule", "newcompound")] == ["CHEMBL2000"]
+    assert "CHEMBL1002" not in [m.chembl_id for m in names.search("molecule", "compound 2")]
+    assert [m.chembl_id for m in names.search("molecule", "compound 3")][:1] == ["CHEMBL1003"]
+
+    # The incrementally updated target index matches a full build of the new release
+    updated = get_target_index()
+    assert updated is not served and updated.release == "ChEMBL_34"
+    build_index(new, str(tmp_path / "rebuilt"))
+    rebuilt = TargetIndex(str(tmp_path / "rebuilt"))
+    assert len(updated) == len(rebuilt)
+    for molecule in ("CHEMBL25", "CHEMBL1001"):
+        assert updated.molecule_targets(molecule) == rebuilt.molecule_targets(molecule)
+    for target in range(200, 212):
+        assert updated.target_molecules(f"CHEMBL{target}") == rebuilt.target_molecules(f"CHEMBL{target}")
+    assert len(served.molecule_targets("CHEMBL25")) == 12
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".tmp")] == []
+
+
+def test_interrupted_sync_is_run_again(releases, stores, tmp_path, monkeypatch):
+    old, new = releases
+    sync(old, **stores)
+
+    def fail(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(sync_module, "sync_target_index", fail)
+    with pytest.raises(OSError, match="disk full"):
+        sync(new, **stores)
+    assert state_release(stores["state"]) == "ChEMBL_33"
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".tmp")] == []
+
+    monkeypatch.undo()
+    report = sync(new, **stores)
+    assert report.delta.molecules == {"CHEMBL25", "CHEMBL1001"}
+    assert TargetIndex(stores["target_index"]).release == "ChEMBL_34"
+
+
+def test_status_compares_the_served_release(chembl_stub, releases, stores):
+    assert asyncio.run(check_release(stores["state"])) == ("ChEMBL_33", None)
+    with pytest.raises(SystemExit) as exit_info:
+        main(["status", "--state", stores["state"]])
+    assert exit_info.value.code == 1
+
+    sync(releases[0], stores["state"], None, None, None)
+    assert asyncio.run(check_release(stores["state"])) == ("ChEMBL_33", "ChEMBL_33")
+    main(["status", "--state", stores["state"]])
@@ -0,0 +1,168 @@
+"""
+Tests for the precomputed molecule/target summary index.
+"""
+
+import asyncio
+import os
+import sqlite3
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from conftest import ACTIVITIES, build_fixture_db
+from mcp_server import get_molecule_targets, get_target_molecules, targets
+from mcp_server.utils import configure_cache, get_cache
+from mcp_server.utils.target_index import (
+    TargetIndex,
+    build_index,
+    configure_target_index,
+    get_target_index,
+    refresh_index,
+)
+
+
+@pytest.fixture
+def fixture_db(tmp_path):
+    path = str(tmp_path / "chembl.db")
+    build_fixture_db(path)
+    return path
+
+
+@pytest.fixture
+def target_index(fixture_db, tmp_path):
+    path = str(tmp_path / "targets")
+    build_index(fixture_db, path)
+    index = configure_target_index(path)
+    try:
+        yield index
+    finally:
+        configure_target_index()
+
+
+def test_summaries_match_activities(target_index):
+    """Counts and best pChEMBL per pair agree with the raw activities."""
+    expected = {}
+    for act in ACTIVITIES:
+        count, best = expected.get(act["target_chembl_id"], (0, None))
+        pchembl = float(act["pchembl_value"])
+        expected[act["target_chembl_id"]] = (count + 1, pchembl if best is None else max(best, pchembl))
+
+    ranked = target_index.molecule_targets("CHEMBL25")
+    assert {target: (info["count"], info["best_pchembl"]) for target, info in ranked} == expected
+    assert ranked[0][1]["name"] == "Target 0" and ranked[0][1]["total"] == 12
+    assert ranked[0][1]["best_activity"] == "IC50 = 10.0 nM"
+
+    molecules = target_index.target_molecules("CHEMBL200")
+    assert molecules == [("CHEMBL25", {**molecules[0][1], "count": 10, "best_pchembl": 8.0})]
+    assert target_index.molecule_targets("CHEMBL1000") is None
+    assert target_index.target_molecules("CHEMBL999") is None
+    assert target_index.molecule_targets("aspirin") is None
+    assert target_index.meta["release"] == "ChEMBL_33"
+
+
+@pytest.mark.asyncio
+async def test_tools_match_the_activity_scan(chembl_stub, fixture_db, tmp_path):
+    """The indexed answers are the ones the tools fold from the activities, without any scan."""
+    scanned = [await get_molecule_targets("CHEMBL25", limit=20, aggregate=True),
+               await get_target_molecules("CHEMBL200", limit=5)]
+    assert chembl_stub.count("/activity") > 0
+
+    build_index(fixture_db, str(tmp_path / "targets"))
+    configure_target_index(str(tmp_path / "targets"))
+    try:
+        before = chembl_stub.count("/activity")
+        indexed = [await get_molecule_targets("CHEMBL25", limit=20, aggregate=True),
+                   await get_target_molecules("CHEMBL200", limit=5)]
+        assert indexed == scanned
+        assert chembl_stub.count("/activity") == before
+
+        # The default mode pages through the same ranking
+        first = await get_molecule_targets("CHEMBL25", limit=5)
+        assert first.count("ChEMBL ID:") == 5 and "Activity: IC50 = 10.0 nM" in first
+        assert chembl_stub.count("/activity") == before
+    finally:
+        configure_target_index()
+
+
+@pytest.mark.asyncio
+async def test_unindexed_molecule_falls_back_to_scan(chembl_stub, target_index):
+    result = await get_molecule_targets("CHEMBL1000")
+    assert "No target information found" in result
+    assert chembl_stub.count("/activity") == 1
+
+
+@pytest.mark.asyncio
+async def test_target_scan_is_capped(chembl_stub, monkeypatch):
+    """Without an index, a target's molecules are ranked on a bounded prefix of its activities."""
+    full = await get_target_molecules("CHEMBL200", limit=20)
+    assert "Note:" not in full
+
+    configure_cache(path=None)
+    monkeypatch.setattr(targets, "TARGET_SCAN_MAX_ACTIVITIES", 4)
+    capped = await get_target_molecules("CHEMBL200", limit=20)
+    assert "Note: only the first 4 activities of this target were scanned" in capped
+    assert "Activities: 10" in full and "Activities: 4" in capped
+    assert not [key for key in get_cache().memory._entries if key.startswith("activity.json")]
+
+
+@pytest.mark.asyncio
+async def test_target_ranking_is_cached_and_coalesced(chembl_stub):
+    """Concurrent and repeated calls for a target share one scan, whose pages stay out of the cache."""
+    chembl_stub.delay = 0.05
+    results = await asyncio.gather(*[get_target_molecules("CHEMBL200", limit=5) for _ in range(5)])
+    results.append(await get_target_molecules("CHEMBL200", limit=5))
+    assert len(set(results)) == 1 and "ChEMBL ID: CHEMBL25" in results[0]
+    assert chembl_stub.count("/activity.json") == 1
+    keys = list(get_cache().memory._entries)
+    assert "target_molecules/CHEMBL200.json" in keys
+    assert not [key for key in keys if key.startswith("activity.json")]
+
+
+def test_lookup_latency(target_index):
+    """A lookup answers in microseconds (well below a millisecond)."""
+    start = time.perf_counter()
+    for _ in range(1000):
+        target_index.molecule_targets("CHEMBL25")
+        target_index.target_molecules("CHEMBL205")
+    per_lookup = (time.perf_counter() - start) / 2000
+    print(f"\nlookup: {per_lookup * 1e6:.1f} us")
+    assert per_lookup < 1e-3
+
+
+def test_refresh_swaps_on_new_release(fixture_db, tmp_path):
+    """A refresh only rebuilds for a new release, and the served index follows the symlink."""
+    link = str(tmp_path / "targets")
+    assert refresh_index(fixture_db, link) == 12
+    assert os.path.islink(link)
+    configure_target_index(link)
+    try:
+        old = get_target_index()
+        assert refresh_index(fixture_db, link) is None
+        assert get_target_index() is old
+
+        conn = sqlite3.connect(fixture_db)
+        conn.execute("UPDATE version SET name = 'ChEMBL_34'")
+        conn.execute("DELETE FROM activities WHERE activity_id % 12 = 0")
+        conn.commit()
+        conn.close()
+
+        assert refresh_index(fixture_db, link) == 11
+        new = get_target_index()
+        assert new is not old and new.release == "ChEMBL_34"
+        assert len(new.molecule_targets("CHEMBL25")) == 11
+        assert sorted(os.listdir(tmp_path)) == ["chembl.db", "targets", "targets.ChEMBL_34"]
+        # Lookups on the previous index keep working from its mapped files
+        assert len(old.molecule_targets("CHEMBL25")) == 12
+    finally:
+        configure_target_index()
+
+
+def test_refresh_adopts_built_directory(fixture_db, tmp_path):
+    path = str(tmp_path / "targets")
+    build_index(fixture_db, path)
+    assert refresh_index(fixture_db, path) is None
+    assert refresh_index(fixture_db, path, force=True) == 12
+    assert os.path.islink(path) and TargetIndex(path).release == "ChEMBL_33"
+    assert sorted(os.listdir(tmp_path)) == ["chembl.db", "targets", "targets.ChEMBL_33"]
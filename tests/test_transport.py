@@ -0,0 +1,84 @@
+"""
+Tests for the pooled transport: keep-alive, retries, backoff and circuit breaker.
+"""
+
+import time
+
+import pytest
+
+from mcp_server import get_molecule_details
+from mcp_server.utils import CircuitBreaker, CircuitOpenError, configure_transport, molecule_client
+from mcp_server.utils.transport import parse_retry_after
+
+MOLECULE_PATH = "/molecule/CHEMBL25.json"
+
+
+@pytest.mark.asyncio
+async def test_connections_are_reused(chembl_stub):
+    """Sequential requests share pooled keep-alive connections."""
+    for i in range(10):
+        await molecule_client.get(f"CHEMBL{1000 + i}")
+    assert chembl_stub.connections == 1
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried(chembl_stub):
+    """429/503 answers are retried until the request succeeds."""
+    chembl_stub.fail_next(MOLECULE_PATH, 503)
+    chembl_stub.fail_next(MOLECULE_PATH, 429)
+
+    assert "ASPIRIN" in await get_molecule_details("CHEMBL25")
+    assert chembl_stub.count(MOLECULE_PATH) == 3
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_honored(chembl_stub):
+    """The delay before a retry is at least the server's Retry-After."""
+    chembl_stub.fail_next(MOLECULE_PATH, 429, headers={"Retry-After": "0.3"})
+
+    start = time.perf_counter()
+    assert "ASPIRIN" in await get_molecule_details("CHEMBL25")
+    assert time.perf_counter() - start >= 0.3
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried(chembl_stub):
+    """Non-transient errors surface immediately."""
+    chembl_stub.fail_next(MOLECULE_PATH, 400)
+
+    assert "HTTP 400" in await get_molecule_details("CHEMBL25")
+    assert chembl_stub.count(MOLECULE_PATH) == 1
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker(chembl_stub):
+    """Repeated failures open the circuit; a successful trial closes it again."""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.2)
+    configure_transport(chembl_stub.base_url, max_retries=1, backoff_base=0.01, breaker=breaker)
+    chembl_stub.fail_next(MOLECULE_PATH, 503, times=4)
+
+    for _ in range(2):
+        assert "HTTP 503" in await get_molecule_details("CHEMBL25")
+    assert breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        await molecule_client.get("CHEMBL25")
+    assert chembl_stub.count(MOLECULE_PATH) == 4
+
+    time.sleep(0.25)
+    assert breaker.state == "half-open"
+    assert "ASPIRIN" in await get_molecule_details("CHEMBL25")
+    assert breaker.state == "closed"
+
+
+def test_backoff_and_retry_after_parsing():
+    """Backoff grows exponentially with jitter and never undercuts Retry-After."""
+    transport = configure_transport(backoff_base=1.0)
+    for attempt in range(4):
+        assert 0 <= transport.backoff(attempt) <= 2 ** attempt
+    assert transport.backoff(0, retry_after=5) >= 5
+
+    assert parse_retry_after("2") == 2.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+    configure_transport()
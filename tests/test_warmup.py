@@ -0,0 +1,97 @@
+"""
+Tests for the startup cache warm-up.
+"""
+
+import asyncio
+import json
+
+import pytest
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from mcp_server import get_molecule_details, get_target_details, mcp, server_stats
+from mcp_server.__main__ import parse_args
+from mcp_server.utils import get_backend, get_warmup
+from mcp_server.utils.warmup import configure_warmup, manifest_from_log, parse_manifest, warm_up
+
+HTTPX_LOG = """\
+INFO HTTP Request: GET https://www.ebi.ac.uk/chembl/api/data/molecule/CHEMBL25.json "HTTP/1.1 200 OK"
+INFO HTTP Request: GET https://www.ebi.ac.uk/chembl/api/data/molecule/CHEMBL25.json "HTTP/1.1 200 OK"
+INFO HTTP Request: GET https://www.ebi.ac.uk/chembl/api/data/target/CHEMBL230.json "HTTP/1.1 200 OK"
+INFO HTTP Request: GET https://www.ebi.ac.uk/chembl/api/data/molecule.json?molecule_chembl_id__in=CHEMBL1001%2Cchembl25&limit=2 "HTTP/1.1 200 OK"
+INFO HTTP Request: GET https://www.ebi.ac.uk/chembl/api/data/activity.json?molecule_chembl_id=CHEMBL1002&offset=0 "HTTP/1.1 200 OK"
+"""
+
+
+@pytest.fixture(autouse=True)
+def reset_warmup():
+    yield
+    configure_warmup(None, None)
+
+
+def test_parse_manifest():
+    assert parse_manifest('{"molecule": ["chembl25", "CHEMBL25", "CHEMBL1001"], "target": ["CHEMBL230"]}') == {
+        "molecule": ["CHEMBL25", "CHEMBL1001"], "target": ["CHEMBL230"]}
+    assert parse_manifest("# hot IDs\nmolecule CHEMBL25\n\ntarget, CHEMBL230  # COX-2\n") == {
+        "molecule": ["CHEMBL25"], "target": ["CHEMBL230"]}
+    with pytest.raises(ValueError, match="Unknown warm-up resource 'activity'"):
+        parse_manifest("activity 5000")
+    with pytest.raises(ValueError, match="line 1"):
+        parse_manifest("CHEMBL25")
+
+
+def test_manifest_from_log_ranks_by_frequency():
+    manifest = manifest_from_log(HTTPX_LOG.splitlines())
+    assert manifest == {"molecule": ["CHEMBL25", "CHEMBL1001", "CHEMBL1002"], "target": ["CHEMBL230"]}
+    assert manifest_from_log(HTTPX_LOG.splitlines(), top=1)["molecule"] == ["CHEMBL25"]
+
+
+def test_cli_options():
+    args = parse_args(["--warmup-manifest", "hot.json", "--warmup-log", "access.log"])
+    assert (args.warmup_manifest, args.warmup_log) == ("hot.json", "access.log")
+
+
+@pytest.mark.asyncio
+async def test_warm_up_fills_the_cache(chembl_stub):
+    await get_backend().release()
+    manifest = {"molecule": ["CHEMBL25", "CHEMBL1001", "CHEMBL1002", "CHEMBL9999"], "target": ["CHEMBL230"]}
+    report = await warm_up(manifest, concurrency=1, chunk_size=2)
+    assert chembl_stub.count("/molecule.json") == 2 and chembl_stub.count("/target.json") == 1
+    assert report.total("loaded") == 4 and report.counts["molecule"]["missing"] == 1
+
+    requests = len(chembl_stub.requests)
+    assert "ASPIRIN" in await get_molecule_details("CHEMBL25")
+    assert "COMPOUND 1" in await get_molecule_details("CHEMBL1001")
+    assert "CHEMBL230" in await get_target_details("CHEMBL230")
+    assert len(chembl_stub.requests) == requests
+
+    # Cached records, and IDs already known to be missing, are not fetched again
+    await warm_up(manifest)
+    assert len(chembl_stub.requests) == requests
+
+
+@pytest.mark.asyncio
+async def test_startup_does_not_wait_for_warm_up(chembl_stub, tmp_path):
+    manifest = tmp_path / "hot.json"
+    manifest.write_text(json.dumps({"molecule": ["CHEMBL25", "CHEMBL1001"]}))
+    log = tmp_path / "access.log"
+    log.write_text(HTTPX_LOG)
+    warmup = configure_warmup(str(manifest), str(log))
+    await get_backend().release()
+    chembl_stub.delay = 0.3
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    async with create_connected_server_and_client_session(mcp._mcp_server) as session:
+        assert loop.time() - start < 0.3
+        assert warmup.running and get_warmup().status() == "Running"
+        await session.list_tools()
+        report = await warmup.start()
+    assert report.counts["molecule"]["loaded"] == 3 and report.counts["target"]["loaded"] == 1
+    assert "Warm-up:\n4 of 4 records loaded" in await server_stats()
+
+
+@pytest.mark.asyncio
+async def test_failed_warm_up_is_reported(chembl_stub, tmp_path):
+    warmup = configure_warmup(str(tmp_path / "missing.json"))
+    report = await warmup.run()
+    assert report.error and "missing.json" in warmup.status()